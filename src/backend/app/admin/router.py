@@ -1,14 +1,17 @@
-from typing import List
+from datetime import datetime
+from typing import List, Optional
 
-from fastapi import APIRouter
+from fastapi import APIRouter, Query
 from fastapi.params import Depends
 
 from app.admin.dependencies import get_admin_service
-from app.admin.schemas import UserSchema
+from app.admin.schemas import (DeletedUserSchema, JobStatus,
+                               UserDirectoryEntry, UserDirectoryFilter,
+                               UserDirectorySort, UserSchema)
 from app.admin.service import AdminService
 from app.auth.dependencies import get_current_admin_id
 from app.auth.schemas import UserRole
-from app.core.schemas import BaseReturn
+from app.core.schemas import BaseReturn, CursorPage
 from app.i18n import _
 
 router = APIRouter(
@@ -32,6 +35,47 @@ async def get_users(
     return BaseReturn(message=_("Users retrieved successfully"), data=users)
 
 
+@router.get(
+    "/users/directory",
+    response_model=BaseReturn[CursorPage[UserDirectoryEntry]],
+)
+async def get_user_directory(
+    role: Optional[UserRole] = None,
+    is_verified: Optional[bool] = None,
+    created_from: Optional[datetime] = Query(
+        None, description="Only users created at or after this date"
+    ),
+    created_to: Optional[datetime] = Query(
+        None, description="Only users created at or before this date"
+    ),
+    search: Optional[str] = Query(
+        None,
+        max_length=100,
+        description="Case-insensitive prefix of the email, first, last or full name",
+    ),
+    sort: UserDirectorySort = UserDirectorySort.CREATED_AT_DESC,
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    limit: int = Query(25, ge=1, le=100),
+    admin_id: str = Depends(get_current_admin_id),
+    admin_service: AdminService = Depends(get_admin_service),
+):
+    """
+    Get a page of the user directory, with the total number of matching users
+    """
+    filters = UserDirectoryFilter(
+        role=role,
+        is_verified=is_verified,
+        created_from=created_from,
+        created_to=created_to,
+        search=search,
+        sort=sort,
+        cursor=cursor,
+        limit=limit,
+    )
+    page = await admin_service.get_user_directory(admin_id, filters)
+    return BaseReturn(message=_("Users retrieved successfully"), data=page)
+
+
 @router.post(
     "/users/change-role",
     response_model=BaseReturn[UserSchema],
@@ -51,7 +95,7 @@ async def change_user_role(
 
 @router.delete(
     "/users/{user_id}",
-    response_model=BaseReturn[UserSchema],
+    response_model=BaseReturn[DeletedUserSchema],
     response_model_exclude_none=True,
 )
 async def delete_user(
@@ -59,7 +103,8 @@ async def delete_user(
     admin_service: AdminService = Depends(get_admin_service),
 ):
     """
-    Delete user
+    Delete user. Their exam data is deleted by a background job, whose
+    progress can be followed with the returned cleanup_job_id.
     """
     user = await admin_service.delete_user(user_id)
     return BaseReturn(message=_("User deleted successfully"), data=user)
@@ -79,3 +124,19 @@ async def change_verification(
     """
     user = await admin_service.change_verify(user_id)
     return BaseReturn(message=_("User verified successfully"), data=user)
+
+
+@router.get(
+    "/jobs/{job_id}",
+    response_model=BaseReturn[JobStatus],
+    response_model_exclude_none=True,
+)
+async def get_job_status(
+    job_id: str,
+    admin_service: AdminService = Depends(get_admin_service),
+):
+    """
+    Get the state and progress of a background job
+    """
+    status = await admin_service.get_job_status(job_id)
+    return BaseReturn(message=_("Job status retrieved successfully"), data=status)
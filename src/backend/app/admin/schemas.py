@@ -1,13 +1,70 @@
-from typing import Any
+from datetime import datetime
+from enum import Enum
+from typing import Any, Optional
 
-from pydantic import ConfigDict, Field
+from pydantic import BaseModel, ConfigDict, Field
 
 from app.auth.models import User
+from app.auth.schemas import UserRole
 
 
 class UserSchema(User):
     id: Any = Field(..., alias="_id", serialization_alias="id")
     hashed_password: Any = Field(exclude=True)
-    notifications_tasks_id: Any = Field(exclude=True)
+    search_keys: Any = Field(exclude=True)
 
     model_config = ConfigDict(from_attributes=True)
+
+
+class DeletedUserSchema(UserSchema):
+    # Background job deleting the exam data of the user
+    cleanup_job_id: Optional[str] = None
+
+
+class JobProgress(BaseModel):
+    step: str
+    done: int
+    total: int
+
+
+class JobStatus(BaseModel):
+    """State of a background job, as reported by the Celery result backend"""
+
+    id: str
+    state: str
+    progress: Optional[JobProgress] = None
+    result: Optional[Any] = None
+    error: Optional[str] = None
+
+
+class UserDirectoryEntry(BaseModel):
+    """User of the admin directory, read with a projection of these fields only"""
+
+    id: str = Field(..., alias="_id", serialization_alias="id")
+    email: str
+    first_name: Optional[str] = None
+    last_name: Optional[str] = None
+    role: UserRole
+    is_verified: bool = False
+    receive_notifications: bool = True
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+
+class UserDirectorySort(str, Enum):
+    CREATED_AT_DESC = "-created_at"
+    CREATED_AT = "created_at"
+    EMAIL = "email"
+    EMAIL_DESC = "-email"
+
+
+class UserDirectoryFilter(BaseModel):
+    role: Optional[UserRole] = None
+    is_verified: Optional[bool] = None
+    created_from: Optional[datetime] = None
+    created_to: Optional[datetime] = None
+    # Case-insensitive prefix of the email, first name, last name or full name
+    search: Optional[str] = None
+    sort: UserDirectorySort = UserDirectorySort.CREATED_AT_DESC
+    cursor: Optional[str] = None
+    limit: int = Field(25, ge=1, le=100)
@@ -1,9 +1,20 @@
+import asyncio
 from typing import List
 
-from app.admin.schemas import UserSchema
-from app.auth.repository import UserRepository
+from celery.result import AsyncResult
+from fastapi.concurrency import run_in_threadpool
+
+from app.admin.schemas import (DeletedUserSchema, JobProgress, JobStatus,
+                               UserDirectoryEntry, UserDirectoryFilter,
+                               UserSchema)
+from app.auth.repository import UserRepository, search_keys_filter
+from app.auth.revocation import revocation_list
 from app.auth.schemas import UserRole
+from app.celery.tasks.cleanup_tasks.tasks import delete_user_data
+from app.celery.worker import celery
 from app.core.exceptions import NotFoundError
+from app.core.pagination import SortKey
+from app.core.schemas import CursorPage
 from app.i18n import _
 
 
@@ -12,10 +23,37 @@ class AdminService:
         self.user_repository = user_repository
 
     async def get_all_users(self, admin_id) -> List[UserSchema]:
-        users = await self.user_repository.get_all()
-        return [
-            UserSchema.model_validate(user) for user in users if user.id != admin_id
-        ]
+        users = await self.user_repository.get_all({"_id": {"$ne": admin_id}})
+        return [UserSchema.model_validate(user) for user in users]
+
+    async def get_user_directory(
+        self, admin_id: str, filters: UserDirectoryFilter
+    ) -> CursorPage[UserDirectoryEntry]:
+        query = {"_id": {"$ne": admin_id}}
+        if filters.role is not None:
+            query["role"] = filters.role
+        if filters.is_verified is not None:
+            query["is_verified"] = filters.is_verified
+        if filters.created_from or filters.created_to:
+            query["created_at"] = {}
+            if filters.created_from:
+                query["created_at"]["$gte"] = filters.created_from
+            if filters.created_to:
+                query["created_at"]["$lte"] = filters.created_to
+        if filters.search and filters.search.strip():
+            query.update(search_keys_filter(filters.search))
+
+        (items, next_cursor), total = await asyncio.gather(
+            self.user_repository.get_page(
+                query,
+                SortKey.parse(filters.sort.value),
+                cursor=filters.cursor,
+                limit=filters.limit,
+                projection_model=UserDirectoryEntry,
+            ),
+            self.user_repository.count(query),
+        )
+        return CursorPage(items=items, total=total, next_cursor=next_cursor)
 
     async def change_user_role(self, user_id: str, role: UserRole) -> UserSchema:
         user = await self.user_repository.get_by_id(user_id)
@@ -23,14 +61,35 @@ class AdminService:
             raise NotFoundError(_("User not found"))
         user.role = role
         await self.user_repository.save(user)
+        # Tokens carry the role, so the user has to log in again
+        await revocation_list.revoke_user(user.id)
         return UserSchema.model_validate(user)
 
-    async def delete_user(self, user_id: str) -> UserSchema:
+    async def delete_user(self, user_id: str) -> DeletedUserSchema:
         user = await self.user_repository.get_by_id(user_id)
         if not user:
             raise NotFoundError(_("User not found"))
+        # The exam data of the user can be large, it is deleted in the background.
+        # Queued first: if the broker is down the user is kept, and the deletion
+        # can be retried, rather than leaving their data with no job to delete it
+        job = delete_user_data.delay(user_id=user.id, role=user.role.value)
         await self.user_repository.delete(user_id)
-        return UserSchema.model_validate(user)
+        deleted = DeletedUserSchema.model_validate(user)
+        deleted.cleanup_job_id = job.id
+        return deleted
+
+    async def get_job_status(self, job_id: str) -> JobStatus:
+        result = AsyncResult(job_id, app=celery)
+        # Reading the state is a blocking call to the result backend
+        state, info = await run_in_threadpool(lambda: (result.state, result.info))
+        status = JobStatus(id=job_id, state=state)
+        if state == "PROGRESS" and isinstance(info, dict):
+            status.progress = JobProgress(**info)
+        elif state == "SUCCESS":
+            status.result = info
+        elif state == "FAILURE":
+            status.error = str(info)
+        return status
 
     async def change_verify(self, user_id: str) -> UserSchema:
         user = await self.user_repository.get_by_id(user_id)
@@ -1,8 +1,11 @@
+from typing import Optional
+
 from fastapi import Depends
 
 from app.auth.infrastructure import CookieTokenAuth
 from app.auth.models import User, UserRole
 from app.auth.repository import UserRepository
+from app.auth.revocation import revocation_list
 from app.auth.security import decode_token
 from app.auth.service import AuthService
 from app.core.exceptions import AuthenticationError, ForbiddenError
@@ -27,6 +30,11 @@ cookie_token_auth = CookieTokenAuth(
     cookie_name="access_token",
     description="HTTP-only cookie or Bearer token authentication",
 )
+optional_cookie_token_auth = CookieTokenAuth(
+    token_url="/auth/login",
+    cookie_name="access_token",
+    auto_error=False,
+)
 
 
 async def get_auth_token(
@@ -41,11 +49,19 @@ async def get_auth_token(
 async def get_decode_token(token: str = Depends(get_auth_token)) -> dict:
     """Decode the authentication token"""
     token_data = decode_token(token)
-    if not token_data:
+    # Checked against the in-memory mirror of the revocation list
+    if not token_data or revocation_list.is_revoked(token_data):
         raise AuthenticationError(_("Invalid token"))
     return token_data
 
 
+async def get_optional_token_data(
+    token: Optional[str] = Depends(optional_cookie_token_auth),
+) -> Optional[dict]:
+    """Decode the authentication token of the request, if any"""
+    return decode_token(token) if token else None
+
+
 # Token validation dependencies
 async def get_current_user_id(
     token_data: dict = Depends(get_decode_token),
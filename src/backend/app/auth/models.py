@@ -1,13 +1,24 @@
 import uuid
-from typing import Dict, List, Optional
+from typing import List, Optional
 
-from beanie import Delete, Document, Indexed, before_event
+from beanie import (Document, Indexed, Insert, Replace, Save, SaveChanges,
+                    before_event)
 from pydantic import ConfigDict, EmailStr, Field
+from pymongo import IndexModel
 
 from app.auth.schemas import UserRole
 from app.database.mixins import TimestampMixin
 
 
+def user_search_keys(
+    email: str, first_name: Optional[str], last_name: Optional[str]
+) -> List[str]:
+    """Lowercased values a user can be found by with a prefix search"""
+    full_name = " ".join(name for name in (first_name, last_name) if name)
+    keys = (email, first_name, last_name, full_name)
+    return list(dict.fromkeys(key.strip().lower() for key in keys if key))
+
+
 class User(Document, TimestampMixin):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     email: Indexed(EmailStr, unique=True)
@@ -17,18 +28,23 @@ class User(Document, TimestampMixin):
     is_verified: bool = False
     role: UserRole = UserRole.STUDENT
     receive_notifications: bool = True
-    notifications_tasks_id: Dict[str, List[str]] = Field(default_factory=dict)
-
-    @before_event(Delete)
-    async def before_delete(self):
-        """Trigger cascade deletion of related exam data when a user is deleted"""
-        from app.exam.models import cascade_delete_user
+    # Kept in sync with the email and names for the admin user directory
+    search_keys: List[str] = Field(default_factory=list)
 
-        await cascade_delete_user(self.id, self.role)
+    @before_event(Insert, Replace, Save, SaveChanges)
+    def set_search_keys(self):
+        self.search_keys = user_search_keys(self.email, self.first_name, self.last_name)
 
     class Settings:
         name = "users"
         use_state_management = True
+        indexes = [
+            "role",
+            "created_at",
+            "search_keys",
+            # Typeahead lookups of the users of a role
+            IndexModel([("role", 1), ("search_keys", 1)]),
+        ]
 
     model_config = ConfigDict(
         json_schema_extra={
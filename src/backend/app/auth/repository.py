@@ -1,9 +1,23 @@
-from typing import List, Optional
+import re
+from typing import Any, Dict, List, Optional, Set, Type
 
-from app.auth.models import User
+from pydantic import BaseModel
+from pymongo import UpdateOne
+
+from app.auth.models import User, user_search_keys
 from app.auth.schemas import UserRole
 from app.core.repository.base_repository import BaseRepository
 
+SEARCH_KEY_FIELDS = {"email", "first_name", "last_name"}
+
+
+def search_keys_filter(prefix: str) -> Dict[str, Any]:
+    """
+    Match the users whose email or name starts with a prefix, ignoring case.
+    The regex is anchored and the keys are lowercased, so the index is used.
+    """
+    return {"search_keys": {"$regex": f"^{re.escape(prefix.strip().lower())}"}}
+
 
 class UserRepository(BaseRepository[User]):
     """Repository for User model operations"""
@@ -15,3 +29,92 @@ class UserRepository(BaseRepository[User]):
     async def get_all_by_role(self, role: UserRole) -> Optional[List[User]]:
         """Get a user by role"""
         return await self.model_class.find(self.model_class.role == role).to_list()
+
+    async def search(
+        self,
+        prefix: str,
+        *,
+        role: Optional[UserRole] = None,
+        limit: int = 10,
+        projection_model: Optional[Type[BaseModel]] = None,
+    ) -> List[Any]:
+        """Get the first users, by email, whose email or name starts with a prefix"""
+        query = search_keys_filter(prefix)
+        if role is not None:
+            query["role"] = role
+        find = self.model_class.find(query).sort("email").limit(limit)
+        if projection_model is not None:
+            find = find.project(projection_model)
+        return await find.to_list()
+
+    async def get_by_ids_or_emails(
+        self,
+        ids: List[str],
+        emails: List[str],
+        *,
+        role: Optional[UserRole] = None,
+        projection_model: Optional[Type[BaseModel]] = None,
+    ) -> List[Any]:
+        """Get the users having one of the ids or one of the emails (ignoring case)"""
+        # The lowercased email is one of the indexed search keys, but so are
+        # the names, which may look like the email of someone else
+        emails = [email.strip().lower() for email in emails if "@" in email]
+        query = {
+            "$or": [
+                {"_id": {"$in": ids}},
+                {
+                    "search_keys": {"$in": emails},
+                    "$expr": {"$in": [{"$toLower": "$email"}, emails]},
+                },
+            ]
+        }
+        if role is not None:
+            query["role"] = role
+        find = self.model_class.find(query)
+        if projection_model is not None:
+            find = find.project(projection_model)
+        return await find.to_list()
+
+    async def get_existing_ids(
+        self, ids: List[str], *, role: Optional[UserRole] = None
+    ) -> Set[str]:
+        """The ids, among `ids`, of existing users"""
+        query: Dict[str, Any] = {"_id": {"$in": ids}}
+        if role is not None:
+            query["role"] = role
+        return set(await self.model_class.distinct("_id", query))
+
+    async def update(self, entity_id: str, data: Dict[str, Any]) -> Optional[User]:
+        """Update a user, keeping the search keys in sync with the names"""
+        if SEARCH_KEY_FIELDS & data.keys():
+            user = await self.get_by_id(entity_id)
+            if not user:
+                return None
+            values = {field: getattr(user, field) for field in SEARCH_KEY_FIELDS}
+            values.update((key, data[key]) for key in SEARCH_KEY_FIELDS & data.keys())
+            data["search_keys"] = user_search_keys(**values)
+        return await super().update(entity_id, data)
+
+    async def backfill_search_keys(self) -> int:
+        """Set the search keys of the users created before they existed"""
+        collection = self.model_class.get_motor_collection()
+        cursor = collection.find(
+            {"search_keys": {"$exists": False}},
+            {"email": 1, "first_name": 1, "last_name": 1},
+        )
+        operations = [
+            UpdateOne(
+                {"_id": user["_id"]},
+                {
+                    "$set": {
+                        "search_keys": user_search_keys(
+                            user["email"], user.get("first_name"), user.get("last_name")
+                        )
+                    }
+                },
+            )
+            async for user in cursor
+        ]
+        if operations:
+            await collection.bulk_write(operations, ordered=False)
+        return len(operations)
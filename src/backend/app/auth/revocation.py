@@ -0,0 +1,161 @@
+import asyncio
+import json
+import logging
+import time
+from typing import Dict, Optional
+
+from redis.exceptions import RedisError
+
+from app.database.redis import get_redis_client, get_shared_redis_client
+from app.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# Redis hash of user id -> time before which their tokens are invalid
+NOT_BEFORE_KEY = "auth:not-before"
+# Redis sorted set of revoked token ids, scored by the token expiration time
+REVOKED_TOKENS_KEY = "auth:revoked-tokens"
+# Every revocation is also published here for the other API nodes
+CHANNEL = "auth:revocations"
+
+RECONNECT_DELAY = 5
+PRUNE_INTERVAL = 60
+
+
+class RevocationList:
+    """
+    Access tokens revoked before they expire.
+
+    Two kinds of entries are kept in Redis:
+        - a "not before" time per user, invalidating every token issued to
+          the user before it (role change, password reset)
+        - single token ids (logout)
+
+    Each API process mirrors them in memory: it loads them when it starts,
+    then follows the revocations published by the other processes. Checking
+    a token is a dictionary lookup, with no round trip to Redis.
+    """
+
+    def __init__(self):
+        self._not_before: Dict[str, float] = {}
+        self._revoked: Dict[str, float] = {}
+        self._pruned_at = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    def is_revoked(self, token_data: dict) -> bool:
+        if token_data.get("jti") in self._revoked:
+            return True
+        not_before = self._not_before.get(token_data.get("sub"))
+        return not_before is not None and token_data.get("iat", 0) < not_before
+
+    def apply(self, event: dict) -> None:
+        """Record a revocation event, from this process or a published one"""
+        if event["type"] == "user":
+            not_before = max(event["at"], self._not_before.get(event["id"], 0))
+            self._not_before[event["id"]] = not_before
+        elif event["type"] == "token":
+            self._revoked[event["id"]] = event["exp"]
+        self._prune()
+
+    def _prune(self) -> None:
+        """Forget entries that only concern tokens which have expired anyway"""
+        now = time.time()
+        if now - self._pruned_at < PRUNE_INTERVAL:
+            return
+        self._pruned_at = now
+        oldest_valid_token = now - settings.ACCESS_TOKEN_EXPIRE_SECONDS
+        self._not_before = {
+            user_id: at
+            for user_id, at in self._not_before.items()
+            if at > oldest_valid_token
+        }
+        self._revoked = {jti: exp for jti, exp in self._revoked.items() if exp > now}
+
+    async def load(self, client) -> None:
+        """Replace the local mirror with the entries stored in Redis"""
+        now = time.time()
+        await client.zremrangebyscore(REVOKED_TOKENS_KEY, "-inf", now)
+        revoked = await client.zrange(REVOKED_TOKENS_KEY, 0, -1, withscores=True)
+        not_before = await client.hgetall(NOT_BEFORE_KEY)
+
+        oldest_valid_token = now - settings.ACCESS_TOKEN_EXPIRE_SECONDS
+        stale = [
+            user_id
+            for user_id, at in not_before.items()
+            if float(at) <= oldest_valid_token
+        ]
+        if stale:
+            await client.hdel(NOT_BEFORE_KEY, *stale)
+
+        self._revoked = dict(revoked)
+        self._not_before = {
+            user_id: float(at)
+            for user_id, at in not_before.items()
+            if float(at) > oldest_valid_token
+        }
+        self._pruned_at = now
+
+    async def revoke_user(self, user_id: str) -> None:
+        """Invalidate every token issued to a user until now"""
+        event = {"type": "user", "id": user_id, "at": time.time()}
+        self.apply(event)
+        pipe = get_shared_redis_client().pipeline(transaction=True)
+        pipe.hset(NOT_BEFORE_KEY, user_id, event["at"])
+        await self._publish(pipe, event)
+
+    async def revoke_token(self, jti: str, expires_at: float) -> None:
+        """Invalidate a single token"""
+        event = {"type": "token", "id": jti, "exp": expires_at}
+        self.apply(event)
+        pipe = get_shared_redis_client().pipeline(transaction=True)
+        pipe.zadd(REVOKED_TOKENS_KEY, {jti: expires_at})
+        await self._publish(pipe, event)
+
+    async def _publish(self, pipe, event: dict) -> None:
+        """Store and publish a revocation in a single transaction"""
+        try:
+            async with pipe:
+                pipe.publish(CHANNEL, json.dumps(event))
+                await pipe.execute()
+        except (RedisError, OSError):
+            # Still enforced by this process, but not by the other ones
+            logger.exception("Could not store the revocation of %s", event["id"])
+
+    async def _follow(self) -> None:
+        while True:
+            # A client of its own: the shared one times out idle connections
+            client = await get_redis_client()
+            try:
+                async with client.pubsub(ignore_subscribe_messages=True) as pubsub:
+                    # Subscribe before loading, so no revocation falls in between
+                    await pubsub.subscribe(CHANNEL)
+                    await self.load(client)
+                    while True:
+                        message = await pubsub.get_message(timeout=PRUNE_INTERVAL)
+                        if message is not None:
+                            self.apply(json.loads(message["data"]))
+                        self._prune()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Lost the revocation list feed, reconnecting")
+                await asyncio.sleep(RECONNECT_DELAY)
+            finally:
+                await client.aclose()
+
+    def start(self) -> None:
+        """Start mirroring the revocations stored in Redis"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._follow())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+revocation_list = RevocationList()
@@ -1,12 +1,34 @@
+from typing import Optional
+
 from fastapi import APIRouter, Depends, Response
 
-from app.auth.dependencies import get_auth_service
+from app.auth.dependencies import get_auth_service, get_optional_token_data
 from app.auth.schemas import (AuthReturn, EmailRequest, Token,
                               UserCreate, UserLogin, UserResetPassword)
 from app.auth.service import AuthService
+from app.core.rate_limit import RateLimit, RateLimiter, body_field
 from app.i18n import _
 
-router = APIRouter(tags=["auth"], prefix="/auth")
+# Anonymous clients are counted per account, so students logging in from
+# the same school network do not share a budget. Logins are counted per
+# account from each address: failed logins from one client cannot lock an
+# account out for everyone, and the bcrypt work spent on an account is bounded.
+# The budgets per client address only stop a client cycling through emails:
+# they stay far above what a school behind one address sends when its classes
+# log in at the start of an exam.
+rate_limiter = RateLimiter(
+    login=(
+        RateLimit(10, 60, key=body_field("email", per_address=True)),
+        RateLimit(600, 60),
+    ),
+    register=(RateLimit(5, 3600, key=body_field("email")), RateLimit(1000, 3600)),
+    send_password_reset_token=(
+        RateLimit(5, 3600, key=body_field("email")),
+        RateLimit(1000, 3600),
+    ),
+)
+
+router = APIRouter(tags=["auth"], prefix="/auth", dependencies=[Depends(rate_limiter)])
 
 
 # Authentication endpoints
@@ -34,10 +56,11 @@ async def login(
 @router.post("/logout", response_model=AuthReturn, response_model_exclude_none=True)
 async def logout(
     response: Response,
+    token_data: Optional[dict] = Depends(get_optional_token_data),
     auth_service: AuthService = Depends(get_auth_service),
 ):
-    """Logout and clear cookies"""
-    await auth_service.logout(response)
+    """Logout, revoking the access token, and clear cookies"""
+    await auth_service.logout(response, token_data)
     return {"message": _("Logout successful")}
 
 
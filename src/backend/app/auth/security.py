@@ -1,3 +1,7 @@
+import asyncio
+import multiprocessing
+import uuid
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta, timezone
 from enum import Enum
 from typing import Any, Dict, Optional
@@ -22,9 +26,9 @@ class TokenType(str, Enum):
     USER_DELETION = "user_deletion"
 
 
-def get_password_hash(password: str) -> str:
+def get_password_hash(password: str, rounds: Optional[int] = None) -> str:
     """Generate a salt and hash the password"""
-    salt = bcrypt.gensalt()
+    salt = bcrypt.gensalt(rounds or settings.BCRYPT_ROUNDS)
     return bcrypt.hashpw(password.encode("utf-8"), salt).decode("utf-8")
 
 
@@ -35,18 +39,75 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     )
 
 
+def password_needs_rehash(hashed_password: str) -> bool:
+    """Check if a hash was made with another work factor than the configured one"""
+    try:
+        return int(hashed_password.split("$")[2]) != settings.BCRYPT_ROUNDS
+    except (IndexError, ValueError):
+        return True
+
+
+# bcrypt is CPU bound for tens of milliseconds per call, so it runs in worker
+# processes instead of blocking the event loop (and every request on it)
+_password_hash_pool: Optional[ProcessPoolExecutor] = None
+
+
+def _get_password_hash_pool() -> ProcessPoolExecutor:
+    global _password_hash_pool
+    if _password_hash_pool is None:
+        _password_hash_pool = ProcessPoolExecutor(
+            max_workers=settings.PASSWORD_HASH_WORKERS,
+            # Forking a process running the event loop and database clients is unsafe
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _password_hash_pool
+
+
+def shutdown_password_hash_pool() -> None:
+    global _password_hash_pool
+    if _password_hash_pool is not None:
+        _password_hash_pool.shutdown(cancel_futures=True)
+        _password_hash_pool = None
+
+
+async def hash_password(password: str) -> str:
+    """Hash a password in the password hashing process pool"""
+    salt = bcrypt.gensalt(settings.BCRYPT_ROUNDS)
+    hashed = await asyncio.get_running_loop().run_in_executor(
+        _get_password_hash_pool(), bcrypt.hashpw, password.encode("utf-8"), salt
+    )
+    return hashed.decode("utf-8")
+
+
+async def check_password(plain_password: str, hashed_password: str) -> bool:
+    """Check a password against its hash in the password hashing process pool"""
+    return await asyncio.get_running_loop().run_in_executor(
+        _get_password_hash_pool(),
+        bcrypt.checkpw,
+        plain_password.encode("utf-8"),
+        hashed_password.encode("utf-8"),
+    )
+
+
 def create_access_token(
     subject: str, role: str, expires_delta: Optional[timedelta] = None
 ) -> str:
     """Create JWT access token for authentication"""
+    now = datetime.now(timezone.utc)
     if expires_delta:
-        expire = datetime.now(timezone.utc) + expires_delta
+        expire = now + expires_delta
     else:
-        expire = datetime.now(timezone.utc) + timedelta(
-            minutes=settings.ACCESS_TOKEN_EXPIRE_SECONDS
-        )
-
-    to_encode = {"exp": expire, "sub": subject, "role": role}
+        expire = now + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_SECONDS)
+
+    # "iat" keeps sub-second precision to compare with revocation times, and
+    # "jti" identifies the token to revoke it alone
+    to_encode = {
+        "exp": expire,
+        "iat": now.timestamp(),
+        "jti": uuid.uuid4().hex,
+        "sub": subject,
+        "role": role,
+    }
     encoded_jwt = jwt.encode(
         to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM
     )
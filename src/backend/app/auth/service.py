@@ -1,15 +1,19 @@
 from datetime import timedelta
+from typing import Optional
 
+from app.auth.models import User
 from app.auth.repository import UserRepository
+from app.auth.revocation import revocation_list
 from app.auth.schemas import UserCreate, UserLogin, UserResponse, UserRole
 from app.auth.security import (
     TokenType,
+    check_password,
     create_access_token,
     create_verification_token,
     decode_verification_token,
     delete_verification_token,
-    get_password_hash,
-    verify_password,
+    hash_password,
+    password_needs_rehash,
 )
 from app.celery.tasks.email_tasks.tasks import (
     user_password_reset_mail,
@@ -23,6 +27,24 @@ from app.settings import settings
 from fastapi import Response
 
 
+def set_access_cookie(response: Response, user: User) -> None:
+    """Open a session for the user with a new access token cookie"""
+    access_token_expires = timedelta(seconds=settings.ACCESS_TOKEN_EXPIRE_SECONDS)
+    access_token = create_access_token(
+        subject=user.id, role=user.role, expires_delta=access_token_expires
+    )
+
+    response.set_cookie(
+        key="access_token",
+        value=access_token,
+        httponly=True,
+        secure=settings.COOKIE_SECURE,
+        samesite="lax",
+        max_age=settings.ACCESS_TOKEN_EXPIRE_SECONDS,
+        domain=settings.DOMAIN,
+    )
+
+
 class AuthService:
     def __init__(self, user_repository: UserRepository):
         self.user_repository = user_repository
@@ -36,7 +58,7 @@ class AuthService:
                 )
             )
 
-        hashed_password = get_password_hash(user_data.password)
+        hashed_password = await hash_password(user_data.password)
         user_dict = {
             "email": user_data.email,
             "hashed_password": hashed_password,
@@ -57,7 +79,7 @@ class AuthService:
         if not user:
             raise AuthenticationError(_("Invalid username or password"))
 
-        if not verify_password(login_data.password, user.hashed_password):
+        if not await check_password(login_data.password, user.hashed_password):
             raise AuthenticationError(_("Invalid username or password"))
 
         if not user.is_verified:
@@ -65,24 +87,23 @@ class AuthService:
                 _("Email not verified. Please verify your email first.")
             )
 
-        access_token_expires = timedelta(seconds=settings.ACCESS_TOKEN_EXPIRE_SECONDS)
-        access_token = create_access_token(
-            subject=user.id, role=user.role, expires_delta=access_token_expires
-        )
+        # Upgrade the hash when the configured work factor changed
+        if password_needs_rehash(user.hashed_password):
+            await self.user_repository.update(
+                user.id,
+                {"hashed_password": await hash_password(login_data.password)},
+            )
 
-        response.set_cookie(
-            key="access_token",
-            value=access_token,
-            httponly=True,
-            secure=settings.COOKIE_SECURE,
-            samesite="lax",
-            max_age=settings.ACCESS_TOKEN_EXPIRE_SECONDS,
-            domain=settings.DOMAIN,
-        )
+        set_access_cookie(response, user)
 
         return UserResponse.model_validate(user)
 
-    async def logout(self, response: Response) -> None:
+    async def logout(
+        self, response: Response, token_data: Optional[dict] = None
+    ) -> None:
+        if token_data and token_data.get("jti"):
+            await revocation_list.revoke_token(token_data["jti"], token_data["exp"])
+
         response.delete_cookie(
             key="access_token",
             httponly=True,
@@ -150,9 +171,11 @@ class AuthService:
             raise NotFoundError(_("User not found"))
 
         # Update user's password
-        hashed_password = get_password_hash(new_password)
+        hashed_password = await hash_password(new_password)
         user.hashed_password = hashed_password
         await self.user_repository.save(user)
+        # Sessions opened with the former password end as well
+        await revocation_list.revoke_user(user.id)
 
         await delete_verification_token(token)
 
@@ -172,7 +195,7 @@ class AuthService:
         if existing_user:
             return
 
-        hashed_password = get_password_hash(password)
+        hashed_password = await hash_password(password)
         user_data = {
             "email": email,
             "hashed_password": hashed_password,
@@ -0,0 +1,106 @@
+import asyncio
+import threading
+from functools import cached_property
+from typing import Any, Coroutine, Optional, TypeVar
+
+import redis.asyncio as redis
+from celery import signals
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
+from pymongo import MongoClient
+from pymongo.database import Database
+
+from app.settings import settings
+
+T = TypeVar("T")
+
+
+class WorkerRuntime:
+    """
+    The event loop and database clients of a worker process.
+
+    async_to_sync sets up loop machinery for every call, and clients created
+    in a task are bound to its loop, so each task used to connect to MongoDB
+    and Redis again. Here one event loop runs for the whole process in a
+    thread of its own; tasks (from any thread of the pool) run coroutines on
+    it, and share clients created once, on first use.
+    """
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(
+            target=self.loop.run_forever, name="worker-event-loop", daemon=True
+        )
+        self._thread.start()
+
+    def run(self, coroutine: Coroutine[Any, Any, T]) -> T:
+        """Run a coroutine on the loop of the process, waiting for its result"""
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop).result()
+
+    @cached_property
+    def mongo(self) -> MongoClient:
+        return MongoClient(settings.MONGODB_URL)
+
+    @cached_property
+    def motor(self) -> AsyncIOMotorClient:
+        return AsyncIOMotorClient(settings.MONGODB_URL, io_loop=self.loop)
+
+    @cached_property
+    def redis(self) -> redis.Redis:
+        return redis.Redis.from_url(settings.REDIS_URL, decode_responses=True)
+
+    def close(self) -> None:
+        if "redis" in self.__dict__:
+            self.run(self.redis.aclose())
+        if "motor" in self.__dict__:
+            self.motor.close()
+        if "mongo" in self.__dict__:
+            self.mongo.close()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join()
+        self.loop.close()
+
+
+_runtime: Optional[WorkerRuntime] = None
+_runtime_lock = threading.Lock()
+
+
+def get_runtime() -> WorkerRuntime:
+    """The runtime of the process, started here outside of prefork workers"""
+    global _runtime
+    if _runtime is None:
+        with _runtime_lock:
+            if _runtime is None:
+                _runtime = WorkerRuntime()
+    return _runtime
+
+
+@signals.worker_process_init.connect
+def init_worker_process(**kwargs):
+    global _runtime
+    # The loop thread and the clients of the parent process do not survive
+    # the fork
+    _runtime = WorkerRuntime()
+
+
+@signals.worker_process_shutdown.connect
+def shutdown_worker_process(**kwargs):
+    global _runtime
+    if _runtime is not None:
+        _runtime.close()
+        _runtime = None
+
+
+def run_async(coroutine: Coroutine[Any, Any, T]) -> T:
+    return get_runtime().run(coroutine)
+
+
+def get_worker_redis() -> redis.Redis:
+    return get_runtime().redis
+
+
+def get_worker_mongo_database() -> Database:
+    return get_runtime().mongo[settings.MONGO_DATABASE]
+
+
+def get_worker_motor_database() -> AsyncIOMotorDatabase:
+    return get_runtime().motor[settings.MONGO_DATABASE]
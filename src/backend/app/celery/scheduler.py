@@ -0,0 +1,141 @@
+import logging
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional
+
+from kombu.utils.json import dumps, loads
+
+from app.database.redis import get_shared_redis_client
+
+logger = logging.getLogger(__name__)
+
+# Moves due entries out of their group, earliest group first, until `budget`
+# entries are claimed or none is due. Each visited group is re-indexed by its
+# next fire time, or dropped when it is empty (including groups cancelled by
+# deleting their key). Running as one script, an entry is claimed by a single
+# dispatcher, and fewer than `budget` entries means nothing else is due.
+CLAIM_SCRIPT = """
+local now = ARGV[1]
+local budget = tonumber(ARGV[2])
+local prefix = ARGV[3]
+local claimed = {}
+
+while budget > 0 do
+    local groups = redis.call("ZRANGEBYSCORE", KEYS[1], "-inf", now, "LIMIT", 0, 1)
+    if #groups == 0 then
+        break
+    end
+    local group = groups[1]
+    local key = prefix .. group
+    local due = redis.call("ZRANGEBYSCORE", key, "-inf", now, "LIMIT", 0, budget)
+    if #due > 0 then
+        redis.call("ZREM", key, unpack(due))
+        for _, entry in ipairs(due) do
+            claimed[#claimed + 1] = entry
+        end
+        budget = budget - #due
+    end
+    local next = redis.call("ZRANGE", key, 0, 0, "WITHSCORES")
+    if #next == 0 then
+        redis.call("ZREM", KEYS[1], group)
+    else
+        redis.call("ZADD", KEYS[1], next[2], group)
+    end
+end
+return claimed
+"""
+
+
+class ScheduledTask(NamedTuple):
+    """A Celery task to send at `fire_at`, `tag` identifies it in its group"""
+
+    fire_at: datetime
+    task: str
+    kwargs: Dict[str, Any]
+    tag: str = ""
+
+
+class TaskScheduler:
+    """
+    Celery tasks scheduled in Redis until they are due, in groups.
+
+    Celery ETA tasks are held in the memory of a worker until they are due,
+    and can only be cancelled one by one. Here each group (e.g. the reminders
+    of an exam) is a sorted set of entries scored by their fire time, and an
+    index sorted set holds every group by its earliest fire time:
+
+        {prefix}:due        group -> earliest fire time
+        {prefix}:{group}    entry -> fire time
+
+    Cancelling a group is a single key delete. A periodic dispatcher claims
+    the due entries in batches and sends their tasks; an entry is sent at
+    most once.
+    """
+
+    def __init__(self, prefix: str):
+        self.prefix = prefix
+        self.index_key = f"{prefix}:due"
+
+    def group_key(self, group: str) -> str:
+        return f"{self.prefix}:{group}"
+
+    async def schedule(self, group: str, tasks: Iterable[ScheduledTask]) -> None:
+        entries = {
+            dumps(
+                {"task": task.task, "kwargs": task.kwargs, "tag": task.tag},
+                sort_keys=True,
+            ): task.fire_at.timestamp()
+            for task in tasks
+        }
+        if not entries:
+            return
+        pipe = get_shared_redis_client().pipeline(transaction=True)
+        pipe.zadd(self.group_key(group), entries)
+        # Only moves the group earlier in the index, never later
+        pipe.zadd(self.index_key, {group: min(entries.values())}, lt=True)
+        await pipe.execute()
+
+    async def cancel_group(self, group: str) -> None:
+        """Cancel every task of a group, its index entry is dropped when due"""
+        await get_shared_redis_client().delete(self.group_key(group))
+
+    async def cancel(self, group: str, tags: Iterable[str]) -> None:
+        """Cancel the tasks of a group with one of the `tags`"""
+        tags = set(tags)
+        client = get_shared_redis_client()
+        key = self.group_key(group)
+        entries = [
+            entry
+            for entry in await client.zrange(key, 0, -1)
+            if loads(entry)["tag"] in tags
+        ]
+        if entries:
+            await client.zrem(key, *entries)
+
+    async def claim_due(
+        self, client, limit: int, now: Optional[float] = None
+    ) -> List[Dict[str, Any]]:
+        """Remove and return up to `limit` due entries"""
+        claim = client.register_script(CLAIM_SCRIPT)
+        entries = await claim(
+            keys=[self.index_key],
+            args=[time.time() if now is None else now, limit, f"{self.prefix}:"],
+        )
+        return [loads(entry) for entry in entries]
+
+    async def dispatch(self, client, send_task, batch_size: int) -> int:
+        """Send the tasks of every due entry, returning how many were sent"""
+        sent = 0
+        while True:
+            entries = await self.claim_due(client, batch_size)
+            for entry in entries:
+                try:
+                    send_task(entry["task"], kwargs=entry["kwargs"])
+                    sent += 1
+                except Exception:
+                    logger.exception("Could not send scheduled task %s", entry)
+            if len(entries) < batch_size:
+                return sent
+
+
+reminder_scheduler = TaskScheduler("reminders")
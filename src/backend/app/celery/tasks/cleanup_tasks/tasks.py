@@ -0,0 +1,38 @@
+from pymongo.errors import PyMongoError
+from redis.exceptions import RedisError
+
+from app.auth.schemas import UserRole
+from app.celery.runtime import get_worker_motor_database, run_async
+from app.celery.worker import celery
+from app.exam.cascade import cascade_delete_user
+
+
+@celery.task(bind=True, max_retries=5, default_retry_delay=30)
+def delete_user_data(self, user_id: str, role: str):
+    """
+    Delete the exam data of a deleted user.
+
+    Progress is published as a PROGRESS state with the current step and the
+    documents handled so far. The deletion resumes where it stopped, so it is
+    retried when MongoDB, Redis or the network fail.
+    """
+
+    # The deletion runs on the event loop thread, where the request of the
+    # task (a thread local) is not set
+    task_id = self.request.id
+
+    def report(step: str, done: int, total: int):
+        self.update_state(
+            task_id=task_id,
+            state="PROGRESS",
+            meta={"step": step, "done": done, "total": total},
+        )
+
+    try:
+        return run_async(
+            cascade_delete_user(
+                get_worker_motor_database(), user_id, UserRole(role), report
+            )
+        )
+    except (PyMongoError, RedisError, OSError) as exc:
+        raise self.retry(exc=exc)
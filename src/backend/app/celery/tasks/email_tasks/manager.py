@@ -1,9 +1,17 @@
-from typing import Any, Dict, List
+import binascii
+from email.message import Message
+from email.mime.multipart import MIMEMultipart
+from email.mime.nonmultipart import MIMENonMultipart
+from email.utils import formataddr, formatdate, make_msgid
+from typing import Any, Dict, List, Optional, Sequence
 
+import aiosmtplib
 from fastapi_mail import ConnectionConfig, FastMail, MessageSchema, MessageType
 
 from app.settings import settings
 
+from .templating import TemplateRenderer
+
 mail_config = ConnectionConfig(
     MAIL_USERNAME=settings.SMTP_USER,
     MAIL_PASSWORD=settings.SMTP_PASSWORD,
@@ -20,6 +28,15 @@ mail_config = ConnectionConfig(
 
 mail = FastMail(mail_config)
 
+mail_templates = TemplateRenderer(mail_config.template_engine())
+
+MAIL_SENDER = (
+    formataddr((mail_config.MAIL_FROM_NAME, mail_config.MAIL_FROM))
+    if mail_config.MAIL_FROM_NAME is not None
+    else mail_config.MAIL_FROM
+)
+MAIL_FROM_DOMAIN = mail_config.MAIL_FROM.rpartition("@")[2]
+
 
 def create_message(
     recipients: List[str], subject: str, body: Dict[str, Any] | None = None
@@ -33,3 +50,102 @@ def create_message(
         subtype=MessageType.html,
     )
     return message
+
+
+def _base64_lines(data: bytes) -> str:
+    """
+    Base64 in lines of 76 characters. MIMEText encodes 57 bytes at a time,
+    which costs more than rendering the template.
+    """
+    encoded = binascii.b2a_base64(data, newline=False).decode("ascii")
+    return "".join(
+        encoded[start : start + 76] + "\n" for start in range(0, len(encoded), 76)
+    )
+
+
+def build_message(
+    recipients: List[str],
+    subject: str,
+    template: str,
+    body: Dict[str, Any],
+    personal: Sequence[str] = (),
+) -> Message:
+    """
+    The MIME message FastMail would send for a templated message. The
+    `personal` variables are the ones differing between the recipients of a
+    mass email, see TemplateRenderer.
+    """
+    html = mail_templates.render(template, body, personal)
+    part = MIMENonMultipart("text", "html", charset="utf-8")
+    part["Content-Transfer-Encoding"] = "base64"
+    part.set_payload(_base64_lines(html.encode()))
+
+    message = MIMEMultipart("mixed")
+    message.attach(part)
+    message["Date"] = formatdate(localtime=True)
+    # Without a domain, make_msgid looks up the host name for every message
+    message["Message-ID"] = make_msgid(domain=MAIL_FROM_DOMAIN)
+    message["To"] = ", ".join(recipients)
+    message["From"] = MAIL_SENDER
+    message["Subject"] = subject
+    return message
+
+
+class SMTPSession:
+    """
+    One SMTP connection for many messages, opened on the first message.
+
+    FastMail opens a connection (and logs in) for every message. Servers close
+    idle connections, and some after a number of messages, so the connection
+    is reopened once when the server has closed it.
+    """
+
+    def __init__(self, config: ConnectionConfig = mail_config):
+        self.config = config
+        self._smtp: Optional[aiosmtplib.SMTP] = None
+
+    async def __aenter__(self) -> "SMTPSession":
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.close()
+
+    async def _connect(self) -> aiosmtplib.SMTP:
+        smtp = aiosmtplib.SMTP(
+            hostname=self.config.MAIL_SERVER,
+            port=self.config.MAIL_PORT,
+            timeout=self.config.TIMEOUT,
+            use_tls=self.config.MAIL_SSL_TLS,
+            start_tls=self.config.MAIL_STARTTLS,
+            validate_certs=self.config.VALIDATE_CERTS,
+        )
+        await smtp.connect()
+        if self.config.USE_CREDENTIALS:
+            await smtp.login(
+                self.config.MAIL_USERNAME,
+                self.config.MAIL_PASSWORD.get_secret_value(),
+            )
+        self._smtp = smtp
+        return smtp
+
+    async def send(self, message: Message) -> Dict[str, Any]:
+        """Send a message, returning the recipients the server refused"""
+        if self.config.SUPPRESS_SEND:
+            return {}
+        smtp = self._smtp
+        if smtp is None or not smtp.is_connected:
+            smtp = await self._connect()
+        try:
+            refused, _ = await smtp.send_message(message)
+        except aiosmtplib.SMTPServerDisconnected:
+            self._smtp = None
+            refused, _ = await (await self._connect()).send_message(message)
+        return refused
+
+    async def close(self) -> None:
+        if self._smtp is not None and self._smtp.is_connected:
+            try:
+                await self._smtp.quit()
+            except aiosmtplib.SMTPException:
+                self._smtp.close()
+        self._smtp = None
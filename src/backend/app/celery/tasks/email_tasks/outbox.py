@@ -0,0 +1,214 @@
+import logging
+import time
+import uuid
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+import aiosmtplib
+from kombu.utils.json import dumps, loads
+
+from .manager import SMTPSession, build_message
+
+logger = logging.getLogger(__name__)
+
+# A drain is started by the first message queued after the last one started;
+# the flag expires in case that drain is lost
+DRAIN_FLAG_TTL = 300
+
+# A drain not seen for this long (no batch popped, no message handled) is
+# considered dead, and the messages it was sending are queued again
+PROCESSING_TIMEOUT = 600
+
+# Moves up to ARGV[1] messages from the queue to the processing list of a
+# drain, which is recorded as seen at ARGV[2]. A message is thus never only in
+# the memory of a worker: it stays in the processing list until handled.
+POP_SCRIPT = """
+local entries = redis.call("LRANGE", KEYS[1], 0, tonumber(ARGV[1]) - 1)
+if #entries > 0 then
+    redis.call("LTRIM", KEYS[1], #entries, -1)
+    redis.call("RPUSH", KEYS[2], unpack(entries))
+end
+redis.call("ZADD", KEYS[3], ARGV[2], KEYS[2])
+return entries
+"""
+
+# Queues again the messages of the drains not seen since ARGV[1], returning
+# how many were queued
+RECOVER_SCRIPT = """
+local moved = 0
+for _, list in ipairs(redis.call("ZRANGEBYSCORE", KEYS[2], "-inf", ARGV[1])) do
+    local entries = redis.call("LRANGE", list, 0, -1)
+    for i = 1, #entries, 1000 do
+        redis.call("RPUSH", KEYS[1], unpack(entries, i, math.min(i + 999, #entries)))
+    end
+    moved = moved + #entries
+    redis.call("DEL", list)
+    redis.call("ZREM", KEYS[2], list)
+end
+return moved
+"""
+
+
+# The server cannot take any message for now
+UNAVAILABLE = (
+    OSError,  # Including connection errors and timeouts
+    aiosmtplib.SMTPAuthenticationError,
+    aiosmtplib.SMTPHeloError,
+)
+
+
+class DrainResult(NamedTuple):
+    sent: int
+    failed: int
+    requeued: int
+    # The SMTP server could not be reached, the remaining messages are queued
+    interrupted: bool
+
+
+class MailOutbox:
+    """
+    Messages waiting to be sent, in a Redis list drained in batches.
+
+    Each message is a JSON object with its recipients, subject, template name,
+    template variables (and which of them are personal, see build_message)
+    and the number of failed attempts so far:
+
+        {key}                    list of messages, oldest first
+        {key}:drain              set while a drain is pending
+        {key}:processing:{id}    messages being sent by a drain
+        {key}:processing         processing lists -> when their drain was seen
+
+    A drain moves batches of messages to its processing list and sends them
+    over a single SMTP connection, removing each message once handled:
+    messages refused for a temporary reason are queued again until
+    `max_attempts`, messages refused for good (or failing to render) are
+    dropped. When the server cannot be reached, the rest of the batch is
+    queued again and the drain stops. The messages of a drain that died are
+    queued again by the next one, so a message may be sent twice but is never
+    lost.
+    """
+
+    def __init__(self, key: str):
+        self.key = key
+        self.drain_key = f"{key}:drain"
+        self.processing_key = f"{key}:processing"
+
+    async def push(self, client, messages: List[Dict[str, Any]]) -> bool:
+        """Queue messages, returns whether a drain should be started"""
+        pipe = client.pipeline(transaction=False)
+        pipe.rpush(self.key, *[dumps(message) for message in messages])
+        pipe.set(self.drain_key, 1, nx=True, ex=DRAIN_FLAG_TTL)
+        _, start_drain = await pipe.execute()
+        return bool(start_drain)
+
+    async def pop(
+        self, client, processing: str, count: int
+    ) -> List[Tuple[str, Dict[str, Any]]]:
+        """Move up to `count` messages to a processing list, with their entry"""
+        pop = client.register_script(POP_SCRIPT)
+        entries = await pop(
+            keys=[self.key, processing, self.processing_key], args=[count, time.time()]
+        )
+        return [(entry, loads(entry)) for entry in entries]
+
+    async def ack(self, client, processing: str, entry: str) -> None:
+        """Remove a handled message from a processing list"""
+        pipe = client.pipeline(transaction=True)
+        pipe.lrem(processing, 1, entry)
+        pipe.zadd(self.processing_key, {processing: time.time()})
+        await pipe.execute()
+
+    async def release(self, client, processing: str, entries: List[str]) -> None:
+        """Queue `entries` again and drop a processing list, at once"""
+        pipe = client.pipeline(transaction=True)
+        if entries:
+            pipe.rpush(self.key, *entries)
+        pipe.delete(processing)
+        pipe.zrem(self.processing_key, processing)
+        await pipe.execute()
+
+    async def recover(self, client, now: Optional[float] = None) -> int:
+        """Queue again the messages of the drains that died while sending them"""
+        recover = client.register_script(RECOVER_SCRIPT)
+        now = time.time() if now is None else now
+        moved = await recover(
+            keys=[self.key, self.processing_key], args=[now - PROCESSING_TIMEOUT]
+        )
+        if moved:
+            logger.warning("Queued again %s emails of a lost drain", moved)
+        return moved
+
+    async def drain(self, client, batch_size: int, max_attempts: int) -> DrainResult:
+        """Send the queued messages, until the queue is empty"""
+        # Messages queued from now on start another drain
+        await client.delete(self.drain_key)
+        await self.recover(client)
+        processing = f"{self.processing_key}:{uuid.uuid4().hex}"
+        sent = failed = 0
+        retry: List[Dict[str, Any]] = []
+        unsent: List[str] = []
+        interrupted = False
+
+        async with SMTPSession() as smtp:
+            while not interrupted:
+                batch = await self.pop(client, processing, batch_size)
+                if not batch:
+                    break
+                for index, (entry, message) in enumerate(batch):
+                    try:
+                        mime = build_message(
+                            message["recipients"],
+                            message["subject"],
+                            message["template"],
+                            message["body"],
+                            message.get("personal", ()),
+                        )
+                        refused = await smtp.send(mime)
+                    except UNAVAILABLE as exc:
+                        logger.warning("SMTP server unavailable: %s", exc)
+                        unsent = [entry for entry, _ in batch[index:]]
+                        interrupted = True
+                        break
+                    except aiosmtplib.SMTPException as exc:
+                        if _is_temporary(exc):
+                            message["attempts"] = message.get("attempts", 0) + 1
+                            if message["attempts"] < max_attempts:
+                                # Kept in the processing list until queued again
+                                retry.append(message)
+                                continue
+                        logger.error(
+                            "Dropped email %r to %s: %s",
+                            message["subject"],
+                            message["recipients"],
+                            exc,
+                        )
+                        failed += 1
+                    except Exception:
+                        logger.exception(
+                            "Could not render email %r", message["subject"]
+                        )
+                        failed += 1
+                    else:
+                        if refused:
+                            logger.warning(
+                                "Recipients refused for email %r: %s",
+                                message["subject"],
+                                refused,
+                            )
+                        sent += 1
+                    await self.ack(client, processing, entry)
+
+        # Queued last, so that this drain does not pick them up again
+        await self.release(
+            client, processing, unsent + [dumps(message) for message in retry]
+        )
+        return DrainResult(sent, failed, len(retry), interrupted)
+
+
+def _is_temporary(exc: aiosmtplib.SMTPException) -> bool:
+    """4xx replies are temporary failures, 5xx replies permanent ones"""
+    if isinstance(exc, aiosmtplib.SMTPRecipientsRefused):
+        return any(400 <= refused.code < 500 for refused in exc.recipients)
+    return isinstance(exc, aiosmtplib.SMTPResponseException) and 400 <= exc.code < 500
+
+
+mail_outbox = MailOutbox("mail:outbox")
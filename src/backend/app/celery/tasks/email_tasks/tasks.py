@@ -1,20 +1,63 @@
-from datetime import datetime
+import logging
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Sequence
 
-from asgiref.sync import async_to_sync
 from celery import signals
+from pymongo.errors import PyMongoError
 
+from app.celery.runtime import get_worker_mongo_database, get_worker_redis, run_async
+from app.celery.scheduler import reminder_scheduler
 from app.celery.worker import celery
 from app.settings import settings
 
-from .manager import create_message, mail
+from .outbox import mail_outbox
+
+logger = logging.getLogger(__name__)
+
+
+def queue_mail(
+    recipients: List[str],
+    subject: str,
+    body: Dict[str, Any],
+    template: str,
+    personal: Sequence[str] = (),
+):
+    """
+    Queue an email, sent in a batch by send_queued_mail. Mass emails name
+    the `personal` variables of the body, which differ between recipients.
+    """
+    message = {
+        "recipients": recipients,
+        "subject": subject,
+        "body": body,
+        "template": template,
+        "personal": list(personal),
+    }
+    if run_async(mail_outbox.push(get_worker_redis(), [message])):
+        send_queued_mail.delay()
+
+
+@celery.task(bind=True, max_retries=8)
+def send_queued_mail(self):
+    """
+    Send the queued emails over one SMTP connection. When the server cannot
+    be reached, the emails stay queued and the task is retried with a growing
+    delay.
+    """
+    result = run_async(
+        mail_outbox.drain(
+            get_worker_redis(), settings.MAIL_BATCH_SIZE, settings.MAIL_MAX_ATTEMPTS
+        )
+    )
+    if result.interrupted or result.requeued:
+        raise self.retry(countdown=min(30 * 2**self.request.retries, 3600))
+    return result._asdict()
 
 
 @celery.task
 def user_verify_mail_event(recipient: str, link: str, username: str):
-    message = create_message(
-        recipients=[
-            recipient,
-        ],
+    queue_mail(
+        recipients=[recipient],
         subject=f"{settings.PROJECT_NAME} | Verify Your Email",
         body={
             "verification_link": link,
@@ -22,16 +65,14 @@ def user_verify_mail_event(recipient: str, link: str, username: str):
             "datetime": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
             "year": datetime.now().year,
         },
+        template="verify.html",
     )
-    async_to_sync(mail.send_message)(message, "verify.html")
 
 
 @celery.task
 def user_password_reset_mail(recipient: str, link: str, username: str):
-    message = create_message(
-        recipients=[
-            recipient,
-        ],
+    queue_mail(
+        recipients=[recipient],
         subject=f"{settings.PROJECT_NAME} | Reset Your Password",
         body={
             "reset_link": link,
@@ -39,8 +80,8 @@ def user_password_reset_mail(recipient: str, link: str, username: str):
             "datetime": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
             "year": datetime.now().year,
         },
+        template="password_reset.html",
     )
-    async_to_sync(mail.send_message)(message, "password_reset.html")
 
 
 @celery.task
@@ -49,10 +90,8 @@ def user_welcome_mail_event(
     date_registered: str,
     username: str,
 ):
-    message = create_message(
-        recipients=[
-            recipient,
-        ],
+    queue_mail(
+        recipients=[recipient],
         subject=f"{settings.PROJECT_NAME} | Welcome to {settings.PROJECT_NAME}",
         body={
             "login_link": settings.LOGIN_URL,
@@ -60,8 +99,8 @@ def user_welcome_mail_event(
             "username": username,
             "year": datetime.now().year,
         },
+        template="welcome.html",
     )
-    async_to_sync(mail.send_message)(message, "welcome.html")
 
 
 @celery.task(bind=True)
@@ -84,7 +123,7 @@ def exam_reminder_notification(
         )
         else f"{settings.PROJECT_NAME} | Reminder: {exam_title} Exam"
     )
-    message = create_message(
+    queue_mail(
         recipients=[recipient],
         subject=subject,
         body={
@@ -96,51 +135,38 @@ def exam_reminder_notification(
             "exam_link": link,
             "year": datetime.now().year,
         },
+        template="exam_reminder.html",
+        personal=("username", "datetime", "exam_link"),
+    )
+
+
+@celery.task
+def dispatch_scheduled_reminders():
+    """Send the exam reminders that are due, run periodically by celery beat"""
+    return run_async(
+        reminder_scheduler.dispatch(
+            get_worker_redis(), celery.send_task, settings.REMINDER_BATCH_SIZE
+        )
     )
-    async_to_sync(mail.send_message)(message, "exam_reminder.html")
 
 
 @signals.task_postrun.connect(sender=exam_reminder_notification)
 def exam_reminder_notification_post(sender, **kwargs):
     task_id = kwargs.get("task_id")
-    exam_instance_id = kwargs.get("kwargs", {}).get("exam_instance_id")
-    recipient = kwargs.get("kwargs", {}).get("recipient")
-
-    if not (task_id and exam_instance_id and recipient):
+    # Only reminders scheduled as ETA tasks have a job, they carry the ID of
+    # their student exam as exam_instance_id
+    if not (task_id and kwargs.get("kwargs", {}).get("exam_instance_id")):
         return
 
-    import logging
-
-    from pymongo import MongoClient
-
-    from app.settings import settings
-
+    # Fired jobs expire, see NotificationJob
+    now = datetime.now(timezone.utc)
     try:
-        client = MongoClient(settings.MONGODB_URL)
-        db = client[settings.MONGO_DATABASE]
-        users_collection = db["users"]
-
-        user = users_collection.find_one({"email": recipient})
-        if not user:
-            return
-
-        exam_id_str = str(exam_instance_id)
-        notifications = user.get("notifications_tasks_id", {})
-        if exam_id_str in notifications and task_id in notifications[exam_id_str]:
-            notifications[exam_id_str].remove(task_id)
-
-            if not notifications[exam_id_str]:
-                del notifications[exam_id_str]
-
-            users_collection.update_one(
-                {"email": recipient},
-                {"$set": {"notifications_tasks_id": notifications}},
-            )
-    except Exception as e:
-        logging.error(f"Error in exam_reminder_notification_post: {e}")
-    finally:
-        if "client" in locals():
-            client.close()
+        get_worker_mongo_database()["notification_jobs"].update_one(
+            {"_id": task_id, "fired_at": None},
+            {"$set": {"fired_at": now, "updated_at": now}},
+        )
+    except PyMongoError:
+        logger.exception("Could not mark reminder task %s as fired", task_id)
 
 
 @celery.task
@@ -150,10 +176,8 @@ def user_deletion_confirmation(
     date_registered: datetime,
     link: str,
 ):
-    message = create_message(
-        recipients=[
-            recipient,
-        ],
+    queue_mail(
+        recipients=[recipient],
         subject=f"{settings.PROJECT_NAME} | Account Deletion Confirmation",
         body={
             "datetime": date_registered.strftime("%Y-%m-%d %H:%M"),
@@ -161,8 +185,8 @@ def user_deletion_confirmation(
             "deletion_link": link,
             "year": datetime.now().year,
         },
+        template="request_deletion.html",
     )
-    async_to_sync(mail.send_message)(message, "request_deletion.html")
 
 
 @celery.task
@@ -171,18 +195,16 @@ def user_deleted_notification(
     username: str,
     date_registered: datetime,
 ):
-    message = create_message(
-        recipients=[
-            recipient,
-        ],
+    queue_mail(
+        recipients=[recipient],
         subject=f"{settings.PROJECT_NAME} | Thanks for being with us :(",
         body={
             "datetime": date_registered.strftime("%Y-%m-%d %H:%M"),
             "username": username,
             "year": datetime.now().year,
         },
+        template="account_deleted.html",
     )
-    async_to_sync(mail.send_message)(message, "account_deleted.html")
 
 
 @celery.task
@@ -199,10 +221,8 @@ def exam_finish_confirmation(
         duration_minutes = int((end_time - start_time).total_seconds() / 60)
         duration = f"{duration_minutes} minutes"
 
-    message = create_message(
-        recipients=[
-            recipient,
-        ],
+    queue_mail(
+        recipients=[recipient],
         subject=f"{settings.PROJECT_NAME} | Exam Submitted Successfully",
         body={
             "username": username,
@@ -214,5 +234,5 @@ def exam_finish_confirmation(
             "datetime": datetime.now().strftime("%Y-%m-%d %H:%M"),
             "year": datetime.now().year,
         },
+        template="exam_finished.html",
     )
-    async_to_sync(mail.send_message)(message, "exam_finished.html")
@@ -0,0 +1,71 @@
+import json
+import re
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence
+
+from jinja2 import Environment
+
+# Stands for a personal variable in a pre-rendered template
+MARKER = "\x00{}\x00"
+
+
+class TemplateRenderer:
+    """
+    Email templates rendered once per set of shared variables.
+
+    Mass emails, such as the reminders of an exam, only differ by a few
+    personal variables (the name of the recipient, their link). The template
+    is rendered once with markers in place of these, and split into literal
+    parts; each email then joins the parts with its own values, without
+    running the template.
+
+    Personal variables must be printed as they are. When a marker does not
+    come out of the template unchanged (because the variable is filtered, or
+    used in a condition), that template is always rendered in full.
+    """
+
+    def __init__(self, environment: Environment, max_size: int = 256):
+        self.environment = environment
+        self.max_size = max_size
+        # Literal parts alternating with personal variable names, or None
+        # when the template cannot be pre-rendered
+        self._cache: OrderedDict[str, Optional[List[str]]] = OrderedDict()
+
+    def render(
+        self, name: str, variables: Dict[str, Any], personal: Sequence[str] = ()
+    ) -> str:
+        if not personal:
+            return self.environment.get_template(name).render(**variables)
+
+        personal = sorted(set(personal))
+        shared = {k: v for k, v in variables.items() if k not in personal}
+        key = json.dumps([name, personal, shared], sort_keys=True, default=str)
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            parts = self._cache[key]
+        else:
+            parts = self._prerender(name, shared, personal)
+            self._cache[key] = parts
+            if len(self._cache) > self.max_size:
+                self._cache.popitem(last=False)
+
+        if parts is None:
+            return self.environment.get_template(name).render(**variables)
+        # Odd parts are variable names, printed as Jinja prints them
+        return "".join(
+            str(variables.get(part, "")) if index % 2 else part
+            for index, part in enumerate(parts)
+        )
+
+    def _prerender(
+        self, name: str, shared: Dict[str, Any], personal: List[str]
+    ) -> Optional[List[str]]:
+        markers = {field: MARKER.format(field) for field in personal}
+        html = self.environment.get_template(name).render(**shared, **markers)
+        pattern = "|".join(re.escape(field) for field in personal)
+        parts = re.split(MARKER.format(f"({pattern})"), html)
+        if set(parts[1::2]) != set(personal) or any(
+            "\x00" in part for part in parts[::2]
+        ):
+            return None
+        return parts
@@ -0,0 +1,14 @@
+from app.celery.runtime import get_worker_motor_database, run_async
+from app.celery.worker import celery
+from app.exam.question_import import run_question_import
+
+
+@celery.task
+def import_question_file(import_id: str):
+    """
+    Import the questions of a question bank file into its collection.
+
+    Progress and rejected rows are recorded in the import document. It is not
+    retried: the questions imported before a failure would be imported again.
+    """
+    return run_async(run_question_import(get_worker_motor_database(), import_id))
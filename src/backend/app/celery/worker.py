@@ -8,4 +8,17 @@ celery = Celery(
     backend=settings.REDIS_URL,
 )
 
-celery.autodiscover_tasks(["app.celery.tasks.email_tasks.tasks"])
+celery.autodiscover_tasks(
+    [
+        "app.celery.tasks.email_tasks.tasks",
+        "app.celery.tasks.cleanup_tasks.tasks",
+        "app.celery.tasks.import_tasks.tasks",
+    ]
+)
+
+celery.conf.beat_schedule = {
+    "dispatch-scheduled-reminders": {
+        "task": "app.celery.tasks.email_tasks.tasks.dispatch_scheduled_reminders",
+        "schedule": settings.REMINDER_DISPATCH_INTERVAL,
+    },
+}
@@ -0,0 +1,90 @@
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Awaitable, Callable, Optional
+
+from fastapi import Depends, Request, Response
+
+from app.core.exceptions import NotModifiedError
+from app.core.schemas import ResourceVersion
+from app.core.utils import etag_matches, make_etag
+from app.i18n.manager import get_language
+
+VersionGetter = Callable[..., Awaitable[Optional[ResourceVersion]]]
+
+
+def _as_utc(value: datetime) -> datetime:
+    """MongoDB hands back naive datetimes that are already in UTC"""
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def _modified_since(if_modified_since: Optional[str], last_modified: datetime) -> bool:
+    """Evaluate an If-Modified-Since header at the one second HTTP-date precision"""
+    if not if_modified_since:
+        return True
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return True
+    if since.tzinfo is None:
+        return True
+    return last_modified.replace(microsecond=0) > since
+
+
+def conditional_get(get_version: VersionGetter):
+    """
+    Build a dependency answering conditional GET requests for a resource.
+
+    `get_version` is a dependency returning the ResourceVersion of the
+    requested resource, or None when it cannot tell (e.g. the resource does
+    not exist), in which case the route runs as usual.
+
+    The entity tag also covers the request path, timezone and language, since
+    responses are localized. When the client's If-None-Match (or, for plain
+    timestamped resources, If-Modified-Since) still matches, a 304 is raised
+    before the route and its service code run. Otherwise the validators are
+    added to the response headers.
+    """
+
+    async def dependency(
+        request: Request,
+        response: Response,
+        version: Optional[ResourceVersion] = Depends(get_version),
+    ) -> None:
+        if version is None:
+            return
+
+        last_modified = _as_utc(version.last_modified)
+        digest = hashlib.sha1(
+            "|".join(
+                (
+                    request.url.path,
+                    last_modified.isoformat(),
+                    version.tag,
+                    getattr(request.state, "timezone_name", ""),
+                    get_language(),
+                )
+            ).encode()
+        ).hexdigest()
+        headers = {
+            "ETag": make_etag(digest[:20]),
+            "Cache-Control": "private, no-cache",
+        }
+        if not version.tag:
+            headers["Last-Modified"] = format_datetime(last_modified, usegmt=True)
+
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match is not None:
+            not_modified = etag_matches(if_none_match, headers["ETag"])
+        else:
+            not_modified = not version.tag and not _modified_since(
+                request.headers.get("if-modified-since"), last_modified
+            )
+        if not_modified:
+            raise NotModifiedError(headers)
+
+        response.headers.update(headers)
+
+    return dependency
@@ -30,3 +30,19 @@ class UnprocessableEntityError(HTTPException):
         super().__init__(
             status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=detail
         )
+
+
+class NotModifiedError(HTTPException):
+    """Short-circuits a conditional GET whose cached representation is current"""
+
+    def __init__(self, headers: dict):
+        super().__init__(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+
+class TooManyRequestsError(HTTPException):
+    def __init__(self, detail: str, headers: dict):
+        super().__init__(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=detail,
+            headers=headers,
+        )
@@ -0,0 +1,70 @@
+import base64
+import binascii
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from bson import json_util
+
+from app.core.exceptions import BadRequestError
+from app.i18n import lazy_gettext
+
+INVALID_CURSOR = lazy_gettext("Invalid pagination cursor")
+
+
+class SortKey(NamedTuple):
+    """Sort of a keyset paginated list, always completed with the _id"""
+
+    field: str
+    descending: bool = False
+
+    @classmethod
+    def parse(cls, sort: str) -> "SortKey":
+        """Read a sort parameter such as "email" or "-created_at" """
+        if sort.startswith("-"):
+            return cls(sort[1:], True)
+        return cls(sort)
+
+    @property
+    def direction(self) -> int:
+        return -1 if self.descending else 1
+
+    def sort_spec(self) -> List[Tuple[str, int]]:
+        return [(self.field, self.direction), ("_id", self.direction)]
+
+
+def encode_cursor(value: Any, last_id: Any) -> str:
+    """Cursor pointing after the last document of a page: its sort value and id"""
+    position = json_util.dumps([value, last_id])
+    return base64.urlsafe_b64encode(position.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[Any, Any]:
+    """Sort value and id of the last document before a cursor"""
+    try:
+        value, last_id = json_util.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (binascii.Error, ValueError, TypeError, UnicodeDecodeError):
+        raise BadRequestError(str(INVALID_CURSOR))
+    # Cursors come from clients: an operator such as {"$ne": null} must not
+    # reach the query
+    if isinstance(value, (dict, list)) or isinstance(last_id, (dict, list)):
+        raise BadRequestError(str(INVALID_CURSOR))
+    return value, last_id
+
+
+def keyset_filter(sort: SortKey, cursor: Optional[str]) -> Dict[str, Any]:
+    """
+    Query matching the documents after a cursor, in the order of `sort`.
+
+    Unlike skip/limit, a page costs the same wherever it is in the list, and
+    documents inserted or deleted meanwhile do not shift the next pages.
+    """
+    if not cursor:
+        return {}
+    value, last_id = decode_cursor(cursor)
+
+    operator = "$lt" if sort.descending else "$gt"
+    return {
+        "$or": [
+            {sort.field: {operator: value}},
+            {sort.field: value, "_id": {operator: last_id}},
+        ]
+    }
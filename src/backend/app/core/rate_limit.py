@@ -0,0 +1,214 @@
+import logging
+import math
+from typing import Awaitable, Callable, NamedTuple, Optional, Tuple, Union
+
+from fastapi import Request, Response
+from redis.exceptions import RedisError
+
+from app.auth.infrastructure import CookieTokenAuth
+from app.auth.security import decode_token
+from app.core.exceptions import TooManyRequestsError
+from app.database.redis import get_shared_redis_client
+from app.i18n import _
+from app.settings import settings
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "rate-limit"
+
+KeyFunc = Callable[[Request], Awaitable[Optional[str]]]
+
+# Generic cell rate algorithm (GCRA). The key holds the theoretical arrival
+# time (TAT) of the next request, in milliseconds: each accepted request pushes
+# it by one emission interval (period / limit), and a request is rejected when
+# that would put it more than a whole period ahead of now. This is a sliding
+# window of `limit` requests per `period`, stored in a single integer.
+#
+# The script reads the clock of the Redis server, so all workers agree on the
+# time, and checks and updates the key in one round trip.
+GCRA_SCRIPT = """
+local interval = tonumber(ARGV[1])
+local limit = tonumber(ARGV[2])
+local time = redis.call("TIME")
+local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+
+local tat = tonumber(redis.call("GET", KEYS[1])) or now
+if tat < now then
+    tat = now
+end
+local new_tat = tat + interval
+local allow_at = new_tat - interval * limit
+if allow_at > now then
+    return {0, 0, tat - now, allow_at - now}
+end
+
+redis.call("SET", KEYS[1], new_tat, "PX", new_tat - now)
+return {1, math.floor((now - allow_at) / interval), new_tat - now, 0}
+"""
+
+
+class RateLimit(NamedTuple):
+    """
+    At most `limit` requests per `period` seconds for each client of a route.
+
+    Clients are identified by their user id and role when they send an access
+    token. Otherwise `key` may derive an identity from the request (e.g. the
+    email of a login form), and the client address is used last.
+    """
+
+    limit: int
+    period: int
+    key: Optional[KeyFunc] = None
+
+
+class RateLimitState(NamedTuple):
+    allowed: bool
+    remaining: int
+    # Milliseconds until the client has its whole limit again
+    reset_after: int
+    # Milliseconds until the next request would be accepted
+    retry_after: int
+
+
+_gcra_script = None
+
+
+async def hit(key: str, rate_limit: RateLimit) -> RateLimitState:
+    """Count a request against a rate limit"""
+    global _gcra_script
+    if _gcra_script is None:
+        _gcra_script = get_shared_redis_client().register_script(GCRA_SCRIPT)
+
+    interval = math.ceil(rate_limit.period * 1000 / rate_limit.limit)
+    allowed, remaining, reset_after, retry_after = await _gcra_script(
+        keys=[key], args=[interval, rate_limit.limit]
+    )
+    return RateLimitState(bool(allowed), remaining, reset_after, retry_after)
+
+
+def _client_address(request: Request) -> str:
+    # Set by nginx, which overwrites any value sent by the client
+    real_ip = request.headers.get("x-real-ip")
+    if real_ip:
+        return real_ip
+    return request.client.host if request.client else "unknown"
+
+
+def body_field(name: str, *, per_address: bool = False) -> KeyFunc:
+    """
+    Key anonymous clients by a field of the JSON body, such as an email, and
+    by their address too with `per_address`
+    """
+
+    async def key(request: Request) -> Optional[str]:
+        try:
+            body = await request.json()
+        except ValueError:
+            return None
+        value = body.get(name) if isinstance(body, dict) else None
+        if not value:
+            return None
+        value = str(value).strip().lower()
+        return f"{_client_address(request)}:{value}" if per_address else value
+
+    return key
+
+
+# Token lookup only; routes still authenticate with their own dependencies
+_optional_token = CookieTokenAuth(token_url="/auth/login", auto_error=False)
+
+
+class RateLimiter:
+    """
+    Router dependency applying the rate limit policies of its routes.
+
+    Policies are declared once per router: `default` applies to every route,
+    and keyword arguments override it for the routes of that name (the name
+    of the endpoint function):
+
+        router = APIRouter(
+            dependencies=[
+                Depends(RateLimiter(RateLimit(120, 60), save_answer=RateLimit(600, 60)))
+            ],
+        )
+
+    A route may also have several policies, each with its own budget, e.g. per
+    account and per client address: a request is rejected as soon as one of
+    them is exceeded, and the headers describe the policy with the fewest
+    requests left.
+
+    Each route, role and client has its own budget. Accepted responses carry
+    the RateLimit-Limit, RateLimit-Remaining, RateLimit-Reset and
+    RateLimit-Policy headers; rejected requests get a 429 with Retry-After.
+
+    When Redis cannot be reached, requests are let through.
+    """
+
+    def __init__(
+        self,
+        default: Optional[RateLimit] = None,
+        **routes: Union[RateLimit, Tuple[RateLimit, ...]],
+    ):
+        self.default = default
+        self.routes = routes
+
+    async def identify(self, request: Request, rate_limit: RateLimit) -> str:
+        token = await _optional_token(request)
+        token_data = decode_token(token) if token else None
+        if token_data and token_data.get("sub"):
+            return f"{token_data.get('role')}:{token_data['sub']}"
+
+        if rate_limit.key is not None:
+            identity = await rate_limit.key(request)
+            if identity:
+                return f"anonymous:{identity}"
+        return f"anonymous:{_client_address(request)}"
+
+    async def __call__(self, request: Request, response: Response) -> None:
+        if not settings.RATE_LIMIT_ENABLED:
+            return
+
+        route = request.scope.get("route")
+        rate_limits = self.routes.get(getattr(route, "name", None), self.default)
+        if rate_limits is None:
+            return
+        if isinstance(rate_limits, RateLimit):
+            rate_limits = (rate_limits,)
+
+        route_path = getattr(route, "path", request.url.path)
+        states = []
+        for index, rate_limit in enumerate(rate_limits):
+            identity = await self.identify(request, rate_limit)
+            key = f"{KEY_PREFIX}:{request.method}:{route_path}:{identity}"
+            if index:
+                # Policies sharing an identity (e.g. an authenticated user)
+                # still have their own budget
+                key = f"{key}:{index}"
+            try:
+                state = await hit(key, rate_limit)
+            except (RedisError, OSError) as error:
+                logger.warning("Rate limit check skipped: %s", error)
+                return
+            states.append((rate_limit, state))
+            if not state.allowed:
+                break
+
+        # The rejecting policy, or the one with the fewest requests left
+        rate_limit, state = min(
+            states, key=lambda checked: (checked[1].allowed, checked[1].remaining)
+        )
+        headers = {
+            "RateLimit-Limit": str(rate_limit.limit),
+            "RateLimit-Remaining": str(state.remaining),
+            "RateLimit-Reset": str(math.ceil(state.reset_after / 1000)),
+            "RateLimit-Policy": f"{rate_limit.limit};w={rate_limit.period}",
+        }
+        if not state.allowed:
+            headers["Retry-After"] = str(max(1, math.ceil(state.retry_after / 1000)))
+            raise TooManyRequestsError(
+                _("Too many requests, please try again later"), headers
+            )
+
+        # Routes returning a Response object drop the headers set on `response`,
+        # so hand them to the request context middleware when it is installed
+        getattr(request.state, "response_headers", response.headers).update(headers)
@@ -1,9 +1,22 @@
 from datetime import datetime, timezone
-from typing import Any, Dict, Generic, List, Optional, Type, TypeVar
+from typing import (
+    Any,
+    AsyncIterator,
+    Dict,
+    Generic,
+    List,
+    Optional,
+    Tuple,
+    Type,
+    TypeVar,
+)
 
 from beanie import Document, DeleteRules
+from pydantic import BaseModel
 
+from app.core.pagination import SortKey, encode_cursor, keyset_filter
 from app.core.repository.abstract_repository import AbstractRepository
+from app.core.schemas import ResourceVersion
 
 T = TypeVar("T", bound=Document)
 
@@ -101,6 +114,57 @@ class BaseRepository(AbstractRepository[T], Generic[T]):
 
         return entity
 
+    async def get_page(
+        self,
+        filter_criteria: Dict[str, Any],
+        sort: SortKey,
+        *,
+        cursor: Optional[str] = None,
+        limit: int = 25,
+        projection_model: Optional[Type[BaseModel]] = None,
+    ) -> Tuple[List[Any], Optional[str]]:
+        """
+        Get a page of entities with keyset pagination, and the cursor of the
+        next page (None on the last one). With `projection_model`, only its
+        fields are read and the items are instances of it.
+        """
+        keyset = keyset_filter(sort, cursor)
+        query = {"$and": [filter_criteria, keyset]} if keyset else filter_criteria
+        find = self.model_class.find(query).sort(sort.sort_spec()).limit(limit + 1)
+        if projection_model is not None:
+            find = find.project(projection_model)
+
+        # One extra item tells whether there is a next page
+        items = [item async for item in find]
+        if len(items) <= limit:
+            return items, None
+        items = items[:limit]
+        last = items[-1]
+        return items, encode_cursor(getattr(last, sort.field), last.id)
+
+    async def iter_documents(
+        self,
+        filter_criteria: Dict[str, Any],
+        *,
+        projection: Optional[Dict[str, Any]] = None,
+        sort: Optional[List[Tuple[str, int]]] = None,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Raw documents of the entities matching a filter, read from a cursor
+        batch by batch rather than loaded at once
+        """
+        cursor = self.model_class.get_motor_collection().find(
+            filter_criteria, projection
+        )
+        if sort:
+            cursor = cursor.sort(sort)
+        async for document in cursor:
+            yield document
+
+    async def count(self, filter_criteria: Optional[Dict[str, Any]] = None) -> int:
+        """Count the entities matching a filter"""
+        return await self.model_class.find(filter_criteria or {}).count()
+
     async def update(self, entity_id: str, data: Dict[str, Any]) -> Optional[T]:
         """Update an entity"""
         entity = await self.get_by_id(entity_id)
@@ -133,3 +197,42 @@ class BaseRepository(AbstractRepository[T], Generic[T]):
 
         await entity.save()
         return entity
+
+    async def get_version(self, entity_id: str) -> Optional[ResourceVersion]:
+        """Get the version of an entity without loading the whole document"""
+        document = await self.model_class.get_motor_collection().find_one(
+            {"_id": entity_id}, {"updated_at": 1}
+        )
+        if not document or not document.get("updated_at"):
+            return None
+        return ResourceVersion(document["updated_at"])
+
+    async def get_list_version(
+        self, filter_criteria: Optional[Dict[str, Any]] = None
+    ) -> Optional[ResourceVersion]:
+        """
+        Get the version of a list of entities: their latest update time,
+        tagged with their count so that deletions also change the version.
+        """
+        return await self._aggregate_version(self.model_class, filter_criteria)
+
+    @staticmethod
+    async def _aggregate_version(
+        model_class: Type[Document], filter_criteria: Optional[Dict[str, Any]]
+    ) -> Optional[ResourceVersion]:
+        """Count the matching documents and get their latest updated_at"""
+        pipeline = [
+            {"$match": filter_criteria or {}},
+            {
+                "$group": {
+                    "_id": None,
+                    "count": {"$sum": 1},
+                    "last_modified": {"$max": "$updated_at"},
+                }
+            },
+        ]
+        cursor = model_class.get_motor_collection().aggregate(pipeline)
+        result = await cursor.to_list(length=1)
+        if not result or not result[0]["last_modified"]:
+            return None
+        return ResourceVersion(result[0]["last_modified"], str(result[0]["count"]))
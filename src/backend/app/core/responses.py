@@ -0,0 +1,164 @@
+import json
+import zlib
+from datetime import datetime, timezone
+from typing import Any, AsyncIterable, AsyncIterator, Dict, Mapping, Optional, Type
+
+from bson import DBRef, ObjectId
+from fastapi import Request, Response, status
+from fastapi.responses import StreamingResponse
+
+from app.core.schemas import BaseReturn
+
+try:
+    import msgpack
+except ImportError:  # installed with the "msgpack" extra
+    msgpack = None
+
+MSGPACK_MEDIA_TYPE = "application/x-msgpack"
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+# Bytes of lines gathered before a chunk is written to the client
+NDJSON_CHUNK_SIZE = 64 * 1024
+
+
+def accepts_msgpack(request: Optional[Request]) -> bool:
+    """Check whether the client asked for a MessagePack body"""
+    if msgpack is None or request is None:
+        return False
+    return MSGPACK_MEDIA_TYPE in request.headers.get("accept", "")
+
+
+class ReturnResponse(Response):
+    """
+    Response rendering a `BaseReturn` payload built from trusted service output.
+
+    FastAPI validates whatever a route returns against its `response_model`
+    before serializing it, although the services already hand back validated
+    schema instances. This response skips that second validation: the payload
+    is assembled with `model_construct` and dumped straight to bytes by the
+    compiled pydantic-core serializer of `return_type`, which still only emits
+    the fields declared on the schema.
+
+    Clients sending `Accept: application/x-msgpack` get a MessagePack body when
+    the optional `msgpack` package is installed, JSON otherwise.
+    """
+
+    media_type = "application/json"
+
+    def __init__(
+        self,
+        return_type: Type[BaseReturn],
+        message: str,
+        data: Any = None,
+        *,
+        request: Optional[Request] = None,
+        status_code: int = status.HTTP_200_OK,
+        headers: Optional[Mapping[str, str]] = None,
+    ) -> None:
+        payload = return_type.model_construct(message=message, data=data)
+        serializer = return_type.__pydantic_serializer__
+
+        if accepts_msgpack(request):
+            self.media_type = MSGPACK_MEDIA_TYPE
+            content = msgpack.packb(
+                serializer.to_python(payload, mode="json", by_alias=True)
+            )
+        else:
+            content = serializer.to_json(payload, by_alias=True)
+
+        super().__init__(content, status_code=status_code, headers=headers)
+        if msgpack is not None:
+            self.headers.append("Vary", "Accept")
+
+
+def accepts_gzip(request: Optional[Request]) -> bool:
+    """Check whether the client accepts a gzip encoded body"""
+    if request is None:
+        return False
+    for coding in request.headers.get("accept-encoding", "").split(","):
+        name, _, params = coding.partition(";")
+        if name.strip().lower() != "gzip":
+            continue
+        # "gzip;q=0" refuses it
+        quality = params.strip().removeprefix("q=")
+        try:
+            return not quality or float(quality) > 0
+        except ValueError:
+            return False
+    return False
+
+
+def export_record(kind: str, document: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    An exported MongoDB document, under `data` with its id as `id`, as the
+    documents may have a `type` field of their own
+    """
+    document = dict(document)
+    return {"type": kind, "data": {"id": document.pop("_id", None), **document}}
+
+
+def _json_default(value: Any) -> Any:
+    """JSON value of the BSON types of raw MongoDB documents"""
+    if isinstance(value, DBRef):
+        return value.id
+    if isinstance(value, datetime):
+        # Dates are stored in UTC, and read back without a timezone
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return value.isoformat()
+    if isinstance(value, ObjectId):
+        return str(value)
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+class NDJSONResponse(StreamingResponse):
+    """
+    Response streaming the records of an async iterable as JSON Lines.
+
+    Records are encoded one at a time as they are produced, so the memory used
+    does not depend on the size of the export. Lines are gathered in chunks of
+    about `NDJSON_CHUNK_SIZE` bytes, compressed on the fly when the client
+    accepts gzip. With a `filename`, the body is sent as an attachment.
+    """
+
+    media_type = NDJSON_MEDIA_TYPE
+
+    def __init__(
+        self,
+        records: AsyncIterable[Dict[str, Any]],
+        *,
+        request: Optional[Request] = None,
+        filename: Optional[str] = None,
+        headers: Optional[Mapping[str, str]] = None,
+    ) -> None:
+        gzip = accepts_gzip(request)
+        super().__init__(self._chunks(records, gzip), headers=headers)
+        self.headers.append("Vary", "Accept-Encoding")
+        if gzip:
+            self.headers["Content-Encoding"] = "gzip"
+        if filename:
+            self.headers["Content-Disposition"] = f'attachment; filename="{filename}"'
+
+    @staticmethod
+    async def _chunks(
+        records: AsyncIterable[Dict[str, Any]], gzip: bool
+    ) -> AsyncIterator[bytes]:
+        compressor = zlib.compressobj(wbits=16 + zlib.MAX_WBITS) if gzip else None
+        buffer = bytearray()
+        async for record in records:
+            buffer += json.dumps(
+                record, default=_json_default, ensure_ascii=False
+            ).encode()
+            buffer += b"\n"
+            if len(buffer) < NDJSON_CHUNK_SIZE:
+                continue
+            chunk = compressor.compress(buffer) if compressor else bytes(buffer)
+            buffer.clear()
+            if chunk:
+                yield chunk
+
+        chunk = bytes(buffer)
+        if compressor:
+            chunk = compressor.compress(chunk) + compressor.flush()
+        if chunk:
+            yield chunk
@@ -1,10 +1,35 @@
-from typing import Generic, TypeVar
+from datetime import datetime
+from typing import Generic, List, NamedTuple, Optional, TypeVar
 
 from pydantic import BaseModel
 
+from app.i18n import LazyString
+
 T = TypeVar("T")
 
 
+class ResourceVersion(NamedTuple):
+    """
+    Cheap summary of the state a representation is built from.
+
+    `last_modified` is the latest `updated_at` of every document the response
+    depends on. `tag` carries any other state that changes the representation
+    without touching a timestamp, such as the number of documents in a list.
+    """
+
+    last_modified: datetime
+    tag: str = ""
+
+
 class BaseReturn(BaseModel, Generic[T]):
-    message: str
+    message: str | LazyString
     data: T | None = None
+
+
+class CursorPage(BaseModel, Generic[T]):
+    """Page of a keyset paginated list"""
+
+    items: List[T]
+    total: int
+    # Pass as `cursor` to get the next page, None on the last page
+    next_cursor: Optional[str] = None
@@ -0,0 +1,170 @@
+import codecs
+import csv
+import json
+import re
+from typing import Any, AsyncIterable, AsyncIterator, List, Tuple
+
+from app.core.exceptions import BadRequestError
+from app.i18n import _
+
+# Largest JSON value read from a stream, a bound on the decoding buffer
+MAX_JSON_VALUE_SIZE = 1024 * 1024
+
+# Blanks between the values of a JSON array or JSON Lines
+_JSON_BLANKS = re.compile(r"\s*")
+
+
+async def iter_lines(chunks: AsyncIterable[bytes]) -> AsyncIterator[str]:
+    """Lines of a UTF-8 request body, decoded as the chunks arrive"""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    buffer = ""
+    try:
+        async for chunk in chunks:
+            buffer += decoder.decode(chunk)
+            *lines, buffer = buffer.split("\n")
+            for line in lines:
+                yield line.rstrip("\r")
+        buffer += decoder.decode(b"", final=True)
+    except UnicodeDecodeError:
+        raise BadRequestError(_("The file must be UTF-8 encoded"))
+    if buffer:
+        yield buffer.rstrip("\r")
+
+
+def _csv_row(text: str, number: int) -> List[str]:
+    """Parse the CSV row starting on line `number`"""
+    try:
+        return next(csv.reader([text]))
+    except csv.Error as exc:
+        # e.g. a value over the field size limit of the csv module
+        raise BadRequestError(
+            _("Invalid CSV at line {number}: {error}").format(number=number, error=exc)
+        )
+
+
+async def iter_csv_column(
+    chunks: AsyncIterable[bytes], column: str
+) -> AsyncIterator[str]:
+    """
+    Non-empty values of a column of a CSV body, read line by line.
+
+    The column is found by name in the first row, ignoring case. Without such
+    a header, the first column is read, from the first row on. Quoted values
+    spanning several lines are not supported.
+    """
+    index = None
+    number = 0
+    async for line in iter_lines(chunks):
+        number += 1
+        if not line.strip():
+            continue
+        row = _csv_row(line, number)
+        if index is None:
+            header = [cell.strip().lower() for cell in row]
+            if column.lower() in header:
+                index = header.index(column.lower())
+                continue
+            index = 0
+        if len(row) > index and row[index].strip():
+            yield row[index].strip()
+
+
+async def iter_csv_rows(
+    chunks: AsyncIterable[bytes],
+) -> AsyncIterator[Tuple[int, List[str]]]:
+    """
+    Rows of a CSV body with the number of the line they start on, read line
+    by line. Quoted values may span several lines, blank lines are skipped.
+    """
+    pending: List[str] = []
+    quotes = 0
+    number = start = 0
+    async for line in iter_lines(chunks):
+        number += 1
+        if not pending:
+            if not line.strip():
+                continue
+            start = number
+        pending.append(line)
+        # An odd number of quotes so far: a quoted value goes on
+        quotes += line.count('"')
+        if quotes % 2:
+            continue
+        yield start, _csv_row("\n".join(pending), start)
+        pending, quotes = [], 0
+    if pending:
+        yield start, _csv_row("\n".join(pending), start)
+
+
+async def iter_json_values(
+    chunks: AsyncIterable[bytes],
+) -> AsyncIterator[Tuple[int, Any]]:
+    """
+    Values of a UTF-8 JSON array, or of JSON Lines, with their position from
+    1, decoded as the chunks arrive. Only one value is held at a time.
+    """
+    decoder = json.JSONDecoder()
+    text_decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    buffer = ""
+    count = 0
+    in_array = False
+    # In an array, whether a comma is due before the next value
+    expect_comma = False
+    ended = False
+    async for chunk, final in _until_end(chunks):
+        try:
+            buffer += text_decoder.decode(chunk, final=final)
+        except UnicodeDecodeError:
+            raise BadRequestError(_("The file must be UTF-8 encoded"))
+
+        position = 0
+        while True:
+            position = _JSON_BLANKS.match(buffer, position).end()
+            if position == len(buffer):
+                break
+            if ended:
+                raise BadRequestError(_("Unexpected data after the JSON array"))
+            if count == 0 and not in_array and buffer[position] == "[":
+                in_array = True
+                position += 1
+                continue
+            if in_array and buffer[position] == "]":
+                ended = True
+                position += 1
+                continue
+            if expect_comma:
+                if buffer[position] != ",":
+                    raise BadRequestError(
+                        _("Invalid JSON at value {number}").format(number=count + 1)
+                    )
+                expect_comma = False
+                position += 1
+                continue
+            try:
+                value, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                if final or len(buffer) - position > MAX_JSON_VALUE_SIZE:
+                    raise BadRequestError(
+                        _("Invalid JSON at value {number}").format(number=count + 1)
+                    )
+                break
+            # A number at the end of the buffer may go on in the next chunk
+            if end == len(buffer) and not final and isinstance(value, (int, float)):
+                break
+            position = end
+            expect_comma = in_array
+            count += 1
+            yield count, value
+        buffer = buffer[position:]
+
+    if in_array and not ended:
+        raise BadRequestError(_("The JSON array is not closed"))
+
+
+async def _until_end(
+    chunks: AsyncIterable[bytes],
+) -> AsyncIterator[Tuple[bytes, bool]]:
+    """The chunks, then an empty one marking the end"""
+    async for chunk in chunks:
+        yield chunk, False
+    yield b"", True
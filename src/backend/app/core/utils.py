@@ -44,3 +44,23 @@ def convert_user_timezone_to_utc(dt, timezone):
 
 def get_timezone(request: Request):
     return request.state.timezone
+
+
+def make_etag(*parts, weak: bool = True) -> str:
+    """Build an HTTP entity tag from the given parts"""
+    tag = '"' + "-".join(str(part) for part in parts) + '"'
+    return f"W/{tag}" if weak else tag
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Check an If-None-Match header value against an entity tag (weak comparison)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+
+    def opaque(tag: str) -> str:
+        tag = tag.strip()
+        return tag[2:] if tag.startswith("W/") else tag
+
+    return any(opaque(tag) == opaque(etag) for tag in if_none_match.split(","))
@@ -6,8 +6,10 @@ from app.settings import settings
 
 async def init_db():
     from app.auth.models import User
-    from app.exam.models import (Collection, ExamInstance, Question,
-                                 StudentAttempt, StudentExam, StudentResponse)
+    from app.exam.models import (Collection, ExamInstance, NotificationJob,
+                                 Question, QuestionImport, StudentAttempt,
+                                 StudentExam, StudentExamSummary,
+                                 StudentResponse)
 
     client = AsyncIOMotorClient(settings.MONGODB_URL)
 
@@ -22,5 +24,8 @@ async def init_db():
             StudentExam,
             StudentAttempt,
             StudentResponse,
+            StudentExamSummary,
+            NotificationJob,
+            QuestionImport,
         ],
     )
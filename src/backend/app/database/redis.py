@@ -1,8 +1,28 @@
+from typing import Optional
+
 import redis.asyncio as redis
 
 from app.settings import settings
 
+_shared_client: Optional[redis.Redis] = None
+
 
 async def get_redis_client():
     """Get Redis client as a dependency"""
     return redis.Redis.from_url(settings.REDIS_URL, decode_responses=True)
+
+
+def get_shared_redis_client() -> redis.Redis:
+    """
+    Client shared by the whole process, for calls made on every request: its
+    connection pool is reused instead of opening a connection per call.
+    """
+    global _shared_client
+    if _shared_client is None:
+        _shared_client = redis.Redis.from_url(
+            settings.REDIS_URL,
+            decode_responses=True,
+            socket_connect_timeout=1,
+            socket_timeout=1,
+        )
+    return _shared_client
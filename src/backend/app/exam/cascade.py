@@ -0,0 +1,239 @@
+import logging
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from bson import DBRef
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from app.auth.models import User
+from app.auth.schemas import UserRole
+from app.celery.scheduler import reminder_scheduler
+from app.exam.models import (Collection, ExamInstance, NotificationJob,
+                             Question, StudentAttempt, StudentExam,
+                             StudentExamSummary, StudentResponse)
+
+logger = logging.getLogger(__name__)
+
+# Ids per $in query: keeps each command well under the 16MB BSON limit
+CHUNK_SIZE = 1000
+
+# Called with the current step, and the documents handled out of the total
+ProgressCallback = Callable[[str, int, int], None]
+
+USERS = User.Settings.name
+QUESTIONS = Question.Settings.name
+COLLECTIONS = Collection.Settings.name
+EXAM_INSTANCES = ExamInstance.Settings.name
+STUDENT_EXAMS = StudentExam.Settings.name
+STUDENT_ATTEMPTS = StudentAttempt.Settings.name
+STUDENT_RESPONSES = StudentResponse.Settings.name
+STUDENT_EXAM_SUMMARIES = StudentExamSummary.Settings.name
+NOTIFICATION_JOBS = NotificationJob.Settings.name
+
+
+def _chunks(ids: List[Any]) -> Iterator[List[Any]]:
+    for start in range(0, len(ids), CHUNK_SIZE):
+        yield ids[start : start + CHUNK_SIZE]
+
+
+def _refs(collection: str, ids: List[Any]) -> List[DBRef]:
+    """Links are stored as DBRefs, matched whole to use the field indexes"""
+    return [DBRef(collection, id) for id in ids]
+
+
+async def _distinct_ids(
+    db: AsyncIOMotorDatabase, collection: str, field: str, values: List[Any]
+) -> List[Any]:
+    """Ids of the documents whose `field` is one of `values`"""
+    ids = []
+    for chunk in _chunks(values):
+        ids.extend(await db[collection].distinct("_id", {field: {"$in": chunk}}))
+    return ids
+
+
+class _Deletion:
+    """Chunked delete_many calls, counting deleted documents per collection"""
+
+    def __init__(
+        self,
+        db: AsyncIOMotorDatabase,
+        total: int = 0,
+        on_progress: Optional[ProgressCallback] = None,
+    ):
+        self.db = db
+        self.total = total
+        self.on_progress = on_progress
+        self.done = 0
+        self.deleted: Dict[str, int] = {}
+
+    def report(self, step: str) -> None:
+        if self.on_progress is not None:
+            self.on_progress(step, self.done, self.total)
+
+    async def delete_in(
+        self, collection: str, field: str, values: List[Any], *, progress=True
+    ) -> None:
+        for chunk in _chunks(values):
+            result = await self.db[collection].delete_many({field: {"$in": chunk}})
+            self.deleted[collection] = (
+                self.deleted.get(collection, 0) + result.deleted_count
+            )
+            if progress:
+                self.done += len(chunk)
+                self.report(collection)
+
+    async def student_exams(
+        self, student_exam_ids: List[Any], attempt_ids: List[Any]
+    ) -> None:
+        """
+        Student exams with their attempts, responses, dashboard summaries and
+        reminder jobs
+        """
+        await self.delete_in(
+            STUDENT_RESPONSES,
+            "attempt_id",
+            _refs(STUDENT_ATTEMPTS, attempt_ids),
+            progress=False,
+        )
+        await self.delete_in(STUDENT_ATTEMPTS, "_id", attempt_ids)
+        await self.delete_in(
+            STUDENT_EXAM_SUMMARIES, "_id", student_exam_ids, progress=False
+        )
+        await self.delete_in(
+            NOTIFICATION_JOBS, "student_exam_id", student_exam_ids, progress=False
+        )
+        await self.delete_in(STUDENT_EXAMS, "_id", student_exam_ids)
+
+
+async def _attempt_ids(db: AsyncIOMotorDatabase, student_exam_ids: List[Any]):
+    return await _distinct_ids(
+        db, STUDENT_ATTEMPTS, "student_exam_id", _refs(STUDENT_EXAMS, student_exam_ids)
+    )
+
+
+async def delete_student_exams(
+    db: AsyncIOMotorDatabase, student_exam_ids: List[Any]
+) -> Dict[str, int]:
+    """
+    Delete student exams with their attempts, responses and summaries, in a
+    few delete_many calls. Document hooks are not run, so the exam instances
+    still list the students as assigned.
+    """
+    deletion = _Deletion(db)
+    await deletion.student_exams(
+        student_exam_ids, await _attempt_ids(db, student_exam_ids)
+    )
+    return deletion.deleted
+
+
+async def delete_exam_instance_student_exams(
+    db: AsyncIOMotorDatabase, instance_ids: List[Any]
+) -> Dict[str, int]:
+    """Delete every student exam taken on the exam instances"""
+    student_exam_ids = await _distinct_ids(
+        db, STUDENT_EXAMS, "exam_instance_id", _refs(EXAM_INSTANCES, instance_ids)
+    )
+    return await delete_student_exams(db, student_exam_ids)
+
+
+async def cascade_delete_user(
+    db: AsyncIOMotorDatabase,
+    user_id: str,
+    role: UserRole,
+    on_progress: Optional[ProgressCallback] = None,
+) -> Dict[str, int]:
+    """
+    Delete the exam data of a deleted user, returning the count per collection.
+
+    The affected ids are collected first with indexed queries, then deleted
+    with one delete_many per chunk of ids, children before parents, so that
+    an interrupted run never leaves documents pointing to deleted parents.
+    Document hooks are not run. Running it again resumes where it stopped.
+
+    Teachers and admins lose their collections, questions and exam instances
+    with every student exam taken on them, except the questions still linked
+    from the collections of other users (their forks included); students and
+    admins lose their own student exams and their exam assignments. The
+    pending reminders of the deleted student exams are cancelled.
+    """
+    owner = DBRef(USERS, user_id)
+    owns_exams = role in (UserRole.TEACHER, UserRole.ADMIN)
+    takes_exams = role in (UserRole.STUDENT, UserRole.ADMIN)
+
+    collection_ids: List[Any] = []
+    question_ids: List[Any] = []
+    instance_ids: List[Any] = []
+    if owns_exams:
+        collection_ids = await db[COLLECTIONS].distinct("_id", {"created_by": owner})
+        linked = await db[COLLECTIONS].distinct("questions", {"created_by": owner})
+        created = await db[QUESTIONS].distinct("_id", {"created_by": owner})
+        candidate_ids = {ref.id for ref in linked} | set(created)
+        # Questions still linked from the collections of other users, forks
+        # included, stay with these collections
+        kept_ids = set()
+        for chunk in _chunks(list(candidate_ids)):
+            still_linked = await db[COLLECTIONS].distinct(
+                "questions",
+                {
+                    "created_by": {"$ne": owner},
+                    "questions": {"$in": _refs(QUESTIONS, chunk)},
+                },
+            )
+            kept_ids.update(ref.id for ref in still_linked if ref.id in candidate_ids)
+        question_ids = list(candidate_ids - kept_ids)
+        instance_ids = await db[EXAM_INSTANCES].distinct("_id", {"created_by": owner})
+
+    student_exam_ids = set()
+    # Reminders of the student exams of the user, by exam instance
+    reminder_tags: Dict[Any, List[Any]] = {}
+    if takes_exams:
+        async for student_exam in db[STUDENT_EXAMS].find(
+            {"student_id": owner}, {"exam_instance_id": 1}
+        ):
+            student_exam_ids.add(student_exam["_id"])
+            reminder_tags.setdefault(student_exam["exam_instance_id"].id, []).append(
+                student_exam["_id"]
+            )
+    student_exam_ids.update(
+        await _distinct_ids(
+            db,
+            STUDENT_EXAMS,
+            "exam_instance_id",
+            _refs(EXAM_INSTANCES, instance_ids),
+        )
+    )
+    student_exam_ids = list(student_exam_ids)
+    attempt_ids = await _attempt_ids(db, student_exam_ids)
+
+    total = (
+        len(attempt_ids)
+        + len(student_exam_ids)
+        + len(instance_ids)
+        + len(collection_ids)
+        + len(question_ids)
+    )
+    # Before deleting the documents a resumed run would find them with
+    for instance_id in instance_ids:
+        await reminder_scheduler.cancel_group(instance_id)
+    for instance_id, tags in reminder_tags.items():
+        await reminder_scheduler.cancel(instance_id, tags)
+
+    deletion = _Deletion(db, total, on_progress)
+    deletion.report("collect")
+
+    await deletion.student_exams(student_exam_ids, attempt_ids)
+    if takes_exams:
+        await db[EXAM_INSTANCES].update_many(
+            {"assigned_students.student_id": owner},
+            {
+                "$pull": {"assigned_students": {"student_id": owner}},
+                "$set": {"updated_at": datetime.now(timezone.utc)},
+            },
+        )
+    await deletion.delete_in(EXAM_INSTANCES, "_id", instance_ids)
+    await deletion.delete_in(COLLECTIONS, "_id", collection_ids)
+    await deletion.delete_in(QUESTIONS, "_id", question_ids)
+
+    deleted = deletion.deleted
+    logger.info("Deleted the exam data of user %s: %s", user_id, deleted)
+    return deleted
@@ -1,8 +1,12 @@
-from app.exam.models import (Collection, ExamInstance, Question,
-                             StudentAttempt, StudentExam, StudentResponse)
+from app.exam.models import (Collection, ExamInstance, NotificationJob,
+                             Question, QuestionImport, StudentAttempt,
+                             StudentExam, StudentExamSummary, StudentResponse)
 from app.exam.repository import (CollectionRepository, ExamInstanceRepository,
-                                 QuestionRepository, StudentAttemptRepository,
+                                 NotificationJobRepository,
+                                 QuestionImportRepository, QuestionRepository,
+                                 StudentAttemptRepository,
                                  StudentExamRepository,
+                                 StudentExamSummaryRepository,
                                  StudentResponseRepository)
 
 
@@ -28,3 +32,15 @@ def get_student_attempt_repository() -> StudentAttemptRepository:
 
 def get_student_exam_repository() -> StudentExamRepository:
     return StudentExamRepository(StudentExam)
+
+
+def get_student_exam_summary_repository() -> StudentExamSummaryRepository:
+    return StudentExamSummaryRepository(StudentExamSummary)
+
+
+def get_notification_job_repository() -> NotificationJobRepository:
+    return NotificationJobRepository(NotificationJob)
+
+
+def get_question_import_repository() -> QuestionImportRepository:
+    return QuestionImportRepository(QuestionImport)
@@ -5,9 +5,10 @@ from typing import Any, Dict, List, Optional
 
 from beanie import BackLink, Delete, Document, Link, before_event
 from pydantic import BaseModel, ConfigDict, Field
+from pymongo import TEXT, IndexModel
 
 from app.auth.models import User
-from app.auth.schemas import UserRole
+from app.auth.schemas import UserResponse
 from app.database.mixins import TimestampMixin
 
 
@@ -23,6 +24,19 @@ class ExamStatus(str, Enum):
     ARCHIVED = "archived"
 
 
+class ImportFormat(str, Enum):
+    CSV = "csv"
+    JSON = "json"
+    GIFT = "gift"
+
+
+class ImportStatus(str, Enum):
+    PENDING = "pending"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+
 class StudentExamStatus(str, Enum):
     NOT_STARTED = "not_started"
     IN_PROGRESS = "in_progress"
@@ -117,6 +131,8 @@ class Question(Document, TimestampMixin):
         indexes = [
             "created_by",
             "type",
+            # Full-text search of the question bank
+            IndexModel([("question_text", TEXT)], name="question_text_search"),
         ]
 
     @before_event(Delete)
@@ -166,6 +182,8 @@ class Collection(Document, TimestampMixin):
 
     # List of question IDs - using Link for proper relationships
     questions: List[Link[Question]] = Field(default_factory=list)
+    # Collection this one is a fork of, sharing its questions until edited
+    forked_from: Optional[str] = None
 
     class Settings:
         name = "collections"
@@ -173,14 +191,29 @@ class Collection(Document, TimestampMixin):
         indexes = [
             "created_by",
             "status",
+            "questions",
+            # Full-text search of the catalog, a title match ranks higher
+            IndexModel(
+                [("title", TEXT), ("description", TEXT)],
+                weights={"title": 3, "description": 1},
+                name="collection_text_search",
+            ),
         ]
 
     @before_event(Delete)
     async def before_delete(self):
-        """Delete all questions linked to this collection when the collection is deleted"""
-        question_ids = []
-        for q in self.questions:
-            question_ids.append(q.ref.id)
+        """
+        Delete all questions linked to this collection when the collection is
+        deleted, except those still linked from other collections (forks)
+        """
+        refs = [q.ref for q in self.questions]
+        if not refs:
+            return
+        shared = await Collection.get_motor_collection().distinct(
+            "questions", {"_id": {"$ne": self.id}, "questions": {"$in": refs}}
+        )
+        shared_ids = {ref.id for ref in shared}
+        question_ids = [ref.id for ref in refs if ref.id not in shared_ids]
         if question_ids:
             await Question.find({"_id": {"$in": question_ids}}).delete()
 
@@ -194,6 +227,7 @@ class Collection(Document, TimestampMixin):
                 "created_by": "550e8400-e29b-41d4-a716-446655440001",
                 "status": "draft",
                 "questions": [],
+                "forked_from": None,
                 "created_at": "2025-04-16T11:01:29.000Z",
                 "updated_at": "2025-04-16T11:01:29.000Z",
             }
@@ -231,12 +265,12 @@ class ExamInstance(Document, TimestampMixin):
     @before_event(Delete)
     async def before_delete(self):
         """Delete all student exams associated with this exam instance when deleted"""
-        student_exams = await StudentExam.find(
-            StudentExam.exam_instance_id.id == self.id
-        ).to_list()
+        from app.exam.cascade import delete_exam_instance_student_exams
 
-        for exam in student_exams:
-            await exam.delete()
+        # In bulk: deleting them one by one would rewrite this instance each time
+        await delete_exam_instance_student_exams(
+            self.get_motor_collection().database, [self.id]
+        )
 
     model_config = ConfigDict(
         arbitrary_types_allowed=True,
@@ -283,11 +317,17 @@ class StudentResponse(Document, TimestampMixin):
     option_order: Dict[str, int] = Field(
         default_factory=dict
     )  # Maps option_id -> position
+    version: int = 0  # Attempt response_version at which this response last changed
 
     class Settings:
         name = "student_responses"
         use_state_management = True
-        indexes = ["attempt_id", "question_id", "score"]
+        indexes = [
+            "attempt_id",
+            "question_id",
+            "score",
+            [("attempt_id.$id", 1), ("version", 1)],  # Delta reloads
+        ]
 
     model_config = ConfigDict(
         arbitrary_types_allowed=True,
@@ -301,6 +341,7 @@ class StudentResponse(Document, TimestampMixin):
                 "score": 1.0,
                 "is_flagged": False,
                 "option_order": {"opt1": 2, "opt2": 0, "opt3": 1},
+                "version": 3,
                 "created_at": "2025-04-20T09:15:30.000Z",
                 "updated_at": "2025-04-20T09:15:30.000Z",
             }
@@ -319,6 +360,9 @@ class StudentAttempt(Document, TimestampMixin):
     pass_fail: Optional[PassFailStatus] = None
     last_auto_save: Optional[datetime] = None
     question_order: List[str] = Field(default_factory=list)
+    response_version: int = 0  # Incremented on every answer or flag change
+    # Versions assigned to responses still being written
+    pending_versions: List[int] = Field(default_factory=list)
 
     responses: List[BackLink[StudentResponse]] = Field(
         default_factory=list, json_schema_extra={"original_field": "attempt_id"}
@@ -327,7 +371,19 @@ class StudentAttempt(Document, TimestampMixin):
     class Settings:
         name = "student_attempts"
         use_state_management = True
-        indexes = ["student_exam_id", "status", "grade"]
+        indexes = [
+            "student_exam_id",
+            "status",
+            "grade",
+            [("student_exam_id.$id", 1), ("submitted_at", -1)],  # Exam reports
+        ]
+
+    @property
+    def written_response_version(self) -> int:
+        """Latest response version up to which every response is written"""
+        if self.pending_versions:
+            return min(self.pending_versions) - 1
+        return self.response_version
 
     @before_event(Delete)
     async def before_delete(self):
@@ -357,6 +413,8 @@ class StudentAttempt(Document, TimestampMixin):
                     "550e8400-e29b-41d4-a716-446655440011",
                     "550e8400-e29b-41d4-a716-446655440012",
                 ],
+                "response_version": 3,
+                "pending_versions": [],
                 "created_at": "2025-04-20T09:00:10.000Z",
                 "updated_at": "2025-04-20T09:14:30.000Z",
             }
@@ -391,6 +449,8 @@ class StudentExam(Document, TimestampMixin):
         for attempt in attempts:
             await attempt.delete()
 
+        await StudentExamSummary.find({"_id": self.id}).delete()
+
         exam_instance = await self.exam_instance_id.fetch()
         if exam_instance:
             exam_instance.assigned_students = [
@@ -417,25 +477,125 @@ class StudentExam(Document, TimestampMixin):
     )
 
 
-async def cascade_delete_user(user_id: str, role: UserRole):
+class ExamInstanceSnapshot(BaseModel):
+    """Copy of the exam instance fields shown on the student dashboard"""
+
+    id: str
+    title: str
+    start_date: datetime
+    end_date: datetime
+    status: ExamStatus
+    max_attempts: int = 1
+    passing_score: int = 50
+    security_settings: SecuritySettings = Field(default_factory=SecuritySettings)
+    notification_settings: NotificationSettings = Field(
+        default_factory=NotificationSettings
+    )
+    created_by: UserResponse
+
+    @classmethod
+    def from_instance(
+        cls, instance: ExamInstance, creator: User
+    ) -> "ExamInstanceSnapshot":
+        return cls(
+            id=instance.id,
+            title=instance.title,
+            start_date=instance.start_date,
+            end_date=instance.end_date,
+            status=instance.status,
+            max_attempts=instance.max_attempts,
+            passing_score=instance.passing_score,
+            security_settings=instance.security_settings,
+            notification_settings=instance.notification_settings,
+            created_by=UserResponse.model_validate(creator),
+        )
+
+
+class StudentExamSummary(Document, TimestampMixin):
     """
-    Cascade delete all data related to a user when they're deleted.
+    Denormalized read model of a StudentExam for the student dashboard.
+
+    Shares its ID with the StudentExam and is kept in sync on assignment,
+    start, submit and exam instance edits, so listing a student's exams is a
+    single indexed query without link resolution.
     """
-    # Delete all questions created by the user (can be teacher or admin)
-    if role == UserRole.TEACHER or role == UserRole.ADMIN:
-        # await Collection.find(Collection.created_by.id == user_id).delete()
-        # to support the cascade delete of collections
-        collections = await Collection.find(
-            Collection.created_by.id == user_id
-        ).to_list()
-        for collection in collections:
-            await collection.delete()
-        await ExamInstance.find(ExamInstance.created_by.id == user_id).delete()
 
-    # Delete all student exams and responses
-    if role == UserRole.STUDENT or role == UserRole.ADMIN:
-        student_exams = await StudentExam.find(
-            StudentExam.student_id.id == user_id
-        ).to_list()
-        for exam in student_exams:
-            await exam.delete()
+    id: str
+    student_id: str
+    exam_instance_id: ExamInstanceSnapshot
+    current_status: StudentExamStatus = StudentExamStatus.NOT_STARTED
+    attempts_count: int = 0
+    last_grade: Optional[float] = None
+    last_pass_fail: Optional[PassFailStatus] = None
+
+    class Settings:
+        name = "student_exam_summaries"
+        indexes = ["student_id", "exam_instance_id.id"]
+
+
+# Fired notification jobs are kept this long, in seconds
+FIRED_NOTIFICATION_JOB_TTL = 7 * 24 * 3600
+
+
+class NotificationJob(Document, TimestampMixin):
+    """
+    A reminder of a student exam scheduled as a Celery ETA task, kept to
+    revoke it when the student is unassigned. Its ID is the Celery task ID.
+
+    This used to be a dict of task IDs per student exam in the User document,
+    loaded with the user on every request and rewritten in full.
+    """
+
+    id: str
+    user_id: str
+    student_exam_id: str
+    fired_at: Optional[datetime] = None
+
+    class Settings:
+        name = "notification_jobs"
+        indexes = [
+            IndexModel([("user_id", 1), ("student_exam_id", 1)]),
+            "student_exam_id",
+            IndexModel(
+                [("fired_at", 1)], expireAfterSeconds=FIRED_NOTIFICATION_JOB_TTL
+            ),
+        ]
+
+
+# Question imports are kept this long after they started, in seconds
+QUESTION_IMPORT_TTL = 7 * 24 * 3600
+
+
+class ImportRowError(BaseModel):
+    # Line of a CSV or GIFT file, or position of a JSON value
+    row: int
+    error: str
+
+
+class QuestionImport(Document, TimestampMixin):
+    """
+    A question bank file imported into a collection by a background job.
+    Its ID is the Celery task ID, the file is kept in GridFS until imported.
+    """
+
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    collection_id: str
+    created_by: str
+    format: ImportFormat
+    file_id: Optional[Any] = None
+    status: ImportStatus = ImportStatus.PENDING
+    # Rows read so far, and of those the imported and rejected ones
+    rows: int = 0
+    imported: int = 0
+    failed: int = 0
+    # The first rejected rows only
+    errors: List[ImportRowError] = Field(default_factory=list)
+    # Why the whole import failed
+    error: Optional[str] = None
+
+    class Settings:
+        name = "question_imports"
+        indexes = [
+            "created_by",
+            IndexModel([("created_at", 1)], expireAfterSeconds=QUESTION_IMPORT_TTL),
+        ]
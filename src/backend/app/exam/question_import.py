@@ -0,0 +1,496 @@
+import logging
+import re
+from datetime import datetime, timezone
+from typing import (Any, AsyncIterable, AsyncIterator, Dict, List, NamedTuple,
+                    Optional, Tuple)
+
+from bson import DBRef
+from fastapi import HTTPException
+from motor.motor_asyncio import AsyncIOMotorDatabase, AsyncIOMotorGridFSBucket
+from pydantic import ValidationError
+
+from app.auth.models import User
+from app.core.exceptions import BadRequestError
+from app.core.streaming import iter_csv_rows, iter_json_values, iter_lines
+from app.exam.models import (Collection, ImportFormat, ImportStatus, Question,
+                             QuestionImport, QuestionType)
+from app.i18n import _
+
+logger = logging.getLogger(__name__)
+
+# Questions validated and inserted at once
+BATCH_SIZE = 500
+
+# Rejected rows reported with their error, the others are only counted
+MAX_REPORTED_ERRORS = 100
+
+# GridFS bucket of the files waiting to be imported
+BUCKET = "question_imports"
+
+USERS = User.Settings.name
+QUESTIONS = Question.Settings.name
+COLLECTIONS = Collection.Settings.name
+QUESTION_IMPORTS = QuestionImport.Settings.name
+
+
+class ParsedRow(NamedTuple):
+    """A question read from a file, or why it could not be read"""
+
+    row: int
+    data: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+
+
+# CSV
+
+
+def _question_from_csv(record: Dict[str, str]) -> Dict[str, Any]:
+    """
+    A question from a CSV row. Options are separated by "|", and the correct
+    ones start with "*".
+    """
+    data = {
+        key: value.strip()
+        for key, value in record.items()
+        if key and value and value.strip()
+    }
+    if "type" in data:
+        data["type"] = data["type"].lower()
+    options = data.pop("options", None)
+    if options:
+        data["options"] = [
+            (
+                {"text": option[1:].strip(), "is_correct": True}
+                if option.startswith("*")
+                else {"text": option, "is_correct": False}
+            )
+            for option in (option.strip() for option in options.split("|"))
+            if option
+        ]
+    return data
+
+
+async def _csv_questions(chunks: AsyncIterable[bytes]) -> AsyncIterator[ParsedRow]:
+    header = None
+    async for line, row in iter_csv_rows(chunks):
+        if header is None:
+            header = [cell.strip().lower() for cell in row]
+            if "question_text" not in header or "type" not in header:
+                raise BadRequestError(
+                    _("The CSV file must have question_text and type columns")
+                )
+            continue
+        if len(row) > len(header):
+            yield ParsedRow(line, error=str(_("More values than columns")))
+            continue
+        yield ParsedRow(line, _question_from_csv(dict(zip(header, row))))
+
+
+# JSON
+
+
+async def _json_questions(chunks: AsyncIterable[bytes]) -> AsyncIterator[ParsedRow]:
+    async for position, value in iter_json_values(chunks):
+        if isinstance(value, dict):
+            yield ParsedRow(position, value)
+        else:
+            yield ParsedRow(position, error=str(_("A question must be a JSON object")))
+
+
+# GIFT, the question format of Moodle
+
+_GIFT_MARKUP = re.compile(r"^\s*\[(html|moodle|plain|markdown)\]", re.IGNORECASE)
+_GIFT_WEIGHT = re.compile(r"^%(-?\d+(?:\.\d+)?)%")
+_GIFT_ESCAPE = re.compile(r"\\(.)")
+
+
+def _find_unescaped(text: str, token: str, start: int = 0) -> int:
+    index = start
+    while index < len(text):
+        if text[index] == "\\":
+            index += 2
+        elif text.startswith(token, index):
+            return index
+        else:
+            index += 1
+    return -1
+
+
+def _split_unescaped(text: str, separators: str) -> List[Tuple[str, str]]:
+    """Parts of a text split on unescaped separators, with the separator before"""
+    parts = []
+    separator = ""
+    start = index = 0
+    while index < len(text):
+        if text[index] == "\\":
+            index += 2
+            continue
+        if text[index] in separators:
+            parts.append((separator, text[start:index]))
+            separator = text[index]
+            start = index + 1
+        index += 1
+    parts.append((separator, text[start:]))
+    return parts
+
+
+def _unescape(text: str) -> str:
+    text = text.replace("\\n", "\n")
+    return _GIFT_ESCAPE.sub(r"\1", text).strip()
+
+
+def _question_from_gift(text: str) -> Dict[str, Any]:
+    """
+    A question from its GIFT text. Multiple choice, true/false, short answer
+    and missing word questions are supported.
+    """
+    if text.startswith("::"):
+        title_end = _find_unescaped(text, "::", 2)
+        if title_end < 0:
+            raise ValueError(_("The question title is not closed"))
+        text = text[title_end + 2 :]
+
+    start = _find_unescaped(text, "{")
+    end = _find_unescaped(text, "}", start + 1) if start >= 0 else -1
+    if end < 0:
+        raise ValueError(_("The answers must be between braces"))
+    before = _GIFT_MARKUP.sub("", text[:start])
+    answers = text[start + 1 : end].strip()
+    after = text[end + 1 :]
+    # A missing word question: the answers replace a blank in the text
+    if after.strip():
+        before = f"{before.rstrip()} _____ {after.lstrip()}"
+    question_text = _unescape(before)
+
+    if not answers:
+        raise ValueError(_("Essay questions are not supported"))
+    if answers.startswith("#"):
+        raise ValueError(_("Numerical questions are not supported"))
+
+    head = _split_unescaped(answers, "#")[0][1].strip().upper()
+    if head in ("T", "TRUE", "F", "FALSE"):
+        is_true = head.startswith("T")
+        return {
+            "question_text": question_text,
+            "type": QuestionType.SINGLECHOICE.value,
+            "options": [
+                {"text": "True", "is_correct": is_true},
+                {"text": "False", "is_correct": not is_true},
+            ],
+        }
+
+    parts = _split_unescaped(answers, "=~")
+    if parts[0][1].strip():
+        raise ValueError(_("Each answer must start with = or ~"))
+    options = []
+    weighted = False
+    for marker, part in parts[1:]:
+        # Without the feedback
+        answer = _split_unescaped(part, "#")[0][1].strip()
+        if _find_unescaped(answer, "->") >= 0:
+            raise ValueError(_("Matching questions are not supported"))
+        weight = _GIFT_WEIGHT.match(answer)
+        if weight:
+            answer = answer[weight.end() :]
+            weighted = weighted or marker == "~"
+            is_correct = float(weight.group(1)) > 0
+        else:
+            is_correct = marker == "="
+        options.append({"text": _unescape(answer), "is_correct": is_correct})
+
+    if all(marker == "=" for marker, _part in parts[1:]):
+        return {
+            "question_text": question_text,
+            "type": QuestionType.SHORTANSWER.value,
+            "correct_input_answer": options[0]["text"],
+        }
+    correct = sum(option["is_correct"] for option in options)
+    question_type = (
+        QuestionType.MCQ if weighted or correct > 1 else QuestionType.SINGLECHOICE
+    )
+    return {
+        "question_text": question_text,
+        "type": question_type.value,
+        "options": options,
+    }
+
+
+def _parse_gift(line: int, lines: List[str]) -> ParsedRow:
+    try:
+        return ParsedRow(line, _question_from_gift("\n".join(lines).strip()))
+    except ValueError as exc:
+        return ParsedRow(line, error=str(exc))
+
+
+async def _gift_questions(chunks: AsyncIterable[bytes]) -> AsyncIterator[ParsedRow]:
+    """Questions separated by blank lines, skipping comments and categories"""
+    lines: List[str] = []
+    number = start = 0
+    async for line in iter_lines(chunks):
+        number += 1
+        stripped = line.strip()
+        if stripped.startswith("//") or stripped.startswith("$CATEGORY:"):
+            continue
+        if not stripped:
+            if lines:
+                yield _parse_gift(start, lines)
+                lines = []
+            continue
+        if not lines:
+            start = number
+        lines.append(line)
+    if lines:
+        yield _parse_gift(start, lines)
+
+
+PARSERS = {
+    ImportFormat.CSV: _csv_questions,
+    ImportFormat.JSON: _json_questions,
+    ImportFormat.GIFT: _gift_questions,
+}
+
+
+def parse_questions(
+    format: ImportFormat, chunks: AsyncIterable[bytes]
+) -> AsyncIterator[ParsedRow]:
+    """Questions of a streamed question bank file, read as the chunks arrive"""
+    return PARSERS[format](chunks)
+
+
+# Import
+
+
+def _validation_message(exc: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(loc) for loc in error['loc'])}: {error['msg']}"
+        for error in exc.errors()
+    )
+
+
+class _Import:
+    """Questions validated and inserted in batches, counted in the import job"""
+
+    def __init__(self, db: AsyncIOMotorDatabase, job: Dict[str, Any], position: int):
+        self.db = db
+        self.job = job
+        self.position = position
+        self.batch: List[ParsedRow] = []
+
+    async def add(self, parsed: ParsedRow) -> None:
+        self.batch.append(parsed)
+        if len(self.batch) >= BATCH_SIZE:
+            await self.flush()
+
+    def _validate(self) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        # Not imported at the top: the collection service starts the imports
+        from app.exam.teacher.schemas import QuestionSchema
+        from app.exam.teacher.services.collection_service import CollectionService
+
+        now = datetime.now(timezone.utc)
+        documents, errors = [], []
+        for parsed in self.batch:
+            if parsed.error is not None:
+                errors.append({"row": parsed.row, "error": parsed.error})
+                continue
+            try:
+                question = QuestionSchema.model_validate(parsed.data)
+                data = CollectionService._prepare_question_data(
+                    question, self.job["created_by"]
+                )
+                CollectionService._validate_question_by_type(data)
+            except ValidationError as exc:
+                errors.append({"row": parsed.row, "error": _validation_message(exc)})
+                continue
+            except HTTPException as exc:
+                errors.append({"row": parsed.row, "error": str(exc.detail)})
+                continue
+            documents.append(
+                {
+                    "_id": data["_id"],
+                    "position": self.position,
+                    "question_text": data["question_text"],
+                    "type": data["type"].value,
+                    "created_by": DBRef(USERS, data["created_by"]),
+                    "has_katex": data["has_katex"],
+                    "options": data["options"],
+                    "correct_input_answer": data["correct_input_answer"],
+                    "weight": data["weight"],
+                    "created_at": now,
+                    "updated_at": now,
+                }
+            )
+            self.position += 1
+        return documents, errors
+
+    async def flush(self) -> None:
+        if not self.batch:
+            return
+        documents, errors = self._validate()
+        now = datetime.now(timezone.utc)
+        if documents:
+            await self.db[QUESTIONS].insert_many(documents)
+            await self.db[COLLECTIONS].update_one(
+                {"_id": self.job["collection_id"]},
+                {
+                    "$push": {
+                        "questions": {
+                            "$each": [
+                                DBRef(QUESTIONS, document["_id"])
+                                for document in documents
+                            ]
+                        }
+                    },
+                    "$set": {"updated_at": now},
+                },
+            )
+
+        update: Dict[str, Any] = {
+            "$inc": {
+                "rows": len(self.batch),
+                "imported": len(documents),
+                "failed": len(errors),
+            },
+            "$set": {"updated_at": now},
+        }
+        if errors:
+            update["$push"] = {
+                "errors": {"$each": errors, "$slice": MAX_REPORTED_ERRORS}
+            }
+        await self.db[QUESTION_IMPORTS].update_one({"_id": self.job["_id"]}, update)
+        self.batch = []
+
+
+async def _next_position(db: AsyncIOMotorDatabase, collection: Dict[str, Any]) -> int:
+    """Position after the last question of a collection"""
+    question_ids = [ref.id for ref in collection.get("questions", [])]
+    cursor = db[QUESTIONS].aggregate(
+        [
+            {"$match": {"_id": {"$in": question_ids}}},
+            {"$group": {"_id": None, "last": {"$max": "$position"}}},
+        ]
+    )
+    result = await cursor.to_list(length=1)
+    if not result or result[0]["last"] is None:
+        return 0
+    return result[0]["last"] + 1
+
+
+async def import_questions(
+    db: AsyncIOMotorDatabase, job: Dict[str, Any], chunks: AsyncIterable[bytes]
+) -> Dict[str, Any]:
+    """
+    Import the questions of a streamed file into the collection of an import
+    job, returning the job. The rows are validated and inserted in batches of
+    BATCH_SIZE, and linked to the collection after its last question, in
+    file order. The job counts the rows so far; rejected rows do not stop the
+    import, but an unreadable file does.
+    """
+    imports = db[QUESTION_IMPORTS]
+    await imports.update_one(
+        {"_id": job["_id"]},
+        {
+            "$set": {
+                "status": ImportStatus.RUNNING.value,
+                "updated_at": datetime.now(timezone.utc),
+            }
+        },
+    )
+
+    status, error = ImportStatus.COMPLETED, None
+    try:
+        collection = await db[COLLECTIONS].find_one(
+            {"_id": job["collection_id"]}, {"questions": 1}
+        )
+        if collection is None:
+            status, error = ImportStatus.FAILED, str(_("Collection not found"))
+        else:
+            batches = _Import(db, job, await _next_position(db, collection))
+            try:
+                async for parsed in parse_questions(
+                    ImportFormat(job["format"]), chunks
+                ):
+                    await batches.add(parsed)
+            except HTTPException as exc:
+                status, error = ImportStatus.FAILED, str(exc.detail)
+            # Rows read before the file turned out unreadable are imported too
+            await batches.flush()
+    except Exception:
+        # The job must not stay running, its clients poll until it ends
+        logger.exception("Question import %s failed", job["_id"])
+        status, error = ImportStatus.FAILED, str(_("The import failed unexpectedly"))
+
+    await imports.update_one(
+        {"_id": job["_id"]},
+        {
+            "$set": {
+                "status": status.value,
+                "error": error,
+                "updated_at": datetime.now(timezone.utc),
+            }
+        },
+    )
+    job = await imports.find_one({"_id": job["_id"]})
+    logger.info(
+        "Question import %s %s: %s rows, %s imported",
+        job["_id"],
+        status.value,
+        job["rows"],
+        job["imported"],
+    )
+    return job
+
+
+# Files waiting to be imported
+
+
+def _bucket(db: AsyncIOMotorDatabase) -> AsyncIOMotorGridFSBucket:
+    return AsyncIOMotorGridFSBucket(db, bucket_name=BUCKET)
+
+
+async def save_import_file(
+    db: AsyncIOMotorDatabase,
+    import_id: str,
+    chunks: AsyncIterable[bytes],
+    max_size: int,
+) -> Any:
+    """Store a streamed file in GridFS as it arrives, returning its id"""
+    grid_in = _bucket(db).open_upload_stream(import_id)
+    size = 0
+    try:
+        async for chunk in chunks:
+            size += len(chunk)
+            if size > max_size:
+                raise BadRequestError(
+                    _("The file must be at most {size} MB").format(
+                        size=max_size // (1024 * 1024)
+                    )
+                )
+            await grid_in.write(chunk)
+    except BaseException:
+        await grid_in.abort()
+        raise
+    await grid_in.close()
+    return grid_in._id
+
+
+async def _iter_import_file(
+    db: AsyncIOMotorDatabase, file_id: Any
+) -> AsyncIterator[bytes]:
+    grid_out = await _bucket(db).open_download_stream(file_id)
+    while chunk := await grid_out.readchunk():
+        yield chunk
+
+
+async def run_question_import(
+    db: AsyncIOMotorDatabase, import_id: str
+) -> Optional[Dict[str, Any]]:
+    """Import a file waiting in GridFS, which is deleted once imported"""
+    job = await db[QUESTION_IMPORTS].find_one({"_id": import_id})
+    if job is None:
+        logger.warning("Question import %s not found", import_id)
+        return None
+    try:
+        job = await import_questions(db, job, _iter_import_file(db, job["file_id"]))
+    finally:
+        await _bucket(db).delete(job["file_id"])
+    return {key: job[key] for key in ("status", "rows", "imported", "failed")}
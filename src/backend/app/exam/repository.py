@@ -1,15 +1,28 @@
-from datetime import datetime, timezone
-from typing import Dict, List
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, AsyncIterable, Dict, List, Optional
 
+from bson import DBRef
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+
+from app.auth.models import User
 from app.core.repository.base_repository import BaseRepository
+from app.core.schemas import ResourceVersion
+from app.exam.cascade import delete_student_exams
+from app.exam.question_import import save_import_file
 from app.exam.models import (
     Collection,
     ExamInstance,
+    ExamInstanceSnapshot,
     ExamStatus,
+    NotificationJob,
     Question,
+    QuestionImport,
+    QuestionType,
     StudentAttempt,
     StudentExam,
     StudentExamStatus,
+    StudentExamSummary,
     StudentResponse,
 )
 
@@ -20,26 +33,228 @@ class CollectionRepository(BaseRepository[Collection]):
     async def get_published(self) -> List[Collection]:
         """Get all published collections"""
         # Fetch collections with linked objects (created_by user)
-        collections = await self.model_class.find(
-            {"status": ExamStatus.PUBLISHED}
-        ).to_list()
+        return await self.model_class.find({"status": ExamStatus.PUBLISHED}).to_list()
+
+    async def search_published(
+        self,
+        text: Optional[str],
+        question_ids: List[str],
+        *,
+        owner_id: Optional[str] = None,
+        limit: int = 1000,
+    ) -> List[Dict[str, Any]]:
+        """
+        Published collections whose title or description match a full-text
+        search (unless `text` is None), or which link one of `question_ids`,
+        best text matches first. Besides the collection fields, each has its
+        text `score`, its `question_count` and its `matched_questions`.
+        """
+        refs = [DBRef(Question.Settings.name, id) for id in question_ids]
+        matches: List[Dict[str, Any]] = []
+        if text is not None:
+            matches.append({"$text": {"$search": text}})
+        if refs:
+            matches.append({"questions": {"$in": refs}})
+        if not matches:
+            return []
+
+        query: Dict[str, Any] = {"status": ExamStatus.PUBLISHED.value}
+        if owner_id is not None:
+            query["created_by"] = DBRef(User.Settings.name, owner_id)
+        if len(matches) == 1:
+            query.update(matches[0])
+        else:
+            query["$or"] = matches
 
-        for collection in collections:
-            if hasattr(collection.created_by, "notifications_tasks_id"):
-                collection.created_by.notifications_tasks_id = []
-        return collections
+        pipeline = [
+            {"$match": query},
+            {
+                "$project": {
+                    "title": 1,
+                    "description": 1,
+                    "created_by": 1,
+                    "updated_at": 1,
+                    "score": (
+                        {"$meta": "textScore"} if text is not None else {"$literal": 0}
+                    ),
+                    "question_count": {"$size": "$questions"},
+                    # Literal, as DBRefs would be read as $ref and $id operators
+                    "matched_questions": {
+                        "$filter": {
+                            "input": "$questions",
+                            "as": "question",
+                            "cond": {"$in": ["$$question", {"$literal": refs}]},
+                        }
+                    },
+                }
+            },
+            {"$sort": {"score": -1, "_id": 1}},
+            {"$limit": limit},
+        ]
+        cursor = self.model_class.get_motor_collection().aggregate(pipeline)
+        return await cursor.to_list(length=None)
+
+    async def fork(
+        self, collection_id: str, user_id: str, title: Optional[str] = None
+    ) -> str:
+        """
+        Copy a collection to a new draft of the user linking the same
+        questions, returning its id. The copy is made by the database in a
+        single aggregation, and no question is copied: forks share the
+        questions of their source until they edit them.
+        """
+        fork_id = str(uuid.uuid4())
+        now = datetime.now(timezone.utc)
+        pipeline = [
+            {"$match": {"_id": collection_id}},
+            {
+                "$project": {
+                    "_id": {"$literal": fork_id},
+                    "title": 1 if title is None else {"$literal": title},
+                    "description": 1,
+                    "questions": 1,
+                    "created_by": {"$literal": DBRef(User.Settings.name, user_id)},
+                    "status": {"$literal": ExamStatus.DRAFT.value},
+                    "forked_from": "$_id",
+                    "created_at": {"$literal": now},
+                    "updated_at": {"$literal": now},
+                }
+            },
+            {
+                "$merge": {
+                    "into": Collection.Settings.name,
+                    "whenMatched": "fail",
+                    "whenNotMatched": "insert",
+                }
+            },
+        ]
+        await self.model_class.get_motor_collection().aggregate(pipeline).to_list(
+            length=None
+        )
+        return fork_id
+
+    async def is_question_shared(self, question_id: str, collection_id: str) -> bool:
+        """Whether a question is linked from another collection than this one"""
+        collection = await self.model_class.get_motor_collection().find_one(
+            {
+                "_id": {"$ne": collection_id},
+                "questions": DBRef(Question.Settings.name, question_id),
+            },
+            {"_id": 1},
+        )
+        return collection is not None
+
+    async def replace_question(
+        self, collection_id: str, question_id: str, new_question_id: str
+    ) -> bool:
+        """
+        Link another question in place of one of a collection, keeping its
+        place. False if the collection changed meanwhile.
+        """
+        ref = DBRef(Question.Settings.name, question_id)
+        motor_collection = self.model_class.get_motor_collection()
+        collection = await motor_collection.find_one(
+            {"_id": collection_id, "questions": ref}, {"questions": 1}
+        )
+        if not collection:
+            return False
+
+        index = collection["questions"].index(ref)
+        result = await motor_collection.update_one(
+            {"_id": collection_id, f"questions.{index}": ref},
+            {
+                "$set": {
+                    f"questions.{index}": DBRef(
+                        Question.Settings.name, new_question_id
+                    ),
+                    "updated_at": datetime.now(timezone.utc),
+                }
+            },
+        )
+        return result.modified_count == 1
+
+    async def remove_question(self, collection_id: str, question_id: str) -> None:
+        """Unlink a question from a collection"""
+        await self.model_class.get_motor_collection().update_one(
+            {"_id": collection_id},
+            {
+                "$pull": {"questions": DBRef(Question.Settings.name, question_id)},
+                "$set": {"updated_at": datetime.now(timezone.utc)},
+            },
+        )
+
+    async def get_version(self, collection_id: str) -> Optional[ResourceVersion]:
+        """
+        Get the version of a collection including its questions, which are
+        edited and deleted without touching the collection document.
+        """
+        collection = await self.model_class.get_motor_collection().find_one(
+            {"_id": collection_id}, {"updated_at": 1, "questions": 1}
+        )
+        if not collection:
+            return None
+
+        question_ids = [ref.id for ref in collection.get("questions", [])]
+        questions = await self._aggregate_version(
+            Question, {"_id": {"$in": question_ids}}
+        )
+        if not questions:
+            return ResourceVersion(collection["updated_at"], "0")
+        return ResourceVersion(
+            max(collection["updated_at"], questions.last_modified), questions.tag
+        )
 
 
 class QuestionRepository(BaseRepository[Question]):
     """Repository for Question model operations"""
 
-    pass
+    async def search_text(
+        self,
+        text: str,
+        *,
+        question_type: Optional[QuestionType] = None,
+        limit: int = 1000,
+    ) -> Dict[str, float]:
+        """
+        Text score of the best matches of a full-text search on the question
+        texts, by question id
+        """
+        query: Dict[str, Any] = {"$text": {"$search": text}}
+        if question_type is not None:
+            query["type"] = question_type.value
+        score = {"$meta": "textScore"}
+        cursor = (
+            self.model_class.get_motor_collection()
+            .find(query, {"score": score})
+            .sort([("score", score)])
+            .limit(limit)
+        )
+        return {question["_id"]: question["score"] async for question in cursor}
 
 
 class ExamInstanceRepository(BaseRepository[ExamInstance]):
     """Repository for ExamInstance model operations"""
 
-    pass
+    async def add_assigned_students(
+        self, instance_id: str, student_ids: List[str]
+    ) -> bool:
+        """
+        Append students to the assignments of an exam instance, unless one of
+        them is already assigned (then none is), returning whether they were.
+        """
+        refs = [DBRef(User.Settings.name, student_id) for student_id in student_ids]
+        assignments = [
+            {"student_id": ref, "notified": False, "notification_timestamp": None}
+            for ref in refs
+        ]
+        result = await self.model_class.get_motor_collection().update_one(
+            {"_id": instance_id, "assigned_students.student_id": {"$nin": refs}},
+            {
+                "$push": {"assigned_students": {"$each": assignments}},
+                "$set": {"updated_at": datetime.now(timezone.utc)},
+            },
+        )
+        return result.modified_count == 1
 
 
 class StudentResponseRepository(BaseRepository[StudentResponse]):
@@ -68,6 +283,14 @@ class StudentResponseRepository(BaseRepository[StudentResponse]):
             option_order = option_orders.get(question.id, {})
             await self.create_response(attempt, question, option_order)
 
+    async def get_changed_since(
+        self, attempt_id: str, since_version: int
+    ) -> List[StudentResponse]:
+        """Get responses of an attempt changed after the given response version."""
+        return await self.model_class.find(
+            {"attempt_id.$id": attempt_id, "version": {"$gt": since_version}}
+        ).to_list()
+
 
 class StudentAttemptRepository(BaseRepository[StudentAttempt]):
     """Repository for StudentAttempt model operations"""
@@ -84,6 +307,93 @@ class StudentAttemptRepository(BaseRepository[StudentAttempt]):
         )
         return await self.create(new_attempt.model_dump())
 
+    async def bump_response_version(self, attempt_id: str) -> int:
+        """
+        Assign the next response version of an attempt and record the
+        auto-save time, returning the new version.
+
+        The version stays pending until release_response_version, in the same
+        update as it is assigned, so that reloads never report a version whose
+        response is not written yet.
+        """
+        collection = self.model_class.get_motor_collection()
+        while True:
+            attempt = await collection.find_one(
+                {"_id": attempt_id}, {"response_version": 1}
+            )
+            if not attempt:
+                return 0
+            current = attempt.get("response_version")
+            version = (current or 0) + 1
+            now = datetime.now(timezone.utc)
+            # Assigned only if no other write took this version meanwhile
+            result = await collection.update_one(
+                {"_id": attempt_id, "response_version": current},
+                {
+                    "$set": {
+                        "response_version": version,
+                        "last_auto_save": now,
+                        "updated_at": now,
+                    },
+                    "$push": {"pending_versions": version},
+                },
+            )
+            if result.modified_count:
+                return version
+
+    async def release_response_version(self, attempt_id: str, version: int) -> None:
+        """Mark the response carrying a version as written"""
+        await self.model_class.get_motor_collection().update_one(
+            {"_id": attempt_id}, {"$pull": {"pending_versions": version}}
+        )
+
+    async def get_version(self, attempt_id: str) -> Optional[ResourceVersion]:
+        """
+        Get the version of an attempt as shown for review, which also depends
+        on the exam instance settings and on the questions it was built from.
+        """
+        attempt = await self.model_class.get_motor_collection().find_one(
+            {"_id": attempt_id},
+            {"updated_at": 1, "student_exam_id": 1, "question_order": 1},
+        )
+        if not attempt:
+            return None
+
+        student_exam = await StudentExam.get_motor_collection().find_one(
+            {"_id": attempt["student_exam_id"].id}, {"exam_instance_id": 1}
+        )
+        if not student_exam:
+            return None
+        instance = await ExamInstance.get_motor_collection().find_one(
+            {"_id": student_exam["exam_instance_id"].id}, {"updated_at": 1}
+        )
+        if not instance:
+            return None
+
+        last_modified = max(attempt["updated_at"], instance["updated_at"])
+        questions = await self._aggregate_version(
+            Question, {"_id": {"$in": attempt.get("question_order", [])}}
+        )
+        if not questions:
+            return ResourceVersion(last_modified, "0")
+        return ResourceVersion(
+            max(last_modified, questions.last_modified), questions.tag
+        )
+
+
+def _median(values: str) -> Dict[str, Any]:
+    """
+    Expression of the median of a sorted array of numbers: its middle value,
+    or the mean of its two middle values when their count is even
+    """
+    last = {"$subtract": [{"$size": values}, 1]}
+    return {
+        "$avg": [
+            {"$arrayElemAt": [values, {"$toInt": {"$floor": {"$divide": [last, 2]}}}]},
+            {"$arrayElemAt": [values, {"$toInt": {"$ceil": {"$divide": [last, 2]}}}]},
+        ]
+    }
+
 
 class StudentExamRepository(BaseRepository[StudentExam]):
     """Repository for StudentExam model operations"""
@@ -104,3 +414,450 @@ class StudentExamRepository(BaseRepository[StudentExam]):
             fetch_links=fetch_links,
         )
         return student_exam
+
+    async def get_ids_by_exam(
+        self, exam_id: str, student_ids: Optional[List[str]] = None
+    ) -> Dict[str, str]:
+        """
+        Ids of the StudentExams of an exam instance by student id, optionally
+        only for some students
+        """
+        query: Dict[str, Any] = {
+            "exam_instance_id": DBRef(ExamInstance.Settings.name, exam_id)
+        }
+        if student_ids is not None:
+            query["student_id"] = {
+                "$in": [DBRef(User.Settings.name, id) for id in student_ids]
+            }
+        cursor = self.model_class.get_motor_collection().find(query, {"student_id": 1})
+        return {
+            student_exam["student_id"].id: student_exam["_id"]
+            async for student_exam in cursor
+        }
+
+    async def count_by_exam(self, exam_ids: List[str]) -> Dict[str, Dict[str, int]]:
+        """
+        Number of student exams of each exam instance, in total (the assigned
+        students) and in progress or submitted, in a single aggregation.
+        Instances without student exams are left out.
+        """
+        if not exam_ids:
+            return {}
+
+        def count_status(status: str) -> Dict[str, Any]:
+            return {"$sum": {"$cond": [{"$eq": ["$current_status", status]}, 1, 0]}}
+
+        pipeline = [
+            {
+                "$match": {
+                    "exam_instance_id": {
+                        "$in": [
+                            DBRef(ExamInstance.Settings.name, id) for id in exam_ids
+                        ]
+                    }
+                }
+            },
+            {
+                "$group": {
+                    "_id": "$exam_instance_id",
+                    "assigned": {"$sum": 1},
+                    "in_progress": count_status(StudentExamStatus.IN_PROGRESS.value),
+                    "submitted": count_status(StudentExamStatus.SUBMITTED.value),
+                }
+            },
+        ]
+        cursor = self.model_class.get_motor_collection().aggregate(pipeline)
+        return {counts.pop("_id").id: counts async for counts in cursor}
+
+    async def get_report_stats(
+        self,
+        exam_id: str,
+        passing_score: float,
+        *,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        student_ids: Optional[List[str]] = None,
+        only_last_attempt: bool = True,
+    ) -> Dict[str, Any]:
+        """
+        Statistics of the graded attempts of an exam instance submitted between
+        two dates, optionally only the last one of each student, in a single
+        aggregation:
+
+        - `summary`: the attempts and students counted, the mean, median, min
+          and max grades and the number of passing attempts, or None when no
+          attempt is counted
+        - `histogram`: the number of grades per bin of 10 points by lower bound,
+          100 and above included in the 90 bin, below 0 in the 0 bin
+        - `timeline`: the average grade per UTC day, as (YYYY-MM-DD, average)
+          sorted by day
+        """
+        query: Dict[str, Any] = {
+            "exam_instance_id": DBRef(ExamInstance.Settings.name, exam_id)
+        }
+        if student_ids:
+            query["student_id"] = {
+                "$in": [DBRef(User.Settings.name, id) for id in student_ids]
+            }
+
+        submitted_at: Dict[str, Any] = {"$ne": None}
+        if start_date:
+            submitted_at["$gte"] = start_date
+        if end_date:
+            submitted_at["$lte"] = end_date
+        attempt_pipeline: List[Dict[str, Any]] = [
+            {"$match": {"grade": {"$ne": None}, "submitted_at": submitted_at}}
+        ]
+        if only_last_attempt:
+            attempt_pipeline += [{"$sort": {"submitted_at": -1}}, {"$limit": 1}]
+        attempt_pipeline.append({"$project": {"_id": 0, "grade": 1, "submitted_at": 1}})
+
+        pipeline = [
+            {"$match": query},
+            {
+                "$lookup": {
+                    "from": StudentAttempt.Settings.name,
+                    "localField": "_id",
+                    "foreignField": "student_exam_id.$id",
+                    "pipeline": attempt_pipeline,
+                    "as": "attempt",
+                }
+            },
+            {"$unwind": "$attempt"},
+            {
+                "$project": {
+                    "grade": "$attempt.grade",
+                    "submitted_at": "$attempt.submitted_at",
+                }
+            },
+            {
+                "$facet": {
+                    "summary": [
+                        # The grades are pushed in order for the median
+                        {"$sort": {"grade": 1}},
+                        {
+                            "$group": {
+                                "_id": None,
+                                "attempts_count": {"$sum": 1},
+                                "student_exams": {"$addToSet": "$_id"},
+                                "mean": {"$avg": "$grade"},
+                                "grades": {"$push": "$grade"},
+                                "min": {"$min": "$grade"},
+                                "max": {"$max": "$grade"},
+                                "passed": {
+                                    "$sum": {
+                                        "$cond": [
+                                            {"$gte": ["$grade", passing_score]},
+                                            1,
+                                            0,
+                                        ]
+                                    }
+                                },
+                            }
+                        },
+                        {
+                            "$project": {
+                                "_id": 0,
+                                "attempts_count": 1,
+                                "total_students": {"$size": "$student_exams"},
+                                "mean": 1,
+                                "median": _median("$grades"),
+                                "min": 1,
+                                "max": 1,
+                                "passed": 1,
+                            }
+                        },
+                    ],
+                    "histogram": [
+                        {
+                            "$bucket": {
+                                # Grades out of 0-100 fall in the first or last
+                                # bin, and 100 in the last one
+                                "groupBy": {"$max": [0, {"$min": ["$grade", 100]}]},
+                                "boundaries": [*range(0, 100, 10), 101],
+                                "output": {"count": {"$sum": 1}},
+                            }
+                        }
+                    ],
+                    "timeline": [
+                        {
+                            "$group": {
+                                "_id": {
+                                    "$dateToString": {
+                                        "format": "%Y-%m-%d",
+                                        "date": "$submitted_at",
+                                    }
+                                },
+                                "average": {"$avg": "$grade"},
+                            }
+                        },
+                        {"$sort": {"_id": 1}},
+                    ],
+                }
+            },
+        ]
+        cursor = self.model_class.get_motor_collection().aggregate(pipeline)
+        (result,) = await cursor.to_list(length=1)
+        return {
+            "summary": result["summary"][0] if result["summary"] else None,
+            "histogram": {
+                bucket["_id"]: bucket["count"] for bucket in result["histogram"]
+            },
+            "timeline": [(day["_id"], day["average"]) for day in result["timeline"]],
+        }
+
+    async def create_many(
+        self, exam_instance_id: str, student_ids: List[str]
+    ) -> Dict[str, str]:
+        """Create the StudentExams of students, returning their ids by student id"""
+        student_exams = {
+            student_id: self.model_class(
+                student_id=student_id, exam_instance_id=exam_instance_id
+            )
+            for student_id in student_ids
+        }
+        if student_exams:
+            await self.model_class.insert_many(list(student_exams.values()))
+        return {
+            student_id: student_exam.id
+            for student_id, student_exam in student_exams.items()
+        }
+
+    async def delete_many(self, student_exam_ids: List[str]) -> None:
+        """Delete StudentExams with their attempts, responses and summaries"""
+        if student_exam_ids:
+            await delete_student_exams(
+                self.model_class.get_motor_collection().database, student_exam_ids
+            )
+
+
+# One document per data migration, by name, holding when it started and
+# completed. A run not completed after MIGRATION_TIMEOUT is taken over.
+MIGRATIONS = "migrations"
+MIGRATION_TIMEOUT = timedelta(hours=1)
+DUPLICATE_KEY = 11000
+
+
+class StudentExamSummaryRepository(BaseRepository[StudentExamSummary]):
+    """Repository for the StudentExamSummary read model"""
+
+    async def get_by_student(self, student_id: str) -> List[StudentExamSummary]:
+        """Get the dashboard summaries of all exams assigned to a student."""
+        return await self.model_class.find({"student_id": student_id}).to_list()
+
+    @staticmethod
+    async def _get_exam_snapshot(
+        exam_instance_id: str,
+    ) -> Optional[ExamInstanceSnapshot]:
+        """Build the dashboard copy of an exam instance and its creator."""
+        instance = await ExamInstance.get(exam_instance_id)
+        if not instance:
+            return None
+        creator = await User.get(instance.created_by.ref.id)
+        if not creator:
+            return None
+        return ExamInstanceSnapshot.from_instance(instance, creator)
+
+    async def create_for_student_exams(
+        self, exam_instance_id: str, student_exam_ids: Dict[str, str]
+    ) -> None:
+        """
+        Create summaries for newly assigned students.
+
+        Args:
+            exam_instance_id: ID of the exam instance the students were assigned to
+            student_exam_ids: Mapping of student ID -> StudentExam ID
+        """
+        if not student_exam_ids:
+            return
+        snapshot = await self._get_exam_snapshot(exam_instance_id)
+        if not snapshot:
+            return
+        await self.model_class.insert_many(
+            [
+                self.model_class(
+                    id=student_exam_id,
+                    student_id=student_id,
+                    exam_instance_id=snapshot,
+                )
+                for student_id, student_exam_id in student_exam_ids.items()
+            ]
+        )
+
+    async def sync_exam_instance(self, exam_instance_id: str) -> None:
+        """Refresh the exam instance copy in every summary of that instance."""
+        snapshot = await self._get_exam_snapshot(exam_instance_id)
+        if not snapshot:
+            return
+        await self.model_class.find({"exam_instance_id.id": exam_instance_id}).update(
+            {
+                "$set": {
+                    "exam_instance_id": snapshot.model_dump(),
+                    "updated_at": datetime.now(timezone.utc),
+                }
+            }
+        )
+
+    async def update_progress(self, student_exam_id: str, data: Dict[str, Any]) -> None:
+        """Update the status, attempts or grade of a single summary in place."""
+        data["updated_at"] = datetime.now(timezone.utc)
+        await self.model_class.find({"_id": student_exam_id}).update({"$set": data})
+
+    async def backfill_missing(self) -> int:
+        """
+        Create summaries for student exams assigned before the read model existed.
+
+        Summaries are created along with student exams since then, so this
+        only scans them until it has completed once, and a single API worker
+        runs it at a time.
+
+        Returns:
+            Number of summaries created
+        """
+        migrations = self.model_class.get_motor_collection().database[MIGRATIONS]
+        now = datetime.now(timezone.utc)
+        try:
+            await migrations.insert_one(
+                {"_id": "student_exam_summaries", "started_at": now}
+            )
+        except DuplicateKeyError:
+            # Completed, or being run by another worker unless that one was lost
+            claimed = await migrations.find_one_and_update(
+                {
+                    "_id": "student_exam_summaries",
+                    "completed_at": None,
+                    "started_at": {"$lt": now - MIGRATION_TIMEOUT},
+                },
+                {"$set": {"started_at": now}},
+            )
+            if not claimed:
+                return 0
+
+        existing_ids = await self.model_class.distinct("_id")
+        student_exams = await StudentExam.find(
+            {"_id": {"$nin": existing_ids}}
+        ).to_list()
+        attempt_ids = [
+            exam.latest_attempt_id.ref.id
+            for exam in student_exams
+            if exam.latest_attempt_id
+        ]
+        attempts = {
+            attempt.id: attempt
+            for attempt in await StudentAttempt.find(
+                {"_id": {"$in": attempt_ids}}
+            ).to_list()
+        }
+
+        snapshots = {}
+        summaries = []
+        for exam in student_exams:
+            instance_id = exam.exam_instance_id.ref.id
+            if instance_id not in snapshots:
+                snapshots[instance_id] = await self._get_exam_snapshot(instance_id)
+            if not snapshots[instance_id]:
+                continue
+
+            attempt = (
+                attempts.get(exam.latest_attempt_id.ref.id)
+                if exam.latest_attempt_id
+                else None
+            )
+            summaries.append(
+                self.model_class(
+                    id=exam.id,
+                    student_id=exam.student_id.ref.id,
+                    exam_instance_id=snapshots[instance_id],
+                    current_status=exam.current_status,
+                    attempts_count=exam.attempts_count,
+                    last_grade=attempt.grade if attempt else None,
+                    last_pass_fail=attempt.pass_fail if attempt else None,
+                )
+            )
+
+        created = len(summaries)
+        if summaries:
+            try:
+                await self.model_class.insert_many(summaries, ordered=False)
+            except BulkWriteError as exc:
+                # Summaries created by assignments made during the scan
+                errors = exc.details["writeErrors"]
+                if any(error["code"] != DUPLICATE_KEY for error in errors):
+                    raise
+                created -= len(errors)
+        await migrations.update_one(
+            {"_id": "student_exam_summaries"},
+            {"$set": {"completed_at": datetime.now(timezone.utc)}},
+        )
+        return created
+
+
+class NotificationJobRepository(BaseRepository[NotificationJob]):
+    """Repository for the reminders scheduled as Celery tasks"""
+
+    async def pop_task_ids(self, student_exams: Dict[str, str]) -> List[str]:
+        """
+        Forget the pending reminder tasks of student exams, given by student
+        id, and return their ids. One query and one delete for all students.
+        """
+        if not student_exams:
+            return []
+        query = {
+            "user_id": {"$in": list(student_exams)},
+            "student_exam_id": {"$in": list(student_exams.values())},
+        }
+        collection = self.model_class.get_motor_collection()
+        task_ids = await collection.distinct("_id", {**query, "fired_at": None})
+        await collection.delete_many(query)
+        return task_ids
+
+    async def backfill_from_users(self) -> int:
+        """
+        Move the reminder task IDs kept in the User documents to jobs.
+
+        Returns:
+            Number of jobs created
+        """
+        users = User.get_motor_collection()
+        query = {"notifications_tasks_id": {"$exists": True}}
+        now = datetime.now(timezone.utc)
+        jobs = [
+            {
+                "_id": task_id,
+                "user_id": user["_id"],
+                "student_exam_id": student_exam_id,
+                "fired_at": None,
+                "created_at": now,
+                "updated_at": now,
+            }
+            async for user in users.find(query, {"notifications_tasks_id": 1})
+            for student_exam_id, task_ids in user["notifications_tasks_id"].items()
+            for task_id in task_ids
+        ]
+        if jobs:
+            try:
+                await self.model_class.get_motor_collection().insert_many(
+                    jobs, ordered=False
+                )
+            except BulkWriteError as exc:
+                # Jobs moved by an interrupted earlier run
+                errors = exc.details["writeErrors"]
+                if any(error["code"] != DUPLICATE_KEY for error in errors):
+                    raise
+        await users.update_many(query, {"$unset": {"notifications_tasks_id": ""}})
+        return len(jobs)
+
+
+class QuestionImportRepository(BaseRepository[QuestionImport]):
+    """Repository for the question bank imports"""
+
+    async def save_file(
+        self, import_id: str, chunks: AsyncIterable[bytes], max_size: int
+    ) -> Any:
+        """Store the file of an import in GridFS as it is uploaded"""
+        return await save_import_file(
+            self.model_class.get_motor_collection().database,
+            import_id,
+            chunks,
+            max_size,
+        )
@@ -1,10 +1,15 @@
+from typing import Optional
+
 from fastapi import Depends
 
+from app.core.schemas import ResourceVersion
 from app.exam.dependencies import (get_student_attempt_repository,
                                    get_student_exam_repository,
+                                   get_student_exam_summary_repository,
                                    get_student_response_repository)
 from app.exam.repository import (StudentAttemptRepository,
                                  StudentExamRepository,
+                                 StudentExamSummaryRepository,
                                  StudentResponseRepository)
 from app.exam.student.services import StudentExamService
 
@@ -19,7 +24,22 @@ def get_student_exam_service(
     student_response_repository: StudentResponseRepository = Depends(
         get_student_response_repository
     ),
+    student_exam_summary_repository: StudentExamSummaryRepository = Depends(
+        get_student_exam_summary_repository
+    ),
 ) -> StudentExamService:
     return StudentExamService(
-        student_exam_repository, student_attempt_repository, student_response_repository
+        student_exam_repository,
+        student_attempt_repository,
+        student_response_repository,
+        student_exam_summary_repository,
     )
+
+
+async def get_attempt_version(
+    attempt_id: str,
+    student_attempt_repository: StudentAttemptRepository = Depends(
+        get_student_attempt_repository
+    ),
+) -> Optional[ResourceVersion]:
+    return await student_attempt_repository.get_version(attempt_id)
@@ -1,27 +1,43 @@
-from typing import List, Union
+from typing import List, Optional, Union
 
-from fastapi import APIRouter, Depends, Request
+from fastapi import APIRouter, Depends, Header, Query, Request, Response, status
 
 from app.auth.dependencies import get_current_student_id
+from app.core.conditional import conditional_get
+from app.core.rate_limit import RateLimit, RateLimiter
+from app.core.responses import ReturnResponse
 from app.core.schemas import BaseReturn
-from app.core.utils import get_timezone
-from app.exam.student.dependencies import get_student_exam_service
+from app.core.utils import etag_matches, get_timezone, make_etag
+from app.exam.student.dependencies import (get_attempt_version,
+                                           get_student_exam_service)
 from app.exam.student.schemas import (AnswerSubmission, QuestionIdentifier,
                                       QuestionWithOptions,
-                                      QuestionWithUserResponse, ReviewAttempt,
-                                      StudentAttemptBasic, StudentExamBase,
-                                      StudentExamDetail)
+                                      QuestionWithUserResponse, ReloadExamDelta,
+                                      ReviewAttempt, StudentAttemptBasic,
+                                      StudentExamBase, StudentExamDetail)
 from app.exam.student.services import StudentExamService
 from app.i18n import _
 
 router = APIRouter(
     prefix="/student",
     tags=["exam/student"],
-    dependencies=[Depends(get_current_student_id)],
+    dependencies=[
+        Depends(get_current_student_id),
+        # Answers are saved as students go through an exam
+        Depends(RateLimiter(RateLimit(120, 60), save_answer=RateLimit(600, 60))),
+    ],
 )
 
+# Response models of the routes answering with a ReturnResponse
+StudentExamsReturn = BaseReturn[List[StudentExamBase]]
+StudentExamDetailReturn = BaseReturn[StudentExamDetail]
+ExamQuestionsReturn = BaseReturn[List[QuestionWithOptions]]
+ReloadExamReturn = BaseReturn[Union[List[QuestionWithUserResponse], ReloadExamDelta]]
+AttemptResultReturn = BaseReturn[StudentAttemptBasic]
+EmptyReturn = BaseReturn[None]
 
-@router.get("/exams", response_model=BaseReturn[List[StudentExamBase]])
+
+@router.get("/exams", response_model=StudentExamsReturn)
 async def get_student_exams(
     student_id: str = Depends(get_current_student_id),
     student_exam_service: StudentExamService = Depends(get_student_exam_service),
@@ -32,13 +48,15 @@ async def get_student_exams(
     """
     user_timezone = get_timezone(request)
     data = await student_exam_service.get_student_exams(student_id, user_timezone)
-    return {
-        "message": _("Exams retrieved successfully"),
-        "data": data,
-    }
+    return ReturnResponse(
+        StudentExamsReturn,
+        _("Exams retrieved successfully"),
+        data,
+        request=request,
+    )
 
 
-@router.get("/exams/{student_exam_id}", response_model=BaseReturn[StudentExamDetail])
+@router.get("/exams/{student_exam_id}", response_model=StudentExamDetailReturn)
 async def get_student_exam(
     student_exam_id: str,
     student_id: str = Depends(get_current_student_id),
@@ -52,15 +70,18 @@ async def get_student_exam(
     data = await student_exam_service.get_student_exam(
         student_id, student_exam_id, user_timezone
     )
-    return {
-        "message": _("Exam retrieved successfully"),
-        "data": data,
-    }
+    return ReturnResponse(
+        StudentExamDetailReturn,
+        _("Exam retrieved successfully"),
+        data,
+        request=request,
+    )
 
 
 @router.get(
     "/exam/{attempt_id}",
     response_model=BaseReturn[Union[ReviewAttempt, StudentAttemptBasic]],
+    dependencies=[Depends(conditional_get(get_attempt_version))],
 )
 async def get_student_attempt(
     attempt_id: str,
@@ -83,78 +104,108 @@ async def get_student_attempt(
     }
 
 
-@router.post(
-    "/exam/{student_exam_id}/start",
-    response_model=BaseReturn[List[QuestionWithOptions]],
-)
+@router.post("/exam/{student_exam_id}/start", response_model=ExamQuestionsReturn)
 async def start_exam(
     student_exam_id: str,
     student_id: str = Depends(get_current_student_id),
     student_exam_service: StudentExamService = Depends(get_student_exam_service),
+    request: Request = None,
 ):
     data = await student_exam_service.start_exam(student_id, student_exam_id)
-    return {
-        "message": _("Exam started successfully"),
-        "data": data,
-    }
+    return ReturnResponse(
+        ExamQuestionsReturn,
+        _("Exam started successfully"),
+        data,
+        request=request,
+    )
 
 
-@router.put("/exam/{student_exam_id}/save_answer", response_model=BaseReturn[None])
+@router.put("/exam/{student_exam_id}/save_answer", response_model=EmptyReturn)
 async def save_answer(
     student_exam_id: str,
     question: AnswerSubmission,
     student_id: str = Depends(get_current_student_id),
     student_exam_service: StudentExamService = Depends(get_student_exam_service),
+    request: Request = None,
 ):
     await student_exam_service.save_answer(student_id, student_exam_id, question)
-    return {
-        "message": _("Answer saved successfully"),
-    }
+    return ReturnResponse(EmptyReturn, _("Answer saved successfully"), request=request)
 
 
-@router.put(
-    "/exam/{student_exam_id}/toggle_flag_question", response_model=BaseReturn[None]
-)
+@router.put("/exam/{student_exam_id}/toggle_flag_question", response_model=EmptyReturn)
 async def toggle_flag_question(
     student_exam_id: str,
     question: QuestionIdentifier,
     student_id: str = Depends(get_current_student_id),
     student_exam_service: StudentExamService = Depends(get_student_exam_service),
+    request: Request = None,
 ):
     await student_exam_service.toggle_flag_question(
         student_id, student_exam_id, question.question_id
     )
-    return {
-        "message": _("Question flagged successfully"),
-    }
+    return ReturnResponse(
+        EmptyReturn, _("Question flagged successfully"), request=request
+    )
 
 
-@router.get(
-    "/exam/{student_exam_id}/reload",
-    response_model=BaseReturn[List[QuestionWithUserResponse]],
-)
+@router.get("/exam/{student_exam_id}/reload", response_model=ReloadExamReturn)
 async def reload_exam(
     student_exam_id: str,
+    since: Optional[int] = Query(
+        None, ge=0, description="Return only responses changed after this version"
+    ),
+    if_none_match: Optional[str] = Header(None),
     student_id: str = Depends(get_current_student_id),
     student_exam_service: StudentExamService = Depends(get_student_exam_service),
+    request: Request = None,
 ):
-    data = await student_exam_service.reload_exam(student_id, student_exam_id)
-    return {
-        "message": _("Exam reloaded successfully"),
-        "data": data,
-    }
+    """
+    Reload the exam questions with the user's previous answers.
+    The X-Response-Version header carries the attempt's response version up to
+    which every response is returned, with `since` only the responses changed
+    after that version are returned.
+    """
+    attempt = await student_exam_service.get_reload_attempt(student_id, student_exam_id)
+    headers = {}
+    if attempt:
+        # Changes as soon as a response write starts or ends, so that a body
+        # read while a response was being written is not kept by the client
+        etag = make_etag(
+            attempt.id, attempt.response_version, *attempt.pending_versions
+        )
+        headers = {
+            "ETag": etag,
+            "X-Response-Version": str(attempt.written_response_version),
+        }
+        if etag_matches(if_none_match, etag):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    if since is not None:
+        data = await student_exam_service.reload_exam_delta(
+            student_id, student_exam_id, since
+        )
+    else:
+        data = await student_exam_service.reload_exam(student_id, student_exam_id)
+    return ReturnResponse(
+        ReloadExamReturn,
+        _("Exam reloaded successfully"),
+        data,
+        request=request,
+        headers=headers,
+    )
 
 
-@router.post(
-    "/exam/{student_exam_id}/submit", response_model=BaseReturn[StudentAttemptBasic]
-)
+@router.post("/exam/{student_exam_id}/submit", response_model=AttemptResultReturn)
 async def submit_exam(
     student_exam_id: str,
     student_id: str = Depends(get_current_student_id),
     student_exam_service: StudentExamService = Depends(get_student_exam_service),
+    request: Request = None,
 ):
     data = await student_exam_service.submit_exam(student_id, student_exam_id)
-    return {
-        "message": _("Exam submitted successfully"),
-        "data": data,
-    }
+    return ReturnResponse(
+        AttemptResultReturn,
+        _("Exam submitted successfully"),
+        data,
+        request=request,
+    )
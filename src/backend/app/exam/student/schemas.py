@@ -85,6 +85,33 @@ class QuestionWithUserResponse(QuestionWithOptions):
     model_config = ConfigDict(arbitrary_types_allowed=True, from_attributes=True)
 
 
+class ResponseDelta(BaseModel):
+    """
+    User response data for a single question changed since a known version.
+    Used when delta-reloading an exam to sync only modified answers.
+    """
+
+    question_id: str
+    user_selected_options: List[str] = []
+    user_text_response: Optional[str] = None
+    is_flagged: bool = False
+
+    model_config = ConfigDict(arbitrary_types_allowed=True, from_attributes=True)
+
+
+class ReloadExamDelta(BaseModel):
+    """
+    Responses of the active attempt changed after the requested version.
+    Used when reconnecting to an exam the client already has loaded.
+    """
+
+    attempt_id: str
+    version: int
+    responses: List[ResponseDelta] = []
+
+    model_config = ConfigDict(arbitrary_types_allowed=True, from_attributes=True)
+
+
 # Exam instance schemas
 class ExamInstanceBase(BaseModel):
     """
@@ -117,6 +144,8 @@ class StudentExamBase(BaseModel):
     exam_instance_id: ExamInstanceBase
     current_status: StudentExamStatus
     attempts_count: int
+    last_grade: Optional[float] = None
+    last_pass_fail: Optional[PassFailStatus] = None
 
     model_config = ConfigDict(arbitrary_types_allowed=True, from_attributes=True)
 
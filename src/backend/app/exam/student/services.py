@@ -1,20 +1,30 @@
 import random
 from datetime import datetime, timezone
-from typing import List, Union
+from typing import List, Optional, Union
+
+from beanie import Link
 
 from app.celery.tasks.email_tasks.tasks import exam_finish_confirmation
 from app.core.exceptions import ForbiddenError
 from app.core.utils import convert_to_user_timezone, make_username
-from app.exam.models import PassFailStatus, QuestionType, StudentExamStatus
+from app.exam.models import (
+    PassFailStatus,
+    QuestionType,
+    StudentAttempt,
+    StudentExamStatus,
+)
 from app.exam.repository import (
     StudentAttemptRepository,
     StudentExamRepository,
+    StudentExamSummaryRepository,
     StudentResponseRepository,
 )
 from app.exam.student.schemas import (
     AnswerSubmission,
     QuestionWithOptions,
     QuestionWithUserResponse,
+    ReloadExamDelta,
+    ResponseDelta,
     ReviewAttempt,
     StudentAttemptBasic,
     StudentExamBase,
@@ -29,33 +39,30 @@ class StudentExamService:
         student_exam_repository: StudentExamRepository,
         student_attempt_repository: StudentAttemptRepository,
         student_response_repository: StudentResponseRepository,
+        student_exam_summary_repository: StudentExamSummaryRepository,
     ):
         self.student_exam_repository = student_exam_repository
         self.student_attempt_repository = student_attempt_repository
         self.student_response_repository = student_response_repository
+        self.student_exam_summary_repository = student_exam_summary_repository
 
     async def get_student_exams(
         self, student_id: str, user_timezone=None
     ) -> List[StudentExamBase]:
         """
-        Get all exams for a student.
+        Get all exams for a student from the dashboard read model.
         """
-        exams = await self.student_exam_repository.get_all(
-            {"student_id.$id": student_id},
-            fetch_fields={"exam_instance_id": 2},
-        )
+        exams = await self.student_exam_summary_repository.get_by_student(student_id)
         if not exams:
             return []
         if user_timezone:
             for exam in exams:
-                if hasattr(exam.exam_instance_id, "start_date"):
-                    exam.exam_instance_id.start_date = convert_to_user_timezone(
-                        exam.exam_instance_id.start_date, user_timezone
-                    )
-                if hasattr(exam.exam_instance_id, "end_date"):
-                    exam.exam_instance_id.end_date = convert_to_user_timezone(
-                        exam.exam_instance_id.end_date, user_timezone
-                    )
+                exam.exam_instance_id.start_date = convert_to_user_timezone(
+                    exam.exam_instance_id.start_date, user_timezone
+                )
+                exam.exam_instance_id.end_date = convert_to_user_timezone(
+                    exam.exam_instance_id.end_date, user_timezone
+                )
         return [StudentExamBase.model_validate(exam) for exam in exams]
 
     async def get_student_exam(
@@ -234,19 +241,33 @@ class StudentExamService:
                 "attempts_count": student_exam.attempts_count + 1,
             },
         )
+        await self.student_exam_summary_repository.update_progress(
+            student_exam.id,
+            {
+                "current_status": StudentExamStatus.IN_PROGRESS,
+                "attempts_count": student_exam.attempts_count + 1,
+            },
+        )
 
         return [QuestionWithOptions.model_validate(question) for question in questions]
 
     async def _get_active_attempt(
-        self, student_id: str, student_exam_id: str, check_time: bool = True
+        self,
+        student_id: str,
+        student_exam_id: str,
+        check_time: bool = True,
+        exam_fetch_depth: int = 3,
     ):
         """
         Get and validate the active attempt for a student exam.
 
         Common validation logic for methods that require an in-progress exam.
+        exam_fetch_depth controls how deep the exam instance links are resolved,
+        use 1 when the collection and its questions are not needed.
         """
         student_exam = await self.student_exam_repository.get_by_id(
-            student_exam_id, fetch_fields={"exam_instance_id": 3, "student_id": 1}
+            student_exam_id,
+            fetch_fields={"exam_instance_id": exam_fetch_depth, "student_id": 1},
         )
         if not student_exam:
             raise ForbiddenError(_("Exam not found"))
@@ -309,11 +330,15 @@ class StudentExamService:
                 raise ForbiddenError(_("Short answer question requires text input"))
             update_data["text_response"] = question.answer
 
-        await self.student_response_repository.update(response.id, update_data)
-
-        await self.student_attempt_repository.update(
-            attempt.id, {"last_auto_save": datetime.now(timezone.utc)}
+        update_data["version"] = (
+            await self.student_attempt_repository.bump_response_version(attempt.id)
         )
+        try:
+            await self.student_response_repository.update(response.id, update_data)
+        finally:
+            await self.student_attempt_repository.release_response_version(
+                attempt.id, update_data["version"]
+            )
 
     async def toggle_flag_question(
         self, student_id: str, student_exam_id: str, question_id: str
@@ -331,13 +356,18 @@ class StudentExamService:
         if not response:
             raise ForbiddenError(_("Question not found in this attempt"))
 
-        await self.student_response_repository.update(
-            response.id,
-            {"is_flagged": not response.is_flagged},
-        )
-        await self.student_attempt_repository.update(
-            attempt.id, {"last_auto_save": datetime.now(timezone.utc)}
+        version = await self.student_attempt_repository.bump_response_version(
+            attempt.id
         )
+        try:
+            await self.student_response_repository.update(
+                response.id,
+                {"is_flagged": not response.is_flagged, "version": version},
+            )
+        finally:
+            await self.student_attempt_repository.release_response_version(
+                attempt.id, version
+            )
 
     async def submit_exam(
         self, student_id: str, student_exam_id: str
@@ -421,6 +451,14 @@ class StudentExamService:
         await self.student_exam_repository.update(
             student_exam.id, {"current_status": StudentExamStatus.SUBMITTED}
         )
+        await self.student_exam_summary_repository.update_progress(
+            student_exam.id,
+            {
+                "current_status": StudentExamStatus.SUBMITTED,
+                "last_grade": final_grade,
+                "last_pass_fail": pass_fail,
+            },
+        )
 
         if attempt.started_at.tzinfo is None:
             started_at_aware = attempt.started_at.replace(tzinfo=timezone.utc)
@@ -505,3 +543,65 @@ class StudentExamService:
             raise ForbiddenError(_("No questions found for this attempt"))
 
         return questions_with_responses
+
+    async def get_reload_attempt(
+        self, student_id: str, student_exam_id: str
+    ) -> Optional[StudentAttempt]:
+        """
+        Get the active attempt of a student exam, with its response versions.
+
+        Uses primary key lookups only, so this is cheap enough to run before
+        every reload. Returns None when there is no attempt in progress, leaving
+        the error reporting to reload_exam.
+        """
+        student_exam = await self.student_exam_repository.get_by_id(student_exam_id)
+        if not student_exam or student_exam.student_id.ref.id != student_id:
+            return None
+
+        if (
+            student_exam.current_status != StudentExamStatus.IN_PROGRESS
+            or not student_exam.latest_attempt_id
+        ):
+            return None
+
+        exam_instance = await student_exam.exam_instance_id.fetch()
+        if isinstance(exam_instance, Link):  # Unresolved, the instance is gone
+            return None
+        self._validate_exam_time(exam_instance.start_date, exam_instance.end_date)
+
+        attempt = await self.student_attempt_repository.get_by_id(
+            student_exam.latest_attempt_id.ref.id
+        )
+        if not attempt or attempt.status != StudentExamStatus.IN_PROGRESS:
+            return None
+
+        return attempt
+
+    async def reload_exam_delta(
+        self, student_id: str, student_exam_id: str, since: int
+    ) -> ReloadExamDelta:
+        """Get the user's responses changed after the given response version."""
+        student_exam, attempt = await self._get_active_attempt(
+            student_id, student_exam_id, exam_fetch_depth=1
+        )
+
+        responses = await self.student_response_repository.get_changed_since(
+            attempt.id, since
+        )
+        # Read before the responses: every response up to this version is in
+        # the delta, those still being written are sent on the next reload
+        version = attempt.written_response_version
+
+        return ReloadExamDelta(
+            attempt_id=attempt.id,
+            version=version,
+            responses=[
+                ResponseDelta(
+                    question_id=response.question_id.ref.id,
+                    user_selected_options=response.selected_option_ids,
+                    user_text_response=response.text_response,
+                    is_flagged=response.is_flagged,
+                )
+                for response in responses
+            ],
+        )
@@ -1,20 +1,32 @@
+from typing import Optional
+
 from fastapi import Depends
 
 from app.auth.dependencies import get_user_repository
 from app.auth.repository import UserRepository
+from app.core.schemas import ResourceVersion
 from app.exam.dependencies import (
     get_collection_repository,
     get_exam_instance_repository,
+    get_notification_job_repository,
+    get_question_import_repository,
     get_question_repository,
     get_student_attempt_repository,
     get_student_exam_repository,
+    get_student_exam_summary_repository,
+    get_student_response_repository,
 )
+from app.exam.models import ExamStatus
 from app.exam.repository import (
     CollectionRepository,
     ExamInstanceRepository,
+    NotificationJobRepository,
+    QuestionImportRepository,
     QuestionRepository,
     StudentAttemptRepository,
     StudentExamRepository,
+    StudentExamSummaryRepository,
+    StudentResponseRepository,
 )
 from app.exam.teacher.services import (
     CollectionService,
@@ -29,9 +41,15 @@ def get_collection_service(
     exam_instance_repository: ExamInstanceRepository = Depends(
         get_exam_instance_repository
     ),
+    question_import_repository: QuestionImportRepository = Depends(
+        get_question_import_repository
+    ),
 ) -> CollectionService:
     return CollectionService(
-        collection_repository, question_repository, exam_instance_repository
+        collection_repository,
+        question_repository,
+        exam_instance_repository,
+        question_import_repository,
     )
 
 
@@ -40,9 +58,20 @@ def get_exam_instance_service(
     collection_repo: CollectionRepository = Depends(get_collection_repository),
     user_repository: UserRepository = Depends(get_user_repository),
     student_exam_repo: StudentExamRepository = Depends(get_student_exam_repository),
+    summary_repo: StudentExamSummaryRepository = Depends(
+        get_student_exam_summary_repository
+    ),
+    notification_job_repo: NotificationJobRepository = Depends(
+        get_notification_job_repository
+    ),
 ) -> ExamInstanceService:
     return ExamInstanceService(
-        exam_ins_repo, collection_repo, user_repository, student_exam_repo
+        exam_ins_repo,
+        collection_repo,
+        user_repository,
+        student_exam_repo,
+        summary_repo,
+        notification_job_repo,
     )
 
 
@@ -56,7 +85,37 @@ def get_report_service(
     student_attempt_repository: StudentAttemptRepository = Depends(
         get_student_attempt_repository
     ),
+    student_response_repository: StudentResponseRepository = Depends(
+        get_student_response_repository
+    ),
 ) -> ReportService:
     return ReportService(
-        student_exam_repository, student_attempt_repository, exam_instance_repository
+        student_exam_repository,
+        student_attempt_repository,
+        exam_instance_repository,
+        student_response_repository,
     )
+
+
+async def get_collection_version(
+    collection_id: str,
+    collection_repository: CollectionRepository = Depends(get_collection_repository),
+) -> Optional[ResourceVersion]:
+    return await collection_repository.get_version(collection_id)
+
+
+async def get_public_collections_version(
+    collection_repository: CollectionRepository = Depends(get_collection_repository),
+) -> Optional[ResourceVersion]:
+    return await collection_repository.get_list_version(
+        {"status": ExamStatus.PUBLISHED}
+    )
+
+
+async def get_exam_instance_version(
+    instance_id: str,
+    exam_instance_repository: ExamInstanceRepository = Depends(
+        get_exam_instance_repository
+    ),
+) -> Optional[ResourceVersion]:
+    return await exam_instance_repository.get_version(instance_id)
@@ -1,12 +1,20 @@
-from typing import List
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, Query, Request, status
 
 from app.auth.dependencies import get_current_teacher_id
-from app.core.schemas import BaseReturn
-from app.exam.teacher.dependencies import get_collection_service
+from app.core.conditional import conditional_get
+from app.core.responses import NDJSONResponse
+from app.core.schemas import BaseReturn, CursorPage
+from app.exam.teacher.dependencies import (get_collection_service,
+                                           get_collection_version,
+                                           get_public_collections_version)
+from app.exam.models import ImportFormat, QuestionType
 from app.exam.teacher.schemas import (CollectionQuestionCount,
-                                      CreateCollection, GetCollection,
+                                      CollectionSearchFilter,
+                                      CollectionSearchResult,
+                                      CreateCollection, ForkCollection,
+                                      GetCollection, QuestionImportSchema,
                                       QuestionOrderSchema, QuestionSchema,
                                       UpdateCollection, UpdateQuestionSchema)
 from app.exam.teacher.services import CollectionService
@@ -47,7 +55,11 @@ async def get_teacher_collections(
     )
 
 
-@router.get("/public", response_model=BaseReturn[List[CollectionQuestionCount]])
+@router.get(
+    "/public",
+    response_model=BaseReturn[List[CollectionQuestionCount]],
+    dependencies=[Depends(conditional_get(get_public_collections_version))],
+)
 async def get_public_collections(
     collection_service: CollectionService = Depends(get_collection_service),
 ):
@@ -59,7 +71,45 @@ async def get_public_collections(
     )
 
 
-@router.get("/{collection_id}", response_model=BaseReturn[GetCollection])
+@router.get(
+    "/search",
+    response_model=BaseReturn[CursorPage[CollectionSearchResult]],
+)
+async def search_public_collections(
+    q: str = Query(
+        ...,
+        min_length=1,
+        max_length=200,
+        description="Words of the collection title or description, or of its questions",
+    ),
+    question_type: Optional[QuestionType] = Query(
+        None, description="Only collections with matching questions of this type"
+    ),
+    owner_id: Optional[str] = Query(None, description="Id of the collection author"),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    limit: int = Query(25, ge=1, le=100),
+    collection_service: CollectionService = Depends(get_collection_service),
+):
+    """
+    Search the published collections, best matches first, with the total
+    number of matching collections
+    """
+    filters = CollectionSearchFilter(
+        text=q,
+        question_type=question_type,
+        owner_id=owner_id,
+        cursor=cursor,
+        limit=limit,
+    )
+    page = await collection_service.search_public_collections(filters)
+    return BaseReturn(message=_("Collections retrieved successfully"), data=page)
+
+
+@router.get(
+    "/{collection_id}",
+    response_model=BaseReturn[GetCollection],
+    dependencies=[Depends(conditional_get(get_collection_version))],
+)
 async def get_collection(
     collection_id: str,
     teacher_id: str = Depends(get_current_teacher_id),
@@ -73,6 +123,28 @@ async def get_collection(
     )
 
 
+@router.get(
+    "/{collection_id}/export",
+    response_class=NDJSONResponse,
+    responses={200: {"content": {"application/x-ndjson": {}}}},
+)
+async def export_collection(
+    collection_id: str,
+    request: Request,
+    teacher_id: str = Depends(get_current_teacher_id),
+    collection_service: CollectionService = Depends(get_collection_service),
+):
+    """
+    Export a collection with its questions as JSON Lines: a "collection"
+    record, then one "question" record per question. Gzip encoded when
+    accepted by the client.
+    """
+    records = await collection_service.export_collection(teacher_id, collection_id)
+    return NDJSONResponse(
+        records, request=request, filename=f"collection_{collection_id}.ndjson"
+    )
+
+
 @router.put("/{collection_id}", response_model=BaseReturn)
 async def update_collection(
     collection_id: str,
@@ -102,6 +174,26 @@ async def delete_collection(
     )
 
 
+@router.post("/{collection_id}/fork", status_code=status.HTTP_201_CREATED)
+async def fork_collection(
+    collection_id: str,
+    fork_data: ForkCollection,
+    teacher_id: str = Depends(get_current_teacher_id),
+    collection_service: CollectionService = Depends(get_collection_service),
+):
+    """
+    Fork a published collection, or one of the teacher's, into a new draft
+    sharing its questions. Editing a question of the fork copies it.
+    """
+    fork_id = await collection_service.fork_collection(
+        collection_id, teacher_id, fork_data
+    )
+    return BaseReturn(
+        message=_("Collection forked successfully"),
+        data={"collection_id": fork_id},
+    )
+
+
 @router.post("/{collection_id}/questions")
 async def add_question_to_collection(
     collection_id: str,
@@ -135,6 +227,61 @@ async def add_bulk_questions_to_collection(
     )
 
 
+@router.post(
+    "/{collection_id}/questions/import",
+    status_code=status.HTTP_202_ACCEPTED,
+    response_model=BaseReturn[QuestionImportSchema],
+    openapi_extra={
+        "requestBody": {
+            "content": {
+                "text/csv": {"schema": {"type": "string"}},
+                "application/json": {"schema": {"type": "string"}},
+                "text/plain": {"schema": {"type": "string"}},
+            },
+            "required": True,
+        }
+    },
+)
+async def import_questions(
+    collection_id: str,
+    request: Request,
+    format: ImportFormat = Query(..., description="Format of the file"),
+    teacher_id: str = Depends(get_current_teacher_id),
+    collection_service: CollectionService = Depends(get_collection_service),
+):
+    """
+    Import a question bank file, sent as the request body, into a collection.
+
+    - csv: question_text and type columns, and optionally options (separated
+      by "|", the correct ones starting with "*"), correct_input_answer,
+      weight and has_katex
+    - json: an array of questions, or one question per line (JSON Lines)
+    - gift: the Moodle format, questions separated by blank lines
+
+    The questions are imported in the background, after the last question of
+    the collection. Poll the returned import for its progress and rejected rows.
+    """
+    question_import = await collection_service.start_question_import(
+        collection_id, teacher_id, format, request.stream()
+    )
+    return BaseReturn(message=_("Question import started"), data=question_import)
+
+
+@router.get("/imports/{import_id}", response_model=BaseReturn[QuestionImportSchema])
+async def get_question_import(
+    import_id: str,
+    teacher_id: str = Depends(get_current_teacher_id),
+    collection_service: CollectionService = Depends(get_collection_service),
+):
+    """Get the progress of a question bank import, with its first rejected rows"""
+    question_import = await collection_service.get_question_import(
+        import_id, teacher_id
+    )
+    return BaseReturn(
+        message=_("Question import retrieved successfully"), data=question_import
+    )
+
+
 @router.post("/{collection_id}/questions/reorder")
 async def reorder_questions(
     collection_id: str,
@@ -158,8 +305,13 @@ async def edit_question(
     teacher_id: str = Depends(get_current_teacher_id),
     collection_service: CollectionService = Depends(get_collection_service),
 ):
-    """Edit a question by its ID"""
-    await collection_service.edit_question(question_id, teacher_id, question_data)
+    """
+    Edit a question by its ID. A question shared with another collection is
+    copied instead, and the returned question ID is that of the copy.
+    """
+    question_id = await collection_service.edit_question(
+        collection_id, question_id, teacher_id, question_data
+    )
     return BaseReturn(
         message=_("Question updated successfully"),
         data={"collection_id": collection_id, "question_id": question_id},
@@ -174,7 +326,7 @@ async def delete_question(
     collection_service: CollectionService = Depends(get_collection_service),
 ):
     """Delete a question by its ID"""
-    await collection_service.delete_question(question_id, teacher_id)
+    await collection_service.delete_question(collection_id, question_id, teacher_id)
     return BaseReturn(
         message=_("Question deleted successfully"),
         data={"collection_id": collection_id, "question_id": question_id},
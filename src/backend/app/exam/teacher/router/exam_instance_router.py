@@ -1,13 +1,22 @@
-from typing import List
+from datetime import datetime
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends, Request
+from fastapi import APIRouter, Depends, Query, Request
 
 from app.auth.dependencies import get_current_teacher_id
-from app.core.schemas import BaseReturn
+from app.core.conditional import conditional_get
+from app.core.schemas import BaseReturn, CursorPage
+from app.core.streaming import iter_csv_column
 from app.core.utils import get_timezone
-from app.exam.teacher.dependencies import get_exam_instance_service
-from app.exam.teacher.schemas import (CreateExamInstanceSchema,
-                                      GetExamInstance,
+from app.exam.models import ExamStatus
+from app.exam.teacher.dependencies import (get_exam_instance_service,
+                                           get_exam_instance_version)
+from app.exam.teacher.schemas import (AssignStudentsSchema,
+                                      CreateExamInstanceSchema,
+                                      ExamInstanceFilter,
+                                      ExamInstanceOverview,
+                                      ExamInstanceSort, GetExamInstance,
+                                      StudentAssignmentResult,
                                       UpdateExamInstanceSchema)
 from app.exam.teacher.services import ExamInstanceService
 from app.i18n import _
@@ -31,6 +40,41 @@ async def get_teacher_exam_instances(
     )
 
 
+@router.get(
+    "/overview",
+    response_model=BaseReturn[CursorPage[ExamInstanceOverview]],
+)
+async def get_exam_instance_overview(
+    status: Optional[ExamStatus] = None,
+    date_from: Optional[datetime] = Query(
+        None, description="Only instances ending at or after this date"
+    ),
+    date_to: Optional[datetime] = Query(
+        None, description="Only instances starting at or before this date"
+    ),
+    sort: ExamInstanceSort = ExamInstanceSort.START_DATE_DESC,
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    limit: int = Query(25, ge=1, le=100),
+    user_id: str = Depends(get_current_teacher_id),
+    instance_service: ExamInstanceService = Depends(get_exam_instance_service),
+    request: Request = None,
+):
+    """
+    Get a page of the teacher's exam instances, with the total number of
+    matching instances and the progress of their students
+    """
+    filters = ExamInstanceFilter(
+        status=status,
+        date_from=date_from,
+        date_to=date_to,
+        sort=sort,
+        cursor=cursor,
+        limit=limit,
+    )
+    page = await instance_service.get_overview(user_id, filters, get_timezone(request))
+    return BaseReturn(message=_("Exam instances retrieved successfully"), data=page)
+
+
 @router.post("/", response_model=BaseReturn[str])
 async def create_exam_instance(
     instance_data: CreateExamInstanceSchema,
@@ -45,7 +89,11 @@ async def create_exam_instance(
     return BaseReturn(message=_("Exam instance created successfully"), data=instance_id)
 
 
-@router.get("/{instance_id}", response_model=BaseReturn[GetExamInstance])
+@router.get(
+    "/{instance_id}",
+    response_model=BaseReturn[GetExamInstance],
+    dependencies=[Depends(conditional_get(get_exam_instance_version))],
+)
 async def get_exam_instance(
     instance_id: str,
     user_id: str = Depends(get_current_teacher_id),
@@ -80,3 +128,51 @@ async def delete_exam_instance(
 ):
     await instance_service.delete_exam_instance(user_id, instance_id)
     return BaseReturn(message=_("Exam instance deleted successfully"), data=instance_id)
+
+
+@router.post(
+    "/{instance_id}/students",
+    response_model=BaseReturn[StudentAssignmentResult],
+)
+async def assign_students(
+    instance_id: str,
+    data: AssignStudentsSchema,
+    user_id: str = Depends(get_current_teacher_id),
+    instance_service: ExamInstanceService = Depends(get_exam_instance_service),
+):
+    """
+    Assign students to an exam instance by id, in addition to those already
+    assigned. Ids which are not those of a student are returned as unknown.
+    """
+    result = await instance_service.assign_students(
+        user_id, instance_id, data.student_ids
+    )
+    return BaseReturn(message=_("Students assigned successfully"), data=result)
+
+
+@router.post(
+    "/{instance_id}/students/csv",
+    response_model=BaseReturn[StudentAssignmentResult],
+    openapi_extra={
+        "requestBody": {
+            "content": {"text/csv": {"schema": {"type": "string"}}},
+            "required": True,
+        }
+    },
+)
+async def assign_students_csv(
+    instance_id: str,
+    request: Request,
+    user_id: str = Depends(get_current_teacher_id),
+    instance_service: ExamInstanceService = Depends(get_exam_instance_service),
+):
+    """
+    Assign students to an exam instance from a CSV file of emails, sent as the
+    request body: the "email" column, or the first column without a header.
+    Emails which are not those of a student are returned as unknown.
+    """
+    emails = iter_csv_column(request.stream(), "email")
+    result = await instance_service.assign_students_by_email(
+        user_id, instance_id, emails
+    )
+    return BaseReturn(message=_("Students assigned successfully"), data=result)
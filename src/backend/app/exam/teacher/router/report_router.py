@@ -4,6 +4,8 @@ from typing import Optional
 from fastapi import APIRouter, Depends, Query, Request, Response
 
 from app.auth.dependencies import get_current_teacher_id
+from app.core.rate_limit import RateLimit, RateLimiter
+from app.core.responses import NDJSONResponse
 from app.core.schemas import BaseReturn
 from app.core.utils import get_timezone
 from app.exam.teacher.dependencies import get_report_service
@@ -13,7 +15,18 @@ from app.i18n import _
 
 router = APIRouter(
     prefix="/report",
-    dependencies=[Depends(get_current_teacher_id)],
+    dependencies=[
+        Depends(get_current_teacher_id),
+        # Reports aggregate every attempt of an exam, PDFs render charts and
+        # exports read every response
+        Depends(
+            RateLimiter(
+                RateLimit(30, 60),
+                export_exam_report_pdf=RateLimit(5, 60),
+                export_exam_instance=RateLimit(5, 60),
+            )
+        ),
+    ],
 )
 
 
@@ -105,3 +118,26 @@ async def export_exam_report_pdf(
     }
 
     return Response(content=pdf_content, headers=headers, media_type="application/pdf")
+
+
+@router.get(
+    "/{exam_instance_id}/export",
+    response_class=NDJSONResponse,
+    responses={200: {"content": {"application/x-ndjson": {}}}},
+)
+async def export_exam_instance(
+    exam_instance_id: str,
+    request: Request,
+    teacher_id: str = Depends(get_current_teacher_id),
+    report_service: ReportService = Depends(get_report_service),
+):
+    """
+    Export an exam instance with all its attempts and responses as JSON Lines:
+    an "exam_instance" record, then batches of "student_exam" records each
+    followed by their "attempt" records and the "response" records of these.
+    Gzip encoded when accepted by the client.
+    """
+    records = await report_service.export_exam_instance(exam_instance_id, teacher_id)
+    return NDJSONResponse(
+        records, request=request, filename=f"exam_{exam_instance_id}.ndjson"
+    )
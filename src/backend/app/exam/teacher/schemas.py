@@ -1,12 +1,17 @@
 from datetime import datetime
-from typing import Any, Dict, List
+from enum import Enum
+from typing import Any, Dict, List, Optional
 
-from pydantic import BaseModel, ConfigDict, Field
+from bson import DBRef
+from pydantic import AliasChoices, BaseModel, ConfigDict, Field, field_validator
 
 from app.auth.schemas import UserResponse
 from app.exam.models import (
     ExamInstance,
     ExamStatus,
+    ImportFormat,
+    ImportRowError,
+    ImportStatus,
     NotificationSettings,
     QuestionType,
     SecuritySettings,
@@ -111,10 +116,16 @@ class UpdateCollection(BaseModel):
     model_config = ConfigDict(arbitrary_types_allowed=True)
 
 
+class ForkCollection(BaseModel):
+    # The title of the forked collection by default
+    title: str | None = None
+
+
 class GetCollection(CollectionBase, TimeStamp):
     id: str
     created_by: UserResponse
     questions: List[QuestionSchema]
+    forked_from: str | None = None
 
 
 class CollectionNoQuestions(GetCollection):
@@ -125,10 +136,85 @@ class CollectionQuestionCount(CollectionNoQuestions):
     question_count: int
 
 
+class CollectionSearchResult(BaseModel):
+    """Published collection found by a catalog search, best matches first"""
+
+    id: str = Field(..., alias="_id", serialization_alias="id")
+    title: str
+    description: str | None = None
+    created_by: str
+    updated_at: datetime | None = None
+    question_count: int = 0
+    # Questions of the collection matching the search
+    matched_questions: List[str] = []
+    score: float
+
+    @field_validator("created_by", mode="before")
+    @classmethod
+    def link_id(cls, value):
+        return value.id if isinstance(value, DBRef) else value
+
+    @field_validator("matched_questions", mode="before")
+    @classmethod
+    def link_ids(cls, value):
+        return [ref.id if isinstance(ref, DBRef) else ref for ref in value]
+
+
+class CollectionSearchFilter(BaseModel):
+    # Words to find in the collection titles and descriptions or question texts
+    text: str
+    # Only collections with matching questions of this type
+    question_type: Optional[QuestionType] = None
+    owner_id: Optional[str] = None
+    cursor: Optional[str] = None
+    limit: int = Field(25, ge=1, le=100)
+
+
+class QuestionImportSchema(BaseModel):
+    """Progress of a question bank import, with its first rejected rows"""
+
+    id: str
+    collection_id: str
+    format: ImportFormat
+    status: ImportStatus
+    rows: int
+    imported: int
+    failed: int
+    errors: List[ImportRowError]
+    error: str | None = None
+    created_at: datetime
+    updated_at: datetime
+
+
 class UserId(BaseModel):
     student_id: str
 
 
+# Students assigned by a single bulk request, ids or rows of a CSV file
+MAX_BULK_ASSIGNMENT = 10000
+
+
+class AssignStudentsSchema(BaseModel):
+    student_ids: List[str] = Field(..., min_length=1, max_length=MAX_BULK_ASSIGNMENT)
+
+
+class StudentAssignmentResult(BaseModel):
+    assigned: int
+    already_assigned: int
+    # Requested ids or emails that are not those of a student
+    unknown: List[str]
+
+
+class NotificationRecipient(BaseModel):
+    """Student fields read to send exam notifications"""
+
+    id: str = Field(..., validation_alias=AliasChoices("id", "_id"))
+    email: str
+    first_name: Optional[str] = None
+    last_name: Optional[str] = None
+    receive_notifications: bool = True
+
+
 class ExamInstanceBase(BaseModel):
     title: str
     start_date: datetime
@@ -168,6 +254,64 @@ class GetExamInstance(ExamInstance):
     assigned_students: List[UserId] | None = None
 
 
+class ExamInstanceOverview(BaseModel):
+    """
+    Exam instance of the teacher's exam list, read with a projection of the
+    instance fields only, with the progress of its students
+    """
+
+    id: str = Field(..., alias="_id", serialization_alias="id")
+    title: str
+    collection_id: str
+    status: ExamStatus
+    start_date: datetime
+    end_date: datetime
+    max_attempts: int = 1
+    passing_score: int = 50
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    # Counted from the student exams of the instance
+    assigned: int = 0
+    in_progress: int = 0
+    submitted: int = 0
+
+    class Settings:
+        projection = {
+            "_id": 1,
+            "title": 1,
+            "collection_id": 1,
+            "status": 1,
+            "start_date": 1,
+            "end_date": 1,
+            "max_attempts": 1,
+            "passing_score": 1,
+            "created_at": 1,
+            "updated_at": 1,
+        }
+
+    @field_validator("collection_id", mode="before")
+    @classmethod
+    def link_id(cls, value):
+        return value.id if isinstance(value, DBRef) else value
+
+
+class ExamInstanceSort(str, Enum):
+    START_DATE_DESC = "-start_date"
+    START_DATE = "start_date"
+    CREATED_AT_DESC = "-created_at"
+    CREATED_AT = "created_at"
+
+
+class ExamInstanceFilter(BaseModel):
+    status: Optional[ExamStatus] = None
+    # Instances open at some point between these dates
+    date_from: Optional[datetime] = None
+    date_to: Optional[datetime] = None
+    sort: ExamInstanceSort = ExamInstanceSort.START_DATE_DESC
+    cursor: Optional[str] = None
+    limit: int = Field(25, ge=1, le=100)
+
+
 class ExamReportFilter(BaseModel):
     start_date: datetime | None = None
     end_date: datetime | None = None
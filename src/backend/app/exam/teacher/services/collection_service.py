@@ -1,7 +1,5 @@
 import uuid
-from typing import List
-
-from beanie import DeleteRules
+from typing import Any, AsyncIterable, AsyncIterator, Dict, List
 
 from app.core.exceptions import (
     BadRequestError,
@@ -9,22 +7,35 @@ from app.core.exceptions import (
     NotFoundError,
     UnprocessableEntityError,
 )
-from app.exam.models import ExamStatus, QuestionType
+from app.core.pagination import INVALID_CURSOR, decode_cursor, encode_cursor
+from app.core.responses import export_record
+from app.core.schemas import CursorPage
+from app.celery.tasks.import_tasks.tasks import import_question_file
+from app.exam.models import ExamStatus, ImportFormat, QuestionImport, QuestionType
 from app.exam.repository import (
     CollectionRepository,
+    QuestionImportRepository,
     QuestionRepository,
     ExamInstanceRepository,
 )
 from app.exam.teacher.schemas import (
     CollectionQuestionCount,
+    CollectionSearchFilter,
+    CollectionSearchResult,
     CreateCollection,
+    ForkCollection,
     GetCollection,
+    QuestionImportSchema,
     QuestionOrderSchema,
     QuestionSchema,
     UpdateCollection,
     UpdateQuestionSchema,
 )
 from app.i18n import _
+from app.settings import settings
+
+# Best matches of each full-text query ranked by a catalog search
+MAX_SEARCH_MATCHES = 1000
 
 
 class CollectionService:
@@ -33,10 +44,12 @@ class CollectionService:
         collection_repository: CollectionRepository,
         question_repository: QuestionRepository,
         exam_instance_repository: ExamInstanceRepository,
+        question_import_repository: QuestionImportRepository,
     ):
         self.collection_repository = collection_repository
         self.question_repository = question_repository
         self.exam_instance_repository = exam_instance_repository
+        self.question_import_repository = question_import_repository
 
     async def create_collection(
         self, collection_data: CreateCollection, user_id: str
@@ -69,6 +82,36 @@ class CollectionService:
 
         return collection.model_dump()
 
+    async def export_collection(
+        self, user_id: str, collection_id: str
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Export records of a collection: the collection, then its questions by
+        position, read from a cursor as the export is written.
+        """
+        collection = await self.collection_repository.get_by_id(collection_id)
+        if not collection:
+            raise NotFoundError(_("Collection not found"))
+
+        is_owner = collection.created_by.ref.id == user_id
+        if not (is_owner or collection.status == ExamStatus.PUBLISHED):
+            raise ForbiddenError(_("You don't have access to this collection"))
+
+        return self._collection_records(collection_id)
+
+    async def _collection_records(
+        self, collection_id: str
+    ) -> AsyncIterator[Dict[str, Any]]:
+        async for collection in self.collection_repository.iter_documents(
+            {"_id": collection_id}
+        ):
+            question_ids = [ref.id for ref in collection.pop("questions", [])]
+            yield export_record("collection", collection)
+            async for question in self.question_repository.iter_documents(
+                {"_id": {"$in": question_ids}}, sort=[("position", 1), ("_id", 1)]
+            ):
+                yield export_record("question", question)
+
     async def update_collection(
         self, collection_id: str, user_id: str, collection_data: UpdateCollection
     ) -> None:
@@ -98,6 +141,26 @@ class CollectionService:
 
         await self.collection_repository.delete(collection_id)
 
+    async def fork_collection(
+        self, collection_id: str, user_id: str, fork_data: ForkCollection
+    ) -> str:
+        """
+        Fork a published or owned collection into a draft of the user,
+        returning the fork ID. The fork links the questions of the source,
+        which are only copied once edited in the fork.
+        """
+        collection = await self.collection_repository.get_by_id(collection_id)
+        if not collection:
+            raise NotFoundError(_("Collection not found"))
+
+        is_owner = collection.created_by.ref.id == user_id
+        if not (is_owner or collection.status == ExamStatus.PUBLISHED):
+            raise ForbiddenError(_("You don't have access to this collection"))
+
+        return await self.collection_repository.fork(
+            collection_id, user_id, fork_data.title
+        )
+
     @staticmethod
     def _validate_question_by_type(question_data: dict) -> None:
         """
@@ -198,12 +261,48 @@ class CollectionService:
         await self.collection_repository.save(collection)
         return question_ids
 
+    async def start_question_import(
+        self,
+        collection_id: str,
+        user_id: str,
+        format: ImportFormat,
+        chunks: AsyncIterable[bytes],
+    ) -> QuestionImportSchema:
+        """
+        Store an uploaded question bank file as it arrives, then import its
+        questions into a collection in a background job.
+        """
+        await self._get_collection_with_permission_check(
+            collection_id, user_id, fetch_questions=False
+        )
+        job = QuestionImport(
+            collection_id=collection_id, created_by=user_id, format=format
+        )
+        job.file_id = await self.question_import_repository.save_file(
+            job.id, chunks, settings.QUESTION_IMPORT_MAX_SIZE
+        )
+        await self.question_import_repository.save(job)
+        import_question_file.apply_async(args=[job.id], task_id=job.id)
+        return QuestionImportSchema.model_validate(job.model_dump())
+
+    async def get_question_import(
+        self, import_id: str, user_id: str
+    ) -> QuestionImportSchema:
+        """Get the progress of a question bank import."""
+        job = await self.question_import_repository.get_by_id(import_id)
+        if not job:
+            raise NotFoundError(_("Question import not found"))
+        if job.created_by != user_id:
+            raise ForbiddenError(_("You don't have access to this question import"))
+        return QuestionImportSchema.model_validate(job.model_dump())
+
     async def _get_collection_with_permission_check(
-        self, collection_id: str, user_id: str
+        self, collection_id: str, user_id: str, *, fetch_questions: bool = True
     ):
         """Get collection and check permissions."""
         collection = await self.collection_repository.get_by_id(
-            collection_id, fetch_fields={"questions": 1}
+            collection_id,
+            fetch_fields={"questions": 1} if fetch_questions else None,
         )
         if not collection:
             raise NotFoundError(
@@ -262,30 +361,39 @@ class CollectionService:
         return question_data_dict
 
     async def edit_question(
-        self, question_id: str, user_id: str, question_data: UpdateQuestionSchema
-    ) -> None:
-        """Edit an existing question by its ID."""
-        question = await self.question_repository.get_by_id(
-            question_id, fetch_fields={"collection": 1}
-        )
+        self,
+        collection_id: str,
+        question_id: str,
+        user_id: str,
+        question_data: UpdateQuestionSchema,
+    ) -> str:
+        """
+        Edit a question of a collection, returning its ID. A question shared
+        with another collection, as a fork and its source are, is copied on
+        write: the edited copy gets a new ID and takes its place.
+        """
+        collection = await self.collection_repository.get_by_id(collection_id)
+        if not collection:
+            raise NotFoundError(_("Collection not found"))
+        if collection.created_by.ref.id != user_id:
+            raise ForbiddenError(_("You do not own this collection"))
+
+        question_ids = [link.ref.id for link in collection.questions]
+        question = None
+        if question_id in question_ids:
+            question = await self.question_repository.get_by_id(question_id)
         if not question:
             raise NotFoundError(_("Question not found"))
 
-        if question.created_by.ref.id != user_id:
-            raise ForbiddenError(_("You do not own this question"))
-
         # Check if the question position is already taken
         if (
-            hasattr(question_data, "position")
+            question_data.position is not None
             and question_data.position != question.position
         ):
-            existing_positions = {
-                q.position
-                for q in question.collection.questions
-                if hasattr(q, "position") and q.id != question.id
-            }
-
-            if question_data.position in existing_positions:
+            other_ids = [id for id in question_ids if id != question_id]
+            if await self.question_repository.count(
+                {"_id": {"$in": other_ids}, "position": question_data.position}
+            ):
                 raise UnprocessableEntityError(
                     _(
                         "Question with position {position} already exists in the collection"
@@ -311,7 +419,41 @@ class CollectionService:
 
         self._validate_question_by_type(merged_data)
 
-        await self.question_repository.update(question_id, update_data)
+        return await self._write_question(collection_id, question, update_data, user_id)
+
+    async def _write_question(
+        self, collection_id: str, question, update_data: dict, user_id: str
+    ) -> str:
+        """
+        Update a question of a collection, or copy it on write when it is not
+        the user's own or is linked from other collections. Returns the ID of
+        the updated question.
+        """
+        is_shared = question.created_by.ref.id != user_id or (
+            await self.collection_repository.is_question_shared(
+                question.id, collection_id
+            )
+        )
+        if not is_shared:
+            await self.question_repository.update(question.id, update_data)
+            return question.id
+
+        copy_data = question.model_dump(
+            exclude={"id", "created_by", "collection", "created_at", "updated_at"}
+        )
+        copy_data.update(update_data)
+        copy_data["_id"] = str(uuid.uuid4())
+        copy_data["created_by"] = user_id
+        copy = await self.question_repository.create(copy_data)
+
+        if not await self.collection_repository.replace_question(
+            collection_id, question.id, copy.id
+        ):
+            await self.question_repository.delete(copy.id)
+            raise BadRequestError(
+                _("The collection was changed meanwhile, please try again")
+            )
+        return copy.id
 
     async def reorder_questions(
         self, collection_id, teacher_id, question_ids: QuestionOrderSchema
@@ -363,8 +505,14 @@ class CollectionService:
 
             new_positions.add(position)
 
+        questions = {q.id: q for q in collection.questions}
         for question_id, position in question_ids.question_orders.items():
-            await self.question_repository.update(question_id, {"position": position})
+            await self._write_question(
+                collection_id,
+                questions[question_id],
+                {"position": position},
+                teacher_id,
+            )
 
         collection = await self.collection_repository.get_by_id(
             collection_id, fetch_fields={"questions": 1}
@@ -390,6 +538,53 @@ class CollectionService:
         )
         return await self._process_collections(collections)
 
+    async def search_public_collections(
+        self, filters: CollectionSearchFilter
+    ) -> CursorPage[CollectionSearchResult]:
+        """
+        Search the published collections by their title and description and
+        by the text of their questions. A collection ranks by its own text
+        score plus that of its best matching question. With a question type,
+        only the collections having matching questions of this type are found.
+        """
+        question_scores = await self.question_repository.search_text(
+            filters.text,
+            question_type=filters.question_type,
+            limit=MAX_SEARCH_MATCHES,
+        )
+        collections = await self.collection_repository.search_published(
+            None if filters.question_type else filters.text,
+            list(question_scores),
+            owner_id=filters.owner_id,
+            limit=MAX_SEARCH_MATCHES,
+        )
+
+        results = []
+        for collection in collections:
+            result = CollectionSearchResult.model_validate(collection)
+            result.score += max(
+                (question_scores.get(id, 0) for id in result.matched_questions),
+                default=0,
+            )
+            results.append(result)
+        results.sort(key=lambda result: (-result.score, result.id))
+
+        remaining = results
+        if filters.cursor:
+            score, last_id = decode_cursor(filters.cursor)
+            if not isinstance(score, (int, float)) or not isinstance(last_id, str):
+                raise BadRequestError(str(INVALID_CURSOR))
+            remaining = [
+                result
+                for result in results
+                if (-result.score, result.id) > (-score, last_id)
+            ]
+        items = remaining[: filters.limit]
+        next_cursor = None
+        if len(remaining) > filters.limit:
+            next_cursor = encode_cursor(items[-1].score, items[-1].id)
+        return CursorPage(items=items, total=len(results), next_cursor=next_cursor)
+
     @staticmethod
     async def _process_collections(collections) -> List[CollectionQuestionCount] | []:
         """Process collection data and add question count."""
@@ -403,15 +598,23 @@ class CollectionService:
             for collection in collections
         ]
 
-    async def delete_question(self, question_id: str, user_id: str) -> None:
-        """Delete an existing question by its ID."""
-        question = await self.question_repository.get_by_id(
-            question_id, fetch_fields={"collection": 1}
-        )
-        if not question:
+    async def delete_question(
+        self, collection_id: str, question_id: str, user_id: str
+    ) -> None:
+        """
+        Remove a question from a collection, deleting it unless another
+        collection still links it, as a fork and its source share questions.
+        """
+        collection = await self.collection_repository.get_by_id(collection_id)
+        if not collection:
+            raise NotFoundError(_("Collection not found"))
+        if collection.created_by.ref.id != user_id:
+            raise ForbiddenError(_("You do not own this collection"))
+        if question_id not in (link.ref.id for link in collection.questions):
             raise NotFoundError(_("Question not found"))
 
-        if question.created_by.ref.id != user_id:
-            raise ForbiddenError(_("You do not own this question"))
-
-        await self.question_repository.delete(question_id, link_rule = DeleteRules.DELETE_LINKS)
+        await self.collection_repository.remove_question(collection_id, question_id)
+        if not await self.collection_repository.is_question_shared(
+            question_id, collection_id
+        ):
+            await self.question_repository.delete(question_id)
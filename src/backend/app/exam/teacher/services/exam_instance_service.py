@@ -1,9 +1,18 @@
+import asyncio
 from datetime import datetime, timedelta, timezone
-from typing import List, Dict
+from typing import Any, AsyncIterable, Dict, List
 
+from bson import DBRef
+
+from app.auth.models import User
 from app.auth.repository import UserRepository
+from app.auth.schemas import UserRole
+from app.celery.scheduler import ScheduledTask, reminder_scheduler
 from app.celery.tasks.email_tasks.tasks import exam_reminder_notification
-from app.core.exceptions import ForbiddenError, NotFoundError
+from app.celery.worker import celery
+from app.core.exceptions import BadRequestError, ForbiddenError, NotFoundError
+from app.core.pagination import SortKey
+from app.core.schemas import CursorPage
 from app.core.utils import (
     convert_to_user_timezone,
     convert_user_timezone_to_utc,
@@ -13,15 +22,26 @@ from app.exam.models import ExamStatus, NotificationSettings
 from app.exam.repository import (
     CollectionRepository,
     ExamInstanceRepository,
+    NotificationJobRepository,
     StudentExamRepository,
+    StudentExamSummaryRepository,
 )
 from app.exam.teacher.schemas import (
+    MAX_BULK_ASSIGNMENT,
     CreateExamInstanceSchema,
+    ExamInstanceFilter,
+    ExamInstanceOverview,
     GetExamInstance,
+    NotificationRecipient,
+    StudentAssignmentResult,
     UpdateExamInstanceSchema,
 )
 from app.i18n import _
 from app.settings import settings
+from app.users.schemas import StudentData
+
+# Emails resolved per query when assigning students from a CSV file
+EMAIL_LOOKUP_BATCH = 1000
 
 
 class ExamInstanceService:
@@ -31,11 +51,15 @@ class ExamInstanceService:
         collection_repository: CollectionRepository,
         user_repository: UserRepository,
         student_exam_repository: StudentExamRepository,
+        student_exam_summary_repository: StudentExamSummaryRepository,
+        notification_job_repository: NotificationJobRepository,
     ):
         self.exam_instance_repository = exam_instance_repository
         self.collection_repository = collection_repository
         self.user_repository = user_repository
         self.student_exam_repository = student_exam_repository
+        self.student_exam_summary_repository = student_exam_summary_repository
+        self.notification_job_repository = notification_job_repository
 
     async def get_by_creator(
         self, user_id: str, user_timezone=None
@@ -50,6 +74,51 @@ class ExamInstanceService:
             for instance in instances
         ]
 
+    async def get_overview(
+        self, user_id: str, filters: ExamInstanceFilter, user_timezone=None
+    ) -> CursorPage[ExamInstanceOverview]:
+        """
+        Get a page of the exam instances of a teacher, with the number of
+        assigned students, and of those in progress or who submitted.
+        """
+        query: Dict[str, Any] = {"created_by": DBRef(User.Settings.name, user_id)}
+        if filters.status is not None:
+            query["status"] = filters.status
+        date_from, date_to = filters.date_from, filters.date_to
+        if user_timezone:
+            if date_from:
+                date_from = convert_user_timezone_to_utc(date_from, user_timezone)
+            if date_to:
+                date_to = convert_user_timezone_to_utc(date_to, user_timezone)
+        if date_from:
+            query["end_date"] = {"$gte": date_from}
+        if date_to:
+            query["start_date"] = {"$lte": date_to}
+
+        (items, next_cursor), total = await asyncio.gather(
+            self.exam_instance_repository.get_page(
+                query,
+                SortKey.parse(filters.sort.value),
+                cursor=filters.cursor,
+                limit=filters.limit,
+                projection_model=ExamInstanceOverview,
+            ),
+            self.exam_instance_repository.count(query),
+        )
+
+        counts = await self.student_exam_repository.count_by_exam(
+            [item.id for item in items]
+        )
+        for item in items:
+            for field, count in counts.get(item.id, {}).items():
+                setattr(item, field, count)
+            if user_timezone:
+                item.start_date = convert_to_user_timezone(
+                    item.start_date, user_timezone
+                )
+                item.end_date = convert_to_user_timezone(item.end_date, user_timezone)
+        return CursorPage(items=items, total=total, next_cursor=next_cursor)
+
     async def get_by_id(
         self, user_id: str, instance_id: str, user_timezone=None
     ) -> GetExamInstance:
@@ -108,6 +177,7 @@ class ExamInstanceService:
         exam_start_time: datetime,
         exam_end_time: datetime,
         student_exam_ids: Dict[str, str],
+        exam_instance_id: str,
     ) -> None:
         # Convert reminder strings to time deltas (e.g. "24h" -> 24 hours before exam)
         reminder_times = []
@@ -131,15 +201,22 @@ class ExamInstanceService:
         if exam_end_time.tzinfo is None:
             exam_end_time = exam_end_time.replace(tzinfo=timezone.utc)
 
-        for user_id in users_id:
-            user = await self.user_repository.get_by_id(user_id["student_id"])
-            if user is None or not user.receive_notifications:
+        recipients = await self.user_repository.get_by_ids_or_emails(
+            [user_id["student_id"] for user_id in users_id],
+            [],
+            projection_model=NotificationRecipient,
+        )
+
+        scheduled = []
+        for user in recipients:
+            if not user.receive_notifications:
                 continue
 
+            student_exam_id = student_exam_ids[user.id]
             # Assuming we have a link, which looks like this:
             # https://localhost/exam/{id}
             link = settings.EXAM_INSTANCE_URL
-            link = link.format(id=student_exam_ids[user_id["student_id"]])
+            link = link.format(id=student_exam_id)
             data = {
                 "recipient": user.email,
                 "username": make_username(user),
@@ -151,34 +228,27 @@ class ExamInstanceService:
             # Send notification immediately
             exam_reminder_notification.apply_async(kwargs=data)
 
-            data["exam_instance_id"] = student_exam_ids[user_id["student_id"]]
-
-            exam_id_str = str(student_exam_ids[user_id["student_id"]])
-            if exam_id_str not in user.notifications_tasks_id:
-                user.notifications_tasks_id[exam_id_str] = []
+            scheduled.extend(
+                ScheduledTask(
+                    fire_at=exam_start_time - delta,
+                    task=exam_reminder_notification.name,
+                    kwargs=data,
+                    tag=student_exam_id,
+                )
+                for delta in reminder_times
+                if exam_start_time - delta > current_time
+            )
 
-            for delta in reminder_times:
-                notification_time = exam_start_time - delta
-                if notification_time > current_time:
-                    result = exam_reminder_notification.apply_async(
-                        kwargs=data, eta=notification_time
-                    )
-                    user.notifications_tasks_id[exam_id_str].append(result.id)
-            await self.user_repository.save(user)
+        # Sent by the reminder dispatcher when they are due
+        await reminder_scheduler.schedule(exam_instance_id, scheduled)
 
     async def _create_student_exam(
         self, users_id: List[dict], exam_instance_id: str
     ) -> Dict[str, str]:
-        """Create a new StudentExam instance."""
-        student_exam_ids = {}
-        for user_id in users_id:
-            student_exam_data = {
-                "student_id": user_id["student_id"],
-                "exam_instance_id": exam_instance_id,
-            }
-            data = await self.student_exam_repository.create(student_exam_data)
-            student_exam_ids[user_id["student_id"]] = data.id
-        return student_exam_ids
+        """Create the StudentExam instances of students, in a single insert."""
+        return await self.student_exam_repository.create_many(
+            exam_instance_id, [user_id["student_id"] for user_id in users_id]
+        )
 
     async def _add_students_to_exam(
         self,
@@ -190,7 +260,17 @@ class ExamInstanceService:
         notification_settings: dict,
     ) -> None:
         """Add students to an exam instance, create StudentExam instances, and send notifications."""
+        # Each student once, in the order given
+        students = [
+            {"student_id": student_id}
+            for student_id in dict.fromkeys(
+                student["student_id"] for student in students
+            )
+        ]
         student_exam_ids = await self._create_student_exam(students, exam_instance_id)
+        await self.student_exam_summary_repository.create_for_student_exams(
+            exam_instance_id, student_exam_ids
+        )
         if (
             notification_settings["reminder_enabled"]
             and notification_settings["reminders"]
@@ -202,6 +282,7 @@ class ExamInstanceService:
                 start_date,
                 end_date,
                 student_exam_ids,
+                exam_instance_id,
             )
 
     async def _remove_students_from_exam(
@@ -211,23 +292,22 @@ class ExamInstanceService:
         Remove students from an exam instance, delete their StudentExam instances,
         and revoke any pending notification tasks.
         """
-        for student in students:
-            student_exam = await self.student_exam_repository.get_by_student_and_exam(
-                student["student_id"], exam_instance_id
-            )
-            if student_exam:
-                await self.student_exam_repository.delete(student_exam.id)
-
-            user = await self.user_repository.get_by_id(student["student_id"])
-            if user and student_exam.id in user.notifications_tasks_id:
-                task_ids = user.notifications_tasks_id[student_exam.id]
-                for task_id in task_ids:
-                    exam_reminder_notification.AsyncResult(task_id).revoke(
-                        terminate=True
-                    )
+        student_exams = await self.student_exam_repository.get_ids_by_exam(
+            exam_instance_id, [student["student_id"] for student in students]
+        )
+        await self.student_exam_repository.delete_many(list(student_exams.values()))
+        await reminder_scheduler.cancel(exam_instance_id, student_exams.values())
+        await self._revoke_notifications(student_exams)
 
-                del user.notifications_tasks_id[student_exam.id]
-                await self.user_repository.save(user)
+    async def _revoke_notifications(self, student_exams: Dict[str, str]) -> None:
+        """
+        Revoke the reminders of student exams, given by student id, that were
+        scheduled as Celery ETA tasks before the reminder scheduler
+        """
+        task_ids = await self.notification_job_repository.pop_task_ids(student_exams)
+        if task_ids:
+            # A single broadcast to the workers for all the tasks
+            celery.control.revoke(task_ids, terminate=True)
 
     @staticmethod
     async def check_datetime(
@@ -247,14 +327,15 @@ class ExamInstanceService:
 
     async def _validate_students_exist(self, students: List[dict]) -> None:
         """Check if all students exist in the user repository."""
-        for student in students:
-            student_id = student.get("student_id")
-            if student_id:
-                user = await self.user_repository.get_by_id(student_id)
-                if not user:
-                    raise NotFoundError(
-                        _("Student with ID {} not found").format(student_id)
-                    )
+        student_ids = [
+            student["student_id"] for student in students if student.get("student_id")
+        ]
+        existing = await self.user_repository.get_existing_ids(student_ids)
+        for student_id in student_ids:
+            if student_id not in existing:
+                raise NotFoundError(
+                    _("Student with ID {} not found").format(student_id)
+                )
 
     async def create_exam_instance(
         self,
@@ -379,9 +460,11 @@ class ExamInstanceService:
                     added_students,
                     instance_id,
                     instance.title,
-                    instance.start_date
-                    if "start_date" not in update_data
-                    else start_date,
+                    (
+                        instance.start_date
+                        if "start_date" not in update_data
+                        else start_date
+                    ),
                     instance.end_date if "end_date" not in update_data else end_date,
                     instance.notification_settings.model_dump(),
                 )
@@ -391,6 +474,10 @@ class ExamInstanceService:
 
         await self.exam_instance_repository.update(instance_id, update_data)
 
+        # Assignment changes are handled above, anything else is shown on the dashboard
+        if update_data.keys() - {"assigned_students"}:
+            await self.student_exam_summary_repository.sync_exam_instance(instance_id)
+
     async def delete_exam_instance(self, user_id: str, instance_id: str) -> None:
         """Delete an existing exam instance."""
         instance = await self.exam_instance_repository.get_by_id(instance_id)
@@ -400,11 +487,102 @@ class ExamInstanceService:
         if instance.created_by.ref.id != user_id:
             raise ForbiddenError(_("You do not own this exam instance"))
 
-        processed_students = []
-        for student in instance.assigned_students:
-            student_id = self._extract_id(student.student_id)
-            processed_students.append({"student_id": student_id})
+        student_exams = await self.student_exam_repository.get_ids_by_exam(instance_id)
+        await reminder_scheduler.cancel_group(instance_id)
+        await self._revoke_notifications(student_exams)
+        # Also deletes the student exams, in bulk
+        await self.exam_instance_repository.delete(instance_id)
+
+    async def assign_students(
+        self, user_id: str, instance_id: str, student_ids: List[str]
+    ) -> StudentAssignmentResult:
+        """Assign students to an exam instance by id, skipping unknown ids."""
+        instance = await self._get_owned_instance(user_id, instance_id)
+        existing = await self.user_repository.get_existing_ids(
+            student_ids, role=UserRole.STUDENT
+        )
+        unknown = [
+            student_id for student_id in student_ids if student_id not in existing
+        ]
+        return await self._assign(
+            instance, [id for id in student_ids if id in existing], unknown
+        )
 
-        await self._remove_students_from_exam(processed_students, instance_id)
+    async def assign_students_by_email(
+        self, user_id: str, instance_id: str, emails: AsyncIterable[str]
+    ) -> StudentAssignmentResult:
+        """Assign students to an exam instance from a stream of emails."""
+        instance = await self._get_owned_instance(user_id, instance_id)
+        requested = []
+        async for email in emails:
+            requested.append(email)
+            if len(requested) > MAX_BULK_ASSIGNMENT:
+                raise BadRequestError(
+                    _("At most {} students can be assigned at once").format(
+                        MAX_BULK_ASSIGNMENT
+                    )
+                )
 
-        await self.exam_instance_repository.delete(instance_id)
+        student_ids = []
+        unknown = []
+        for start in range(0, len(requested), EMAIL_LOOKUP_BATCH):
+            batch = requested[start : start + EMAIL_LOOKUP_BATCH]
+            students = await self.user_repository.get_by_ids_or_emails(
+                [], batch, role=UserRole.STUDENT, projection_model=StudentData
+            )
+            ids_by_email = {student.email.lower(): student.id for student in students}
+            for email in batch:
+                student_id = ids_by_email.get(email.lower())
+                if student_id is None:
+                    unknown.append(email)
+                else:
+                    student_ids.append(student_id)
+        return await self._assign(instance, student_ids, unknown)
+
+    async def _get_owned_instance(self, user_id: str, instance_id: str):
+        instance = await self.exam_instance_repository.get_by_id(instance_id)
+        if not instance:
+            raise NotFoundError(_("Exam instance not found"))
+        if instance.created_by.ref.id != user_id:
+            raise ForbiddenError(_("You do not own this exam instance"))
+        return instance
+
+    async def _assign(
+        self, instance, student_ids: List[str], unknown: List[str]
+    ) -> StudentAssignmentResult:
+        requested = list(dict.fromkeys(student_ids))
+        while True:
+            assigned = {
+                self._extract_id(student.student_id)
+                for student in instance.assigned_students
+            }
+            new_ids = [
+                student_id for student_id in requested if student_id not in assigned
+            ]
+            if not new_ids:
+                break
+            # Added only if none of them was assigned meanwhile, so that
+            # concurrent assignments neither duplicate nor miss a student
+            added = await self.exam_instance_repository.add_assigned_students(
+                instance.id, new_ids
+            )
+            if added:
+                break
+            instance = await self.exam_instance_repository.get_by_id(instance.id)
+            if not instance:
+                raise NotFoundError(_("Exam instance not found"))
+
+        if new_ids:
+            await self._add_students_to_exam(
+                [{"student_id": student_id} for student_id in new_ids],
+                instance.id,
+                instance.title,
+                instance.start_date,
+                instance.end_date,
+                instance.notification_settings.model_dump(),
+            )
+        return StudentAssignmentResult(
+            assigned=len(new_ids),
+            already_assigned=len(requested) - len(new_ids),
+            unknown=unknown,
+        )
@@ -1,20 +1,23 @@
-import statistics
 from datetime import datetime, timezone
 from io import BytesIO
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from bson import DBRef
 
 from reportlab.lib import colors
 from reportlab.lib.pagesizes import A4
 from reportlab.lib.styles import getSampleStyleSheet
 from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
 
-from app.core.exceptions import NotFoundError
+from app.core.exceptions import ForbiddenError, NotFoundError
+from app.core.responses import export_record
 from app.core.utils import convert_to_user_timezone, convert_user_timezone_to_utc
-from app.exam.models import StudentAttempt
+from app.exam.models import ExamInstance, StudentAttempt, StudentExam
 from app.exam.repository import (
     ExamInstanceRepository,
     StudentAttemptRepository,
     StudentExamRepository,
+    StudentResponseRepository,
 )
 from app.exam.teacher.schemas import (
     ExamReportFilter,
@@ -25,6 +28,9 @@ from app.exam.teacher.schemas import (
 )
 from app.i18n import _
 
+# Student exams whose attempts and responses are read per query of an export
+EXPORT_BATCH_SIZE = 100
+
 
 class ReportService:
     def __init__(
@@ -32,10 +38,12 @@ class ReportService:
         student_exam_repository: StudentExamRepository,
         student_attempt_repository: StudentAttemptRepository,
         exam_instance_repository: ExamInstanceRepository,
+        student_response_repository: StudentResponseRepository,
     ):
         self.student_exam_repository = student_exam_repository
         self.student_attempt_repository = student_attempt_repository
         self.exam_instance_repository = exam_instance_repository
+        self.student_response_repository = student_response_repository
 
     async def get_exam_report(
         self,
@@ -71,13 +79,17 @@ class ReportService:
         elif end_date and end_date.tzinfo is None:
             end_date = end_date.replace(tzinfo=timezone.utc)
 
-        date_range = (start_date, end_date)
-
-        attempts = await self._get_filtered_attempts(
-            exam_instance_id, date_range, filters.student_ids, filters.only_last_attempt
+        report = await self.student_exam_repository.get_report_stats(
+            exam_instance_id,
+            exam_instance.passing_score,
+            start_date=start_date,
+            end_date=end_date,
+            student_ids=filters.student_ids,
+            only_last_attempt=filters.only_last_attempt,
         )
+        summary = report["summary"]
 
-        if not attempts:
+        if not summary:
             return ExamReportResponse(
                 exam_title=exam_instance.title,
                 total_students=0,
@@ -85,16 +97,12 @@ class ReportService:
                 statistics=ExamStatistics(),
             )
 
-        scores = [attempt.grade for attempt in attempts if attempt.grade is not None]
-
-        passing_score = exam_instance.passing_score
-        passing_students = sum(1 for score in scores if score >= passing_score)
-        pass_rate = (passing_students / len(scores)) * 100 if scores else 0
+        pass_rate = (summary["passed"] / summary["attempts_count"]) * 100
 
-        histogram_data = self._prepare_histogram_data(scores)
+        histogram_data = self._prepare_histogram_data(report["histogram"])
 
         # Convert timeline timestamps to user timezone
-        timeline_data = self._prepare_timeline_data(attempts)
+        timeline_data = self._prepare_timeline_data(report["timeline"])
         if user_timezone and timeline_data:
             for point in timeline_data:
                 # Convert the datetime object from ISO format string
@@ -107,19 +115,83 @@ class ReportService:
 
         return ExamReportResponse(
             exam_title=exam_instance.title,
-            total_students=len(set(attempt.student_exam_id.id for attempt in attempts)),
-            attempts_count=len(attempts),
+            total_students=summary["total_students"],
+            attempts_count=summary["attempts_count"],
             statistics=ExamStatistics(
-                mean=statistics.mean(scores) if scores else None,
-                median=statistics.median(scores) if scores else None,
-                max=max(scores) if scores else None,
-                min=min(scores) if scores else None,
+                mean=summary["mean"],
+                median=summary["median"],
+                max=summary["max"],
+                min=summary["min"],
             ),
             pass_rate=pass_rate,
             histogram_data=histogram_data,
             timeline_data=timeline_data,
         )
 
+    async def export_exam_instance(
+        self, exam_instance_id: str, user_id: str
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Export records of an exam instance: the instance, then each batch of
+        its student exams followed by their attempts and the responses of
+        these. Documents are read from cursors as the export is written, so
+        only the ids of a batch are held at a time.
+        """
+        exam_instance = await self.exam_instance_repository.get_by_id(exam_instance_id)
+        if not exam_instance:
+            raise NotFoundError(_("Exam instance not found"))
+        if exam_instance.created_by.ref.id != user_id:
+            raise ForbiddenError(_("You don't have access to this exam instance"))
+
+        return self._exam_instance_records(exam_instance_id)
+
+    async def _exam_instance_records(
+        self, exam_instance_id: str
+    ) -> AsyncIterator[Dict[str, Any]]:
+        async for exam_instance in self.exam_instance_repository.iter_documents(
+            {"_id": exam_instance_id}
+        ):
+            yield export_record("exam_instance", exam_instance)
+
+        student_exam_ids = []
+        async for student_exam in self.student_exam_repository.iter_documents(
+            {"exam_instance_id": DBRef(ExamInstance.Settings.name, exam_instance_id)},
+            sort=[("_id", 1)],
+        ):
+            yield export_record("student_exam", student_exam)
+            student_exam_ids.append(student_exam["_id"])
+            if len(student_exam_ids) == EXPORT_BATCH_SIZE:
+                async for record in self._attempt_records(student_exam_ids):
+                    yield record
+                student_exam_ids = []
+        if student_exam_ids:
+            async for record in self._attempt_records(student_exam_ids):
+                yield record
+
+    async def _attempt_records(
+        self, student_exam_ids: List[str]
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Attempts of some student exams, then the responses of these attempts"""
+        attempt_refs = []
+        async for attempt in self.student_attempt_repository.iter_documents(
+            {
+                "student_exam_id": {
+                    "$in": [
+                        DBRef(StudentExam.Settings.name, id) for id in student_exam_ids
+                    ]
+                }
+            },
+            sort=[("_id", 1)],
+        ):
+            yield export_record("attempt", attempt)
+            attempt_refs.append(DBRef(StudentAttempt.Settings.name, attempt["_id"]))
+
+        if attempt_refs:
+            async for response in self.student_response_repository.iter_documents(
+                {"attempt_id": {"$in": attempt_refs}}, sort=[("_id", 1)]
+            ):
+                yield export_record("response", response)
+
     async def _get_filtered_attempts(
         self,
         exam_instance_id: str,
@@ -186,57 +258,32 @@ class ReportService:
 
         return all_attempts
 
-    def _prepare_histogram_data(self, scores: List[float]) -> List[HistogramDataPoint]:
-        """Helper method to prepare histogram data for percentage scores (0-100%)"""
-        if not scores:
+    def _prepare_histogram_data(self, bins: Dict[int, int]) -> List[HistogramDataPoint]:
+        """
+        Helper method to prepare histogram data for percentage scores (0-100%),
+        from the number of scores per bin lower bound
+        """
+        if not bins:
             return []
 
         # Create bins for scores (0-9, 10-19, ..., 90-100)
-        bins = {}
-        for i in range(0, 100, 10):
-            bins[i] = 0
-
-        for score in scores:
-            # Special handling for score of exactly 100%
-            if score == 100:
-                bin_key = 90  # Put 100% in the 90-100 bin
-            else:
-                bin_key = (int(score) // 10) * 10
-            bins[bin_key] += 1
-
-        # Create histogram data points with special handling for last bin
         result = []
-        for k, v in bins.items():
+        for k in range(0, 100, 10):
             if k == 90:
                 range_str = "90-100"  # Last bin includes 100%
             else:
                 range_str = f"{k}-{k + 9}"
-            result.append(HistogramDataPoint(range=range_str, count=v))
+            result.append(HistogramDataPoint(range=range_str, count=bins.get(k, 0)))
 
         return result
 
     def _prepare_timeline_data(
-        self, attempts: List[StudentAttempt]
+        self, days: List[Tuple[str, float]]
     ) -> List[TimelineDataPoint]:
-        """Helper method to prepare timeline data (scores over time)"""
-        if not attempts:
-            return []
-
-        sorted_attempts = sorted(
-            [a for a in attempts if a.submitted_at and a.grade is not None],
-            key=lambda x: x.submitted_at,
-        )
-
-        timeline_data = {}
-        for attempt in sorted_attempts:
-            day = attempt.submitted_at.date().isoformat()
-            if day not in timeline_data:
-                timeline_data[day] = []
-            timeline_data[day].append(attempt.grade)
-
+        """Helper method to prepare timeline data (average score per day)"""
         return [
-            TimelineDataPoint(date=day, average_score=sum(scores) / len(scores))
-            for day, scores in timeline_data.items()
+            TimelineDataPoint(date=day, average_score=average_score)
+            for day, average_score in days
         ]
 
     async def get_student_report_data(
@@ -1,3 +1,3 @@
-from .manager import _, set_locale
+from .manager import LazyString, _, lazy_gettext, set_locale
 
-__all__ = ["set_locale", "_"]
+__all__ = ["set_locale", "_", "lazy_gettext", "LazyString"]
@@ -1,11 +1,110 @@
 import contextvars
 import gettext
+import logging
+import re
+from functools import lru_cache
+from io import BytesIO
 from pathlib import Path
+from types import MappingProxyType
+from typing import Any, Callable, Mapping, Optional
 
+from babel.messages.mofile import write_mo
+from babel.messages.pofile import read_po
 from fastapi import Request
+from pydantic_core import core_schema
+
+logger = logging.getLogger(__name__)
+
+DOMAIN = "messages"
+TRANSLATIONS_DIR = Path(__file__).parent / "translations"
+SOURCE_LANGUAGE = "en"
 
 # Store current language per request
-_current_lang = contextvars.ContextVar("current_language", default="en")
+_current_lang = contextvars.ContextVar("current_language", default=SOURCE_LANGUAGE)
+
+_NULL_TRANSLATION = gettext.NullTranslations()
+
+
+def _load_catalog(messages_dir: Path) -> Optional[gettext.GNUTranslations]:
+    """
+    Load the compiled catalog of a language, compiling the .po file in memory
+    when no .mo file was built (compiled catalogs are not committed).
+    """
+    mo_file = messages_dir / f"{DOMAIN}.mo"
+    if mo_file.exists():
+        with mo_file.open("rb") as fp:
+            return gettext.GNUTranslations(fp)
+
+    po_file = messages_dir / f"{DOMAIN}.po"
+    if po_file.exists():
+        with po_file.open("rb") as fp:
+            catalog = read_po(fp)
+        buffer = BytesIO()
+        write_mo(buffer, catalog)
+        buffer.seek(0)
+        return gettext.GNUTranslations(buffer)
+
+    return None
+
+
+def load_catalogs(
+    localedir: Path = TRANSLATIONS_DIR,
+) -> Mapping[str, gettext.GNUTranslations]:
+    """Load every catalog under `localedir` into a read-only mapping by language"""
+    catalogs = {}
+    for messages_dir in sorted(localedir.glob("*/LC_MESSAGES")):
+        catalog = _load_catalog(messages_dir)
+        if catalog is not None:
+            catalogs[messages_dir.parent.name] = catalog
+    return MappingProxyType(catalogs)
+
+
+# Loaded once when the application imports the module
+CATALOGS = load_catalogs()
+
+# Languages reported without catalog, only well-formed tags (the header is
+# sent by clients) and at most MAX_REPORTED_MISSING of them
+_LANGUAGE_TAG = re.compile(r"[a-z]{2,3}(-[A-Z]{2})?")
+MAX_REPORTED_MISSING = 100
+_reported_missing = set()
+
+
+def _report_missing(lang: str) -> None:
+    language, _sep, region = lang.replace("_", "-").partition("-")
+    tag = f"{language.lower()}-{region.upper()}" if region else language.lower()
+    if (
+        not _LANGUAGE_TAG.fullmatch(tag)
+        or tag in _reported_missing
+        or len(_reported_missing) >= MAX_REPORTED_MISSING
+    ):
+        return
+    _reported_missing.add(tag)
+    logger.warning(
+        "No translation catalog for language %r, falling back to %r",
+        tag,
+        SOURCE_LANGUAGE,
+    )
+
+
+@lru_cache(maxsize=128)
+def _resolve_translation(lang: str) -> gettext.NullTranslations:
+    """
+    Find the catalog of a language tag: exact match first ("uk_UA", "uk-UA"),
+    then any catalog of the same language ("uk" -> "uk_UA").
+    """
+    normalized = lang.replace("-", "_")
+    for name, catalog in CATALOGS.items():
+        if name.lower() == normalized.lower():
+            return catalog
+
+    language = normalized.split("_")[0].lower()
+    for name, catalog in CATALOGS.items():
+        if name.split("_")[0].lower() == language:
+            return catalog
+
+    if language != SOURCE_LANGUAGE:
+        _report_missing(lang)
+    return _NULL_TRANSLATION
 
 
 def set_language(lang: str):
@@ -16,20 +115,69 @@ def get_language() -> str:
     return _current_lang.get()
 
 
-def get_translation(lang: str = None):
-    lang = lang or get_language()
-    locales_dir = Path(__file__).parent / "translations"
-    return gettext.translation(
-        "messages",
-        localedir=locales_dir,
-        languages=[lang],
-        fallback=True,
-    )
+def get_translation(lang: str = None) -> gettext.NullTranslations:
+    return _resolve_translation(lang or get_language())
 
 
 def _(message: str) -> str:
-    translation = get_translation()
-    return translation.gettext(message)
+    return get_translation().gettext(message)
+
+
+class LazyString:
+    """
+    String computed only when it is used, for instance a message translated
+    with `lazy_gettext` at import time, before any request language is known.
+
+    It behaves like its value when converted with str(), compared, hashed or
+    formatted, and Pydantic models serialize it as a plain string. Other
+    consumers, such as HTTPException details, need an explicit str().
+    """
+
+    __slots__ = ("_func", "_args", "_kwargs")
+
+    def __init__(self, func: Callable[..., str], *args: Any, **kwargs: Any):
+        self._func = func
+        self._args = args
+        self._kwargs = kwargs
+
+    def __str__(self) -> str:
+        return str(self._func(*self._args, **self._kwargs))
+
+    def __repr__(self) -> str:
+        return f"LazyString({str(self)!r})"
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, LazyString):
+            other = str(other)
+        return str(self) == other
+
+    def __hash__(self) -> int:
+        return hash(str(self))
+
+    def __len__(self) -> int:
+        return len(str(self))
+
+    def __add__(self, other: str) -> str:
+        return str(self) + other
+
+    def __radd__(self, other: str) -> str:
+        return other + str(self)
+
+    def format(self, *args: Any, **kwargs: Any) -> "LazyString":
+        return LazyString(lambda: str(self).format(*args, **kwargs))
+
+    @classmethod
+    def __get_pydantic_core_schema__(cls, source: Any, handler: Any):
+        return core_schema.json_or_python_schema(
+            json_schema=core_schema.str_schema(),
+            python_schema=core_schema.is_instance_schema(cls),
+            serialization=core_schema.plain_serializer_function_ser_schema(str),
+        )
+
+
+def lazy_gettext(message: str) -> LazyString:
+    """Mark a message for translation in the language active when it is used"""
+    return LazyString(_, message)
 
 
 async def set_locale(request: Request):
@@ -38,5 +186,5 @@ async def set_locale(request: Request):
     #     or request.headers.get("Accept-Language")
     #     or "en"
     # )
-    lang = request.headers.get("X-User-Language", "en")
+    lang = request.headers.get("X-User-Language", SOURCE_LANGUAGE)
     set_language(lang)
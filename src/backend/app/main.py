@@ -4,10 +4,14 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from .auth.dependencies import get_user_repository
+from .auth.revocation import revocation_list
+from .auth.security import shutdown_password_hash_pool
 from .auth.service import AuthService
 from .database import init_db
+from .exam.dependencies import (get_notification_job_repository,
+                                get_student_exam_summary_repository)
 from .i18n import _
-from .middleware import LanguageMiddleware, TimezoneMiddleware
+from .middleware import RequestContextMiddleware
 from .router import router
 from .settings import settings
 
@@ -20,9 +24,21 @@ async def lifespan(app: FastAPI):
     user_repository = get_user_repository()
     auth_service = AuthService(user_repository)
     await auth_service.initialize_test_users()
+    await user_repository.backfill_search_keys()
+
+    # Build dashboard summaries for exams assigned before the read model
+    # existed, until done once
+    await get_student_exam_summary_repository().backfill_missing()
+    # Move reminder task IDs out of the User documents
+    await get_notification_job_repository().backfill_from_users()
+
+    revocation_list.start()
 
     yield
 
+    await revocation_list.stop()
+    shutdown_password_hash_pool()
+
 
 app = FastAPI(
     title=f"{settings.PROJECT_NAME} API",
@@ -38,8 +54,7 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-app.add_middleware(TimezoneMiddleware)
-app.add_middleware(LanguageMiddleware)
+app.add_middleware(RequestContextMiddleware)
 
 app.include_router(router)
 
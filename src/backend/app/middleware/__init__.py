@@ -1,4 +1,9 @@
-from .language_middleware import LanguageMiddleware
-from .timezone_middleware import TimezoneMiddleware
+from .request_context import (RequestContextMiddleware, get_request_elapsed,
+                              get_request_id, get_request_timezone)
 
-__all__ = ["LanguageMiddleware", "TimezoneMiddleware"]
+__all__ = [
+    "RequestContextMiddleware",
+    "get_request_elapsed",
+    "get_request_id",
+    "get_request_timezone",
+]
@@ -0,0 +1,113 @@
+import time
+import uuid
+from contextvars import ContextVar
+from datetime import tzinfo
+from functools import lru_cache
+from typing import Optional
+
+import pytz
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.i18n.manager import set_language
+
+# Per-request values, readable anywhere down the call stack of a request
+_request_id: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+_timezone: ContextVar[tzinfo] = ContextVar("timezone", default=pytz.utc)
+_started_at: ContextVar[Optional[float]] = ContextVar("started_at", default=None)
+
+
+def get_request_id() -> Optional[str]:
+    return _request_id.get()
+
+
+def get_request_timezone() -> tzinfo:
+    return _timezone.get()
+
+
+def get_request_elapsed() -> Optional[float]:
+    """Seconds spent on the current request so far"""
+    started_at = _started_at.get()
+    return time.perf_counter() - started_at if started_at is not None else None
+
+
+@lru_cache(maxsize=None)
+def _load_timezone(name: str) -> tzinfo:
+    return pytz.timezone(name)
+
+
+def resolve_timezone(name: str) -> Optional[tzinfo]:
+    """
+    Get a timezone by name from the zone table, loading each zone only once.
+    Only names known to pytz are cached, so arbitrary header values cannot
+    grow the table.
+    """
+    if name not in pytz.all_timezones_set:
+        return None
+    return _load_timezone(name)
+
+
+class RequestContextMiddleware:
+    """
+    Pure ASGI middleware setting up the context of each HTTP request.
+
+    In a single pass over the request headers it sets:
+        - the language, from X-User-Language (default "en")
+        - the timezone, from X-Timezone (unknown zones fall back to the
+          default), in `request.state.timezone` / `timezone_name`
+        - the request id, taken from X-Request-ID or generated
+        - the request start time
+        - `request.state.response_headers`, headers added to the response
+          whatever the route returns (even a Response object of its own)
+
+    These are also stored in context variables, and the response carries the
+    X-Request-ID and a Server-Timing header with the time spent in the app.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        default_timezone: str = "UTC",
+        default_language: str = "en",
+    ):
+        self.app = app
+        self.default_timezone = default_timezone
+        self.default_language = default_language
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started_at = time.perf_counter()
+        headers = Headers(scope=scope)
+
+        timezone_name = headers.get("x-timezone", self.default_timezone)
+        timezone = resolve_timezone(timezone_name)
+        if timezone is None:
+            timezone_name = self.default_timezone
+            timezone = resolve_timezone(timezone_name)
+        request_id = headers.get("x-request-id") or uuid.uuid4().hex
+
+        state = scope.setdefault("state", {})
+        state["timezone"] = timezone
+        state["timezone_name"] = timezone_name
+        state["request_id"] = request_id
+        state["response_headers"] = extra_headers = {}
+
+        set_language(headers.get("x-user-language", self.default_language))
+        _timezone.set(timezone)
+        _request_id.set(request_id)
+        _started_at.set(started_at)
+
+        async def send_with_context(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                response_headers = MutableHeaders(scope=message)
+                for name, value in extra_headers.items():
+                    response_headers.append(name, value)
+                response_headers.append("X-Request-ID", request_id)
+                elapsed_ms = (time.perf_counter() - started_at) * 1000
+                response_headers.append("Server-Timing", f"app;dur={elapsed_ms:.1f}")
+            await send(message)
+
+        await self.app(scope, receive, send_with_context)
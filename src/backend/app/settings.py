@@ -24,6 +24,13 @@ class Settings(BaseSettings):
     DOMAIN: str
     ACCESS_TOKEN_EXPIRE_SECONDS: int
 
+    # Password hashing: bcrypt work factor and size of the hashing process pool
+    BCRYPT_ROUNDS: int = Field(12, ge=4, le=31)
+    PASSWORD_HASH_WORKERS: int = Field(2, ge=1)
+
+    # Application rate limits, declared per router (see app.core.rate_limit)
+    RATE_LIMIT_ENABLED: bool = True
+
     # Admin
     ADMIN_EMAIL: str
     ADMIN_PASSWORD: str
@@ -52,6 +59,18 @@ class Settings(BaseSettings):
     SMTP_HOST: str
     EMAIL_FROM_NAME: str
 
+    # Exam reminders: how often due reminders are sent, and how many per batch
+    REMINDER_DISPATCH_INTERVAL: int = Field(30, ge=1)
+    REMINDER_BATCH_SIZE: int = Field(500, ge=1)
+
+    # Queued emails: how many are popped at once, and how many times an email
+    # refused for a temporary reason is tried
+    MAIL_BATCH_SIZE: int = Field(100, ge=1)
+    MAIL_MAX_ATTEMPTS: int = Field(5, ge=1)
+
+    # Largest question bank file imported into a collection, in bytes
+    QUESTION_IMPORT_MAX_SIZE: int = Field(50 * 1024 * 1024, ge=1)
+
     # MongoDB settings
     MONGO_USERNAME: str = Field(..., alias="MONGO_INITDB_ROOT_USERNAME")
     MONGO_PASSWORD: str = Field(..., alias="MONGO_INITDB_ROOT_PASSWORD")
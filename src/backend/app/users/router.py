@@ -1,16 +1,21 @@
 from typing import List
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query, Response
 
 from app.auth.dependencies import get_current_teacher_id, get_current_user_id
 from app.auth.schemas import Token, UserResponse
 from app.core.schemas import BaseReturn
-from app.i18n import _
+from app.i18n import _, lazy_gettext
 from app.users.dependencies import get_user_service
-from app.users.schemas import StudentData, UserUpdate, UserUpdatePassword
+from app.users.schemas import (StudentData, StudentResolveRequest,
+                               StudentResolveResult, UserUpdate,
+                               UserUpdatePassword)
 
 router = APIRouter(prefix="/users", tags=["users"])
 
+# Translated in the language of each response
+STUDENTS_RETRIEVED = lazy_gettext("Students retrieved successfully")
+
 
 @router.get(
     "/me", response_model=BaseReturn[UserResponse], response_model_exclude_none=True
@@ -81,14 +86,18 @@ async def delete_user_info(
 )
 async def change_password(
     password_data: UserUpdatePassword,
+    response: Response,
     user_id: str = Depends(get_current_user_id),
     user_service=Depends(get_user_service),
 ):
     """
     Change the password of the currently logged-in user
+
+    Every other session is logged out, and this one gets a new access token
+    cookie.
     """
     await user_service.change_password(
-        user_id, password_data.password, password_data.new_password
+        user_id, password_data.password, password_data.new_password, response
     )
     return BaseReturn(
         message=_("Password changed successfully"),
@@ -99,6 +108,7 @@ async def change_password(
     "/fetch-students",
     response_model=BaseReturn[List[StudentData]],
     response_model_exclude_none=True,
+    deprecated=True,
 )
 async def get_student_mails(
     teacher_id=Depends(get_current_teacher_id),
@@ -106,9 +116,60 @@ async def get_student_mails(
 ):
     """
     As a teacher get all student emails as a teacher.
+
+    Prefer /students/search and /students/resolve, which do not download
+    every student.
     """
     students = await user_service.get_all_students()
     return BaseReturn(
-        message=_("Students retrieved successfully"),
+        message=STUDENTS_RETRIEVED,
         data=students,
     )
+
+
+@router.get(
+    "/students/search",
+    response_model=BaseReturn[List[StudentData]],
+    response_model_exclude_none=True,
+)
+async def search_students(
+    q: str = Query(
+        ...,
+        min_length=2,
+        max_length=100,
+        description="Beginning of the email, first, last or full name",
+    ),
+    limit: int = Query(10, ge=1, le=25),
+    teacher_id=Depends(get_current_teacher_id),
+    user_service=Depends(get_user_service),
+):
+    """
+    As a teacher find students for a typeahead, by the beginning of their
+    email or name (case-insensitive).
+    """
+    students = await user_service.search_students(q, limit)
+    return BaseReturn(
+        message=STUDENTS_RETRIEVED,
+        data=students,
+    )
+
+
+@router.post(
+    "/students/resolve",
+    response_model=BaseReturn[StudentResolveResult],
+    response_model_exclude_none=True,
+)
+async def resolve_students(
+    request: StudentResolveRequest,
+    teacher_id=Depends(get_current_teacher_id),
+    user_service=Depends(get_user_service),
+):
+    """
+    As a teacher get the students having the given ids or emails, for instance
+    those assigned to an exam.
+    """
+    result = await user_service.resolve_students(request)
+    return BaseReturn(
+        message=STUDENTS_RETRIEVED,
+        data=result,
+    )
@@ -1,6 +1,6 @@
-from typing import Optional
+from typing import List, Optional
 
-from pydantic import BaseModel, ConfigDict, EmailStr, Field
+from pydantic import AliasChoices, BaseModel, ConfigDict, EmailStr, Field
 
 
 class UserUpdatePassword(BaseModel):
@@ -15,10 +15,22 @@ class UserUpdate(BaseModel):
 
 
 class StudentData(BaseModel):
-    id: str
+    id: str = Field(..., validation_alias=AliasChoices("id", "_id"))
 
-    first_name: str
-    last_name: str
+    first_name: Optional[str] = None
+    last_name: Optional[str] = None
     email: EmailStr
 
     model_config = ConfigDict(from_attributes=True)
+
+
+class StudentResolveRequest(BaseModel):
+    ids: List[str] = Field(default_factory=list, max_length=500)
+    emails: List[str] = Field(default_factory=list, max_length=500)
+
+
+class StudentResolveResult(BaseModel):
+    students: List[StudentData]
+    # Requested ids and emails that are not those of a student
+    unknown_ids: List[str]
+    unknown_emails: List[str]
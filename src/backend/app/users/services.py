@@ -1,18 +1,24 @@
 from typing import List
 
+from fastapi import Response
+
 from app.auth.repository import UserRepository
+from app.auth.revocation import revocation_list
 from app.auth.schemas import UserResponse, UserRole
-from app.auth.security import (TokenType, create_verification_token,
+from app.auth.security import (TokenType, check_password,
+                               create_verification_token,
                                decode_verification_token,
-                               delete_verification_token, get_password_hash,
-                               verify_password)
+                               delete_verification_token, hash_password)
+from app.auth.service import set_access_cookie
+from app.celery.tasks.cleanup_tasks.tasks import delete_user_data
 from app.celery.tasks.email_tasks.tasks import (user_deleted_notification,
                                                 user_deletion_confirmation)
 from app.core.exceptions import AuthenticationError, NotFoundError
 from app.core.utils import make_username
 from app.i18n import _
 from app.settings import settings
-from app.users.schemas import StudentData, UserUpdate
+from app.users.schemas import (StudentData, StudentResolveRequest,
+                               StudentResolveResult, UserUpdate)
 
 
 class UserService:
@@ -26,6 +32,39 @@ class UserService:
             return []
         return [StudentData.model_validate(student) for student in students]
 
+    async def search_students(self, prefix: str, limit: int) -> List[StudentData]:
+        """Get the students whose email or name starts with a prefix"""
+        return await self.user_repository.search(
+            prefix, role=UserRole.STUDENT, limit=limit, projection_model=StudentData
+        )
+
+    async def resolve_students(
+        self, request: StudentResolveRequest
+    ) -> StudentResolveResult:
+        """Get the students having the requested ids or emails"""
+        students = []
+        if request.ids or request.emails:
+            students = await self.user_repository.get_by_ids_or_emails(
+                request.ids,
+                request.emails,
+                role=UserRole.STUDENT,
+                projection_model=StudentData,
+            )
+
+        found_ids = {student.id for student in students}
+        found_emails = {student.email.lower() for student in students}
+        return StudentResolveResult(
+            students=students,
+            unknown_ids=[
+                user_id for user_id in request.ids if user_id not in found_ids
+            ],
+            unknown_emails=[
+                email
+                for email in request.emails
+                if email.strip().lower() not in found_emails
+            ],
+        )
+
     async def get_user_info(self, user_id: str) -> UserResponse:
         user = await self.user_repository.get_by_id(user_id)
 
@@ -85,6 +124,8 @@ class UserService:
         if not user:
             raise NotFoundError(_("User not found"))
 
+        # Queued first, so that the user is kept when the broker is down
+        delete_user_data.delay(user_id=user.id, role=user.role.value)
         await self.user_repository.delete(user_id)
         user_deleted_notification.delay(
             recipient=user.email,
@@ -94,14 +135,18 @@ class UserService:
         await delete_verification_token(token)
 
     async def change_password(
-        self, user_id: str, old_password: str, new_password: str
+        self, user_id: str, old_password: str, new_password: str, response: Response
     ) -> None:
         user = await self.user_repository.get_by_id(user_id)
         if not user:
             raise NotFoundError(_("User not found"))
-        if not verify_password(old_password, user.hashed_password):
+        if not await check_password(old_password, user.hashed_password):
             raise AuthenticationError(_("Invalid password"))
 
         await self.user_repository.update(
-            user_id, {"hashed_password": get_password_hash(new_password)}
+            user_id, {"hashed_password": await hash_password(new_password)}
         )
+        # Sessions opened with the former password end as well, except the
+        # current one which gets a token issued after the revocation
+        await revocation_list.revoke_user(user.id)
+        set_access_cookie(response, user)
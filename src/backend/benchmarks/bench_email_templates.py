@@ -0,0 +1,108 @@
+"""
+Render the reminder emails of an exam, in full or once per exam.
+
+"full render" runs the exam_reminder.html template for every recipient, as
+FastMail does. "TemplateRenderer" renders it once with markers in place of
+the personal variables and joins the parts for each recipient.
+
+"FastMail message" and "build_message" also build the MIME message sent
+over SMTP, as FastMail.send_message did and as the mail outbox now does.
+
+Usage (from src/backend):
+    python -m benchmarks.bench_email_templates [--messages 10000]
+"""
+
+import argparse
+import asyncio
+import time
+from email.utils import formataddr
+
+from fastapi_mail import MessageSchema, MessageType
+from fastapi_mail.msg import MailMsg
+
+from app.celery.tasks.email_tasks.manager import build_message, mail_config
+from app.celery.tasks.email_tasks.templating import TemplateRenderer
+
+TEMPLATE = "exam_reminder.html"
+PERSONAL = ("username", "datetime", "exam_link")
+
+
+def make_variables(count: int) -> list:
+    return [
+        {
+            "username": f"Student {index}",
+            "exam_title": "Linear Algebra Midterm",
+            "start_time": "2025-04-20 09:00",
+            "duration": "90 minutes",
+            "datetime": "2025-04-19 09:00",
+            "exam_link": f"https://hell-app.com/exam/{index:024x}",
+            "year": 2025,
+        }
+        for index in range(count)
+    ]
+
+
+def full_render(messages: list) -> None:
+    environment = mail_config.template_engine()
+    for variables in messages:
+        environment.get_template(TEMPLATE).render(**variables)
+
+
+def fastmail_message(messages: list) -> None:
+    """What FastMail.send_message did for each message before sending it"""
+    environment = mail_config.template_engine()
+    sender = formataddr((mail_config.MAIL_FROM_NAME, mail_config.MAIL_FROM))
+
+    async def build():
+        for variables in messages:
+            html = environment.get_template(TEMPLATE).render(**variables)
+            message = MessageSchema(
+                recipients=["student@example.com"],
+                subject="Reminder",
+                template_body=html,
+                subtype=MessageType.html,
+            )
+            await MailMsg(message)._message(sender)
+
+    asyncio.run(build())
+
+
+def cached_render(messages: list) -> None:
+    renderer = TemplateRenderer(mail_config.template_engine())
+    for variables in messages:
+        renderer.render(TEMPLATE, variables, PERSONAL)
+
+
+def cached_message(messages: list) -> None:
+    for variables in messages:
+        build_message(
+            ["student@example.com"], "Reminder", TEMPLATE, variables, PERSONAL
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--messages", type=int, default=10000)
+    args = parser.parse_args()
+    messages = make_variables(args.messages)
+
+    print(f"{args.messages} messages of {TEMPLATE}")
+    baseline = None
+    for label, case in (
+        ("full render", full_render),
+        ("TemplateRenderer", cached_render),
+        ("FastMail message", fastmail_message),
+        ("build_message", cached_message),
+    ):
+        start = time.perf_counter()
+        case(messages)
+        seconds = time.perf_counter() - start
+        baseline = baseline or seconds
+        print(
+            f"  {label:<28} {seconds:7.3f} s  {seconds / args.messages * 1e6:8.1f} us"
+            f"/message  x{baseline / seconds:.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Measure the per-request overhead of the request context middleware.
+
+"before" is the former stack of two BaseHTTPMiddleware classes (language and
+timezone, the latter calling pytz.timezone on every request), "after" is the
+single pure ASGI RequestContextMiddleware. Both wrap the same trivial
+Starlette endpoint, driven directly through the ASGI interface, and the time
+of the bare endpoint is subtracted.
+
+Usage (from src/backend):
+    python -m benchmarks.bench_middleware [--requests 20000]
+"""
+
+import argparse
+import asyncio
+import time
+
+import pytz
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+
+from app.i18n.manager import set_language
+from app.middleware import RequestContextMiddleware
+
+
+class LegacyLanguageMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request, call_next):
+        set_language(request.headers.get("X-User-Language", "en"))
+        return await call_next(request)
+
+
+class LegacyTimezoneMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request, call_next):
+        timezone_name = request.headers.get("X-Timezone", "UTC")
+        try:
+            timezone = pytz.timezone(timezone_name)
+        except pytz.exceptions.UnknownTimeZoneError:
+            timezone = pytz.timezone("UTC")
+        request.state.timezone = timezone
+        request.state.timezone_name = timezone_name
+        return await call_next(request)
+
+
+async def endpoint(request):
+    return PlainTextResponse("ok")
+
+
+def make_app(*middleware: Middleware) -> Starlette:
+    return Starlette(routes=[Route("/", endpoint)], middleware=list(middleware))
+
+
+SCOPE = {
+    "type": "http",
+    "asgi": {"version": "3.0"},
+    "http_version": "1.1",
+    "method": "GET",
+    "scheme": "http",
+    "path": "/",
+    "raw_path": b"/",
+    "root_path": "",
+    "query_string": b"",
+    "headers": [
+        (b"host", b"test"),
+        (b"x-timezone", b"Europe/Paris"),
+        (b"x-user-language", b"fr"),
+    ],
+    "client": ("127.0.0.1", 1234),
+    "server": ("test", 80),
+}
+
+
+async def run(app, requests: int) -> float:
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    started = time.perf_counter()
+    for _ in range(requests):
+        await app(dict(SCOPE), receive, send)
+    return (time.perf_counter() - started) / requests
+
+
+async def main(requests: int) -> None:
+    apps = {
+        "no middleware": make_app(),
+        "before": make_app(
+            Middleware(LegacyLanguageMiddleware),
+            Middleware(LegacyTimezoneMiddleware),
+        ),
+        "after": make_app(Middleware(RequestContextMiddleware)),
+    }
+    for app in apps.values():
+        await run(app, 200)  # warm up
+
+    results = {name: await run(app, requests) for name, app in apps.items()}
+    bare = results["no middleware"]
+    for name, seconds in results.items():
+        print(
+            f"{name:<14} {seconds * 1e6:8.1f} us/request"
+            f"  overhead {(seconds - bare) * 1e6:8.1f} us"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=20000)
+    asyncio.run(main(parser.parse_args().requests))
@@ -0,0 +1,143 @@
+"""
+Compare FastAPI's default response rendering with ReturnResponse.
+
+The default path is what a route returning a dict goes through: validation
+of the content against the response_model, serialization to Python objects,
+then json.dumps in JSONResponse. ReturnResponse skips the validation and
+dumps straight to bytes (or MessagePack).
+
+Payloads mirror GET /student/exams and GET /student/exam/{id}/reload.
+
+Usage (from src/backend):
+    python -m benchmarks.bench_responses [--exams 50] [--questions 100]
+"""
+
+import argparse
+import asyncio
+import timeit
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+from starlette.requests import Request
+
+from app.core.responses import MSGPACK_MEDIA_TYPE, ReturnResponse, msgpack
+from app.exam.student.router import ReloadExamReturn, StudentExamsReturn
+from app.exam.student.schemas import QuestionWithUserResponse, StudentExamBase
+
+
+def make_student_exams(count: int) -> list:
+    now = datetime.now(timezone.utc)
+    return [
+        StudentExamBase.model_validate(
+            {
+                "id": str(uuid.uuid4()),
+                "exam_instance_id": {
+                    "id": str(uuid.uuid4()),
+                    "title": f"Exam {i}",
+                    "start_date": now,
+                    "end_date": now + timedelta(hours=2),
+                    "status": "published",
+                    "security_settings": {},
+                    "notification_settings": {"reminders": ["1d", "1h"]},
+                    "created_by": {
+                        "id": str(uuid.uuid4()),
+                        "email": "teacher@example.com",
+                        "first_name": "Ada",
+                        "last_name": "Lovelace",
+                        "role": "teacher",
+                        "receive_notifications": True,
+                    },
+                },
+                "current_status": "not_started",
+                "attempts_count": 0,
+            }
+        )
+        for i in range(count)
+    ]
+
+
+def make_reload_questions(count: int) -> list:
+    return [
+        QuestionWithUserResponse(
+            id=str(uuid.uuid4()),
+            question_text=f"Question {i}: " + "lorem ipsum " * 10,
+            type="mcq",
+            options=[
+                {"id": str(uuid.uuid4()), "text": f"Option {j}"} for j in range(4)
+            ],
+            user_selected_options=[],
+            is_flagged=i % 7 == 0,
+        )
+        for i in range(count)
+    ]
+
+
+def make_request(accept: str) -> Request:
+    return Request({"type": "http", "headers": [(b"accept", accept.encode())]})
+
+
+async def fastapi_default(field, data) -> JSONResponse:
+    content = await serialize_response(
+        field=field, response_content={"message": "ok", "data": data}
+    )
+    return JSONResponse(content)
+
+
+def bench(name: str, return_type, data, number: int) -> None:
+    field = create_model_field("Response", return_type, mode="serialization")
+    loop = asyncio.new_event_loop()
+    json_request = make_request("application/json")
+    msgpack_request = make_request(MSGPACK_MEDIA_TYPE)
+
+    cases = {
+        "fastapi default": lambda: loop.run_until_complete(
+            fastapi_default(field, data)
+        ),
+        "ReturnResponse json": lambda: ReturnResponse(
+            return_type, "ok", data, request=json_request
+        ),
+    }
+    if msgpack is not None:
+        cases["ReturnResponse msgpack"] = lambda: ReturnResponse(
+            return_type, "ok", data, request=msgpack_request
+        )
+
+    print(f"\n{name}")
+    baseline = None
+    for label, case in cases.items():
+        size = len(case().body)
+        seconds = min(timeit.repeat(case, number=number, repeat=5)) / number
+        baseline = baseline or seconds
+        print(
+            f"  {label:<24} {seconds * 1e6:9.1f} us  {size:8d} bytes"
+            f"  x{baseline / seconds:.2f}"
+        )
+    loop.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--exams", type=int, default=50)
+    parser.add_argument("--questions", type=int, default=100)
+    parser.add_argument("--number", type=int, default=200)
+    args = parser.parse_args()
+
+    bench(
+        f"get_student_exams ({args.exams} exams)",
+        StudentExamsReturn,
+        make_student_exams(args.exams),
+        args.number,
+    )
+    bench(
+        f"reload_exam ({args.questions} questions)",
+        ReloadExamReturn,
+        make_reload_questions(args.questions),
+        args.number,
+    )
+
+
+if __name__ == "__main__":
+    main()
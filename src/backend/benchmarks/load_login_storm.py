@@ -0,0 +1,202 @@
+"""
+Measure the latency of exam requests while a login storm is running.
+
+A student with an exam in progress polls GET /v1/exam/student/exam/{id}/reload
+with the ETag of its answers back to back, as the exam page does, and the
+latency of these requests (answered 304) is recorded, first on an idle
+application, then while `--concurrency` clients hammer POST /v1/auth/login.
+"inline" verifies passwords with bcrypt on the event loop, as login used to;
+"pool" uses the password hashing process pool.
+
+The application runs in process on an in-memory database (mongomock) with
+rate limits disabled, so the figures only show the effect of bcrypt on the
+event loop. Mongomock cannot resolve links with $lookup pipelines, hence the
+exam is started directly and only the unchanged reload is probed.
+
+Usage (from src/backend):
+    python -m benchmarks.load_login_storm [--seconds 5] [--concurrency 20]
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+
+from beanie import init_beanie
+from httpx import ASGITransport, AsyncClient
+from mongomock_motor import AsyncMongoMockClient
+
+from app.auth.models import User, UserRole
+from app.auth.security import (create_access_token, get_password_hash,
+                               shutdown_password_hash_pool, verify_password)
+from app.core.utils import make_etag
+from app.exam.models import (Collection, ExamInstance, ExamStatus,
+                             NotificationJob, Question, QuestionType,
+                             StudentAttempt, StudentExam, StudentExamStatus,
+                             StudentExamSummary, StudentResponse)
+from app.main import app
+from app.settings import settings
+
+EMAIL = "storm@example.com"
+PASSWORD = "Password123!"
+
+
+async def inline_check_password(plain_password: str, hashed_password: str) -> bool:
+    return verify_password(plain_password, hashed_password)
+
+
+async def setup() -> tuple:
+    """Create the storm account and a student with an exam in progress"""
+    settings.RATE_LIMIT_ENABLED = False
+    await init_beanie(
+        database=AsyncMongoMockClient().get_database(name="db"),
+        document_models=[
+            User,
+            Collection,
+            Question,
+            ExamInstance,
+            StudentExam,
+            StudentResponse,
+            StudentAttempt,
+            StudentExamSummary,
+            NotificationJob,
+        ],
+    )
+    user = User(
+        email=EMAIL, hashed_password=get_password_hash(PASSWORD), is_verified=True
+    )
+    await user.insert()
+
+    teacher = User(
+        email="teacher@example.com", hashed_password="-", role=UserRole.TEACHER
+    )
+    student = User(email="student@example.com", hashed_password="-", is_verified=True)
+    await teacher.insert()
+    await student.insert()
+    question = Question(
+        question_text="2 + 2?",
+        type=QuestionType.SHORTANSWER,
+        created_by=teacher,
+        correct_input_answer="4",
+    )
+    await question.insert()
+    collection = Collection(
+        title="Storm",
+        created_by=teacher,
+        questions=[question],
+        status=ExamStatus.PUBLISHED,
+    )
+    await collection.insert()
+    now = datetime.now(timezone.utc)
+    instance = ExamInstance(
+        collection_id=collection,
+        title="Storm",
+        created_by=teacher,
+        start_date=now - timedelta(minutes=1),
+        end_date=now + timedelta(hours=1),
+        status=ExamStatus.PUBLISHED,
+    )
+    await instance.insert()
+    student_exam = StudentExam(
+        exam_instance_id=instance,
+        student_id=student,
+        current_status=StudentExamStatus.IN_PROGRESS,
+        attempts_count=1,
+    )
+    await student_exam.insert()
+    # Started and answered directly, see above
+    attempt = StudentAttempt(
+        student_exam_id=student_exam,
+        status=StudentExamStatus.IN_PROGRESS,
+        started_at=now,
+        question_order=[question.id],
+        response_version=1,
+    )
+    await attempt.insert()
+    await StudentResponse(
+        attempt_id=attempt, question_id=question, text_response="4", version=1
+    ).insert()
+    student_exam.latest_attempt_id = attempt
+    await student_exam.save()
+
+    token = create_access_token(subject=student.id, role=student.role)
+    headers = {
+        "Authorization": f"Bearer {token}",
+        "If-None-Match": make_etag(attempt.id, attempt.response_version),
+    }
+    return headers, student_exam.id
+
+
+async def probe(client: AsyncClient, exam: tuple, seconds: float) -> list:
+    headers, student_exam_id = exam
+    latencies = []
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        response = await client.get(
+            f"/v1/exam/student/exam/{student_exam_id}/reload", headers=headers
+        )
+        latencies.append(time.perf_counter() - started)
+        assert response.status_code == 304, response.text
+    return latencies
+
+
+async def storm(client: AsyncClient, stop: asyncio.Event, counter: list) -> None:
+    while not stop.is_set():
+        response = await client.post(
+            "/v1/auth/login", json={"email": EMAIL, "password": PASSWORD}
+        )
+        assert response.status_code == 200, response.text
+        counter.append(1)
+
+
+async def measure(
+    client: AsyncClient, exam: tuple, seconds: float, concurrency: int
+) -> tuple:
+    stop = asyncio.Event()
+    logins = []
+    stormers = [
+        asyncio.create_task(storm(client, stop, logins)) for _ in range(concurrency)
+    ]
+    latencies = await probe(client, exam, seconds)
+    stop.set()
+    await asyncio.gather(*stormers)
+    return latencies, len(logins)
+
+
+def report(label: str, latencies: list, logins: int, seconds: float) -> None:
+    latencies = sorted(latencies)
+    p95 = latencies[min(int(len(latencies) * 0.95), len(latencies) - 1)]
+    print(
+        f"{label:<14} p50 {statistics.median(latencies) * 1e3:8.1f} ms"
+        f"  p95 {p95 * 1e3:8.1f} ms  max {latencies[-1] * 1e3:8.1f} ms"
+        f"  probes {len(latencies):6d}  logins/s {logins / seconds:6.1f}"
+    )
+
+
+async def main(seconds: float, concurrency: int) -> None:
+    exam = await setup()
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        # Warm up, and start the pool workers outside of the measures
+        await measure(client, exam, 0.5, 2)
+
+        report("idle", await probe(client, exam, seconds), 0, seconds)
+        with patch("app.auth.service.check_password", inline_check_password):
+            report(
+                "inline", *await measure(client, exam, seconds, concurrency), seconds
+            )
+        report("pool", *await measure(client, exam, seconds, concurrency), seconds)
+
+    shutdown_password_hash_pool()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--concurrency", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(main(args.seconds, args.concurrency))
@@ -0,0 +1,183 @@
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock, patch
+
+import jwt
+import pytest
+from kombu.exceptions import OperationalError
+
+from app.auth.models import User
+from app.auth.schemas import UserRole
+from app.settings import settings
+
+
+class TestAdminRouter:
+    """Integration tests for the admin user directory"""
+
+    @pytest.fixture
+    async def admin_user(self):
+        user = User(
+            email="admin@example.com",
+            hashed_password="hash",
+            is_verified=True,
+            role=UserRole.ADMIN,
+        )
+        await user.insert()
+        return user
+
+    @pytest.fixture
+    def auth_headers(self, admin_user):
+        token = jwt.encode(
+            {"sub": str(admin_user.id), "role": admin_user.role},
+            settings.SECRET_KEY,
+            algorithm=settings.ALGORITHM,
+        )
+        return {"Authorization": f"Bearer {token}"}
+
+    @pytest.fixture
+    async def users(self):
+        now = datetime.now(timezone.utc)
+        users = [
+            User(
+                email=f"student{i}@example.com",
+                hashed_password="hash",
+                first_name="Ada" if i % 2 else "Grace",
+                last_name=f"Student{i}",
+                is_verified=i < 3,
+                role=UserRole.STUDENT,
+                created_at=now - timedelta(days=i),
+            )
+            for i in range(5)
+        ]
+        users.append(
+            User(
+                email="teacher@example.com",
+                hashed_password="hash",
+                first_name="Alan",
+                last_name="Turing",
+                role=UserRole.TEACHER,
+                created_at=now - timedelta(days=10),
+            )
+        )
+        for user in users:
+            await user.insert()
+        return users
+
+    async def test_directory_pages(self, client, auth_headers, users):
+        """Pages follow each other without the admin, newest first"""
+        emails = []
+        cursor = None
+        while True:
+            params = {"limit": 4}
+            if cursor:
+                params["cursor"] = cursor
+            response = await client.get(
+                "/v1/admin/users/directory", params=params, headers=auth_headers
+            )
+            assert response.status_code == 200
+            page = response.json()["data"]
+            assert page["total"] == 6
+            emails += [user["email"] for user in page["items"]]
+            cursor = page["next_cursor"]
+            if cursor is None:
+                break
+
+        assert emails == [user.email for user in users]
+
+    async def test_directory_projection(self, client, auth_headers, users):
+        response = await client.get(
+            "/v1/admin/users/directory",
+            params={"sort": "email", "limit": 1},
+            headers=auth_headers,
+        )
+
+        user = response.json()["data"]["items"][0]
+        assert user["email"] == "student0@example.com"
+        assert user["id"] == users[0].id
+        assert "hashed_password" not in user
+        assert "notifications_tasks_id" not in user
+        assert "search_keys" not in user
+
+    async def test_directory_filters(self, client, auth_headers, users):
+        response = await client.get(
+            "/v1/admin/users/directory",
+            params={"role": "student", "is_verified": True, "search": "ADA"},
+            headers=auth_headers,
+        )
+
+        page = response.json()["data"]
+        assert page["total"] == 1
+        assert page["items"][0]["email"] == "student1@example.com"
+
+    async def test_directory_search_full_name(self, client, auth_headers, users):
+        response = await client.get(
+            "/v1/admin/users/directory",
+            params={"search": "alan t"},
+            headers=auth_headers,
+        )
+
+        assert [user["email"] for user in response.json()["data"]["items"]] == [
+            "teacher@example.com"
+        ]
+
+    async def test_directory_created_range(self, client, auth_headers, users):
+        created_from = datetime.now(timezone.utc) - timedelta(days=2, hours=1)
+        response = await client.get(
+            "/v1/admin/users/directory",
+            params={"created_from": created_from.isoformat(), "role": "student"},
+            headers=auth_headers,
+        )
+
+        assert response.json()["data"]["total"] == 3
+
+    async def test_directory_invalid_cursor(self, client, auth_headers):
+        response = await client.get(
+            "/v1/admin/users/directory",
+            params={"cursor": "garbage"},
+            headers=auth_headers,
+        )
+
+        assert response.status_code == 400
+
+    @patch("app.admin.service.delete_user_data")
+    async def test_delete_user(self, mock_task, client, auth_headers, users):
+        """The user is deleted at once, their exam data by a background job"""
+        mock_task.delay.return_value = MagicMock(id="job-1")
+        teacher = users[-1]
+
+        response = await client.delete(
+            f"/v1/admin/users/{teacher.id}", headers=auth_headers
+        )
+
+        assert response.status_code == 200
+        assert response.json()["data"]["cleanup_job_id"] == "job-1"
+        assert await User.get(teacher.id) is None
+        mock_task.delay.assert_called_once_with(user_id=teacher.id, role="teacher")
+
+    @patch("app.admin.service.delete_user_data")
+    async def test_delete_user_broker_unavailable(
+        self, mock_task, client, auth_headers, users
+    ):
+        """The user is kept when their data cannot be queued for deletion"""
+        mock_task.delay.side_effect = OperationalError("broker unavailable")
+        teacher = users[-1]
+
+        with pytest.raises(OperationalError):
+            await client.delete(f"/v1/admin/users/{teacher.id}", headers=auth_headers)
+
+        assert await User.get(teacher.id) is not None
+
+    @patch("app.admin.service.AsyncResult")
+    async def test_job_status(self, mock_result, client, auth_headers):
+        mock_result.return_value = MagicMock(
+            state="PROGRESS",
+            info={"step": "student_exams", "done": 1000, "total": 2500},
+        )
+
+        response = await client.get("/v1/admin/jobs/job-1", headers=auth_headers)
+
+        assert response.status_code == 200
+        assert response.json()["data"] == {
+            "id": "job-1",
+            "state": "PROGRESS",
+            "progress": {"step": "student_exams", "done": 1000, "total": 2500},
+        }
@@ -1,4 +1,7 @@
+from unittest.mock import AsyncMock, patch
+
 import pytest
+from pymongo import UpdateOne
 
 from app.auth.models import User
 from app.auth.repository import UserRepository
@@ -35,3 +38,56 @@ class TestUserRepository:
         # Test with non-existent email
         non_existent = await repository.get_by_email("non-existent@example.com")
         assert non_existent is None
+
+    async def test_update_keeps_search_keys(self, repository):
+        user = await repository.create(
+            {"email": "Ada@Example.com", "hashed_password": "hash"}
+        )
+        assert user.search_keys == ["ada@example.com"]
+
+        updated = await repository.update(user.id, {"last_name": "Lovelace"})
+
+        assert updated.search_keys == ["ada@example.com", "lovelace"]
+
+    async def test_backfill_search_keys(self, repository):
+        # mongomock's bulk_write does not match the installed pymongo
+        collection = User.get_motor_collection()
+        await collection.insert_one(
+            {"_id": "legacy", "email": "old@example.com", "first_name": "Old"}
+        )
+
+        with patch.object(
+            type(collection), "bulk_write", new_callable=AsyncMock
+        ) as mock_bulk_write:
+            assert await repository.backfill_search_keys() == 1
+
+        operations = mock_bulk_write.await_args.args[0]
+        assert operations == [
+            UpdateOne(
+                {"_id": "legacy"},
+                {"$set": {"search_keys": ["old@example.com", "old"]}},
+            )
+        ]
+
+    async def test_get_by_ids_or_emails(self, repository):
+        """Emails match the email of the users only, not their names"""
+        ada = await repository.create(
+            {"email": "Ada@Example.com", "hashed_password": "hash"}
+        )
+        impostor = await repository.create(
+            {
+                "email": "eve@example.com",
+                "first_name": "ada@example.com",
+                "hashed_password": "hash",
+            }
+        )
+        grace = await repository.create(
+            {"email": "grace@example.com", "hashed_password": "hash"}
+        )
+
+        users = await repository.get_by_ids_or_emails(
+            [grace.id], [" ADA@example.com", "not an email"]
+        )
+
+        assert {user.id for user in users} == {ada.id, grace.id}
+        assert impostor.id not in {user.id for user in users}
@@ -0,0 +1,108 @@
+import time
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from redis.exceptions import ConnectionError
+
+from app.auth.dependencies import get_decode_token
+from app.auth.revocation import RevocationList
+from app.auth.security import create_access_token, decode_token
+from app.core.exceptions import AuthenticationError
+
+
+@pytest.fixture
+def revocations():
+    return RevocationList()
+
+
+@pytest.fixture
+def mock_redis():
+    """Shared Redis client whose pipelines succeed"""
+    pipe = MagicMock()
+    pipe.__aenter__ = AsyncMock(return_value=pipe)
+    pipe.__aexit__ = AsyncMock(return_value=None)
+    pipe.execute = AsyncMock()
+    client = MagicMock()
+    client.pipeline.return_value = pipe
+    with patch("app.auth.revocation.get_shared_redis_client", return_value=client):
+        yield pipe
+
+
+class TestRevocationList:
+    """Tests for the in-memory mirror of revoked tokens"""
+
+    async def test_revoke_token(self, revocations, mock_redis):
+        """A revoked token is rejected, other tokens of the user are not"""
+        token = decode_token(create_access_token(subject="user-1", role="student"))
+        other = decode_token(create_access_token(subject="user-1", role="student"))
+
+        await revocations.revoke_token(token["jti"], token["exp"])
+
+        assert revocations.is_revoked(token)
+        assert not revocations.is_revoked(other)
+        mock_redis.zadd.assert_called_once()
+        mock_redis.publish.assert_called_once()
+        mock_redis.execute.assert_awaited_once()
+
+    async def test_revoke_user(self, revocations, mock_redis):
+        """Tokens issued before the revocation are rejected, later ones are not"""
+        before = decode_token(create_access_token(subject="user-1", role="student"))
+        other_user = decode_token(create_access_token(subject="user-2", role="student"))
+
+        await revocations.revoke_user("user-1")
+        after = decode_token(create_access_token(subject="user-1", role="teacher"))
+
+        assert revocations.is_revoked(before)
+        assert not revocations.is_revoked(after)
+        assert not revocations.is_revoked(other_user)
+
+    def test_apply_published_events(self, revocations):
+        """Events from other nodes are applied, keeping the latest not-before"""
+        now = time.time()
+        revocations.apply({"type": "user", "id": "user-1", "at": now})
+        revocations.apply({"type": "user", "id": "user-1", "at": now - 60})
+
+        assert revocations.is_revoked({"sub": "user-1", "iat": now - 1})
+        assert not revocations.is_revoked({"sub": "user-1", "iat": now + 1})
+
+    async def test_load(self, revocations):
+        """Loading replaces the mirror and drops entries of expired tokens"""
+        now = time.time()
+        client = MagicMock()
+        client.zremrangebyscore = AsyncMock()
+        client.zrange = AsyncMock(return_value=[("jti-1", now + 60)])
+        client.hgetall = AsyncMock(
+            return_value={"user-1": str(now), "user-2": str(now - 10**9)}
+        )
+        client.hdel = AsyncMock()
+
+        await revocations.load(client)
+
+        assert revocations.is_revoked({"jti": "jti-1"})
+        assert revocations.is_revoked({"sub": "user-1", "iat": now - 1})
+        assert not revocations.is_revoked({"sub": "user-2", "iat": 0})
+        client.hdel.assert_awaited_once_with("auth:not-before", "user-2")
+
+    async def test_revoke_without_redis(self, revocations, mock_redis):
+        """When Redis is down the revocation still applies on this node"""
+        mock_redis.execute.side_effect = ConnectionError("unreachable")
+
+        with patch("app.auth.revocation.logger") as mock_logger:
+            await revocations.revoke_user("user-1")
+
+        assert revocations.is_revoked({"sub": "user-1", "iat": 0})
+        mock_logger.exception.assert_called_once()
+
+
+class TestDecodeToken:
+    """Tests for the revocation check of authenticated requests"""
+
+    async def test_revoked_token_rejected(self):
+        token = create_access_token(subject="user-1", role="student")
+        assert (await get_decode_token(token))["sub"] == "user-1"
+
+        with patch(
+            "app.auth.dependencies.revocation_list.is_revoked", return_value=True
+        ):
+            with pytest.raises(AuthenticationError):
+                await get_decode_token(token)
@@ -1,9 +1,12 @@
-from unittest.mock import patch
+import time
+from http.cookies import SimpleCookie
+from unittest.mock import AsyncMock, patch
 
 import jwt
 import pytest
 
 from app.auth.models import User
+from app.auth.revocation import revocation_list
 from app.auth.security import get_password_hash
 from app.settings import settings
 
@@ -180,14 +183,32 @@ class TestAuthRouter:
         password_data = {"password": old_password, "new_password": new_password}
         headers = {"Authorization": f"Bearer {token}"}
 
-        # Send request
-        response = await client.put(
-            "/v1/users/me/change-password", json=password_data, headers=headers
-        )
-
-        # Verify
-        assert response.status_code == 200
-        assert response.json()["message"] == "Password changed successfully"
+        # Send request, applying the revocation to this process only
+        with patch.object(revocation_list, "_not_before", {}), patch(
+            "app.users.services.revocation_list.revoke_user",
+            new_callable=AsyncMock,
+            side_effect=lambda user_id: revocation_list.apply(
+                {"type": "user", "id": user_id, "at": time.time()}
+            ),
+        ) as mock_revoke_user:
+            response = await client.put(
+                "/v1/users/me/change-password", json=password_data, headers=headers
+            )
+
+            # Verify
+            assert response.status_code == 200
+            assert response.json()["message"] == "Password changed successfully"
+            mock_revoke_user.assert_awaited_once_with(user.id)
+
+            # Tokens issued before the change no longer work
+            response_old = await client.get("/v1/users/me", headers=headers)
+            assert response_old.status_code == 401
+
+            # The session that changed the password continues with a new token
+            cookie = SimpleCookie(response.headers["set-cookie"])
+            new_headers = {"Authorization": f"Bearer {cookie['access_token'].value}"}
+            response_new = await client.get("/v1/users/me", headers=new_headers)
+            assert response_new.status_code == 200
 
     @patch("app.auth.service.decode_verification_token")
     async def test_verify_token_endpoint(self, mock_decode_token, client, test_user):
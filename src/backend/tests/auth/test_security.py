@@ -0,0 +1,26 @@
+from unittest.mock import patch
+
+from app.auth.security import (check_password, get_password_hash,
+                               hash_password, password_needs_rehash)
+
+
+class TestPasswordHashing:
+    """Tests for password hashing in the process pool"""
+
+    async def test_hash_and_check_password(self):
+        """Hashes made in the pool use the configured cost and verify"""
+        with patch("app.auth.security.settings.BCRYPT_ROUNDS", 4):
+            hashed = await hash_password("Password123!")
+
+            assert hashed.startswith("$2b$04$")
+            assert await check_password("Password123!", hashed)
+            assert not await check_password("wrong", hashed)
+
+    def test_password_needs_rehash(self):
+        hashed = get_password_hash("Password123!", rounds=4)
+
+        with patch("app.auth.security.settings.BCRYPT_ROUNDS", 4):
+            assert not password_needs_rehash(hashed)
+        with patch("app.auth.security.settings.BCRYPT_ROUNDS", 5):
+            assert password_needs_rehash(hashed)
+        assert password_needs_rehash("not-a-bcrypt-hash")
@@ -128,7 +128,7 @@ class TestAuthService:
         mock_response = MagicMock(spec=Response)
 
         # Execute
-        with patch("app.auth.service.verify_password", return_value=True):
+        with patch("app.auth.service.check_password", return_value=True):
             with patch(
                 "app.auth.service.create_access_token", return_value="test_token"
             ):
@@ -142,6 +142,26 @@ class TestAuthService:
         assert mock_response.set_cookie.call_args[1]["key"] == "access_token"
         assert mock_response.set_cookie.call_args[1]["value"] == "test_token"
 
+    async def test_login_rehashes_outdated_password(
+        self, auth_service, mock_user_repository, test_user
+    ):
+        # Setup: hash made with a lower work factor than configured
+        test_user.hashed_password = get_password_hash("password123", rounds=4)
+        mock_user_repository.get_by_email.return_value = test_user
+        login_data = UserLogin(email=test_user.email, password="password123")
+
+        # Execute
+        with patch(
+            "app.auth.service.hash_password", return_value="rehashed"
+        ) as mock_hash:
+            await auth_service.login(login_data, MagicMock(spec=Response))
+
+        # Verify
+        mock_hash.assert_called_once_with("password123")
+        mock_user_repository.update.assert_called_once_with(
+            test_user.id, {"hashed_password": "rehashed"}
+        )
+
     async def test_login_user_not_found(self, auth_service, mock_user_repository):
         # Setup
         mock_user_repository.get_by_email.return_value = None
@@ -164,7 +184,7 @@ class TestAuthService:
         mock_response = MagicMock(spec=Response)
 
         # Execute and verify exception
-        with patch("app.auth.service.verify_password", return_value=False):
+        with patch("app.auth.service.check_password", return_value=False):
             with pytest.raises(AuthenticationError) as exc_info:
                 await auth_service.login(login_data, mock_response)
 
@@ -180,7 +200,7 @@ class TestAuthService:
         mock_response = MagicMock(spec=Response)
 
         # Execute and verify exception
-        with patch("app.auth.service.verify_password", return_value=True):
+        with patch("app.auth.service.check_password", return_value=True):
             with pytest.raises(AuthenticationError) as exc_info:
                 await auth_service.login(login_data, mock_response)
 
@@ -204,6 +224,18 @@ class TestAuthService:
             domain=None,
         )
 
+    async def test_logout_revokes_token(self, auth_service):
+        mock_response = MagicMock(spec=Response)
+        token_data = {"sub": "test-user-id", "jti": "token-id", "exp": 1700000000}
+
+        with patch(
+            "app.auth.service.revocation_list.revoke_token", new_callable=AsyncMock
+        ) as mock_revoke_token:
+            await auth_service.logout(mock_response, token_data)
+
+        mock_revoke_token.assert_awaited_once_with("token-id", 1700000000)
+        mock_response.delete_cookie.assert_called_once()
+
     # Verification token tests
     async def test_verify_token_success(
         self, auth_service, mock_user_repository, unverified_user
@@ -331,14 +363,19 @@ class TestAuthService:
             "app.auth.service.decode_verification_token", return_value=token_data
         ):
             with patch(
-                "app.auth.service.get_password_hash", return_value="new_hashed_password"
+                "app.auth.service.hash_password", return_value="new_hashed_password"
             ):
-                await auth_service.reset_password(token, new_password)
+                with patch(
+                    "app.auth.service.revocation_list.revoke_user",
+                    new_callable=AsyncMock,
+                ) as mock_revoke_user:
+                    await auth_service.reset_password(token, new_password)
 
         # Verify
         mock_user_repository.get_by_id.assert_called_once_with(test_user.id)
         mock_user_repository.save.assert_called_once_with(test_user)
         assert test_user.hashed_password == "new_hashed_password"
+        mock_revoke_user.assert_awaited_once_with(test_user.id)
 
     async def test_reset_password_invalid_token(self, auth_service):
         # Setup
@@ -0,0 +1,220 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import aiosmtplib
+import pytest
+from kombu.utils.json import dumps, loads
+
+from app.celery.tasks.email_tasks import outbox as outbox_module
+from app.celery.tasks.email_tasks.manager import SMTPSession, mail_config
+from app.celery.tasks.email_tasks.outbox import MailOutbox
+
+
+def make_mail(recipient: str, attempts: int = 0) -> dict:
+    return {
+        "recipients": [recipient],
+        "subject": "Welcome",
+        "body": {"username": "Ada", "datetime": "", "login_link": "", "year": 2025},
+        "template": "welcome.html",
+        "attempts": attempts,
+    }
+
+
+@pytest.fixture
+def outbox():
+    return MailOutbox("mail:outbox")
+
+
+@pytest.fixture
+def mock_redis():
+    """Redis client whose scripts are mocked, popping no message by default"""
+    pipe = MagicMock()
+    pipe.execute = AsyncMock(return_value=[1, True])
+    client = MagicMock()
+    client.pipeline.return_value = pipe
+    client.delete = AsyncMock()
+    client.pop_script = AsyncMock(return_value=[])
+    client.recover_script = AsyncMock(return_value=0)
+    client.register_script.side_effect = lambda script: {
+        outbox_module.POP_SCRIPT: client.pop_script,
+        outbox_module.RECOVER_SCRIPT: client.recover_script,
+    }[script]
+    return client
+
+
+@pytest.fixture
+def mock_smtp():
+    session = MagicMock()
+    session.send = AsyncMock(return_value={})
+    session.__aenter__ = AsyncMock(return_value=session)
+    session.__aexit__ = AsyncMock(return_value=None)
+    with patch.object(outbox_module, "SMTPSession", return_value=session):
+        yield session
+
+
+def batches(*mails_per_batch):
+    return [[dumps(mail) for mail in mails] for mails in mails_per_batch] + [[]]
+
+
+def requeued(mock_redis) -> list:
+    pipe = mock_redis.pipeline.return_value
+    return [
+        [loads(entry) for entry in call.args[1:]] for call in pipe.rpush.call_args_list
+    ]
+
+
+def acked(mock_redis) -> list:
+    pipe = mock_redis.pipeline.return_value
+    return [loads(call.args[2]) for call in pipe.lrem.call_args_list]
+
+
+class TestMailOutbox:
+    """Tests for the queue of emails sent in batches"""
+
+    async def test_push(self, outbox, mock_redis):
+        """The first message queued since the last drain starts one"""
+        assert await outbox.push(mock_redis, [make_mail("a@example.com")])
+
+        pipe = mock_redis.pipeline.return_value
+        pipe.rpush.assert_called_once_with(
+            "mail:outbox", dumps(make_mail("a@example.com"))
+        )
+        pipe.set.assert_called_once_with("mail:outbox:drain", 1, nx=True, ex=300)
+
+    async def test_drain_one_connection(self, outbox, mock_redis, mock_smtp):
+        """Every batch goes through the same session, until the queue is empty"""
+        mock_redis.pop_script.side_effect = batches(
+            [make_mail("a@example.com"), make_mail("b@example.com")],
+            [make_mail("c@example.com")],
+        )
+
+        result = await outbox.drain(mock_redis, batch_size=2, max_attempts=3)
+
+        assert result == (3, 0, 0, False)
+        mock_redis.delete.assert_awaited_once_with("mail:outbox:drain")
+        sent = [call.args[0] for call in mock_smtp.send.call_args_list]
+        assert [message["To"] for message in sent] == [
+            "a@example.com",
+            "b@example.com",
+            "c@example.com",
+        ]
+        assert "Ada" in sent[0].get_payload()[0].get_payload(decode=True).decode()
+        assert [mail["recipients"] for mail in acked(mock_redis)] == [
+            ["a@example.com"],
+            ["b@example.com"],
+            ["c@example.com"],
+        ]
+        assert requeued(mock_redis) == []
+        # The processing list is dropped once empty
+        processing = mock_redis.pop_script.call_args.kwargs["keys"][1]
+        assert processing.startswith("mail:outbox:processing:")
+        pipe = mock_redis.pipeline.return_value
+        pipe.delete.assert_called_once_with(processing)
+        pipe.zrem.assert_called_once_with("mail:outbox:processing", processing)
+
+    async def test_drain_partial_failure(self, outbox, mock_redis, mock_smtp):
+        """Temporary refusals are queued again, permanent ones dropped"""
+        mock_redis.pop_script.side_effect = batches(
+            [
+                make_mail("a@example.com"),
+                make_mail("busy@example.com"),
+                make_mail("gone@example.com"),
+                make_mail("late@example.com", attempts=2),
+            ]
+        )
+        mock_smtp.send.side_effect = [
+            {},
+            aiosmtplib.SMTPDataError(451, "Try again later"),
+            aiosmtplib.SMTPRecipientsRefused(
+                [aiosmtplib.SMTPRecipientRefused(550, "No such user", "gone")]
+            ),
+            aiosmtplib.SMTPDataError(451, "Try again later"),
+        ]
+
+        result = await outbox.drain(mock_redis, batch_size=10, max_attempts=3)
+
+        assert result == (1, 2, 1, False)
+        # Queued again with the processing list dropped, in one transaction
+        assert requeued(mock_redis) == [[make_mail("busy@example.com", attempts=1)]]
+        assert [mail["recipients"] for mail in acked(mock_redis)] == [
+            ["a@example.com"],
+            ["gone@example.com"],
+            ["late@example.com"],
+        ]
+
+    async def test_drain_server_unavailable(self, outbox, mock_redis, mock_smtp):
+        """The rest of the batch stays queued and the drain stops"""
+        mock_redis.pop_script.side_effect = batches(
+            [make_mail("a@example.com"), make_mail("b@example.com")],
+            [make_mail("c@example.com")],
+        )
+        mock_smtp.send.side_effect = [{}, aiosmtplib.SMTPConnectError("refused")]
+
+        result = await outbox.drain(mock_redis, batch_size=2, max_attempts=3)
+
+        assert result == (1, 0, 0, True)
+        assert requeued(mock_redis) == [[make_mail("b@example.com")]]
+        assert mock_redis.pop_script.await_count == 1
+
+    async def test_drain_crash(self, outbox, mock_redis, mock_smtp):
+        """Messages of a batch are only removed once handled"""
+        mock_redis.pop_script.side_effect = batches(
+            [make_mail("a@example.com"), make_mail("b@example.com")]
+        )
+        mock_smtp.send.side_effect = [{}, asyncio.CancelledError()]
+
+        with pytest.raises(asyncio.CancelledError):
+            await outbox.drain(mock_redis, batch_size=2, max_attempts=3)
+
+        # b@example.com is left in the processing list for a later drain
+        assert [mail["recipients"] for mail in acked(mock_redis)] == [["a@example.com"]]
+        mock_redis.pipeline.return_value.delete.assert_not_called()
+
+    async def test_drain_recovers_lost_drains(self, outbox, mock_redis, mock_smtp):
+        """Drains not seen for a while have their messages queued again"""
+        with patch.object(outbox_module.time, "time", return_value=1000.0):
+            await outbox.drain(mock_redis, batch_size=2, max_attempts=3)
+
+        mock_redis.recover_script.assert_awaited_once_with(
+            keys=["mail:outbox", "mail:outbox:processing"],
+            args=[1000.0 - outbox_module.PROCESSING_TIMEOUT],
+        )
+
+
+class TestSMTPSession:
+    """Tests for the reuse of an SMTP connection against a local SMTP sink"""
+
+    async def test_one_connection(self, unused_tcp_port):
+        controller_module = pytest.importorskip("aiosmtpd.controller")
+        from aiosmtpd.handlers import Sink
+
+        connections = []
+
+        class Handler(Sink):
+            async def handle_EHLO(self, server, session, envelope, hostname, responses):
+                connections.append(session)
+                session.host_name = hostname
+                return responses
+
+        controller = controller_module.Controller(
+            Handler(), hostname="127.0.0.1", port=unused_tcp_port
+        )
+        controller.start()
+        config = mail_config.model_copy(
+            update={"MAIL_SERVER": "127.0.0.1", "MAIL_PORT": unused_tcp_port}
+        )
+        config.USE_CREDENTIALS = False
+        try:
+            async with SMTPSession(config) as session:
+                for recipient in ("a@example.com", "b@example.com"):
+                    message = outbox_module.build_message(
+                        [recipient],
+                        "Welcome",
+                        "welcome.html",
+                        make_mail(recipient)["body"],
+                    )
+                    assert await session.send(message) == {}
+        finally:
+            await asyncio.to_thread(controller.stop)
+
+        assert len(connections) == 1
@@ -0,0 +1,85 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+import mongomock
+import pytest
+
+from app.celery.runtime import WorkerRuntime
+from app.celery.tasks.email_tasks import tasks
+
+
+@pytest.fixture
+def runtime():
+    runtime = WorkerRuntime()
+    yield runtime
+    runtime.close()
+
+
+async def current_loop():
+    return asyncio.get_running_loop()
+
+
+class TestWorkerRuntime:
+    """Tests for the event loop shared by the tasks of a worker process"""
+
+    def test_one_loop(self, runtime):
+        """Tasks of every pool thread run on the same loop"""
+        with ThreadPoolExecutor(4) as pool:
+            loops = set(pool.map(lambda _: runtime.run(current_loop()), range(8)))
+
+        assert loops == {runtime.loop}
+        assert runtime.loop.is_running()
+
+    def test_exceptions(self, runtime):
+        async def fail():
+            raise ValueError("boom")
+
+        with pytest.raises(ValueError):
+            runtime.run(fail())
+
+    def test_clients_created_once(self, runtime):
+        with patch("app.celery.runtime.MongoClient") as mongo_client:
+            assert runtime.mongo is runtime.mongo
+
+        mongo_client.assert_called_once()
+
+    def test_close(self):
+        runtime = WorkerRuntime()
+        runtime.close()
+
+        assert runtime.loop.is_closed()
+        assert not any(t.name == "worker-event-loop" for t in threading.enumerate())
+
+
+class TestReminderPostrun:
+    """Tests for marking the job of a sent reminder as fired"""
+
+    @pytest.fixture
+    def jobs(self):
+        jobs = mongomock.MongoClient().db["notification_jobs"]
+        with patch.object(
+            tasks, "get_worker_mongo_database", return_value={"notification_jobs": jobs}
+        ):
+            yield jobs
+
+    def finish(self, task_id: str, kwargs: dict):
+        tasks.exam_reminder_notification_post(
+            sender=tasks.exam_reminder_notification, task_id=task_id, kwargs=kwargs
+        )
+
+    def test_mark_fired(self, jobs):
+        jobs.insert_many(
+            [
+                {"_id": "t1", "student_exam_id": "exam1", "fired_at": None},
+                {"_id": "t2", "student_exam_id": "exam1", "fired_at": None},
+            ]
+        )
+
+        self.finish("t1", {"exam_instance_id": "exam1"})
+        # Reminders sent by the dispatcher have no job
+        self.finish("t2", {"recipient": "ada@example.com"})
+
+        assert jobs.find_one({"_id": "t1"})["fired_at"] is not None
+        assert jobs.find_one({"_id": "t2"})["fired_at"] is None
@@ -0,0 +1,116 @@
+from datetime import datetime, timedelta, timezone
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from kombu.utils.json import dumps
+
+from app.celery.scheduler import ScheduledTask, TaskScheduler
+
+START = datetime(2025, 4, 20, 9, 0, tzinfo=timezone.utc)
+
+
+def entry(tag: str) -> str:
+    return dumps(
+        {"task": "remind", "kwargs": {"start_time": START}, "tag": tag},
+        sort_keys=True,
+    )
+
+
+@pytest.fixture
+def scheduler():
+    return TaskScheduler("reminders")
+
+
+@pytest.fixture
+def mock_redis():
+    pipe = MagicMock()
+    pipe.execute = AsyncMock()
+    client = MagicMock()
+    client.pipeline.return_value = pipe
+    client.delete = AsyncMock()
+    client.zrange = AsyncMock()
+    client.zrem = AsyncMock()
+    with patch("app.celery.scheduler.get_shared_redis_client", return_value=client):
+        yield client
+
+
+class TestTaskScheduler:
+    """Tests for the Redis sorted set scheduler of the exam reminders"""
+
+    async def test_schedule(self, scheduler, mock_redis):
+        """Entries go to the group, which is indexed by its earliest fire time"""
+        tasks = [
+            ScheduledTask(
+                START - timedelta(hours=1), "remind", {"start_time": START}, "se1"
+            ),
+            ScheduledTask(
+                START - timedelta(days=1), "remind", {"start_time": START}, "se2"
+            ),
+        ]
+
+        await scheduler.schedule("exam1", tasks)
+
+        pipe = mock_redis.pipeline.return_value
+        pipe.zadd.assert_any_call(
+            "reminders:exam1",
+            {
+                entry("se1"): (START - timedelta(hours=1)).timestamp(),
+                entry("se2"): (START - timedelta(days=1)).timestamp(),
+            },
+        )
+        pipe.zadd.assert_any_call(
+            "reminders:due", {"exam1": (START - timedelta(days=1)).timestamp()}, lt=True
+        )
+        pipe.execute.assert_awaited_once()
+
+    async def test_schedule_nothing(self, scheduler, mock_redis):
+        await scheduler.schedule("exam1", [])
+
+        mock_redis.pipeline.assert_not_called()
+
+    async def test_cancel_group(self, scheduler, mock_redis):
+        """Cancelling the reminders of an exam is a single key delete"""
+        await scheduler.cancel_group("exam1")
+
+        mock_redis.delete.assert_awaited_once_with("reminders:exam1")
+
+    async def test_cancel_tags(self, scheduler, mock_redis):
+        mock_redis.zrange.return_value = [entry("se1"), entry("se2"), entry("se3")]
+
+        await scheduler.cancel("exam1", ["se1", "se3"])
+
+        mock_redis.zrem.assert_awaited_once_with(
+            "reminders:exam1", entry("se1"), entry("se3")
+        )
+
+    async def test_dispatch_batches(self, scheduler):
+        """Due entries are claimed in batches until a batch is not full"""
+        batches = [
+            [{"task": "remind", "kwargs": {"n": n}, "tag": ""} for n in range(2)],
+            [{"task": "remind", "kwargs": {"n": 2}, "tag": ""}],
+        ]
+        send_task = MagicMock()
+
+        with patch.object(
+            scheduler, "claim_due", AsyncMock(side_effect=batches)
+        ) as mock_claim:
+            sent = await scheduler.dispatch(MagicMock(), send_task, batch_size=2)
+
+        assert sent == 3
+        assert mock_claim.await_count == 2
+        send_task.assert_called_with("remind", kwargs={"n": 2})
+
+    async def test_claim_due_decodes_entries(self, scheduler):
+        """Datetimes survive the round trip through Redis"""
+        claim = AsyncMock(return_value=[entry("se1")])
+        client = MagicMock()
+        client.register_script.return_value = claim
+
+        entries = await scheduler.claim_due(client, 10, now=START.timestamp())
+
+        assert entries == [
+            {"task": "remind", "kwargs": {"start_time": START}, "tag": "se1"}
+        ]
+        claim.assert_awaited_once_with(
+            keys=["reminders:due"], args=[START.timestamp(), 10, "reminders:"]
+        )
@@ -0,0 +1,81 @@
+from unittest.mock import patch
+
+from jinja2 import DictLoader, Environment
+
+from app.celery.tasks.email_tasks.manager import mail_config
+from app.celery.tasks.email_tasks.templating import TemplateRenderer
+
+PERSONAL = ("username", "exam_link")
+
+
+def reminder(username: str, exam_link: str) -> dict:
+    return {
+        "username": username,
+        "exam_title": "Midterm",
+        "start_time": "2025-04-20 09:00",
+        "duration": "90 minutes",
+        "datetime": "2025-04-19 09:00",
+        "exam_link": exam_link,
+        "year": 2025,
+    }
+
+
+class TestTemplateRenderer:
+    """Tests for rendering mass emails once per set of shared variables"""
+
+    def test_same_as_full_render(self):
+        environment = mail_config.template_engine()
+        renderer = TemplateRenderer(environment)
+        template = environment.get_template("exam_reminder.html")
+
+        with patch.object(
+            renderer, "_prerender", wraps=renderer._prerender
+        ) as prerender:
+            for index in range(3):
+                variables = reminder(f"Student {index}", f"https://x/{index}")
+                assert renderer.render(
+                    "exam_reminder.html", variables, PERSONAL
+                ) == template.render(**variables)
+
+        # Rendered once for the three recipients
+        prerender.assert_called_once()
+
+    def test_shared_variables_key(self):
+        """Each exam gets its own pre-rendered template"""
+        renderer = TemplateRenderer(mail_config.template_engine())
+        variables = reminder("Ada", "https://x/1")
+        renderer.render("exam_reminder.html", variables, PERSONAL)
+
+        html = renderer.render(
+            "exam_reminder.html", {**variables, "exam_title": "Final"}, PERSONAL
+        )
+
+        assert "Final" in html and "Midterm" not in html
+
+    def test_personal_variable_in_logic(self):
+        """Templates transforming a personal variable are rendered in full"""
+        renderer = TemplateRenderer(
+            Environment(
+                loader=DictLoader(
+                    {"hello.html": "{% if vip %}Dear {{ name|upper }}{% endif %}!"}
+                )
+            )
+        )
+
+        assert renderer.render(
+            "hello.html", {"vip": True, "name": "ada"}, ["name"]
+        ) == ("Dear ADA!")
+        assert renderer.render("hello.html", {"vip": True, "name": "bo"}, ["name"]) == (
+            "Dear BO!"
+        )
+
+    def test_cache_size(self):
+        renderer = TemplateRenderer(
+            Environment(loader=DictLoader({"hello.html": "{{ a }} {{ b }}"})),
+            max_size=2,
+        )
+
+        for a in range(3):
+            assert renderer.render("hello.html", {"a": a, "b": "x"}, ["b"]) == f"{a} x"
+
+        assert len(renderer._cache) == 2
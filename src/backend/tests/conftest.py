@@ -5,9 +5,11 @@ from httpx import ASGITransport, AsyncClient
 from mongomock_motor import AsyncMongoMockClient
 
 from app.auth.models import User
-from app.exam.models import (Collection, ExamInstance, Question,
-                             StudentAttempt, StudentExam, StudentResponse)
+from app.exam.models import (Collection, ExamInstance, NotificationJob,
+                             Question, QuestionImport, StudentAttempt,
+                             StudentExam, StudentExamSummary, StudentResponse)
 from app.main import app
+from app.settings import settings
 
 
 @pytest.fixture
@@ -18,6 +20,12 @@ async def client():
         yield client
 
 
+@pytest.fixture(autouse=True)
+def disable_rate_limits(monkeypatch):
+    """Tests run without Redis, and would trip the limits anyway"""
+    monkeypatch.setattr(settings, "RATE_LIMIT_ENABLED", False)
+
+
 @pytest.fixture
 def fake():
     return Faker()
@@ -35,6 +43,9 @@ async def my_fixture():
             StudentExam,
             StudentResponse,
             StudentAttempt,
+            StudentExamSummary,
+            NotificationJob,
+            QuestionImport,
         ],
         database=client.get_database(name="db"),
     )
@@ -1,7 +1,10 @@
 import pytest
 
+from app.admin.schemas import UserDirectoryEntry
 from app.auth.models import User
 from app.auth.security import get_password_hash
+from app.core.exceptions import BadRequestError
+from app.core.pagination import SortKey, encode_cursor
 from app.core.repository.base_repository import BaseRepository
 
 
@@ -224,3 +227,49 @@ class TestBaseRepository:
         # Verify changes persisted to database
         db_entity = await User.find_one(User.id == entity.id)
         assert db_entity.first_name == entity.first_name
+
+    async def test_get_page(self, repository):
+        """Test keyset pagination through pages sharing sort values"""
+        for i in range(5):
+            await repository.create(
+                {"email": f"user{i}@example.com", "hashed_password": "hash"}
+            )
+        await User.find({}).update({"$set": {"first_name": "Same"}})
+        sort = SortKey.parse("-first_name")
+
+        first, cursor = await repository.get_page({}, sort, limit=2)
+        second, cursor = await repository.get_page({}, sort, cursor=cursor, limit=2)
+        third, last_cursor = await repository.get_page({}, sort, cursor=cursor, limit=2)
+
+        ids = [user.id for user in first + second + third]
+        assert len(set(ids)) == 5
+        assert ids == sorted(ids, reverse=True)
+        assert last_cursor is None
+        assert await repository.count({"first_name": "Same"}) == 5
+
+    async def test_get_page_projection(self, repository):
+        """Test that a projection model limits the fields read"""
+        await repository.create(
+            {"email": "user@example.com", "hashed_password": "hash"}
+        )
+
+        items, _ = await repository.get_page(
+            {}, SortKey("email"), projection_model=UserDirectoryEntry
+        )
+
+        assert isinstance(items[0], UserDirectoryEntry)
+        assert items[0].email == "user@example.com"
+
+    async def test_get_page_invalid_cursor(self, repository):
+        with pytest.raises(BadRequestError):
+            await repository.get_page({}, SortKey("email"), cursor="not-a-cursor")
+
+    @pytest.mark.parametrize(
+        "value, last_id", [({"$ne": None}, "id"), ("a@example.com", {"$ne": None})]
+    )
+    async def test_get_page_operator_cursor(self, repository, value, last_id):
+        """Cursors cannot inject query operators"""
+        with pytest.raises(BadRequestError):
+            await repository.get_page(
+                {}, SortKey("email"), cursor=encode_cursor(value, last_id)
+            )
@@ -0,0 +1,243 @@
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from fastapi import APIRouter, Depends, FastAPI, Response
+from httpx import ASGITransport, AsyncClient
+from redis.exceptions import ConnectionError
+
+from app.auth.router import rate_limiter as auth_rate_limiter
+from app.auth.security import create_access_token
+from app.core.rate_limit import (RateLimit, RateLimiter, RateLimitState,
+                                 body_field)
+from app.middleware import RequestContextMiddleware
+from app.settings import settings
+
+DEFAULT = RateLimit(100, 60)
+LOGIN = RateLimit(10, 60, key=body_field("email"))
+SIGN_IN = RateLimit(3, 60, key=body_field("email", per_address=True))
+SIGN_IN_ADDRESS = RateLimit(5, 60)
+
+router = APIRouter(
+    dependencies=[
+        Depends(
+            RateLimiter(DEFAULT, login=LOGIN, sign_in=(SIGN_IN, SIGN_IN_ADDRESS))
+        )
+    ]
+)
+
+
+@router.get("/items/{item_id}")
+async def read_item(item_id: str):
+    return {"item_id": item_id}
+
+
+@router.get("/raw")
+async def read_raw():
+    return Response(b"raw")
+
+
+@router.post("/login")
+async def login():
+    return {}
+
+
+@router.post("/sign-in")
+async def sign_in():
+    return {}
+
+
+app = FastAPI()
+app.add_middleware(RequestContextMiddleware)
+app.include_router(router)
+
+# The policies of the auth routes, on a stub login route
+auth_router = APIRouter(dependencies=[Depends(auth_rate_limiter)])
+
+
+@auth_router.post("/auth/login", name="login")
+async def login_with_auth_limits():
+    return {}
+
+
+app.include_router(auth_router)
+
+ALLOWED = RateLimitState(allowed=True, remaining=99, reset_after=600, retry_after=0)
+
+
+@pytest.fixture(autouse=True)
+def enable_rate_limits(monkeypatch):
+    monkeypatch.setattr(settings, "RATE_LIMIT_ENABLED", True)
+
+
+@pytest.fixture
+def counting_hit():
+    """Counts the requests of each key against its limit"""
+    counts = {}
+
+    async def hit(key, rate_limit):
+        counts[key] = counts.get(key, 0) + 1
+        remaining = rate_limit.limit - counts[key]
+        return RateLimitState(
+            allowed=remaining >= 0,
+            remaining=max(remaining, 0),
+            reset_after=60000,
+            retry_after=0 if remaining >= 0 else 12000,
+        )
+
+    with patch("app.core.rate_limit.hit", side_effect=hit) as mock:
+        yield mock
+
+
+@pytest.fixture
+def mock_hit():
+    with patch("app.core.rate_limit.hit", new_callable=AsyncMock) as mock:
+        mock.return_value = ALLOWED
+        yield mock
+
+
+async def request(method, url, **kwargs):
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        return await client.request(method, url, **kwargs)
+
+
+class TestRateLimiter:
+    """Tests for the per-route rate limiter dependency"""
+
+    async def test_accepted_request_gets_headers(self, mock_hit):
+        """Accepted responses describe the client's remaining budget"""
+        response = await request("GET", "/items/1")
+
+        assert response.status_code == 200
+        assert response.headers["RateLimit-Limit"] == "100"
+        assert response.headers["RateLimit-Remaining"] == "99"
+        assert response.headers["RateLimit-Reset"] == "1"
+        assert response.headers["RateLimit-Policy"] == "100;w=60"
+
+    async def test_headers_added_to_response_objects(self, mock_hit):
+        """Routes returning their own Response still carry the headers"""
+        response = await request("GET", "/raw")
+
+        assert response.content == b"raw"
+        assert response.headers["RateLimit-Remaining"] == "99"
+
+    async def test_rejected_request(self, mock_hit):
+        """Clients over their limit get a 429 telling when to retry"""
+        mock_hit.return_value = RateLimitState(
+            allowed=False, remaining=0, reset_after=60000, retry_after=1500
+        )
+
+        response = await request("GET", "/items/1")
+
+        assert response.status_code == 429
+        assert response.headers["Retry-After"] == "2"
+        assert response.headers["RateLimit-Remaining"] == "0"
+
+    async def test_key_per_route_and_user(self, mock_hit):
+        """Authenticated clients are counted per route, role and user id"""
+        token = create_access_token(subject="user-1", role="student")
+
+        await request("GET", "/items/1", headers={"Authorization": f"Bearer {token}"})
+
+        key, rate_limit = mock_hit.await_args.args
+        assert key == "rate-limit:GET:/items/{item_id}:student:user-1"
+        assert rate_limit == DEFAULT
+
+    async def test_route_policy_keyed_by_body_field(self, mock_hit):
+        """Route policies override the default and may key anonymous clients"""
+        await request("POST", "/login", json={"email": " Ada@Example.com"})
+
+        key, rate_limit = mock_hit.await_args.args
+        assert key == "rate-limit:POST:/login:anonymous:ada@example.com"
+        assert rate_limit == LOGIN
+
+    async def test_anonymous_client_keyed_by_address(self, mock_hit):
+        """Without token the client address identifies the client"""
+        await request("GET", "/items/1", headers={"X-Real-IP": "203.0.113.7"})
+
+        key, _ = mock_hit.await_args.args
+        assert key == "rate-limit:GET:/items/{item_id}:anonymous:203.0.113.7"
+
+    async def test_several_policies(self, counting_hit):
+        """Each policy of a route has its own budget, the tightest is reported"""
+        headers = {"X-Real-IP": "203.0.113.7"}
+
+        response = await request(
+            "POST", "/sign-in", json={"email": "ada@example.com"}, headers=headers
+        )
+
+        assert response.status_code == 200
+        assert response.headers["RateLimit-Policy"] == "3;w=60"
+        assert response.headers["RateLimit-Remaining"] == "2"
+        keys = [call.args[0] for call in counting_hit.await_args_list]
+        assert keys == [
+            "rate-limit:POST:/sign-in:anonymous:203.0.113.7:ada@example.com",
+            "rate-limit:POST:/sign-in:anonymous:203.0.113.7:1",
+        ]
+
+    async def test_address_cycling_emails_is_limited(self, counting_hit):
+        """A client cannot lift the limit by changing the email it sends"""
+        headers = {"X-Real-IP": "203.0.113.7"}
+        statuses = [
+            (
+                await request(
+                    "POST",
+                    "/sign-in",
+                    json={"email": f"user{i}@example.com"},
+                    headers=headers,
+                )
+            ).status_code
+            for i in range(6)
+        ]
+
+        assert statuses == [200] * 5 + [429]
+
+    async def test_account_limit_per_address(self, counting_hit):
+        """Requests for an account from one address do not lock it out elsewhere"""
+        for _ in range(4):
+            response = await request(
+                "POST",
+                "/sign-in",
+                json={"email": "ada@example.com"},
+                headers={"X-Real-IP": "198.51.100.1"},
+            )
+        assert response.status_code == 429
+        assert response.headers["Retry-After"] == "12"
+
+        response = await request(
+            "POST",
+            "/sign-in",
+            json={"email": "ada@example.com"},
+            headers={"X-Real-IP": "203.0.113.7"},
+        )
+        assert response.status_code == 200
+
+    async def test_school_network_logins(self, counting_hit):
+        """Classes logging in at once from one school address are not limited"""
+        for i in range(200):
+            response = await request(
+                "POST",
+                "/auth/login",
+                json={"email": f"student{i}@example.com"},
+                headers={"X-Real-IP": "203.0.113.7"},
+            )
+            assert response.status_code == 200
+
+    async def test_redis_unavailable(self, mock_hit):
+        """Requests are let through when Redis cannot be reached"""
+        mock_hit.side_effect = ConnectionError("unreachable")
+
+        response = await request("GET", "/items/1")
+
+        assert response.status_code == 200
+        assert "RateLimit-Limit" not in response.headers
+
+    async def test_disabled(self, mock_hit, monkeypatch):
+        """Nothing is counted when rate limits are disabled"""
+        monkeypatch.setattr(settings, "RATE_LIMIT_ENABLED", False)
+
+        response = await request("GET", "/items/1")
+
+        assert response.status_code == 200
+        mock_hit.assert_not_awaited()
@@ -0,0 +1,149 @@
+import gzip
+import json
+from datetime import datetime
+from typing import List
+from unittest.mock import patch
+
+import pytest
+from bson import DBRef
+from starlette.requests import Request
+
+from app.core import responses
+from app.core.responses import (
+    MSGPACK_MEDIA_TYPE,
+    NDJSONResponse,
+    ReturnResponse,
+    accepts_gzip,
+    export_record,
+)
+from app.core.schemas import BaseReturn
+from app.exam.student.schemas import QuestionWithOptions, QuestionWithUserResponse
+
+QuestionsReturn = BaseReturn[List[QuestionWithOptions]]
+
+
+def make_request(accept: str, header: str = "accept") -> Request:
+    return Request(
+        {
+            "type": "http",
+            "method": "GET",
+            "path": "/",
+            "headers": [(header.encode(), accept.encode())],
+        }
+    )
+
+
+class TestReturnResponse:
+    """Tests for the ReturnResponse fast rendering path"""
+
+    def test_renders_declared_fields_only(self):
+        """Data is serialized with the declared schema, extra fields are dropped"""
+        question = QuestionWithUserResponse(
+            id="q1",
+            question_text="What is 2+2?",
+            type="mcq",
+            options=[{"id": "o1", "text": "4"}],
+            user_selected_options=["o1"],
+        )
+
+        response = ReturnResponse(QuestionsReturn, "ok", [question])
+
+        assert response.media_type == "application/json"
+        body = json.loads(response.body)
+        assert body["message"] == "ok"
+        assert body["data"][0]["options"] == [{"id": "o1", "text": "4"}]
+        assert "user_selected_options" not in body["data"][0]
+
+    def test_renders_msgpack_when_accepted(self):
+        """Clients accepting MessagePack get the same payload packed"""
+        msgpack = pytest.importorskip("msgpack")
+        question = QuestionWithOptions(id="q1", question_text="Q", type="mcq")
+        request = make_request(MSGPACK_MEDIA_TYPE)
+
+        response = ReturnResponse(QuestionsReturn, "ok", [question], request=request)
+
+        assert response.headers["content-type"] == MSGPACK_MEDIA_TYPE
+        assert response.headers["vary"] == "Accept"
+        body = msgpack.unpackb(response.body)
+        assert body["data"][0]["id"] == "q1"
+        assert body == json.loads(
+            ReturnResponse(QuestionsReturn, "ok", [question]).body
+        )
+
+    def test_falls_back_to_json(self):
+        """Other Accept values keep the JSON body"""
+        response = ReturnResponse(
+            BaseReturn[None], "saved", request=make_request("application/json")
+        )
+
+        assert response.headers["content-type"] == "application/json"
+        assert json.loads(response.body) == {"message": "saved", "data": None}
+
+
+async def records(count: int):
+    for i in range(count):
+        yield export_record(
+            "question",
+            {
+                "_id": f"q{i}",
+                "created_by": DBRef("users", "u1"),
+                "created_at": datetime(2025, 1, 2, 3, 4, 5),
+            },
+        )
+
+
+async def read_body(response: NDJSONResponse) -> List[bytes]:
+    return [chunk async for chunk in response.body_iterator]
+
+
+class TestNDJSONResponse:
+    """Tests for the streamed JSON Lines export response"""
+
+    async def test_lines(self):
+        response = NDJSONResponse(records(2), filename="export.ndjson")
+
+        chunks = await read_body(response)
+
+        assert response.headers["content-type"] == "application/x-ndjson"
+        assert "content-encoding" not in response.headers
+        assert response.headers["content-disposition"] == (
+            'attachment; filename="export.ndjson"'
+        )
+        assert [json.loads(line) for line in b"".join(chunks).splitlines()] == [
+            {
+                "type": "question",
+                "data": {
+                    "id": f"q{i}",
+                    "created_by": "u1",
+                    "created_at": "2025-01-02T03:04:05+00:00",
+                },
+            }
+            for i in range(2)
+        ]
+
+    async def test_gzip_chunks(self):
+        """Lines are compressed chunk by chunk as the records come"""
+        request = make_request("gzip, deflate", header="accept-encoding")
+
+        with patch.object(responses, "NDJSON_CHUNK_SIZE", 1):
+            response = NDJSONResponse(records(3), request=request)
+            chunks = await read_body(response)
+
+        assert response.headers["content-encoding"] == "gzip"
+        assert response.headers["vary"] == "Accept-Encoding"
+        assert len(chunks) > 1
+        lines = gzip.decompress(b"".join(chunks)).splitlines()
+        assert [json.loads(line)["data"]["id"] for line in lines] == ["q0", "q1", "q2"]
+
+    @pytest.mark.parametrize(
+        "accept_encoding, expected",
+        [
+            ("gzip", True),
+            ("br;q=1, GZIP;q=0.5", True),
+            ("gzip;q=0", False),
+            ("", False),
+        ],
+    )
+    def test_accepts_gzip(self, accept_encoding, expected):
+        request = make_request(accept_encoding, header="accept-encoding")
+        assert accepts_gzip(request) is expected
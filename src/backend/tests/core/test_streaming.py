@@ -0,0 +1,78 @@
+import pytest
+
+from app.core.exceptions import BadRequestError
+from app.core.streaming import iter_csv_column, iter_csv_rows, iter_json_values
+
+
+async def stream(*chunks: bytes):
+    for chunk in chunks:
+        yield chunk
+
+
+async def read(chunks, column="email"):
+    return [value async for value in iter_csv_column(stream(*chunks), column)]
+
+
+class TestIterCsvColumn:
+    """Tests for reading a column of a streamed CSV body"""
+
+    async def test_column_by_header(self):
+        body = b"\xef\xbb\xbfName,Email\r\nAda,ada@example.com\r\n\r\nBob,\nCy,cy@x.io"
+        assert await read([body]) == ["ada@example.com", "cy@x.io"]
+
+    async def test_without_header(self):
+        assert await read([b"ada@example.com\nbob@example.com\n"]) == [
+            "ada@example.com",
+            "bob@example.com",
+        ]
+
+    async def test_chunk_boundaries(self):
+        body = "email\nzoë@example.com\nbob@example.com".encode()
+        chunks = [body[i : i + 3] for i in range(0, len(body), 3)]
+        assert await read(chunks) == ["zoë@example.com", "bob@example.com"]
+
+    async def test_invalid_encoding(self):
+        with pytest.raises(BadRequestError):
+            await read([b"email\n\xff\xfe@example.com\n"])
+
+
+async def collect(iterator):
+    return [item async for item in iterator]
+
+
+class TestIterCsvRows:
+    """Tests for reading the rows of a streamed CSV body"""
+
+    async def test_rows_with_line_numbers(self):
+        body = b'a,b\r\n\r\n"multi\nline",x\n1,2'
+        chunks = [body[i : i + 4] for i in range(0, len(body), 4)]
+        assert await collect(iter_csv_rows(stream(*chunks))) == [
+            (1, ["a", "b"]),
+            (3, ["multi\nline", "x"]),
+            (5, ["1", "2"]),
+        ]
+
+
+class TestIterJsonValues:
+    """Tests for reading the values of a streamed JSON array or JSON Lines body"""
+
+    async def test_array(self):
+        body = b' [{"a": "[1, 2]"}, 2 ,\n"x"] '
+        chunks = [body[i : i + 3] for i in range(0, len(body), 3)]
+        assert await collect(iter_json_values(stream(*chunks))) == [
+            (1, {"a": "[1, 2]"}),
+            (2, 2),
+            (3, "x"),
+        ]
+
+    async def test_json_lines(self):
+        body = b'{"a": 1}\n\n{"a": 2}\n'
+        assert await collect(iter_json_values(stream(body))) == [
+            (1, {"a": 1}),
+            (2, {"a": 2}),
+        ]
+
+    @pytest.mark.parametrize("body", [b"[1, 2", b"[1 2]", b"[1] 2", b'{"a": 1'])
+    async def test_invalid(self, body):
+        with pytest.raises(BadRequestError):
+            await collect(iter_json_values(stream(body)))
@@ -1,6 +1,6 @@
 import uuid
 from datetime import datetime, timezone
-from unittest.mock import patch
+from unittest.mock import MagicMock, patch
 
 import jwt
 import pytest
@@ -11,9 +11,9 @@ from app.auth.security import get_password_hash
 from app.exam.models import (ExamStatus, PassFailStatus, StudentAttempt,
                              StudentExam, StudentExamStatus)
 from app.exam.student.schemas import (CurrentAttempt, QuestionWithOptions,
-                                      QuestionWithUserResponse,
-                                      StudentAttemptBasic, StudentExamBase,
-                                      StudentExamDetail)
+                                      QuestionWithUserResponse, ReloadExamDelta,
+                                      ResponseDelta, StudentAttemptBasic,
+                                      StudentExamBase, StudentExamDetail)
 from app.settings import settings
 
 
@@ -350,3 +350,85 @@ class TestStudentRouter:
 
         # Verify service was called with correct parameters - using positional arguments
         mock_service.assert_called_once_with(str(student_user.id), test_student_exam.id)
+
+    @patch("app.exam.student.services.StudentExamService.reload_exam")
+    @patch("app.exam.student.services.StudentExamService.get_reload_attempt")
+    async def test_reload_exam_not_modified(
+        self, mock_attempt, mock_reload, client, auth_headers, test_student_exam
+    ):
+        """Test reload short-circuits with 304 when the ETag matches"""
+        mock_attempt.return_value = MagicMock(
+            id="attempt1",
+            response_version=3,
+            pending_versions=[],
+            written_response_version=3,
+        )
+
+        response = await client.get(
+            f"/v1/exam/student/exam/{test_student_exam.id}/reload",
+            headers={**auth_headers, "If-None-Match": 'W/"attempt1-3"'},
+        )
+
+        assert response.status_code == 304
+        assert response.headers["ETag"] == 'W/"attempt1-3"'
+        mock_reload.assert_not_called()
+
+    @patch("app.exam.student.services.StudentExamService.reload_exam_delta")
+    @patch("app.exam.student.services.StudentExamService.get_reload_attempt")
+    async def test_reload_exam_delta(
+        self, mock_attempt, mock_delta, client, auth_headers, test_student_exam
+    ):
+        """Test reload with `since` returns only changed responses"""
+        mock_attempt.return_value = MagicMock(
+            id="attempt1",
+            response_version=5,
+            pending_versions=[],
+            written_response_version=5,
+        )
+        mock_delta.return_value = ReloadExamDelta(
+            attempt_id="attempt1",
+            version=5,
+            responses=[
+                ResponseDelta(question_id="q1", user_selected_options=["opt2"])
+            ],
+        )
+
+        response = await client.get(
+            f"/v1/exam/student/exam/{test_student_exam.id}/reload?since=3",
+            headers={**auth_headers, "If-None-Match": 'W/"attempt1-3"'},
+        )
+
+        assert response.status_code == 200
+        assert response.headers["ETag"] == 'W/"attempt1-5"'
+        assert response.headers["X-Response-Version"] == "5"
+        data = response.json()["data"]
+        assert data["version"] == 5
+        assert data["responses"][0]["question_id"] == "q1"
+        mock_delta.assert_called_once_with(
+            test_student_exam.student_id.id, test_student_exam.id, 3
+        )
+
+    @patch("app.exam.student.services.StudentExamService.reload_exam_delta")
+    @patch("app.exam.student.services.StudentExamService.get_reload_attempt")
+    async def test_reload_exam_pending_write(
+        self, mock_attempt, mock_delta, client, auth_headers, test_student_exam
+    ):
+        """A response still being written changes the ETag once written"""
+        mock_attempt.return_value = MagicMock(
+            id="attempt1",
+            response_version=6,
+            pending_versions=[5],
+            written_response_version=4,
+        )
+        mock_delta.return_value = ReloadExamDelta(
+            attempt_id="attempt1", version=4, responses=[]
+        )
+
+        response = await client.get(
+            f"/v1/exam/student/exam/{test_student_exam.id}/reload?since=3",
+            headers={**auth_headers, "If-None-Match": 'W/"attempt1-6"'},
+        )
+
+        assert response.status_code == 200
+        assert response.headers["ETag"] == 'W/"attempt1-6-5"'
+        assert response.headers["X-Response-Version"] == "4"
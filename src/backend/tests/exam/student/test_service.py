@@ -3,7 +3,14 @@ from datetime import datetime, timezone, timedelta
 from unittest.mock import AsyncMock, MagicMock, patch
 
 from app.core.exceptions import ForbiddenError
-from app.exam.models import PassFailStatus, QuestionType, StudentExamStatus, ExamStatus
+from app.exam.models import (
+    ExamStatus,
+    PassFailStatus,
+    QuestionType,
+    StudentAttempt,
+    StudentExam,
+    StudentExamStatus,
+)
 from app.exam.student.schemas import (
     AnswerSubmission,
     QuestionWithOptions,
@@ -17,6 +24,7 @@ from app.exam.student.services import StudentExamService
 from app.exam.repository import (
     StudentExamRepository,
     StudentAttemptRepository,
+    StudentExamSummaryRepository,
     StudentResponseRepository,
 )
 
@@ -31,6 +39,9 @@ class TestStudentExamService:
             student_exam_repository=AsyncMock(spec=StudentExamRepository),
             student_attempt_repository=AsyncMock(spec=StudentAttemptRepository),
             student_response_repository=AsyncMock(spec=StudentResponseRepository),
+            student_exam_summary_repository=AsyncMock(
+                spec=StudentExamSummaryRepository
+            ),
         )
 
     @pytest.fixture
@@ -91,13 +102,18 @@ class TestStudentExamService:
             "app.exam.student.schemas.StudentExamBase.model_validate"
         ) as mock_validate:
             mock_validate.return_value = MagicMock(spec=StudentExamBase)
-            service.student_exam_repository.get_all.return_value = [MagicMock()]
+            service.student_exam_summary_repository.get_by_student.return_value = [
+                MagicMock()
+            ]
 
             # Execute
             result = await service.get_student_exams("student123")
 
             # Assert
-            service.student_exam_repository.get_all.assert_called_once()
+            service.student_exam_summary_repository.get_by_student.assert_called_once_with(
+                "student123"
+            )
+            service.student_exam_repository.get_all.assert_not_called()
             mock_validate.assert_called_once()
             assert isinstance(result, list)
 
@@ -105,14 +121,14 @@ class TestStudentExamService:
     async def test_get_student_exams_empty(self, service):
         """Test empty list returned when student has no exams"""
         # Setup
-        service.student_exam_repository.get_all.return_value = []
+        service.student_exam_summary_repository.get_by_student.return_value = []
 
         # Execute
         result = await service.get_student_exams("student123")
 
         # Assert
         assert result == []
-        service.student_exam_repository.get_all.assert_called_once()
+        service.student_exam_summary_repository.get_by_student.assert_called_once()
 
     @pytest.mark.asyncio
     async def test_get_student_exam_success(self, service, mock_student_exam):
@@ -252,6 +268,11 @@ class TestStudentExamService:
             service.student_exam_repository.get_by_id.assert_called_once()
             service.student_attempt_repository.create_exam_attempt.assert_called_once()
             assert service.student_exam_repository.update.called
+            service.student_exam_summary_repository.update_progress.assert_called_once()
+            _, progress = (
+                service.student_exam_summary_repository.update_progress.call_args.args
+            )
+            assert progress["current_status"] == StudentExamStatus.IN_PROGRESS
 
     @pytest.mark.asyncio
     async def test_start_exam_already_started(self, service, mock_student_exam):
@@ -282,14 +303,23 @@ class TestStudentExamService:
             service.student_response_repository.get_one_by_criteria.return_value = (
                 mock_response
             )
+            service.student_attempt_repository.bump_response_version.return_value = 4
 
             # Execute
             question = AnswerSubmission(question_id="q1", option_ids=["opt1", "opt2"])
             await service.save_answer("student123", "exam123", question)
 
             # Assert
-            service.student_response_repository.update.assert_called_once()
-            service.student_attempt_repository.update.assert_called_once()
+            service.student_response_repository.update.assert_called_once_with(
+                mock_response.id,
+                {"selected_option_ids": ["opt1", "opt2"], "version": 4},
+            )
+            service.student_attempt_repository.bump_response_version.assert_called_once_with(
+                "attempt123"
+            )
+            service.student_attempt_repository.release_response_version.assert_called_once_with(
+                "attempt123", 4
+            )
 
     @pytest.mark.asyncio
     async def test_submit_exam_success(self, service):
@@ -448,15 +478,105 @@ class TestStudentExamService:
                 mock_response
             )
 
+            service.student_attempt_repository.bump_response_version.return_value = 2
+
             # Execute
             await service.toggle_flag_question("student123", "exam123", "question123")
 
             # Assert
             service.student_response_repository.update.assert_called_once_with(
                 mock_response.id,
-                {"is_flagged": True},
+                {"is_flagged": True, "version": 2},
+            )
+            service.student_attempt_repository.bump_response_version.assert_called_once_with(
+                "attempt123"
+            )
+            service.student_attempt_repository.release_response_version.assert_called_once_with(
+                "attempt123", 2
             )
-            service.student_attempt_repository.update.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_reload_exam_delta(self, service):
+        """Test delta reload returns only responses changed after a version"""
+        # Setup
+        mock_attempt = MagicMock(id="attempt123", written_response_version=5)
+        mock_response = MagicMock(
+            selected_option_ids=["o2"], text_response=None, is_flagged=True, version=5
+        )
+        mock_response.question_id.ref.id = "q1"
+
+        with patch.object(
+            service,
+            "_get_active_attempt",
+            return_value=(MagicMock(), mock_attempt),
+        ) as mock_active:
+            service.student_response_repository.get_changed_since.return_value = [
+                mock_response
+            ]
+
+            # Execute
+            result = await service.reload_exam_delta("student123", "exam123", 3)
+
+            # Assert
+            mock_active.assert_called_once_with(
+                "student123", "exam123", exam_fetch_depth=1
+            )
+            service.student_response_repository.get_changed_since.assert_called_once_with(
+                "attempt123", 3
+            )
+            assert result.version == 5
+            assert result.attempt_id == "attempt123"
+            assert len(result.responses) == 1
+            assert result.responses[0].question_id == "q1"
+            assert result.responses[0].user_selected_options == ["o2"]
+            assert result.responses[0].is_flagged is True
+
+    @pytest.mark.asyncio
+    async def test_reload_exam_delta_pending_write(self, service):
+        """Versions assigned to responses not written yet are not reported"""
+        # Setup: version 5 is being written, version 6 is already
+        mock_attempt = StudentAttempt(
+            id="attempt123",
+            student_exam_id=StudentExam(student_id="s1", exam_instance_id="e1"),
+            response_version=6,
+            pending_versions=[5],
+        )
+        mock_response = MagicMock(
+            selected_option_ids=[], text_response="6", is_flagged=False, version=6
+        )
+        mock_response.question_id.ref.id = "q1"
+
+        with patch.object(
+            service,
+            "_get_active_attempt",
+            return_value=(MagicMock(), mock_attempt),
+        ):
+            service.student_response_repository.get_changed_since.return_value = [
+                mock_response
+            ]
+
+            # Execute
+            result = await service.reload_exam_delta("student123", "exam123", 3)
+
+            # Assert: the next delta starts before version 5
+            assert result.version == 4
+            assert len(result.responses) == 1
+
+    @pytest.mark.asyncio
+    async def test_get_reload_attempt_not_in_progress(
+        self, service, mock_student_exam
+    ):
+        """Test no version is reported when the exam is not in progress"""
+        # Setup
+        mock_student_exam.student_id.ref.id = "student123"
+        service.student_exam_repository.get_by_id.return_value = mock_student_exam
+
+        # Execute
+        result = await service.get_reload_attempt("student123", "exam123")
+
+        # Assert
+        assert result is None
+        service.student_attempt_repository.get_by_id.assert_not_called()
 
     @pytest.mark.asyncio
     async def test_validate_exam_time_past_end_date(self, service):
@@ -1,8 +1,11 @@
+import json
 import uuid
+from datetime import datetime, timezone
 from unittest.mock import patch
 
 import jwt
 import pytest
+from bson import ObjectId
 
 from app.auth.models import User
 from app.auth.schemas import UserRole
@@ -10,7 +13,9 @@ from app.auth.security import get_password_hash
 from app.exam.models import (
     Collection,
     ExamStatus,
+    ImportStatus,
     Question,
+    QuestionImport,
     QuestionOption,
     QuestionType,
 )
@@ -154,6 +159,39 @@ class TestTeacherRouter:
         assert response.status_code == 200
         assert response.json()["message"] == "Collection retrieved successfully"
 
+    @patch("app.exam.teacher.services.CollectionService.get_collection")
+    async def test_get_collection_not_modified(
+        self, mock_service, client, auth_headers, test_collection, test_question
+    ):
+        """Test conditional GET of a collection, invalidated by a question edit"""
+        from app.exam.teacher.schemas import GetCollection
+
+        collection_dict = test_collection.model_dump()
+        collection_dict["questions"] = [test_question.model_dump()]
+        mock_service.return_value = GetCollection.model_validate(collection_dict)
+        url = f"/v1/exam/teacher/collections/{test_collection.id}"
+
+        response = await client.get(url, headers=auth_headers)
+        etag = response.headers["ETag"]
+
+        response = await client.get(
+            url, headers={**auth_headers, "If-None-Match": etag}
+        )
+        assert response.status_code == 304
+        assert response.headers["ETag"] == etag
+        assert mock_service.call_count == 1
+
+        question = await Question.get(test_question.id)
+        question.question_text = "What is the capital of Italy?"
+        question.updated_at = datetime.now(timezone.utc)
+        await question.save()
+
+        response = await client.get(
+            url, headers={**auth_headers, "If-None-Match": etag}
+        )
+        assert response.status_code == 200
+        assert response.headers["ETag"] != etag
+
     @patch("app.exam.teacher.services.CollectionService.update_collection")
     async def test_update_collection(
         self, mock_service, client, auth_headers, test_collection
@@ -301,3 +339,307 @@ class TestTeacherRouter:
         assert response.status_code == 200
         assert response.json()["message"] == "Public collections retrieved successfully"
         assert len(response.json()["data"]) == 0
+
+    async def test_search_public_collections(self, client, auth_headers, teacher_user):
+        """Collections rank by their best matching question, page by page"""
+        questions = []
+        for i in range(3):
+            question = Question(
+                question_text=f"Derivative {i}",
+                type=QuestionType.SHORTANSWER,
+                created_by=teacher_user,
+            )
+            await question.insert()
+            collection = Collection(
+                title=f"Calculus {i}",
+                created_by=teacher_user,
+                status=ExamStatus.PUBLISHED,
+                questions=[question],
+            )
+            await collection.insert()
+            questions.append((question, collection))
+        scores = {question.id: 1.0 + i for i, (question, _) in enumerate(questions)}
+        url = "/v1/exam/teacher/collections/search"
+        params = {"q": "derivative", "question_type": "shortanswer", "limit": 2}
+
+        # MongoDB text search is not available in the test database
+        with patch(
+            "app.exam.repository.QuestionRepository.search_text", return_value=scores
+        ):
+            first = await client.get(url, params=params, headers=auth_headers)
+            page = first.json()["data"]
+            second = await client.get(
+                url,
+                params={**params, "cursor": page["next_cursor"]},
+                headers=auth_headers,
+            )
+
+        assert first.status_code == 200
+        assert page["total"] == 3
+        assert [item["title"] for item in page["items"]] == ["Calculus 2", "Calculus 1"]
+        assert page["items"][0]["matched_questions"] == [questions[2][0].id]
+        assert page["items"][0]["score"] == 3.0
+        assert [item["title"] for item in second.json()["data"]["items"]] == [
+            "Calculus 0"
+        ]
+        assert second.json()["data"]["next_cursor"] is None
+
+    async def test_search_invalid_cursor(self, client, auth_headers):
+        with patch(
+            "app.exam.repository.QuestionRepository.search_text", return_value={}
+        ):
+            response = await client.get(
+                "/v1/exam/teacher/collections/search",
+                params={"q": "x", "question_type": "mcq", "cursor": "nope"},
+                headers=auth_headers,
+            )
+
+        assert response.status_code == 400
+
+    async def test_import_questions(self, client, auth_headers, test_collection):
+        """The file is staged and its import queued under the import id"""
+        file_id = ObjectId()
+        with patch(
+            "app.exam.repository.QuestionImportRepository.save_file",
+            return_value=file_id,
+        ) as mock_save, patch(
+            "app.exam.teacher.services.collection_service.import_question_file"
+        ) as mock_task:
+            response = await client.post(
+                f"/v1/exam/teacher/collections/{test_collection.id}/questions/import",
+                params={"format": "gift"},
+                content=b"2 + 2? {=4}",
+                headers=auth_headers,
+            )
+
+        assert response.status_code == 202
+        data = response.json()["data"]
+        assert data["status"] == ImportStatus.PENDING
+        assert data["collection_id"] == str(test_collection.id)
+        job = await QuestionImport.get(data["id"])
+        assert job.file_id == file_id
+        assert mock_save.call_args.args[0] == job.id
+        mock_task.apply_async.assert_called_once_with(args=[job.id], task_id=job.id)
+
+    async def test_get_question_import(
+        self, client, auth_headers, teacher_user, test_collection
+    ):
+        job = QuestionImport(
+            collection_id=test_collection.id,
+            created_by=teacher_user.id,
+            format="csv",
+            status=ImportStatus.COMPLETED,
+            rows=2,
+            imported=1,
+            failed=1,
+            errors=[{"row": 3, "error": "type: Field required"}],
+        )
+        await job.insert()
+        other = QuestionImport(
+            collection_id=test_collection.id, created_by=str(uuid.uuid4()), format="csv"
+        )
+        await other.insert()
+
+        response = await client.get(
+            f"/v1/exam/teacher/collections/imports/{job.id}", headers=auth_headers
+        )
+        forbidden = await client.get(
+            f"/v1/exam/teacher/collections/imports/{other.id}", headers=auth_headers
+        )
+
+        assert response.status_code == 200
+        assert response.json()["data"]["imported"] == 1
+        assert response.json()["data"]["errors"] == [
+            {"row": 3, "error": "type: Field required"}
+        ]
+        assert forbidden.status_code == 403
+
+    @pytest.fixture
+    async def forked_question(self, fake, teacher_user):
+        """Question of a published collection of another teacher, forked"""
+        author = User(
+            email=fake.email(), hashed_password="hashed", role=UserRole.TEACHER
+        )
+        await author.insert()
+        question = Question(
+            question_text="Capital of Italy?",
+            type=QuestionType.SHORTANSWER,
+            correct_input_answer="Rome",
+            created_by=author,
+            position=1,
+        )
+        await question.insert()
+        source = Collection(
+            title="Capitals",
+            created_by=author,
+            status=ExamStatus.PUBLISHED,
+            questions=[question],
+        )
+        await source.insert()
+        fork = Collection(
+            title="Capitals",
+            created_by=teacher_user,
+            questions=[question],
+            forked_from=source.id,
+        )
+        await fork.insert()
+        return question, source, fork
+
+    async def test_fork_collection(self, client, auth_headers, teacher_user, fake):
+        author = User(
+            email=fake.email(), hashed_password="hashed", role=UserRole.TEACHER
+        )
+        await author.insert()
+        draft = Collection(title="Draft", created_by=author)
+        await draft.insert()
+        url = f"/v1/exam/teacher/collections/{draft.id}/fork"
+
+        # The collection is copied by a $merge, not available in the test database
+        with patch(
+            "app.exam.repository.CollectionRepository.fork", return_value="fork-id"
+        ) as mock_fork:
+            forbidden = await client.post(url, json={}, headers=auth_headers)
+            draft.status = ExamStatus.PUBLISHED
+            await draft.save()
+            response = await client.post(
+                url, json={"title": "My copy"}, headers=auth_headers
+            )
+
+        assert forbidden.status_code == 403
+        assert response.status_code == 201
+        assert response.json()["data"] == {"collection_id": "fork-id"}
+        mock_fork.assert_called_once_with(draft.id, teacher_user.id, "My copy")
+
+    async def test_edit_forked_question(self, client, auth_headers, forked_question):
+        """The fork edits its own copy, the source keeps the question"""
+        question, source, fork = forked_question
+        other = Question(
+            question_text="Capital of Spain?",
+            type=QuestionType.SHORTANSWER,
+            correct_input_answer="Madrid",
+            created_by=fork.created_by,
+            position=2,
+        )
+        await other.insert()
+        fork.questions.append(other)
+        await fork.save()
+
+        response = await client.put(
+            f"/v1/exam/teacher/collections/{fork.id}/questions/{question.id}",
+            json={"correct_input_answer": "Roma"},
+            headers=auth_headers,
+        )
+
+        assert response.status_code == 200
+        copy_id = response.json()["data"]["question_id"]
+        assert copy_id != question.id
+        copy = await Question.get(copy_id)
+        assert (copy.question_text, copy.correct_input_answer) == (
+            "Capital of Italy?",
+            "Roma",
+        )
+        assert copy.created_by.ref.id == fork.created_by.id
+        fork = await Collection.get(fork.id)
+        assert [link.ref.id for link in fork.questions] == [copy_id, other.id]
+        source = await Collection.get(source.id)
+        assert [link.ref.id for link in source.questions] == [question.id]
+        assert (await Question.get(question.id)).correct_input_answer == "Rome"
+
+        # The copy is the fork's own, edited in place from now on
+        response = await client.put(
+            f"/v1/exam/teacher/collections/{fork.id}/questions/{copy_id}",
+            json={"correct_input_answer": "Rom"},
+            headers=auth_headers,
+        )
+        assert response.json()["data"]["question_id"] == copy_id
+        assert (await Question.get(copy_id)).correct_input_answer == "Rom"
+
+    async def test_edit_question_position_taken(
+        self, client, auth_headers, forked_question, teacher_user
+    ):
+        question, _, fork = forked_question
+        other = Question(
+            question_text="Capital of Spain?",
+            type=QuestionType.SHORTANSWER,
+            correct_input_answer="Madrid",
+            created_by=teacher_user,
+            position=2,
+        )
+        await other.insert()
+        fork.questions.append(other)
+        await fork.save()
+
+        response = await client.put(
+            f"/v1/exam/teacher/collections/{fork.id}/questions/{question.id}",
+            json={"position": 2},
+            headers=auth_headers,
+        )
+
+        assert response.status_code == 422
+        assert await Question.count() == 2
+
+    async def test_delete_forked_question(self, client, auth_headers, forked_question):
+        """A question still linked from the source is only unlinked"""
+        question, source, fork = forked_question
+
+        response = await client.delete(
+            f"/v1/exam/teacher/collections/{fork.id}/questions/{question.id}",
+            headers=auth_headers,
+        )
+
+        assert response.status_code == 200
+        assert (await Collection.get(fork.id)).questions == []
+        assert await Question.get(question.id) is not None
+        assert len((await Collection.get(source.id)).questions) == 1
+
+    async def test_delete_source_collection(self, forked_question):
+        """Deleting the source of a fork keeps the questions of the fork"""
+        question, source, fork = forked_question
+        own = Question(
+            question_text="Capital of Spain?",
+            type=QuestionType.SHORTANSWER,
+            created_by=source.created_by,
+        )
+        await own.insert()
+        source.questions.append(own)
+        await source.save()
+
+        await (await Collection.get(source.id)).delete()
+
+        assert await Question.distinct("_id") == [question.id]
+
+    async def test_export_collection(
+        self, client, auth_headers, teacher_user, test_collection
+    ):
+        """The collection comes first, then its questions by position"""
+        for position in (2, 1):
+            question = Question(
+                question_text=f"Question {position}",
+                type=QuestionType.SHORTANSWER,
+                created_by=teacher_user,
+                position=position,
+            )
+            await question.insert()
+            test_collection.questions.append(question)
+        await test_collection.save()
+
+        response = await client.get(
+            f"/v1/exam/teacher/collections/{test_collection.id}/export",
+            headers=auth_headers,
+        )
+
+        assert response.status_code == 200
+        assert response.headers["content-disposition"] == (
+            f'attachment; filename="collection_{test_collection.id}.ndjson"'
+        )
+        records = [json.loads(line) for line in response.text.splitlines()]
+        assert records[0]["type"] == "collection"
+        assert records[0]["data"]["id"] == test_collection.id
+        assert records[0]["data"]["created_by"] == teacher_user.id
+        assert "questions" not in records[0]["data"]
+        assert [
+            (record["type"], record["data"]["question_text"]) for record in records[1:]
+        ] == [
+            ("question", "Question 1"),
+            ("question", "Question 2"),
+        ]
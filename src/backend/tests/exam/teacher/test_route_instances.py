@@ -9,7 +9,9 @@ from app.auth.models import User
 from app.auth.schemas import UserRole
 from app.auth.security import get_password_hash
 from app.exam.models import (Collection, ExamInstance, ExamStatus,
-                             NotificationSettings, SecuritySettings)
+                             NotificationSettings, SecuritySettings,
+                             StudentExam, StudentExamStatus,
+                             StudentExamSummary)
 from app.settings import settings
 
 
@@ -109,6 +111,68 @@ class TestExamInstanceRouter:
         assert response.status_code == 200
         assert response.json()["message"] == "Exam instances retrieved successfully"
 
+    async def test_get_exam_instance_overview(
+        self, client, auth_headers, teacher_user, test_collection
+    ):
+        """Pages of the teacher's instances, with the progress of their students"""
+        now = datetime.now(timezone.utc)
+        instances = []
+        for days, status in [(1, ExamStatus.PUBLISHED), (2, ExamStatus.DRAFT)] * 2:
+            instance = ExamInstance(
+                title=f"Exam in {days} days",
+                start_date=now + timedelta(days=days),
+                end_date=now + timedelta(days=days, hours=2),
+                status=status,
+                collection_id=test_collection,
+                created_by=teacher_user,
+            )
+            await instance.insert()
+            instances.append(instance)
+        for status in [StudentExamStatus.IN_PROGRESS, StudentExamStatus.SUBMITTED]:
+            await StudentExam(
+                exam_instance_id=instances[0],
+                student_id=str(uuid.uuid4()),
+                current_status=status,
+            ).insert()
+        url = "/v1/exam/teacher/exam-instances/overview"
+
+        first = await client.get(
+            url, params={"sort": "start_date", "limit": 3}, headers=auth_headers
+        )
+        page = first.json()["data"]
+        assert first.status_code == 200
+        assert page["total"] == 4
+        assert len(page["items"]) == 3
+        counts = {
+            item["id"]: (item["assigned"], item["in_progress"], item["submitted"])
+            for item in page["items"]
+        }
+        assert counts[instances[0].id] == (2, 1, 1)
+        assert counts[instances[2].id] == (0, 0, 0)
+        assert page["items"][0]["collection_id"] == test_collection.id
+
+        second = await client.get(
+            url,
+            params={"sort": "start_date", "limit": 3, "cursor": page["next_cursor"]},
+            headers=auth_headers,
+        )
+        ids = [item["id"] for item in page["items"] + second.json()["data"]["items"]]
+        assert sorted(ids) == sorted(instance.id for instance in instances)
+        assert second.json()["data"]["next_cursor"] is None
+
+        filtered = await client.get(
+            url,
+            params={
+                "status": "published",
+                "date_to": (now + timedelta(days=1, hours=1)).isoformat(),
+            },
+            headers=auth_headers,
+        )
+        assert {item["id"] for item in filtered.json()["data"]["items"]} == {
+            instances[0].id,
+            instances[2].id,
+        }
+
     @patch("app.exam.teacher.services.ExamInstanceService.create_exam_instance")
     async def test_create_exam_instance(
         self, mock_service, client, auth_headers, test_collection
@@ -176,6 +240,39 @@ class TestExamInstanceRouter:
         assert response.status_code == 200
         assert response.json()["message"] == "Exam instance retrieved successfully"
 
+    @patch("app.exam.teacher.services.ExamInstanceService.get_by_id")
+    async def test_get_exam_instance_not_modified(
+        self, mock_service, client, auth_headers, test_exam_instance
+    ):
+        """Test conditional GET of an exam instance by ETag and Last-Modified"""
+        mock_service.return_value = None
+        url = f"/v1/exam/teacher/exam-instances/{test_exam_instance.id}"
+
+        response = await client.get(
+            url, headers={**auth_headers, "If-None-Match": 'W/"stale"'}
+        )
+        assert response.headers["Cache-Control"] == "private, no-cache"
+        last_modified = response.headers["Last-Modified"]
+        etag = response.headers["ETag"]
+        assert mock_service.call_count == 1
+
+        response = await client.get(
+            url, headers={**auth_headers, "If-None-Match": etag}
+        )
+        assert response.status_code == 304
+
+        response = await client.get(
+            url, headers={**auth_headers, "If-Modified-Since": last_modified}
+        )
+        assert response.status_code == 304
+        assert mock_service.call_count == 1
+
+        response = await client.get(
+            url,
+            headers={**auth_headers, "If-None-Match": etag, "X-Timezone": "Asia/Tokyo"},
+        )
+        assert mock_service.call_count == 2
+
     @patch("app.exam.teacher.services.ExamInstanceService.update_exam_instance")
     async def test_update_exam_instance(
         self, mock_service, client, auth_headers, test_exam_instance
@@ -223,3 +320,76 @@ class TestExamInstanceRouter:
         )
         assert response.status_code == 404  # Should be 404 Not Found
         assert response.json()["detail"] == "Exam instance not found"
+
+    @pytest.fixture
+    async def students(self):
+        students = [
+            User(
+                email=f"student{i}@example.com",
+                hashed_password="hash",
+                role=UserRole.STUDENT,
+            )
+            for i in range(3)
+        ]
+        for student in students:
+            await student.insert()
+        return students
+
+    async def test_assign_students(
+        self, client, auth_headers, test_exam_instance, students, teacher_user
+    ):
+        """New students are assigned, others are counted or reported"""
+        url = f"/v1/exam/teacher/exam-instances/{test_exam_instance.id}/students"
+        first = await client.post(
+            url, json={"student_ids": [students[0].id]}, headers=auth_headers
+        )
+        assert first.json()["data"]["assigned"] == 1
+
+        response = await client.post(
+            url,
+            json={
+                "student_ids": [
+                    students[0].id,
+                    students[1].id,
+                    students[1].id,
+                    teacher_user.id,
+                ]
+            },
+            headers=auth_headers,
+        )
+
+        assert response.status_code == 200
+        assert response.json()["data"] == {
+            "assigned": 1,
+            "already_assigned": 1,
+            "unknown": [teacher_user.id],
+        }
+        instance = await ExamInstance.get(test_exam_instance.id)
+        assert len(instance.assigned_students) == 3
+        assert len(await StudentExam.distinct("_id")) == 2
+
+    async def test_assign_students_csv(
+        self, client, auth_headers, test_exam_instance, students
+    ):
+        """Emails are read from the email column, ignoring case"""
+        body = (
+            "name,email\n"
+            "Ada,STUDENT0@example.com\r\n"
+            "Grace,student2@example.com\n"
+            "Nobody,nobody@example.com\n"
+        )
+
+        response = await client.post(
+            f"/v1/exam/teacher/exam-instances/{test_exam_instance.id}/students/csv",
+            content=body.encode(),
+            headers={**auth_headers, "Content-Type": "text/csv"},
+        )
+
+        assert response.status_code == 200
+        assert response.json()["data"] == {
+            "assigned": 2,
+            "already_assigned": 0,
+            "unknown": ["nobody@example.com"],
+        }
+        summaries = await StudentExamSummary.distinct("student_id")
+        assert set(summaries) == {students[0].id, students[2].id}
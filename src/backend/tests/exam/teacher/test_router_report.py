@@ -1,3 +1,4 @@
+import json
 import uuid
 from datetime import datetime, timedelta, timezone
 from unittest.mock import patch
@@ -8,6 +9,8 @@ import pytest
 from app.auth.models import User
 from app.auth.schemas import UserRole
 from app.auth.security import get_password_hash
+from app.exam.models import (Collection, ExamInstance, Question, QuestionType,
+                             StudentAttempt, StudentExam, StudentResponse)
 from app.exam.teacher.schemas import (ExamReportResponse, ExamStatistics,
                                       HistogramDataPoint, TimelineDataPoint)
 from app.settings import settings
@@ -185,3 +188,91 @@ class TestReportRouter:
 
         assert response.status_code == 404
         assert "not found" in response.json()["detail"].lower()
+
+    async def test_export_exam_instance(self, client, auth_headers, teacher_user, fake):
+        """Each batch of student exams is followed by its attempts and responses"""
+        question = Question(
+            question_text="2 + 2?",
+            type=QuestionType.SHORTANSWER,
+            created_by=teacher_user,
+        )
+        await question.insert()
+        collection = Collection(
+            title="Algebra", created_by=teacher_user, questions=[question]
+        )
+        await collection.insert()
+        instance = ExamInstance(
+            collection_id=collection,
+            title="Midterm",
+            created_by=teacher_user,
+            start_date=datetime.now(timezone.utc),
+            end_date=datetime.now(timezone.utc) + timedelta(hours=2),
+        )
+        await instance.insert()
+        attempts = []
+        for _ in range(2):
+            student = User(
+                email=fake.email(), hashed_password="hashed", role=UserRole.STUDENT
+            )
+            await student.insert()
+            student_exam = StudentExam(exam_instance_id=instance, student_id=student)
+            await student_exam.insert()
+            attempt = StudentAttempt(student_exam_id=student_exam, grade=75.0)
+            await attempt.insert()
+            await StudentResponse(
+                attempt_id=attempt, question_id=question, text_response="4"
+            ).insert()
+            attempts.append(attempt)
+        url = f"/v1/exam/teacher/report/{instance.id}/export"
+
+        with patch("app.exam.teacher.services.report_services.EXPORT_BATCH_SIZE", 1):
+            response = await client.get(
+                url, headers={**auth_headers, "Accept-Encoding": "gzip"}
+            )
+
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/x-ndjson"
+        assert response.headers["content-encoding"] == "gzip"
+        records = [json.loads(line) for line in response.text.splitlines()]
+        assert [record["type"] for record in records] == [
+            "exam_instance",
+            "student_exam",
+            "attempt",
+            "response",
+            "student_exam",
+            "attempt",
+            "response",
+        ]
+        assert records[0]["data"]["id"] == instance.id
+        assert records[0]["data"]["created_by"] == teacher_user.id
+        assert {records[2]["data"]["id"], records[5]["data"]["id"]} == {
+            a.id for a in attempts
+        }
+        assert records[3]["data"]["attempt_id"] == records[2]["data"]["id"]
+        assert records[3]["data"]["text_response"] == "4"
+
+    async def test_export_exam_instance_not_owner(self, client, auth_headers, fake):
+        owner = User(
+            email=fake.email(), hashed_password="hashed", role=UserRole.TEACHER
+        )
+        await owner.insert()
+        collection = Collection(title="Algebra", created_by=owner)
+        await collection.insert()
+        instance = ExamInstance(
+            collection_id=collection,
+            title="Midterm",
+            created_by=owner,
+            start_date=datetime.now(timezone.utc),
+            end_date=datetime.now(timezone.utc) + timedelta(hours=2),
+        )
+        await instance.insert()
+
+        response = await client.get(
+            f"/v1/exam/teacher/report/{instance.id}/export", headers=auth_headers
+        )
+        missing = await client.get(
+            f"/v1/exam/teacher/report/{uuid.uuid4()}/export", headers=auth_headers
+        )
+
+        assert response.status_code == 403
+        assert missing.status_code == 404
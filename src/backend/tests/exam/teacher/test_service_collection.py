@@ -3,7 +3,6 @@ from datetime import datetime, timezone
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
-from beanie import DeleteRules
 
 from app.core.exceptions import (
     BadRequestError,
@@ -327,31 +326,42 @@ class TestCollectionService:
         assert result == mock_question.id
 
     async def test_delete_question(
-        self, service, question_repository, mock_question, user_id
+        self,
+        service,
+        collection_repository,
+        question_repository,
+        mock_collection,
+        mock_question,
+        user_id,
     ):
         """Test deleting a question"""
         # Setup
-        question_repository.get_by_id.return_value = mock_question
+        mock_collection.questions = [MagicMock(ref=MagicMock(id=mock_question.id))]
+        collection_repository.get_by_id.return_value = mock_collection
+        collection_repository.is_question_shared.return_value = False
 
         # Execute
-        await service.delete_question(mock_question.id, user_id)
+        await service.delete_question(mock_collection.id, mock_question.id, user_id)
 
         # Verify
-        question_repository.delete.assert_called_once_with(
-            mock_question.id, link_rule=DeleteRules.DELETE_LINKS
+        collection_repository.remove_question.assert_called_once_with(
+            mock_collection.id, mock_question.id
         )
+        question_repository.delete.assert_called_once_with(mock_question.id)
 
     async def test_delete_question_not_owner(
-        self, service, question_repository, mock_question
+        self, service, collection_repository, mock_collection, mock_question
     ):
         """Test deleting a question when not the owner"""
         # Setup
         different_user_id = str(uuid.uuid4())
-        question_repository.get_by_id.return_value = mock_question
+        collection_repository.get_by_id.return_value = mock_collection
 
         # Execute and Verify
         with pytest.raises(ForbiddenError):
-            await service.delete_question(mock_question.id, different_user_id)
+            await service.delete_question(
+                mock_collection.id, mock_question.id, different_user_id
+            )
 
     async def test_get_teacher_collections(
         self, service, collection_repository, user_id
@@ -8,12 +8,16 @@ from app.exam.models import ExamStatus, NotificationSettings
 from app.exam.repository import (
     ExamInstanceRepository,
     CollectionRepository,
+    NotificationJobRepository,
     StudentExamRepository,
+    StudentExamSummaryRepository,
 )
 from app.auth.repository import UserRepository
 from app.exam.teacher.services import ExamInstanceService
 from app.exam.teacher.schemas import (
     CreateExamInstanceSchema,
+    ExamInstanceFilter,
+    ExamInstanceOverview,
     UpdateExamInstanceSchema,
     GetExamInstance,
 )
@@ -42,6 +46,16 @@ class TestExamInstanceService:
         """Mock student exam repository"""
         return AsyncMock(spec=StudentExamRepository)
 
+    @pytest.fixture
+    def student_exam_summary_repository(self):
+        """Mock student exam summary repository"""
+        return AsyncMock(spec=StudentExamSummaryRepository)
+
+    @pytest.fixture
+    def notification_job_repository(self):
+        """Mock notification job repository"""
+        return AsyncMock(spec=NotificationJobRepository)
+
     @pytest.fixture
     def service(
         self,
@@ -49,6 +63,8 @@ class TestExamInstanceService:
         collection_repository,
         user_repository,
         student_exam_repository,
+        student_exam_summary_repository,
+        notification_job_repository,
     ):
         """Initialize service with mock repositories"""
         return ExamInstanceService(
@@ -56,6 +72,8 @@ class TestExamInstanceService:
             collection_repository,
             user_repository,
             student_exam_repository,
+            student_exam_summary_repository,
+            notification_job_repository,
         )
 
     @pytest.fixture
@@ -133,6 +151,41 @@ class TestExamInstanceService:
         assert len(result) == 2
         assert isinstance(result[0], GetExamInstance)
 
+    @pytest.mark.asyncio
+    async def test_get_overview(
+        self, service, exam_instance_repository, student_exam_repository
+    ):
+        """Filters go to the page query, counts are those of the page instances"""
+        start = datetime(2025, 1, 6, 9, 0, tzinfo=timezone.utc)
+        item = ExamInstanceOverview(
+            _id="instance123",
+            title="Test Exam",
+            collection_id="collection123",
+            status=ExamStatus.PUBLISHED,
+            start_date=start,
+            end_date=start + timedelta(hours=2),
+        )
+        exam_instance_repository.get_page.return_value = ([item], "next")
+        exam_instance_repository.count.return_value = 30
+        student_exam_repository.count_by_exam.return_value = {
+            "instance123": {"assigned": 3, "in_progress": 1, "submitted": 2}
+        }
+        filters = ExamInstanceFilter(
+            status=ExamStatus.PUBLISHED, date_to=datetime(2025, 1, 31), limit=10
+        )
+
+        page = await service.get_overview("teacher123", filters, pytz.UTC)
+
+        query = exam_instance_repository.count.call_args.args[0]
+        assert query["created_by"].id == "teacher123"
+        assert query["status"] == ExamStatus.PUBLISHED
+        assert query["start_date"] == {"$lte": datetime(2025, 1, 31, tzinfo=pytz.UTC)}
+        assert "end_date" not in query
+        student_exam_repository.count_by_exam.assert_called_once_with(["instance123"])
+        assert page.total == 30
+        assert page.next_cursor == "next"
+        assert (page.items[0].assigned, page.items[0].submitted) == (3, 2)
+
     @pytest.mark.asyncio
     async def test_get_by_id_success(
         self, service, exam_instance_repository, mock_exam_instance
@@ -183,6 +236,8 @@ class TestExamInstanceService:
         exam_instance_repository,
         collection_repository,
         student_exam_repository,
+        student_exam_summary_repository,
+        user_repository,
         mock_collection,
     ):
         """Test creating an exam instance successfully"""
@@ -209,6 +264,7 @@ class TestExamInstanceService:
         mock_created_instance.end_date = instance_data.end_date
 
         exam_instance_repository.create.return_value = mock_created_instance
+        user_repository.get_existing_ids.return_value = {"student123"}
 
         # Execute - Use pytz timezone object
         result = await service.create_exam_instance(
@@ -220,7 +276,10 @@ class TestExamInstanceService:
             instance_data.collection_id
         )
         exam_instance_repository.create.assert_called_once()
-        student_exam_repository.create.assert_called_once()
+        student_exam_repository.create_many.assert_called_once_with(
+            "new_instance_id", ["student123"]
+        )
+        student_exam_summary_repository.create_for_student_exams.assert_called_once()
         assert result == "new_instance_id"
 
     @pytest.mark.asyncio
@@ -318,6 +377,7 @@ class TestExamInstanceService:
         service,
         exam_instance_repository,
         student_exam_repository,
+        student_exam_summary_repository,
         mock_exam_instance,
         mock_user,
         user_repository,
@@ -332,7 +392,7 @@ class TestExamInstanceService:
             assigned_students=[{"student_id": "student123"}],
         )
 
-        user_repository.get_by_id.return_value = mock_user
+        user_repository.get_existing_ids.return_value = {"student123"}
 
         # Execute - Use pytz timezone object
         await service.update_exam_instance(
@@ -341,10 +401,13 @@ class TestExamInstanceService:
 
         # Assert
         exam_instance_repository.get_by_id.assert_called_once_with("instance123")
-        student_exam_repository.create.assert_called_once_with(
-            {"student_id": "student123", "exam_instance_id": "instance123"}
+        student_exam_repository.create_many.assert_called_once_with(
+            "instance123", ["student123"]
         )
         exam_instance_repository.update.assert_called_once()
+        student_exam_summary_repository.sync_exam_instance.assert_called_once_with(
+            "instance123"
+        )
 
     @pytest.mark.asyncio
     async def test_update_exam_instance_add_and_remove_students(
@@ -353,6 +416,7 @@ class TestExamInstanceService:
         exam_instance_repository,
         student_exam_repository,
         user_repository,
+        notification_job_repository,
         mock_exam_instance,
         mock_user,
     ):
@@ -365,29 +429,35 @@ class TestExamInstanceService:
         mock_exam_instance.assigned_students = [mock_student]
 
         exam_instance_repository.get_by_id.return_value = mock_exam_instance
-        user_repository.get_by_id.return_value = mock_user
+        user_repository.get_existing_ids.return_value = {"newstudent"}
 
-        # Mock student exam for removal
-        mock_student_exam = MagicMock()
-        mock_student_exam.id = "student_exam_id"
-        student_exam_repository.get_by_student_and_exam.return_value = mock_student_exam
+        # Student exam for removal
+        student_exam_repository.get_ids_by_exam.return_value = {
+            "existingstudent": "student_exam_id"
+        }
+        notification_job_repository.pop_task_ids.return_value = []
 
         update_data = UpdateExamInstanceSchema(
             assigned_students=[{"student_id": "newstudent"}]  # Replace with new student
         )
 
         # Execute - Use pytz timezone object
-        await service.update_exam_instance(
-            "teacher123", "instance123", update_data, pytz.UTC
-        )
+        with patch(
+            "app.exam.teacher.services.exam_instance_service.reminder_scheduler",
+            new_callable=AsyncMock,
+        ) as mock_scheduler:
+            await service.update_exam_instance(
+                "teacher123", "instance123", update_data, pytz.UTC
+            )
 
         # Assert
-        student_exam_repository.get_by_student_and_exam.assert_called_once_with(
-            "existingstudent", "instance123"
+        student_exam_repository.get_ids_by_exam.assert_called_once_with(
+            "instance123", ["existingstudent"]
         )
-        student_exam_repository.delete.assert_called_once_with("student_exam_id")
-        student_exam_repository.create.assert_called_once_with(
-            {"student_id": "newstudent", "exam_instance_id": "instance123"}
+        student_exam_repository.delete_many.assert_called_once_with(["student_exam_id"])
+        mock_scheduler.cancel.assert_awaited_once()
+        student_exam_repository.create_many.assert_called_once_with(
+            "instance123", ["newstudent"]
         )
 
     @pytest.mark.asyncio
@@ -397,6 +467,7 @@ class TestExamInstanceService:
         exam_instance_repository,
         student_exam_repository,
         user_repository,
+        notification_job_repository,
         mock_exam_instance,
         mock_user,
     ):
@@ -409,21 +480,31 @@ class TestExamInstanceService:
         mock_exam_instance.assigned_students = [mock_student]
 
         exam_instance_repository.get_by_id.return_value = mock_exam_instance
-        user_repository.get_by_id.return_value = mock_user
-
-        mock_student_exam = MagicMock()
-        mock_student_exam.id = "student_exam_id"
-        student_exam_repository.get_by_student_and_exam.return_value = mock_student_exam
+        student_exam_repository.get_ids_by_exam.return_value = {
+            "student123": "student_exam_id"
+        }
+        notification_job_repository.pop_task_ids.return_value = ["task1", "task2"]
 
         # Execute
-        await service.delete_exam_instance("teacher123", "instance123")
+        with patch(
+            "app.exam.teacher.services.exam_instance_service.celery"
+        ) as mock_celery, patch(
+            "app.exam.teacher.services.exam_instance_service.reminder_scheduler"
+        ) as mock_scheduler:
+            mock_scheduler.cancel_group = AsyncMock()
+            await service.delete_exam_instance("teacher123", "instance123")
 
         # Assert
         exam_instance_repository.get_by_id.assert_called_once_with("instance123")
-        student_exam_repository.get_by_student_and_exam.assert_called_once_with(
-            "student123", "instance123"
+        notification_job_repository.pop_task_ids.assert_called_once_with(
+            {"student123": "student_exam_id"}
         )
-        student_exam_repository.delete.assert_called_once_with("student_exam_id")
+        mock_celery.control.revoke.assert_called_once_with(
+            ["task1", "task2"], terminate=True
+        )
+        mock_scheduler.cancel_group.assert_awaited_once_with("instance123")
+        # The student exams are deleted in bulk by the exam instance hook
+        student_exam_repository.delete.assert_not_called()
         exam_instance_repository.delete.assert_called_once_with("instance123")
 
     @pytest.mark.asyncio
@@ -452,20 +533,20 @@ class TestExamInstanceService:
         """Test validation of student existence - success case"""
         # Setup
         students = [{"student_id": "student123"}]
-        user_repository.get_by_id.return_value = mock_user
+        user_repository.get_existing_ids.return_value = {"student123"}
 
         # Execute - should not raise exception
         await service._validate_students_exist(students)
 
-        # Assert
-        user_repository.get_by_id.assert_called_once_with("student123")
+        # Assert: a single query for all students
+        user_repository.get_existing_ids.assert_called_once_with(["student123"])
 
     @pytest.mark.asyncio
     async def test_validate_students_exist_not_found(self, service, user_repository):
         """Test validation of student existence - student not found"""
         # Setup
         students = [{"student_id": "nonexistent"}]
-        user_repository.get_by_id.return_value = None
+        user_repository.get_existing_ids.return_value = set()
 
         # Execute & Assert
         with pytest.raises(
@@ -473,11 +554,43 @@ class TestExamInstanceService:
         ):
             await service._validate_students_exist(students)
 
+    @pytest.mark.asyncio
+    async def test_assign_concurrently(
+        self, service, exam_instance_repository, mock_exam_instance
+    ):
+        """Students assigned meanwhile by another request are not added again"""
+        # Setup: student1 was assigned since the instance was read
+        async def add_assigned_students(instance_id, student_ids):
+            if "student1" not in student_ids:
+                return True
+            mock_exam_instance.assigned_students = [MagicMock(student_id="student1")]
+            return False
+
+        exam_instance_repository.add_assigned_students.side_effect = (
+            add_assigned_students
+        )
+        exam_instance_repository.get_by_id.return_value = mock_exam_instance
+        service._add_students_to_exam = AsyncMock()
+
+        # Execute
+        result = await service._assign(
+            mock_exam_instance, ["student1", "student2", "student1"], []
+        )
+
+        # Assert: student exams are only created for the students added
+        assert exam_instance_repository.add_assigned_students.call_args_list == [
+            call("instance123", ["student1", "student2"]),
+            call("instance123", ["student2"]),
+        ]
+        students = service._add_students_to_exam.call_args.args[0]
+        assert students == [{"student_id": "student2"}]
+        assert (result.assigned, result.already_assigned) == (1, 1)
+
     @pytest.mark.asyncio
     async def test_send_notification(self, service, user_repository, mock_user):
         """Test sending notifications to students"""
         # Setup
-        user_repository.get_by_id.return_value = mock_user
+        user_repository.get_by_ids_or_emails.return_value = [mock_user]
         users = [{"student_id": "user123"}]
         reminders = ["24h", "1h", "30m"]
         exam_title = "Test Exam"
@@ -488,19 +601,32 @@ class TestExamInstanceService:
 
         with patch(
             "app.exam.teacher.services.exam_instance_service.exam_reminder_notification"
-        ) as mock_task:
-            mock_task.apply_async.return_value.id = "task123"
+        ) as mock_task, patch(
+            "app.exam.teacher.services.exam_instance_service.reminder_scheduler"
+        ) as mock_scheduler:
+            mock_scheduler.schedule = AsyncMock()
 
             # Execute
             await service._send_notification(
-                users, reminders, exam_title, start_time, end_time, student_exam_ids
+                users,
+                reminders,
+                exam_title,
+                start_time,
+                end_time,
+                student_exam_ids,
+                "exam123",
             )
 
             # Assert
-            user_repository.get_by_id.assert_called_once_with("user123")
-            # Instead of hardcoding expected count, verify actual behavior
-            assert mock_task.apply_async.call_count > 0
-            assert "instance123" in mock_user.notifications_tasks_id
-            # Check that the lists are equal without assuming length
-            assert mock_user.notifications_tasks_id["instance123"] == ["task123"] * len(mock_user.notifications_tasks_id["instance123"])
-            user_repository.save.assert_called_once_with(mock_user)
\ No newline at end of file
+            user_repository.get_by_ids_or_emails.assert_called_once()
+            # Sent at once, the reminders are scheduled for later
+            mock_task.apply_async.assert_called_once()
+            group, scheduled = mock_scheduler.schedule.await_args.args
+            assert group == "exam123"
+            # The 24h reminder would already be due
+            assert [task.fire_at for task in scheduled] == [
+                start_time - timedelta(hours=1),
+                start_time - timedelta(minutes=30),
+            ]
+            assert {task.tag for task in scheduled} == {"instance123"}
+            user_repository.save.assert_not_called()
\ No newline at end of file
@@ -0,0 +1,127 @@
+import pytest
+import pytz
+from datetime import datetime
+from unittest.mock import AsyncMock, MagicMock
+
+from app.core.exceptions import NotFoundError
+from app.exam.repository import (
+    ExamInstanceRepository,
+    StudentAttemptRepository,
+    StudentExamRepository,
+    StudentResponseRepository,
+)
+from app.exam.teacher.schemas import ExamReportFilter, ExamStatistics
+from app.exam.teacher.services import ReportService
+
+
+class TestReportService:
+    """Test suite for the exam report of ReportService"""
+
+    @pytest.fixture
+    def exam_instance_repository(self):
+        """Mock exam instance repository"""
+        return AsyncMock(spec=ExamInstanceRepository)
+
+    @pytest.fixture
+    def student_exam_repository(self):
+        """Mock student exam repository"""
+        return AsyncMock(spec=StudentExamRepository)
+
+    @pytest.fixture
+    def service(self, exam_instance_repository, student_exam_repository):
+        """Initialize service with mock repositories"""
+        return ReportService(
+            student_exam_repository,
+            AsyncMock(spec=StudentAttemptRepository),
+            exam_instance_repository,
+            AsyncMock(spec=StudentResponseRepository),
+        )
+
+    @pytest.fixture
+    def mock_exam_instance(self, exam_instance_repository):
+        """Create a mock exam instance"""
+        mock = MagicMock()
+        mock.id = "instance123"
+        mock.title = "Test Exam"
+        mock.passing_score = 50
+        exam_instance_repository.get_by_id.return_value = mock
+        return mock
+
+    async def test_get_exam_report(
+        self, service, student_exam_repository, mock_exam_instance
+    ):
+        """The report is built from the aggregated statistics"""
+        student_exam_repository.get_report_stats.return_value = {
+            "summary": {
+                "attempts_count": 4,
+                "total_students": 3,
+                "mean": 61.25,
+                "median": 55.0,
+                "min": 30.0,
+                "max": 100.0,
+                "passed": 3,
+            },
+            "histogram": {30: 1, 50: 1, 60: 1, 90: 1},
+            "timeline": [("2025-04-20", 42.5), ("2025-04-21", 80.0)],
+        }
+        filters = ExamReportFilter(
+            start_date=datetime(2025, 4, 20, 8, 0),
+            student_ids=["student1", "student2"],
+            only_last_attempt=False,
+        )
+
+        report = await service.get_exam_report(
+            "instance123", filters, pytz.timezone("Asia/Tokyo")
+        )
+
+        student_exam_repository.get_report_stats.assert_awaited_once_with(
+            "instance123",
+            50,
+            start_date=datetime(2025, 4, 19, 23, 0, tzinfo=pytz.utc),
+            end_date=None,
+            student_ids=["student1", "student2"],
+            only_last_attempt=False,
+        )
+        assert report.exam_title == "Test Exam"
+        assert (report.total_students, report.attempts_count) == (3, 4)
+        assert report.statistics == ExamStatistics(
+            mean=61.25, median=55.0, min=30.0, max=100.0
+        )
+        assert report.pass_rate == 75
+        assert [(point.range, point.count) for point in report.histogram_data] == [
+            ("0-9", 0),
+            ("10-19", 0),
+            ("20-29", 0),
+            ("30-39", 1),
+            ("40-49", 0),
+            ("50-59", 1),
+            ("60-69", 1),
+            ("70-79", 0),
+            ("80-89", 0),
+            ("90-100", 1),
+        ]
+        assert [
+            (point.date, point.average_score) for point in report.timeline_data
+        ] == [("2025-04-20", 42.5), ("2025-04-21", 80.0)]
+
+    async def test_get_exam_report_without_attempts(
+        self, service, student_exam_repository, mock_exam_instance
+    ):
+        student_exam_repository.get_report_stats.return_value = {
+            "summary": None,
+            "histogram": {},
+            "timeline": [],
+        }
+
+        report = await service.get_exam_report("instance123", ExamReportFilter())
+
+        assert (report.total_students, report.attempts_count) == (0, 0)
+        assert report.statistics == ExamStatistics()
+        assert report.histogram_data == []
+        assert report.timeline_data == []
+
+    async def test_get_exam_report_not_found(self, service, exam_instance_repository):
+        exam_instance_repository.get_by_id.return_value = None
+
+        with pytest.raises(NotFoundError):
+            await service.get_exam_report("missing", ExamReportFilter())
@@ -0,0 +1,244 @@
+from datetime import datetime, timedelta, timezone
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from bson import DBRef
+
+from app.auth.models import User, UserRole
+from app.exam import cascade
+from app.exam.cascade import cascade_delete_user
+from app.exam.models import (
+    Collection,
+    ExamInstance,
+    NotificationJob,
+    Question,
+    QuestionType,
+    StudentAttempt,
+    StudentExam,
+    StudentExamSummary,
+    StudentResponse,
+)
+
+
+async def make_user(fake, role: UserRole) -> User:
+    user = User(
+        email=fake.email(),
+        hashed_password="hashed",
+        first_name="Test",
+        last_name="User",
+        role=role,
+    )
+    await user.insert()
+    return user
+
+
+async def make_exam(teacher: User, students: list) -> ExamInstance:
+    """Exam instance of a collection of one question, taken by `students`"""
+    question = Question(
+        question_text="2 + 2?", type=QuestionType.SHORTANSWER, created_by=teacher
+    )
+    await question.insert()
+    collection = Collection(title="Algebra", created_by=teacher, questions=[question])
+    await collection.insert()
+    instance = ExamInstance(
+        collection_id=collection,
+        title="Midterm",
+        created_by=teacher,
+        start_date=datetime.now(timezone.utc),
+        end_date=datetime.now(timezone.utc) + timedelta(hours=2),
+        assigned_students=[{"student_id": s.id} for s in students],
+    )
+    await instance.insert()
+
+    for student in students:
+        student_exam = StudentExam(exam_instance_id=instance, student_id=student)
+        await student_exam.insert()
+        await StudentExamSummary.get_motor_collection().insert_one(
+            {"_id": student_exam.id, "student_id": student.id}
+        )
+        attempt = StudentAttempt(student_exam_id=student_exam)
+        await attempt.insert()
+        await StudentResponse(attempt_id=attempt, question_id=question).insert()
+    return instance
+
+
+@pytest.fixture
+def db():
+    return User.get_motor_collection().database
+
+
+@pytest.fixture(autouse=True)
+def mock_scheduler():
+    with patch.object(cascade, "reminder_scheduler", AsyncMock()) as scheduler:
+        yield scheduler
+
+
+class TestCascadeDeleteUser:
+    """Tests for the bulk deletion of the exam data of a deleted user"""
+
+    async def test_delete_teacher(self, fake, db):
+        """A teacher's exams go with every student exam taken on them"""
+        teacher = await make_user(fake, UserRole.TEACHER)
+        other_teacher = await make_user(fake, UserRole.TEACHER)
+        student = await make_user(fake, UserRole.STUDENT)
+        await make_exam(teacher, [student])
+        kept = await make_exam(other_teacher, [student])
+
+        deleted = await cascade_delete_user(db, teacher.id, teacher.role)
+
+        assert deleted == {
+            "student_responses": 1,
+            "student_attempts": 1,
+            "student_exam_summaries": 1,
+            "notification_jobs": 0,
+            "student_exams": 1,
+            "exam_instances": 1,
+            "collections": 1,
+            "questions": 1,
+        }
+        assert await ExamInstance.distinct("_id") == [kept.id]
+        assert await Collection.count() == 1
+        assert await Question.count() == 1
+        assert await StudentExam.count() == 1
+        assert await StudentAttempt.count() == 1
+        assert await StudentResponse.count() == 1
+        assert await StudentExamSummary.get_motor_collection().count_documents({}) == 1
+
+    async def test_delete_student(self, fake, db):
+        """A student's exams and assignments go, the exam instances stay"""
+        teacher = await make_user(fake, UserRole.TEACHER)
+        student = await make_user(fake, UserRole.STUDENT)
+        other_student = await make_user(fake, UserRole.STUDENT)
+        instance = await make_exam(teacher, [student, other_student])
+
+        deleted = await cascade_delete_user(db, student.id, student.role)
+
+        assert deleted["student_exams"] == 1
+        assert deleted["student_responses"] == 1
+        assert "exam_instances" not in deleted
+        instance = await ExamInstance.get_motor_collection().find_one(
+            {"_id": instance.id}
+        )
+        assert [a["student_id"].id for a in instance["assigned_students"]] == [
+            other_student.id
+        ]
+        assert await StudentExam.count() == 1
+        assert await StudentAttempt.count() == 1
+        assert await Question.count() == 1
+
+    async def test_shared_questions(self, fake, db):
+        """Questions of the user stay in the collections of others"""
+        teacher = await make_user(fake, UserRole.TEACHER)
+        other_teacher = await make_user(fake, UserRole.TEACHER)
+        question = Question(
+            question_text="Capital of France?",
+            type=QuestionType.SHORTANSWER,
+            created_by=teacher,
+        )
+        await question.insert()
+        collection = Collection(
+            title="Geography", created_by=other_teacher, questions=[question]
+        )
+        await collection.insert()
+
+        await cascade_delete_user(db, teacher.id, teacher.role)
+
+        collection = await Collection.get(collection.id)
+        assert [link.ref.id for link in collection.questions] == [question.id]
+        assert await Question.count() == 1
+
+    async def test_forked_questions(self, fake, db):
+        """Forks and their sources keep the questions they share"""
+        author = await make_user(fake, UserRole.TEACHER)
+        forker = await make_user(fake, UserRole.TEACHER)
+        question = Question(
+            question_text="Capital of France?",
+            type=QuestionType.SHORTANSWER,
+            created_by=author,
+        )
+        await question.insert()
+        source = Collection(title="Geography", created_by=author, questions=[question])
+        await source.insert()
+        for _ in range(2):
+            fork = Collection(
+                title="Geography",
+                created_by=forker,
+                questions=[question],
+                forked_from=source.id,
+            )
+            await fork.insert()
+
+        await cascade_delete_user(db, forker.id, forker.role)
+
+        assert await Question.count() == 1
+        assert await Collection.distinct("_id") == [source.id]
+
+        fork = Collection(title="Geography", created_by=forker, questions=[question])
+        await fork.insert()
+        await cascade_delete_user(db, author.id, author.role)
+
+        assert await Collection.distinct("_id") == [fork.id]
+        fork = await Collection.get(fork.id)
+        assert [link.ref.id for link in fork.questions] == [question.id]
+        assert await Question.count() == 1
+
+    async def test_cancel_reminders(self, fake, db, mock_scheduler):
+        """The reminders of deleted exams and student exams are cancelled"""
+        teacher = await make_user(fake, UserRole.TEACHER)
+        admin = await make_user(fake, UserRole.ADMIN)
+        student = await make_user(fake, UserRole.STUDENT)
+        own = await make_exam(admin, [student])
+        taken = await make_exam(teacher, [admin, student])
+        student_exam = await StudentExam.get_motor_collection().find_one(
+            {"student_id": DBRef(User.Settings.name, admin.id)}
+        )
+
+        await cascade_delete_user(db, admin.id, admin.role)
+
+        mock_scheduler.cancel_group.assert_awaited_once_with(own.id)
+        mock_scheduler.cancel.assert_awaited_once_with(taken.id, [student_exam["_id"]])
+
+    async def test_progress(self, fake, db):
+        """Progress is reported per chunk, up to the total of documents"""
+        teacher = await make_user(fake, UserRole.TEACHER)
+        student = await make_user(fake, UserRole.STUDENT)
+        for _ in range(3):
+            await make_exam(teacher, [student])
+        on_progress = MagicMock()
+
+        with patch.object(cascade, "CHUNK_SIZE", 2):
+            await cascade_delete_user(db, teacher.id, teacher.role, on_progress)
+
+        steps = [call.args for call in on_progress.call_args_list]
+        assert steps[0] == ("collect", 0, 15)
+        assert steps[-1] == ("questions", 15, 15)
+        assert [step for step, _, _ in steps].count("student_attempts") == 2
+        assert await StudentResponse.count() == 0
+
+
+class TestDeleteExamInstance:
+    """Tests for the bulk deletion of the student exams of an exam instance"""
+
+    async def test_delete_instance(self, fake):
+        teacher = await make_user(fake, UserRole.TEACHER)
+        students = [await make_user(fake, UserRole.STUDENT) for _ in range(3)]
+        instance = await make_exam(teacher, students)
+        kept = await make_exam(teacher, students[:1])
+        for student_exam in await StudentExam.find_all().to_list():
+            await NotificationJob(
+                id=f"task-{student_exam.id}",
+                user_id=student_exam.student_id.ref.id,
+                student_exam_id=student_exam.id,
+            ).insert()
+
+        with patch.object(ExamInstance, "save") as mock_save:
+            await instance.delete()
+
+        # The instance is not rewritten for each of its student exams
+        mock_save.assert_not_called()
+        assert await ExamInstance.distinct("_id") == [kept.id]
+        assert await StudentExam.count() == 1
+        assert await StudentAttempt.count() == 1
+        assert await StudentResponse.count() == 1
+        assert await StudentExamSummary.get_motor_collection().count_documents({}) == 1
+        assert await NotificationJob.count() == 1
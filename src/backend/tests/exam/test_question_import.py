@@ -0,0 +1,232 @@
+from unittest.mock import patch
+
+import pytest
+from pymongo.errors import PyMongoError
+
+from app.auth.models import User, UserRole
+from app.exam import question_import
+from app.exam.models import (
+    Collection,
+    ImportFormat,
+    ImportStatus,
+    Question,
+    QuestionImport,
+    QuestionType,
+)
+from app.exam.question_import import import_questions, parse_questions
+
+
+async def stream(*chunks: bytes):
+    for chunk in chunks:
+        yield chunk
+
+
+async def parse(format: ImportFormat, text: str):
+    return [row async for row in parse_questions(format, stream(text.encode()))]
+
+
+class TestParseQuestions:
+    """Tests for reading the questions of a question bank file"""
+
+    async def test_csv(self):
+        rows = await parse(
+            ImportFormat.CSV,
+            "question_text,type,options,weight\n"
+            '"Capital of France,\nin Europe?",MCQ,*Paris | London|*Lutetia,2\n'
+            "\n"
+            "2 + 2?,shortanswer,,\n"
+            "a,b,c,d,e\n",
+        )
+
+        assert rows[0].row == 2
+        assert rows[0].data == {
+            "question_text": "Capital of France,\nin Europe?",
+            "type": "mcq",
+            "weight": "2",
+            "options": [
+                {"text": "Paris", "is_correct": True},
+                {"text": "London", "is_correct": False},
+                {"text": "Lutetia", "is_correct": True},
+            ],
+        }
+        assert rows[1].row == 5
+        assert rows[1].data == {"question_text": "2 + 2?", "type": "shortanswer"}
+        assert rows[2].error is not None
+
+    async def test_json(self):
+        rows = await parse(
+            ImportFormat.JSON,
+            '{"question_text": "2 + 2?", "type": "shortanswer"}\n[1]\n',
+        )
+
+        assert rows[0].data["question_text"] == "2 + 2?"
+        assert (rows[1].row, rows[1].data) == (2, None)
+
+    async def test_gift(self):
+        rows = await parse(
+            ImportFormat.GIFT,
+            "// Geography\n"
+            "$CATEGORY: europe\n"
+            "::Capital:: [html]What is the capital\n"
+            "of France? {=Paris ~London#No ~Berlin}\n"
+            "\n"
+            "Paris is in France. {T}\n"
+            "\n"
+            "Which are cities? {~%50%Paris ~%50%Lyon ~%-100%Loire}\n"
+            "\n"
+            "2 + 2 \\= {=four =4}\n"
+            "\n"
+            "The {=Seine} flows through Paris.\n"
+            "\n"
+            "Write an essay. {}\n",
+        )
+
+        assert rows[0].row == 3
+        assert rows[0].data == {
+            "question_text": "What is the capital\nof France?",
+            "type": "singlechoice",
+            "options": [
+                {"text": "Paris", "is_correct": True},
+                {"text": "London", "is_correct": False},
+                {"text": "Berlin", "is_correct": False},
+            ],
+        }
+        assert rows[1].data["options"] == [
+            {"text": "True", "is_correct": True},
+            {"text": "False", "is_correct": False},
+        ]
+        assert rows[2].data["type"] == "mcq"
+        assert [option["is_correct"] for option in rows[2].data["options"]] == [
+            True,
+            True,
+            False,
+        ]
+        assert rows[3].data == {
+            "question_text": "2 + 2 =",
+            "type": "shortanswer",
+            "correct_input_answer": "four",
+        }
+        assert rows[4].data["question_text"] == "The _____ flows through Paris."
+        assert rows[5].error == "Essay questions are not supported"
+
+
+class TestImportQuestions:
+    """Tests for importing a question bank file into a collection"""
+
+    @pytest.fixture
+    async def collection(self, fake):
+        teacher = User(
+            email=fake.email(), hashed_password="hashed", role=UserRole.TEACHER
+        )
+        await teacher.insert()
+        question = Question(
+            question_text="Existing",
+            type=QuestionType.SHORTANSWER,
+            created_by=teacher,
+            position=4,
+        )
+        await question.insert()
+        collection = Collection(
+            title="Algebra", created_by=teacher, questions=[question]
+        )
+        await collection.insert()
+        return collection
+
+    async def run(self, collection, format: ImportFormat, *chunks: bytes):
+        job = QuestionImport(
+            collection_id=collection.id,
+            created_by=collection.created_by.id,
+            format=format,
+        )
+        await job.insert()
+        db = QuestionImport.get_motor_collection().database
+        raw_job = await db[QuestionImport.Settings.name].find_one({"_id": job.id})
+        await import_questions(db, raw_job, stream(*chunks))
+        return await QuestionImport.get(job.id)
+
+    async def test_import_in_batches(self, collection):
+        """Valid rows are imported after the existing questions, others reported"""
+        body = (
+            "question_text,type,options,correct_input_answer\n"
+            "One?,shortanswer,,1\n"
+            "Two?,singlechoice,*a|*b,\n"
+            "Three?,singlechoice,a|*b,\n"
+            "Four?,essay,,\n"
+            "Five?,mcq,*a|b|*c,\n"
+        )
+
+        with patch.object(question_import, "BATCH_SIZE", 2):
+            job = await self.run(collection, ImportFormat.CSV, body.encode())
+
+        assert job.status == ImportStatus.COMPLETED
+        assert (job.rows, job.imported, job.failed) == (5, 3, 2)
+        assert [error.row for error in job.errors] == [3, 5]
+        assert "exactly one correct answer" in job.errors[0].error
+        assert job.errors[1].error.startswith("type:")
+
+        collection = await Collection.get(collection.id)
+        questions = [await Question.get(link.ref.id) for link in collection.questions]
+        assert [
+            (question.question_text, question.position) for question in questions
+        ] == [
+            ("Existing", 4),
+            ("One?", 5),
+            ("Three?", 6),
+            ("Five?", 7),
+        ]
+        imported = questions[3]
+        assert imported.type == QuestionType.MCQ
+        assert imported.created_by.ref.id == collection.created_by.ref.id
+        assert [option.is_correct for option in imported.options] == [
+            True,
+            False,
+            True,
+        ]
+
+    async def test_reported_errors_are_capped(self, collection):
+        body = "".join('{"question_text": "?"}\n' for _ in range(5))
+
+        with patch.object(question_import, "MAX_REPORTED_ERRORS", 3):
+            job = await self.run(collection, ImportFormat.JSON, body.encode())
+
+        assert (job.rows, job.failed) == (5, 5)
+        assert len(job.errors) == 3
+
+    async def test_unreadable_file(self, collection):
+        """Rows read before the file turns out invalid are imported"""
+        job = await self.run(
+            collection,
+            ImportFormat.JSON,
+            b'[{"question_text": "2 + 2?", "type": "shortanswer",',
+            b' "correct_input_answer": "4"}, {"question',
+        )
+
+        assert job.status == ImportStatus.FAILED
+        assert job.error == "Invalid JSON at value 2"
+        assert job.imported == 1
+        assert await Question.count() == 2
+
+    async def test_oversized_csv_field(self, collection):
+        """A value over the CSV field limit makes the file unreadable"""
+        body = (
+            "question_text,type,correct_input_answer\n"
+            "One?,shortanswer,1\n" + "x" * 200_000 + ",mcq,\n"
+        )
+
+        job = await self.run(collection, ImportFormat.CSV, body.encode())
+
+        assert job.status == ImportStatus.FAILED
+        assert job.error.startswith("Invalid CSV at line 3:")
+        assert job.imported == 1
+
+    async def test_unexpected_error(self, collection):
+        """The job fails rather than staying running when the import breaks"""
+        body = "question_text,type,correct_input_answer\nOne?,shortanswer,1\n"
+
+        with patch.object(
+            question_import._Import, "flush", side_effect=PyMongoError("down")
+        ):
+            job = await self.run(collection, ImportFormat.CSV, body.encode())
+
+        assert job.status == ImportStatus.FAILED
+        assert job.error == "The import failed unexpectedly"
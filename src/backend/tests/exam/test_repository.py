@@ -0,0 +1,373 @@
+from datetime import datetime, timedelta, timezone
+
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from app.auth.models import User, UserRole
+from app.exam.models import (
+    Collection,
+    ExamInstance,
+    ExamStatus,
+    NotificationJob,
+    Question,
+    QuestionType,
+    StudentAttempt,
+    StudentExam,
+    StudentExamStatus,
+    StudentExamSummary,
+)
+from app.exam.repository import (
+    MIGRATIONS,
+    CollectionRepository,
+    ExamInstanceRepository,
+    NotificationJobRepository,
+    StudentAttemptRepository,
+    StudentExamRepository,
+    StudentExamSummaryRepository,
+    _median,
+)
+
+
+class TestCollectionRepository:
+    async def test_search_published(self, fake):
+        """Without text, published collections linking a question are found"""
+        teacher = User(
+            email=fake.email(), hashed_password="hashed", role=UserRole.TEACHER
+        )
+        await teacher.insert()
+        questions = [
+            Question(
+                question_text=f"Question {i}",
+                type=QuestionType.SHORTANSWER,
+                created_by=teacher,
+            )
+            for i in range(3)
+        ]
+        for question in questions:
+            await question.insert()
+        published = Collection(
+            title="Algebra",
+            created_by=teacher,
+            status=ExamStatus.PUBLISHED,
+            questions=questions[:2],
+        )
+        await published.insert()
+        await Collection(
+            title="Draft", created_by=teacher, questions=questions[1:]
+        ).insert()
+        await Collection(
+            title="Other",
+            created_by="other",
+            status=ExamStatus.PUBLISHED,
+            questions=questions[1:],
+        ).insert()
+        repository = CollectionRepository(Collection)
+
+        found = await repository.search_published(
+            None, [questions[1].id, "unknown"], owner_id=teacher.id
+        )
+
+        assert [collection["_id"] for collection in found] == [published.id]
+        assert found[0]["question_count"] == 2
+        assert found[0]["score"] == 0
+        assert [ref.id for ref in found[0]["matched_questions"]] == [questions[1].id]
+        assert await repository.search_published(None, []) == []
+
+
+class TestStudentExamSummaryRepository:
+    """Tests for the student dashboard read model repository"""
+
+    @pytest.fixture
+    def repository(self):
+        return StudentExamSummaryRepository(StudentExamSummary)
+
+    @pytest.fixture
+    async def exam_instance(self, fake):
+        teacher = User(
+            email=fake.email(),
+            hashed_password="hashed",
+            first_name="Ada",
+            last_name="Lovelace",
+            role=UserRole.TEACHER,
+        )
+        await teacher.insert()
+        collection = Collection(title="Algebra", created_by=teacher)
+        await collection.insert()
+        instance = ExamInstance(
+            collection_id=collection,
+            title="Midterm",
+            created_by=teacher,
+            start_date=datetime.now(timezone.utc),
+            end_date=datetime.now(timezone.utc) + timedelta(hours=2),
+        )
+        await instance.insert()
+        return instance
+
+    async def test_create_for_student_exams(self, repository, exam_instance):
+        """Summaries embed the exam instance and its creator"""
+        await repository.create_for_student_exams(
+            exam_instance.id, {"student1": "se1", "student2": "se2"}
+        )
+
+        summaries = await repository.get_by_student("student1")
+
+        assert len(summaries) == 1
+        assert summaries[0].id == "se1"
+        assert summaries[0].exam_instance_id.title == "Midterm"
+        assert summaries[0].exam_instance_id.created_by.first_name == "Ada"
+        assert summaries[0].current_status == StudentExamStatus.NOT_STARTED
+
+    async def test_sync_exam_instance(self, repository, exam_instance):
+        """Editing an exam instance refreshes every copy of it"""
+        await repository.create_for_student_exams(
+            exam_instance.id, {"student1": "se1", "student2": "se2"}
+        )
+        exam_instance.title = "Final"
+        await exam_instance.save()
+
+        await repository.sync_exam_instance(exam_instance.id)
+
+        summaries = await StudentExamSummary.find_all().to_list()
+        assert {s.exam_instance_id.title for s in summaries} == {"Final"}
+
+    async def test_update_progress(self, repository, exam_instance):
+        """Progress updates only touch the targeted summary"""
+        await repository.create_for_student_exams(
+            exam_instance.id, {"student1": "se1", "student2": "se2"}
+        )
+
+        await repository.update_progress(
+            "se1",
+            {"current_status": StudentExamStatus.IN_PROGRESS, "attempts_count": 1},
+        )
+
+        updated = await StudentExamSummary.get("se1")
+        untouched = await StudentExamSummary.get("se2")
+        assert updated.current_status == StudentExamStatus.IN_PROGRESS
+        assert updated.attempts_count == 1
+        assert untouched.current_status == StudentExamStatus.NOT_STARTED
+
+    async def test_backfill_missing(self, repository, exam_instance):
+        """Student exams without a summary get one, existing ones are kept"""
+        first = StudentExam(student_id="student1", exam_instance_id=exam_instance)
+        second = StudentExam(student_id="student2", exam_instance_id=exam_instance)
+        await first.insert()
+        await second.insert()
+        await repository.create_for_student_exams(
+            exam_instance.id, {"student1": first.id}
+        )
+
+        created = await repository.backfill_missing()
+
+        assert created == 1
+        assert await StudentExamSummary.get(second.id) is not None
+        # Student exams are no longer scanned once the backfill completed
+        await StudentExam(
+            student_id="student3", exam_instance_id=exam_instance
+        ).insert()
+        assert await repository.backfill_missing() == 0
+
+    async def test_backfill_missing_once_at_a_time(self, repository, exam_instance):
+        """Workers starting together leave the backfill to the first one"""
+        await StudentExam(
+            student_id="student1", exam_instance_id=exam_instance
+        ).insert()
+        migrations = StudentExamSummary.get_motor_collection().database[MIGRATIONS]
+        started_at = datetime.now(timezone.utc)
+        await migrations.insert_one(
+            {"_id": "student_exam_summaries", "started_at": started_at}
+        )
+
+        assert await repository.backfill_missing() == 0
+
+        # Taken over when the worker running it was lost
+        await migrations.update_one(
+            {"_id": "student_exam_summaries"},
+            {"$set": {"started_at": started_at - timedelta(hours=2)}},
+        )
+        assert await repository.backfill_missing() == 1
+
+    async def test_backfill_missing_concurrent_assignment(
+        self, repository, exam_instance
+    ):
+        """Summaries created during the scan are kept, not a startup failure"""
+        student_exam = StudentExam(
+            student_id="student1", exam_instance_id=exam_instance
+        )
+        await student_exam.insert()
+        await repository.create_for_student_exams(
+            exam_instance.id, {"student1": student_exam.id}
+        )
+
+        # The summary is created after the existing ones were read
+        with patch.object(StudentExamSummary, "distinct", AsyncMock(return_value=[])):
+            assert await repository.backfill_missing() == 0
+
+        assert await StudentExamSummary.count() == 1
+
+
+class TestExamInstanceRepository:
+    async def test_add_assigned_students(self, fake):
+        teacher = User(
+            email=fake.email(), hashed_password="hashed", role=UserRole.TEACHER
+        )
+        await teacher.insert()
+        collection = Collection(title="Algebra", created_by=teacher)
+        await collection.insert()
+        instance = ExamInstance(
+            collection_id=collection,
+            title="Midterm",
+            created_by=teacher,
+            start_date=datetime.now(timezone.utc),
+            end_date=datetime.now(timezone.utc) + timedelta(hours=2),
+        )
+        await instance.insert()
+        repository = ExamInstanceRepository(ExamInstance)
+
+        assert await repository.add_assigned_students(instance.id, ["s1", "s2"])
+        # One of them is already assigned, so none is
+        assert not await repository.add_assigned_students(instance.id, ["s3", "s2"])
+
+        instance = await ExamInstance.get(instance.id)
+        assert [
+            student.student_id.ref.id for student in instance.assigned_students
+        ] == [
+            "s1",
+            "s2",
+        ]
+
+
+class TestStudentAttemptRepository:
+    async def test_response_versions(self):
+        student_exam = StudentExam(student_id="student1", exam_instance_id="exam1")
+        await student_exam.insert()
+        repository = StudentAttemptRepository(StudentAttempt)
+        attempt = await repository.create_exam_attempt(student_exam, [])
+
+        first = await repository.bump_response_version(attempt.id)
+        second = await repository.bump_response_version(attempt.id)
+        await repository.release_response_version(attempt.id, second)
+
+        # Version 2 is written, but not version 1 yet
+        attempt = await StudentAttempt.get(attempt.id)
+        assert (first, second) == (1, 2)
+        assert attempt.pending_versions == [1]
+        assert attempt.written_response_version == 0
+
+        await repository.release_response_version(attempt.id, first)
+        attempt = await StudentAttempt.get(attempt.id)
+        assert attempt.written_response_version == 2
+
+
+class TestStudentExamRepository:
+    async def test_get_ids_by_exam(self):
+        await StudentExam(student_id="student1", exam_instance_id="exam1").insert()
+        second = StudentExam(student_id="student2", exam_instance_id="exam1")
+        await second.insert()
+        await StudentExam(student_id="student2", exam_instance_id="exam2").insert()
+        repository = StudentExamRepository(StudentExam)
+
+        assert len(await repository.get_ids_by_exam("exam1")) == 2
+        assert await repository.get_ids_by_exam("exam1", ["student2"]) == {
+            "student2": second.id
+        }
+
+    async def test_count_by_exam(self):
+        statuses = [
+            StudentExamStatus.NOT_STARTED,
+            StudentExamStatus.IN_PROGRESS,
+            StudentExamStatus.SUBMITTED,
+            StudentExamStatus.SUBMITTED,
+        ]
+        for i, status in enumerate(statuses):
+            await StudentExam(
+                student_id=f"student{i}",
+                exam_instance_id="exam1",
+                current_status=status,
+            ).insert()
+        await StudentExam(student_id="student0", exam_instance_id="exam2").insert()
+        await StudentExam(student_id="student0", exam_instance_id="exam3").insert()
+        repository = StudentExamRepository(StudentExam)
+
+        counts = await repository.count_by_exam(["exam1", "exam2", "exam4"])
+
+        assert counts == {
+            "exam1": {"assigned": 4, "in_progress": 1, "submitted": 2},
+            "exam2": {"assigned": 1, "in_progress": 0, "submitted": 0},
+        }
+        assert await repository.count_by_exam([]) == {}
+
+    async def test_median(self):
+        """The report median is exact, as statistics.median"""
+        collection = StudentExam.get_motor_collection()
+        await collection.insert_many(
+            [
+                {"_id": "odd", "grades": [30, 55.5, 90]},
+                {"_id": "even", "grades": [60, 80]},
+                {"_id": "single", "grades": [42]},
+            ]
+        )
+
+        cursor = collection.aggregate(
+            [{"$project": {"median": _median("$grades")}}, {"$sort": {"_id": 1}}]
+        )
+
+        assert [(doc["_id"], doc["median"]) async for doc in cursor] == [
+            ("even", 70),
+            ("odd", 55.5),
+            ("single", 42),
+        ]
+
+
+class TestNotificationJobRepository:
+    @pytest.fixture
+    def repository(self):
+        return NotificationJobRepository(NotificationJob)
+
+    async def test_pop_task_ids(self, repository):
+        """Pending jobs of the given student exams are returned, all are removed"""
+        now = datetime.now(timezone.utc)
+        for task_id, user_id, student_exam_id, fired_at in [
+            ("t1", "student", "exam1", None),
+            ("t2", "student", "exam1", now),
+            ("t3", "student", "exam2", None),
+            ("t4", "other", "exam3", None),
+        ]:
+            await NotificationJob(
+                id=task_id,
+                user_id=user_id,
+                student_exam_id=student_exam_id,
+                fired_at=fired_at,
+            ).insert()
+
+        task_ids = await repository.pop_task_ids({"student": "exam1", "other": "exam4"})
+
+        assert task_ids == ["t1"]
+        assert sorted(await NotificationJob.distinct("_id")) == ["t3", "t4"]
+
+    async def test_backfill_from_users(self, repository):
+        users = User.get_motor_collection()
+        await users.insert_many(
+            [
+                {
+                    "_id": "student",
+                    "email": "student@example.com",
+                    "notifications_tasks_id": {"exam1": ["t1", "t2"], "exam2": []},
+                },
+                {"_id": "other", "email": "other@example.com"},
+            ]
+        )
+
+        assert await repository.backfill_from_users() == 2
+        assert await repository.backfill_from_users() == 0
+
+        jobs = await NotificationJob.find().sort("_id").to_list()
+        assert [(job.id, job.user_id, job.student_exam_id) for job in jobs] == [
+            ("t1", "student", "exam1"),
+            ("t2", "student", "exam1"),
+        ]
+        assert (
+            await users.count_documents({"notifications_tasks_id": {"$exists": True}})
+            == 0
+        )
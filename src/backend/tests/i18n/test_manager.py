@@ -0,0 +1,83 @@
+from unittest.mock import patch
+
+from app.core.schemas import BaseReturn
+from app.i18n import LazyString, _, lazy_gettext, manager
+from app.i18n.manager import (CATALOGS, _resolve_translation, get_translation,
+                              logger, set_language)
+
+
+class TestTranslationRegistry:
+    """Tests for the preloaded translation catalogs"""
+
+    def test_catalogs_loaded_once(self):
+        """Every shipped language is loaded and resolved to the same catalog"""
+        assert {"pl", "uk_UA"} <= set(CATALOGS)
+        assert get_translation("pl") is CATALOGS["pl"]
+        assert get_translation("pl") is get_translation("pl")
+
+    def test_language_tag_resolution(self):
+        """Region and separator variants resolve to the shipped catalog"""
+        assert get_translation("uk") is CATALOGS["uk_UA"]
+        assert get_translation("uk-UA") is CATALOGS["uk_UA"]
+        assert get_translation("pl-PL") is CATALOGS["pl"]
+
+    def test_translate_current_language(self):
+        set_language("uk_UA")
+        assert _("Hello World") == "Привіт Світ"
+        set_language("en")
+        assert _("Hello World") == "Hello World"
+
+    def test_missing_catalog_reported_once(self):
+        """A language without catalog falls back to English and is logged once"""
+        _resolve_translation.cache_clear()
+        with patch.object(logger, "warning") as mock_warning:
+            assert get_translation("xx").gettext("Hello World") == "Hello World"
+            _resolve_translation.cache_clear()
+            get_translation("xx")
+
+        mock_warning.assert_called_once()
+
+    def test_reported_languages_bounded(self):
+        """Only well-formed tags are recorded, up to a maximum"""
+        _resolve_translation.cache_clear()
+        reported = set()
+        with patch.object(manager, "_reported_missing", reported), patch.object(
+            manager, "MAX_REPORTED_MISSING", 2
+        ), patch.object(logger, "warning") as mock_warning:
+            for lang in ["xx_yy", "xx-YY", "<script>", "zz" * 50, "ab", "cd"]:
+                assert get_translation(lang) is manager._NULL_TRANSLATION
+
+        assert reported == {"xx-YY", "ab"}
+        assert mock_warning.call_count == 2
+
+
+class TestLazyString:
+    """Tests for lazily translated strings"""
+
+    def test_resolved_when_used(self):
+        """The message is translated in the language active when it is used"""
+        message = lazy_gettext("Hello World")
+
+        set_language("pl")
+        assert str(message) == "Witaj Świecie"
+        set_language("en")
+        assert message == "Hello World"
+
+    def test_format(self):
+        message = lazy_gettext("User with email {email} already exists").format(
+            email="a@b.c"
+        )
+
+        assert isinstance(message, LazyString)
+        assert str(message) == "User with email a@b.c already exists"
+
+    def test_serialized_as_string(self):
+        """BaseReturn serializes lazy messages in the language of the response"""
+        payload = BaseReturn[None](message=lazy_gettext("Hello World"))
+
+        set_language("uk_UA")
+        assert payload.model_dump(mode="json") == {
+            "message": "Привіт Світ",
+            "data": None,
+        }
+        set_language("en")
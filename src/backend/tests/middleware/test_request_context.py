@@ -0,0 +1,67 @@
+import pytz
+from fastapi import FastAPI, Request
+from httpx import ASGITransport, AsyncClient
+
+from app.i18n.manager import get_language
+from app.middleware import (RequestContextMiddleware, get_request_id,
+                            get_request_timezone)
+
+app = FastAPI()
+app.add_middleware(RequestContextMiddleware)
+
+
+@app.get("/context")
+async def read_context(request: Request):
+    return {
+        "language": get_language(),
+        "timezone": str(request.state.timezone),
+        "timezone_name": request.state.timezone_name,
+        "context_timezone": str(get_request_timezone()),
+        "request_id": get_request_id(),
+    }
+
+
+async def get_context(headers=None):
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        return await client.get("/context", headers=headers)
+
+
+class TestRequestContextMiddleware:
+    """Tests for the pure ASGI request context middleware"""
+
+    async def test_defaults(self):
+        """Without headers the request gets UTC, English and a new request id"""
+        response = await get_context()
+
+        data = response.json()
+        assert data["language"] == "en"
+        assert data["timezone"] == "UTC"
+        assert data["context_timezone"] == "UTC"
+        assert data["request_id"] == response.headers["X-Request-ID"]
+        assert response.headers["Server-Timing"].startswith("app;dur=")
+
+    async def test_headers(self):
+        """Language, timezone and request id are taken from the request"""
+        response = await get_context(
+            {
+                "X-User-Language": "fr",
+                "X-Timezone": "Europe/Paris",
+                "X-Request-ID": "abc123",
+            }
+        )
+
+        data = response.json()
+        assert data["language"] == "fr"
+        assert data["timezone"] == "Europe/Paris"
+        assert data["timezone_name"] == "Europe/Paris"
+        assert response.headers["X-Request-ID"] == "abc123"
+
+    async def test_unknown_timezone(self):
+        """Unknown zones fall back to the default timezone"""
+        response = await get_context({"X-Timezone": "Mars/Olympus_Mons"})
+
+        data = response.json()
+        assert data["timezone"] == str(pytz.utc)
+        assert data["timezone_name"] == "UTC"
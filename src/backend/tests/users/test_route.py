@@ -0,0 +1,127 @@
+import jwt
+import pytest
+
+from app.auth.models import User
+from app.auth.schemas import UserRole
+from app.settings import settings
+
+
+class TestStudentLookup:
+    """Integration tests for the teacher student lookup endpoints"""
+
+    @pytest.fixture
+    async def teacher_user(self):
+        user = User(
+            email="teacher@example.com",
+            hashed_password="hash",
+            first_name="Alan",
+            last_name="Turing",
+            is_verified=True,
+            role=UserRole.TEACHER,
+        )
+        await user.insert()
+        return user
+
+    @pytest.fixture
+    def auth_headers(self, teacher_user):
+        token = jwt.encode(
+            {"sub": str(teacher_user.id), "role": teacher_user.role},
+            settings.SECRET_KEY,
+            algorithm=settings.ALGORITHM,
+        )
+        return {"Authorization": f"Bearer {token}"}
+
+    @pytest.fixture
+    async def students(self):
+        students = [
+            User(
+                email=email,
+                hashed_password="hash",
+                first_name=first_name,
+                last_name=last_name,
+                role=UserRole.STUDENT,
+            )
+            for email, first_name, last_name in [
+                ("ada@example.com", "Ada", "Lovelace"),
+                ("grace@example.com", "Grace", "Hopper"),
+                ("alice@example.com", "Alice", None),
+            ]
+        ]
+        for student in students:
+            await student.insert()
+        return students
+
+    async def test_search_students(self, client, auth_headers, students):
+        """Students are matched by the start of their email or names"""
+        response = await client.get(
+            "/v1/users/students/search", params={"q": "A"}, headers=auth_headers
+        )
+        assert response.status_code == 422
+
+        response = await client.get(
+            "/v1/users/students/search", params={"q": "Al"}, headers=auth_headers
+        )
+
+        # The teacher named Alan is not a student
+        assert response.status_code == 200
+        data = response.json()["data"]
+        assert [student["email"] for student in data] == ["alice@example.com"]
+        assert set(data[0]) == {"id", "first_name", "email"}
+
+        response = await client.get(
+            "/v1/users/students/search",
+            params={"q": "ada lo"},
+            headers=auth_headers,
+        )
+        assert [student["id"] for student in response.json()["data"]] == [
+            students[0].id
+        ]
+
+    async def test_search_students_limit(self, client, auth_headers, students):
+        response = await client.get(
+            "/v1/users/students/search",
+            params={"q": "example", "limit": 1},
+            headers=auth_headers,
+        )
+        assert response.json()["data"] == []
+
+        response = await client.get(
+            "/v1/users/students/search",
+            params={"q": "a", "limit": 1},
+            headers=auth_headers,
+        )
+        assert response.status_code == 422
+
+    async def test_search_students_translated(self, client, auth_headers, students):
+        """The module-level message is translated in the request language"""
+        response = await client.get(
+            "/v1/users/students/search",
+            params={"q": "Al"},
+            headers={**auth_headers, "X-User-Language": "pl"},
+        )
+        assert response.json()["message"] == "Studenci pobrani pomyślnie"
+
+        response = await client.get(
+            "/v1/users/students/search", params={"q": "Al"}, headers=auth_headers
+        )
+        assert response.json()["message"] == "Students retrieved successfully"
+
+    async def test_resolve_students(self, client, auth_headers, students, teacher_user):
+        """Ids and emails resolve to students, the others are reported"""
+        response = await client.post(
+            "/v1/users/students/resolve",
+            json={
+                "ids": [students[0].id, teacher_user.id],
+                "emails": ["Grace@example.com", "nobody@example.com"],
+            },
+            headers=auth_headers,
+        )
+
+        assert response.status_code == 200
+        data = response.json()["data"]
+        assert {student["email"] for student in data["students"]} == {
+            "ada@example.com",
+            "grace@example.com",
+        }
+        assert data["unknown_ids"] == [teacher_user.id]
+        assert data["unknown_emails"] == ["nobody@example.com"]